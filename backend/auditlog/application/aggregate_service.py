@@ -0,0 +1,79 @@
+"""In-process per-minute counters for audit actions that are not stored row by row."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from auditlog.infrastructure.repository import AuditActionAggregateRepository
+
+_internal_logger = logging.getLogger("auditlog")
+_lock = threading.Lock()
+_counts: Counter[tuple[str, datetime]] = Counter()
+_exit_hook_registered = False
+
+
+def _bucket_start(now: datetime | None = None) -> datetime:
+    """Возвращает начало минутного интервала.
+
+    Args:
+        now: Момент времени события.
+
+    Returns:
+        Время, округленное вниз до минуты.
+    """
+    return (now or timezone.now()).replace(second=0, microsecond=0)
+
+
+def record_aggregated_event(action: str, now: datetime | None = None) -> None:
+    """Учитывает событие в поминутном счетчике без записи строки аудита.
+
+    Args:
+        action: Код действия аудита.
+        now: Момент времени события.
+    """
+    global _exit_hook_registered
+    key = (action, _bucket_start(now))
+    with _lock:
+        _counts[key] += 1
+        if not _exit_hook_registered:
+            atexit.register(flush_audit_aggregates)
+            _exit_hook_registered = True
+
+
+def pending_aggregate_counts() -> dict[tuple[str, datetime], int]:
+    """Возвращает еще не сохраненные счетчики.
+
+    Returns:
+        Словарь (действие, начало минуты) -> количество событий.
+    """
+    with _lock:
+        return dict(_counts)
+
+
+def flush_audit_aggregates() -> int:
+    """Сохраняет накопленные счетчики в БД.
+
+    Returns:
+        Количество сохраненных пар (действие, минута).
+    """
+    with _lock:
+        snapshot = dict(_counts)
+        _counts.clear()
+    flushed = 0
+    for (action, bucket_start), count in snapshot.items():
+        try:
+            AuditActionAggregateRepository.increment(action, bucket_start, count)
+            flushed += 1
+        except DatabaseError:
+            _internal_logger.exception("Failed to flush audit aggregate %s", action)
+            # Keep the count for the next flush instead of losing it.
+            with _lock:
+                _counts[(action, bucket_start)] += count
+    return flushed
@@ -0,0 +1,189 @@
+"""Incrementally maintained per-(ip, day) rollup of audit events."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import takewhile
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from auditlog.domain.sketch import DistinctSketch
+from auditlog.models import AuditEvent, AuditIpDailySummary, AuditRollupCheckpoint
+
+IP_ROLLUP_CHECKPOINT = "ip_daily"
+_EVENT_FIELDS = ("id", "ip", "created_at", "actor_user_id_snapshot")
+_SUMMARY_FIELDS = ("total_events", "anonymous_events", "first_seen", "last_seen", "account_sketch", "account_estimate")
+
+
+@dataclass(slots=True)
+class _DayBucket:
+    total_events: int = 0
+    anonymous_events: int = 0
+    first_seen: datetime | None = None
+    last_seen: datetime | None = None
+    sketch: DistinctSketch = field(default_factory=DistinctSketch)
+
+    def add(self, created_at: datetime, actor_id: int | None) -> None:
+        self.total_events += 1
+        if actor_id is None:
+            self.anonymous_events += 1
+        else:
+            self.sketch.add(actor_id)
+        if self.first_seen is None or created_at < self.first_seen:
+            self.first_seen = created_at
+        if self.last_seen is None or created_at > self.last_seen:
+            self.last_seen = created_at
+
+
+def _bucket_events(rows: Iterable[dict]) -> dict[tuple[str, date], _DayBucket]:
+    buckets: dict[tuple[str, date], _DayBucket] = {}
+    for row in rows:
+        ip = str(row["ip"] or "")
+        if not ip:
+            continue
+        key = (ip, timezone.localdate(row["created_at"]))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = _DayBucket()
+        bucket.add(row["created_at"], row["actor_user_id_snapshot"])
+    return buckets
+
+
+def _merge_buckets(buckets: dict[tuple[str, date], _DayBucket]) -> None:
+    if not buckets:
+        return
+    existing = {
+        (summary.ip, summary.day): summary
+        for summary in AuditIpDailySummary.objects.select_for_update().filter(
+            ip__in={ip for ip, _ in buckets},
+            day__in={day for _, day in buckets},
+        )
+    }
+    to_create: list[AuditIpDailySummary] = []
+    to_update: list[AuditIpDailySummary] = []
+    for (ip, day), bucket in buckets.items():
+        summary = existing.get((ip, day))
+        if summary is None:
+            summary = AuditIpDailySummary(
+                ip=ip,
+                day=day,
+                total_events=bucket.total_events,
+                anonymous_events=bucket.anonymous_events,
+                first_seen=bucket.first_seen,
+                last_seen=bucket.last_seen,
+            )
+            sketch = bucket.sketch
+            to_create.append(summary)
+        else:
+            summary.total_events += bucket.total_events
+            summary.anonymous_events += bucket.anonymous_events
+            summary.first_seen = min(summary.first_seen, bucket.first_seen)
+            summary.last_seen = max(summary.last_seen, bucket.last_seen)
+            sketch = DistinctSketch.from_bytes(summary.account_sketch)
+            sketch.merge(bucket.sketch)
+            to_update.append(summary)
+        summary.account_sketch = sketch.to_bytes()
+        summary.account_estimate = sketch.estimate()
+    if to_create:
+        AuditIpDailySummary.objects.bulk_create(to_create)
+    if to_update:
+        AuditIpDailySummary.objects.bulk_update(to_update, _SUMMARY_FIELDS)
+
+
+def refresh_ip_rollup(
+    *,
+    batch_size: int = 5000,
+    max_batches: int | None = None,
+    settle_seconds: float = 30.0,
+    now: datetime | None = None,
+) -> int:
+    """Добавляет в сводку по IP события, появившиеся после прошлого запуска.
+
+    События читаются по возрастанию id от сохраненной отметки. Каждый пакет
+    вместе с новой отметкой сохраняется в одной транзакции, поэтому события
+    не учитываются дважды, а параллельные запуски ждут друг друга.
+
+    Args:
+        batch_size: Максимальное число событий в одном пакете.
+        max_batches: Ограничение числа пакетов за запуск; None — без ограничения.
+        settle_seconds: Не учитывать события моложе этого возраста, чтобы не обогнать
+            еще не закоммиченные записи с меньшими id.
+        now: Текущий момент; по умолчанию системное время.
+
+    Returns:
+        Количество учтенных событий.
+    """
+    batch_size = max(1, int(batch_size))
+    horizon = (now or timezone.now()) - timedelta(seconds=max(0.0, settle_seconds))
+    AuditRollupCheckpoint.objects.get_or_create(name=IP_ROLLUP_CHECKPOINT)
+    processed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            checkpoint = AuditRollupCheckpoint.objects.select_for_update().get(name=IP_ROLLUP_CHECKPOINT)
+            rows = list(
+                AuditEvent.objects.filter(id__gt=checkpoint.last_event_id)
+                .order_by("id")
+                .values(*_EVENT_FIELDS)[:batch_size]
+            )
+            settled = list(takewhile(lambda row: row["created_at"] < horizon, rows))
+            if not settled:
+                break
+            _merge_buckets(_bucket_events(settled))
+            checkpoint.last_event_id = settled[-1]["id"]
+            checkpoint.save(update_fields=["last_event_id", "updated_at"])
+        processed += len(settled)
+        batches += 1
+        if len(settled) < batch_size:
+            break
+    return processed
+
+
+def reset_ip_rollup() -> None:
+    """Очищает сводку по IP, чтобы следующий запуск пересчитал ее с нуля."""
+    with transaction.atomic():
+        AuditIpDailySummary.objects.all().delete()
+        AuditRollupCheckpoint.objects.filter(name=IP_ROLLUP_CHECKPOINT).update(last_event_id=0)
+
+
+def get_ip_rollup_checkpoint() -> AuditRollupCheckpoint | None:
+    """Возвращает отметку последнего учтенного события.
+
+    Returns:
+        Объект AuditRollupCheckpoint или None, если сводка еще не строилась.
+    """
+    return AuditRollupCheckpoint.objects.filter(name=IP_ROLLUP_CHECKPOINT).first()
+
+
+def estimate_accounts_by_ip(summaries: QuerySet[AuditIpDailySummary], ips: list[str]) -> dict[str, int]:
+    """Оценивает число уникальных аккаунтов по IP за все дни выборки.
+
+    Args:
+        summaries: Отфильтрованные дневные сводки.
+        ips: IP-адреса текущей страницы.
+
+    Returns:
+        Словарь IP -> оценка числа аккаунтов.
+    """
+    merged: dict[str, DistinctSketch] = {}
+    for ip, raw in summaries.filter(ip__in=ips).values_list("ip", "account_sketch"):
+        sketch = merged.setdefault(str(ip), DistinctSketch())
+        sketch.merge(DistinctSketch.from_bytes(raw))
+    return {ip: sketch.estimate() for ip, sketch in merged.items()}
+
+
+def purge_ip_rollup_before(cutoff_day: date) -> int:
+    """Удаляет дневные сводки старше указанного дня.
+
+    Args:
+        cutoff_day: Первый сохраняемый день.
+
+    Returns:
+        Количество удаленных сводок.
+    """
+    deleted, _ = AuditIpDailySummary.objects.filter(day__lt=cutoff_day).delete()
+    return deleted
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import replace
+import hashlib
+import json
+from dataclasses import asdict, replace
 from datetime import datetime
 from datetime import timezone as dt_timezone
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Count
 from django.utils import timezone
 
 from auditlog.domain.context import AuditQueryFilters
 from auditlog.infrastructure.cursor import encode_cursor
+from auditlog.infrastructure.estimates import estimate_count
 from auditlog.infrastructure.query_builder import apply_filters
 from auditlog.infrastructure.repository import AuditEventRepository
 
@@ -132,6 +136,19 @@ def list_events(filters: AuditQueryFilters):
     return batch, next_cursor
 
 
+def estimate_events_total(filters: AuditQueryFilters) -> int | None:
+    """Оценивает число событий под фильтрами без `COUNT(*)`.
+
+    Args:
+        filters: Набор фильтров; курсор не учитывается.
+
+    Returns:
+        Оценка планировщика или None, если СУБД ее не дает.
+    """
+    queryset = apply_filters(AuditEventRepository.all(), replace(filters, cursor=None))
+    return estimate_count(queryset)
+
+
 def get_event(event_id: int):
     """Возвращает event из текущего контекста или хранилища.
     
@@ -153,10 +170,72 @@ def list_action_counts(filters: AuditQueryFilters):
     Returns:
         Функция не возвращает значение.
     """
-    base_filters = replace(filters, action=None, action_prefix=None, cursor=None)
+    base_filters = _action_counts_filters(filters)
+    ttl = int(getattr(settings, "AUDIT_ACTION_COUNTS_CACHE_SECONDS", 60))
+    if ttl <= 0:
+        return _count_actions(base_filters)
+    cache_key = _action_counts_cache_key(base_filters)
+    items = cache.get(cache_key)
+    if items is None:
+        items = _count_actions(base_filters)
+        cache.set(cache_key, items, timeout=ttl)
+    return items
+
+
+def refresh_action_counts() -> list[dict]:
+    """Пересчитывает и кэширует гистограмму действий без фильтров.
+
+    Returns:
+        Свежий список действий с количеством событий.
+    """
+    base_filters = _action_counts_filters(AuditQueryFilters())
+    items = _count_actions(base_filters)
+    ttl = int(getattr(settings, "AUDIT_ACTION_COUNTS_CACHE_SECONDS", 60))
+    if ttl > 0:
+        # Кэш живет дольше интервала пересчета, чтобы чтение не упиралось в полный подсчет.
+        interval = int(getattr(settings, "AUDIT_ACTION_COUNTS_REFRESH_INTERVAL", 0))
+        cache.set(_action_counts_cache_key(base_filters), items, timeout=max(ttl, 2 * interval))
+    return items
+
+
+def _action_counts_filters(filters: AuditQueryFilters) -> AuditQueryFilters:
+    """Убирает из фильтров параметры, не влияющие на гистограмму действий.
+    
+    Args:
+        filters: Набор фильтров запроса.
+    
+    Returns:
+        Фильтры без action, курсора и лимита.
+    """
+    default_limit = AuditQueryFilters.__dataclass_fields__["limit"].default
+    return replace(filters, action=None, action_prefix=None, cursor=None, limit=default_limit)
+
+
+def _action_counts_cache_key(filters: AuditQueryFilters) -> str:
+    """Формирует ключ кэша гистограммы действий.
+    
+    Args:
+        filters: Нормализованный набор фильтров.
+    
+    Returns:
+        Ключ кэша.
+    """
+    raw = json.dumps(asdict(filters), sort_keys=True, default=str)
+    return f"audit:action-counts:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def _count_actions(filters: AuditQueryFilters) -> list[dict]:
+    """Считает события по действиям.
+    
+    Args:
+        filters: Нормализованный набор фильтров.
+    
+    Returns:
+        Список словарей action/count по убыванию количества.
+    """
     queryset = apply_filters(
         AuditEventRepository.all(),
-        base_filters,
+        filters,
         include_action_filters=False,
     )
     return list(
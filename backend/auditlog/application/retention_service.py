@@ -0,0 +1,87 @@
+"""Chunked retention cleanup of audit events."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from auditlog.models import AuditEvent
+
+
+@dataclass(slots=True)
+class AuditPurgeBatch:
+    """Результат одного пакета удаления."""
+    number: int
+    deleted: int
+    last_id: int
+    total_deleted: int
+
+
+def _expired(cutoff: datetime):
+    return AuditEvent.objects.filter(created_at__lt=cutoff)
+
+
+def estimate_expired_events(cutoff: datetime) -> int:
+    """Считает события старше `cutoff`.
+
+    Args:
+        cutoff: Граница хранения.
+
+    Returns:
+        Количество событий, подлежащих удалению.
+    """
+    return _expired(cutoff).count()
+
+
+def purge_expired_events(
+    cutoff: datetime,
+    *,
+    batch_size: int = 5000,
+    max_batches: int | None = None,
+    sleep_seconds: float = 0.0,
+    start_after_id: int = 0,
+    on_batch: Callable[[AuditPurgeBatch], None] | None = None,
+) -> int:
+    """Удаляет события старше `cutoff` пакетами по диапазонам id.
+
+    Каждый пакет — отдельный DELETE в своей транзакции без загрузки строк в память,
+    поэтому прерванный запуск можно просто повторить: он продолжит с оставшихся строк.
+
+    Args:
+        cutoff: Граница хранения.
+        batch_size: Максимальное число строк в одном DELETE.
+        max_batches: Ограничение числа пакетов за запуск; None — без ограничения.
+        sleep_seconds: Пауза между пакетами в секундах.
+        start_after_id: Начать с id больше указанного.
+        on_batch: Колбэк прогресса после каждого пакета.
+
+    Returns:
+        Общее количество удаленных событий.
+    """
+    batch_size = max(1, int(batch_size))
+    expired = _expired(cutoff)
+    last_id = int(start_after_id)
+    total_deleted = 0
+    number = 0
+    while max_batches is None or number < max_batches:
+        ids = expired.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)
+        boundary = list(ids[batch_size - 1 : batch_size])
+        upper_id = boundary[0] if boundary else ids.order_by("-id").first()
+        if upper_id is None:
+            break
+        batch = expired.filter(id__gt=last_id, id__lte=upper_id)
+        # No signals or cascades hang off AuditEvent, so delete() takes Django's fast
+        # path: a single DELETE for the id range without fetching the rows.
+        deleted, _details = batch.delete()
+        number += 1
+        total_deleted += deleted
+        last_id = upper_id
+        if on_batch is not None:
+            on_batch(AuditPurgeBatch(number=number, deleted=deleted, last_id=last_id, total_deleted=total_deleted))
+        if not boundary:
+            break
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)
+    return total_deleted
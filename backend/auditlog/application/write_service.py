@@ -1,25 +1,43 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import concurrent.futures
 import json
 import logging
+import os
+import random
+import threading
 import uuid
 from collections.abc import Awaitable, Callable, Iterable, Mapping
-from typing import cast
+from functools import lru_cache
+from typing import TypeAlias, cast
 
 from asgiref.sync import sync_to_async
-from django.db import IntegrityError, OperationalError, ProgrammingError
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, ProgrammingError, transaction
 
+from auditlog.application.aggregate_service import record_aggregated_event
 from auditlog.domain.actions import AuditAction
+from auditlog.domain.policy import NEGATIVE_ACTION_MARKERS, AuditPolicy, AuditPolicyTable, AuditTier
 from auditlog.domain.sanitize import sanitize_value
+from auditlog.infrastructure.batch_sink import AuditBatchSink
 from auditlog.infrastructure.repository import AuditEventRepository
 from chat_app_django.ip_utils import get_client_ip_from_request, get_client_ip_from_scope
+from chat_app_django.metrics import observe_audit_flush, observe_audit_overflow
 
 LOGGER_NAME = "security.audit"
+# Scope key holding the audit writes issued for one WebSocket connection.
+AUDIT_PENDING_SCOPE_KEY = "audit_pending_writes"
+
+AuditWrite: TypeAlias = "asyncio.Task | concurrent.futures.Future"
 
 _audit_logger = logging.getLogger(LOGGER_NAME)
 _internal_logger = logging.getLogger("auditlog")
 _pending_persist_tasks: set[asyncio.Task] = set()
+_sink_lock = threading.Lock()
+_sink: AuditBatchSink | None = None
+_sink_pid: int | None = None
 
 
 def _normalize_int(value):
@@ -159,8 +177,34 @@ def _default_success(event: str, status_code: int | None) -> bool:
     if status_code is not None:
         return status_code < 400
     lowered = event.lower()
-    negative_markers = ("failed", "denied", "invalid", "expired", "forbidden", "rate_limited", "rejected")
-    return not any(marker in lowered for marker in negative_markers)
+    return not any(marker in lowered for marker in NEGATIVE_ACTION_MARKERS)
+
+
+@lru_cache(maxsize=8)
+def _policy_table(entries: tuple[str, ...]) -> AuditPolicyTable:
+    """Собирает таблицу политик из настроек.
+    
+    Args:
+        entries: Записи вида `action=policy` из AUDIT_ACTION_POLICIES.
+    
+    Returns:
+        Объект AuditPolicyTable.
+    """
+    return AuditPolicyTable(entries)
+
+
+def resolve_audit_policy(action: str, *, success: bool = True) -> AuditPolicy:
+    """Возвращает политику записи для действия.
+    
+    Args:
+        action: Код или имя действия, которое фиксируется в аудите.
+        success: Флаг успешного выполнения операции.
+    
+    Returns:
+        Объект AuditPolicy из AUDIT_ACTION_POLICIES.
+    """
+    entries = tuple(getattr(settings, "AUDIT_ACTION_POLICIES", ()) or ())
+    return _policy_table(entries).resolve(action, success=success)
 
 
 def _persist_event_row(payload: dict) -> None:
@@ -175,12 +219,73 @@ def _persist_event_row(payload: dict) -> None:
         _internal_logger.exception("Failed to persist audit event")
 
 
-def _persist_event(payload: dict) -> asyncio.Task | None:
+def _persist_event_rows(payloads: list[dict]) -> None:
+    """Сохраняет пачку событий одним bulk_create.
+    
+    Args:
+        payloads: Подготовленные данные событий из буфера.
+    """
+    # All or nothing, so a per-row retry after a failure never duplicates rows.
+    with transaction.atomic():
+        AuditEventRepository.bulk_create(payloads, batch_size=int(settings.AUDIT_BATCH_SIZE))
+
+
+def get_audit_sink() -> AuditBatchSink | None:
+    """Возвращает буфер аудита текущего процесса, если пакетная запись включена.
+    
+    Returns:
+        Объект AuditBatchSink или None, если события пишутся построчно.
+    """
+    global _sink, _sink_pid
+    if not getattr(settings, "AUDIT_BATCH_ENABLED", False):
+        return None
+    pid = os.getpid()
+    sink = _sink
+    if sink is not None and _sink_pid == pid:
+        return sink
+    with _sink_lock:
+        # A forked worker must not share the parent's buffer and writer thread.
+        if _sink is None or _sink_pid != pid:
+            _sink = AuditBatchSink(
+                persist_many=_persist_event_rows,
+                persist_one=_persist_event_row,
+                batch_size=int(settings.AUDIT_BATCH_SIZE),
+                flush_interval=int(settings.AUDIT_BATCH_FLUSH_MS) / 1000,
+                max_buffer=int(settings.AUDIT_BATCH_MAX_BUFFER),
+                on_flush=observe_audit_flush,
+            )
+            _sink_pid = pid
+            atexit.register(_sink.shutdown)
+        return _sink
+
+
+def shutdown_audit_sink(timeout: float | None = 5.0) -> None:
+    """Дописывает буфер аудита в БД и останавливает поток записи.
+    
+    Args:
+        timeout: Максимальное время ожидания потока записи в секундах.
+    """
+    global _sink, _sink_pid
+    with _sink_lock:
+        sink, _sink, _sink_pid = _sink, None, None
+    if sink is not None:
+        sink.shutdown(timeout)
+
+
+def _persist_event(payload: dict) -> AuditWrite | None:
     """Сохраняет event в постоянном хранилище.
     
     Args:
         payload: Подготовленные данные для сохранения или отправки.
     """
+    sink = get_audit_sink()
+    if sink is not None:
+        future = sink.submit(payload)
+        if future is not None:
+            return future
+        # Buffer is full: fall back to a direct write instead of dropping the event.
+        observe_audit_overflow()
+
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
@@ -218,20 +323,58 @@ async def drain_pending_audit_events() -> None:
     """Wait until scheduled audit writes from the current process are persisted."""
 
     while True:
-        pending = [task for task in _pending_persist_tasks if not task.done()]
+        pending: list[Awaitable] = [task for task in _pending_persist_tasks if not task.done()]
+        sink = _sink
+        if sink is not None and _sink_pid == os.getpid():
+            pending.extend(asyncio.wrap_future(future) for future in sink.pending() if not future.done())
         if not pending:
             return
         await asyncio.gather(*pending, return_exceptions=True)
 
 
-async def wait_for_audit_event(task: asyncio.Task | None) -> None:
+async def wait_for_audit_event(task: AuditWrite | None) -> None:
     """Wait for one scheduled audit write without coupling unrelated sessions."""
 
     if task is None or task.done():
         return
+    if isinstance(task, concurrent.futures.Future):
+        await asyncio.gather(asyncio.wrap_future(task), return_exceptions=True)
+        return
     await asyncio.gather(task, return_exceptions=True)
 
 
+def _track_scope_write(scope, task: AuditWrite | None) -> None:
+    """Запоминает незавершенную запись аудита в scope соединения.
+    
+    Args:
+        scope: ASGI-scope с метаданными соединения.
+        task: Ожидаемая запись аудита.
+    """
+    if task is None or task.done():
+        return
+    pending = scope.get(AUDIT_PENDING_SCOPE_KEY)
+    if pending is None:
+        pending = scope[AUDIT_PENDING_SCOPE_KEY] = set()
+    else:
+        # Keep the set bounded on long-lived sockets that audit many messages.
+        pending.difference_update([write for write in pending if write.done()])
+    pending.add(task)
+
+
+async def wait_for_connection_audit_events(scope) -> None:
+    """Wait for the audit writes of one WebSocket connection only.
+
+    Unlike `drain_pending_audit_events`, a slow unrelated write elsewhere in
+    the process does not delay this connection.
+    """
+
+    pending = scope.get(AUDIT_PENDING_SCOPE_KEY)
+    while pending:
+        writes = list(pending)
+        pending.clear()
+        await asyncio.gather(*(wait_for_audit_event(write) for write in writes))
+
+
 def write_event(
     action: str,
     *,
@@ -248,7 +391,7 @@ def write_event(
     is_authenticated=None,
     metadata=None,
     **fields,
-) -> asyncio.Task | None:
+) -> AuditWrite | None:
     """Записывает event в хранилище или аудит.
     
     Args:
@@ -267,9 +410,24 @@ def write_event(
         metadata: Дополнительные поля события, включаемые в аудит-запись.
         **fields: Дополнительные поля, переданные в функцию.
     """
+    normalized_status_code = _normalize_int(status_code)
+    if success is None:
+        success = _default_success(action, normalized_status_code)
+    success = bool(success)
+
+    policy = resolve_audit_policy(action, success=success)
+    if policy.tier == AuditTier.AGGREGATE or (
+        policy.tier == AuditTier.SAMPLE and random.random() >= policy.sample_rate
+    ):
+        # Only counted: no log line and no row for this event.
+        record_aggregated_event(action)
+        return None
+
     event_metadata = _safe_metadata(metadata)
     if fields:
         event_metadata.update(_safe_metadata(fields))
+    if policy.tier == AuditTier.SAMPLE:
+        event_metadata["sample_rate"] = policy.sample_rate
 
     actor_user, actor_user_id_snapshot, actor_username_snapshot, actor_authenticated = _extract_actor(
         actor_user=actor_user,
@@ -278,11 +436,6 @@ def write_event(
         is_authenticated=is_authenticated,
     )
 
-    normalized_status_code = _normalize_int(status_code)
-    if success is None:
-        success = _default_success(action, normalized_status_code)
-    success = bool(success)
-
     payload = {
         "protocol": protocol,
         "method": method,
@@ -309,6 +462,8 @@ def write_event(
             sort_keys=True,
         )
     )
+    if policy.tier == AuditTier.LOG_ONLY:
+        return None
 
     return _persist_event(
         {
@@ -329,7 +484,7 @@ def write_event(
     )
 
 
-def audit_security_event(event: str, **fields) -> asyncio.Task | None:
+def audit_security_event(event: str, **fields) -> AuditWrite | None:
     """Фиксирует security event в системе аудита.
     
     Args:
@@ -351,7 +506,7 @@ def audit_security_event(event: str, **fields) -> asyncio.Task | None:
     )
 
 
-def audit_http_event(event: str, request, **fields) -> asyncio.Task | None:
+def audit_http_event(event: str, request, **fields) -> AuditWrite | None:
     """Фиксирует http event в системе аудита.
     
     Args:
@@ -377,7 +532,7 @@ def audit_http_event(event: str, request, **fields) -> asyncio.Task | None:
     )
 
 
-def audit_ws_event(event: str, scope, **fields) -> asyncio.Task | None:
+def audit_ws_event(event: str, scope, **fields) -> AuditWrite | None:
     """Фиксирует ws event в системе аудита.
     
     Args:
@@ -386,7 +541,7 @@ def audit_ws_event(event: str, scope, **fields) -> asyncio.Task | None:
         **fields: Дополнительные поля, переданные в функцию.
     """
     user = scope.get("user")
-    return write_event(
+    task = write_event(
         event,
         protocol="ws",
         path=scope.get("path"),
@@ -400,13 +555,15 @@ def audit_ws_event(event: str, scope, **fields) -> asyncio.Task | None:
         is_authenticated=fields.pop("is_authenticated", None),
         metadata=fields,
     )
+    _track_scope_write(scope, task)
+    return task
 
 
 def audit_http_request(
     request,
     response=None,
     exception: Exception | None = None,
-) -> asyncio.Task | None:
+) -> AuditWrite | None:
     """Фиксирует http request в системе аудита.
     
     Args:
@@ -1,7 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class AuditlogConfig(AppConfig):
     """Класс AuditlogConfig инкапсулирует связанную бизнес-логику модуля."""
     default_auto_field = "django.db.models.BigAutoField"
     name = "auditlog"
+
+    def ready(self):
+        """Проверяет AUDIT_ACTION_POLICIES при старте, а не на первом событии."""
+        from auditlog.domain.policy import AuditPolicyTable
+
+        try:
+            AuditPolicyTable(getattr(settings, "AUDIT_ACTION_POLICIES", ()) or ())
+        except ValueError as exc:
+            raise ImproperlyConfigured(f"AUDIT_ACTION_POLICIES: {exc}") from exc
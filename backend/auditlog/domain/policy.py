@@ -0,0 +1,111 @@
+"""Per-action audit tiering: persist, sample, log only or aggregate."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+
+class AuditTier:
+    """Способ обработки аудит-события."""
+    PERSIST = "persist"
+    SAMPLE = "sample"
+    LOG_ONLY = "log"
+    AGGREGATE = "aggregate"
+
+
+# Actions with these prefixes or markers are always persisted, whatever the configuration says.
+SECURITY_ACTION_PREFIXES = ("auth.", "security.", "media.signature.")
+NEGATIVE_ACTION_MARKERS = ("failed", "denied", "invalid", "expired", "forbidden", "rate_limited", "rejected")
+
+
+@dataclass(frozen=True, slots=True)
+class AuditPolicy:
+    """Политика записи для одного действия."""
+    tier: str = AuditTier.PERSIST
+    sample_rate: float = 1.0
+
+
+PERSIST_POLICY = AuditPolicy()
+
+
+def is_security_action(action: str) -> bool:
+    """Проверяет, относится ли действие к событиям безопасности.
+
+    Args:
+        action: Код действия аудита.
+
+    Returns:
+        True, если событие нельзя сэмплировать или агрегировать.
+    """
+    lowered = action.lower()
+    if lowered.startswith(SECURITY_ACTION_PREFIXES):
+        return True
+    return any(marker in lowered for marker in NEGATIVE_ACTION_MARKERS)
+
+
+def parse_policy_spec(spec: str) -> AuditPolicy:
+    """Разбирает описание политики: `persist`, `log`, `aggregate` или `sample:<rate>`.
+
+    Args:
+        spec: Текстовое описание политики.
+
+    Returns:
+        Объект AuditPolicy.
+
+    Raises:
+        ValueError: Если описание не распознано.
+    """
+    normalized = spec.strip().lower()
+    if normalized in {AuditTier.PERSIST, AuditTier.LOG_ONLY, AuditTier.AGGREGATE}:
+        return AuditPolicy(tier=normalized)
+    tier, _sep, raw_rate = normalized.partition(":")
+    if tier != AuditTier.SAMPLE or not raw_rate:
+        raise ValueError(f"unknown audit policy {spec!r}")
+    try:
+        rate = float(raw_rate)
+    except ValueError as exc:
+        raise ValueError(f"invalid sample rate in {spec!r}") from exc
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"sample rate in {spec!r} must be between 0 and 1")
+    return AuditPolicy(tier=AuditTier.SAMPLE, sample_rate=rate)
+
+
+class AuditPolicyTable:
+    """Сопоставляет действия с политиками; `prefix.*` задает политику для группы действий."""
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self._exact: dict[str, AuditPolicy] = {}
+        prefixes: list[tuple[str, AuditPolicy]] = []
+        for entry in entries:
+            pattern, sep, spec = entry.partition("=")
+            pattern = pattern.strip()
+            if not sep or not pattern:
+                raise ValueError(f"audit policy entry {entry!r} must look like action=policy")
+            policy = parse_policy_spec(spec)
+            if pattern.endswith("*"):
+                prefixes.append((pattern[:-1], policy))
+            else:
+                self._exact[pattern] = policy
+        # Longest prefix wins.
+        self._prefixes = sorted(prefixes, key=lambda item: len(item[0]), reverse=True)
+
+    def resolve(self, action: str, *, success: bool = True) -> AuditPolicy:
+        """Возвращает политику для действия.
+
+        Args:
+            action: Код действия аудита.
+            success: Флаг успешного выполнения операции.
+
+        Returns:
+            Объект AuditPolicy; неуспешные события и события безопасности всегда сохраняются.
+        """
+        if not success or is_security_action(action):
+            return PERSIST_POLICY
+        policy = self._exact.get(action)
+        if policy is not None:
+            return policy
+        for prefix, prefix_policy in self._prefixes:
+            if action.startswith(prefix):
+                return prefix_policy
+        return PERSIST_POLICY
@@ -0,0 +1,113 @@
+"""HyperLogLog sketch for approximate distinct counts in audit rollups."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from collections.abc import Iterable
+
+DEFAULT_PRECISION = 10
+_HASH_BITS = 64
+
+
+def _alpha(registers: int) -> float:
+    if registers == 16:
+        return 0.673
+    if registers == 32:
+        return 0.697
+    if registers == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / registers)
+
+
+class DistinctSketch:
+    """Приближенный счетчик уникальных значений (HyperLogLog).
+
+    Скетчи разных дней объединяются без потерь через `merge`, поэтому число
+    уникальных аккаунтов за период считается без прохода по событиям.
+    При точности 10 скетч занимает 1 КБ, а ошибка оценки около 3%.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: bytes | bytearray | None = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        size = 1 << precision
+        if registers is not None and len(registers) != size:
+            raise ValueError(f"expected {size} registers, got {len(registers)}")
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(size)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes | memoryview | None, precision: int = DEFAULT_PRECISION) -> DistinctSketch:
+        """Восстанавливает скетч из сохраненных регистров.
+
+        Args:
+            raw: Содержимое BinaryField; пустое значение дает пустой скетч.
+            precision: Точность скетча.
+
+        Returns:
+            Объект DistinctSketch.
+        """
+        if not raw:
+            return cls(precision)
+        return cls(precision, bytes(raw))
+
+    def to_bytes(self) -> bytes:
+        """Возвращает регистры для сохранения в БД.
+
+        Returns:
+            Байтовое представление скетча.
+        """
+        return bytes(self.registers)
+
+    def add(self, value: object) -> None:
+        """Учитывает значение.
+
+        Args:
+            value: Значение; сравнивается по строковому представлению.
+        """
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (_HASH_BITS - self.precision)
+        remainder_bits = _HASH_BITS - self.precision
+        remainder = hashed & ((1 << remainder_bits) - 1)
+        rank = remainder_bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[object]) -> None:
+        """Учитывает несколько значений.
+
+        Args:
+            values: Значения для учета.
+        """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: DistinctSketch) -> None:
+        """Объединяет скетч с другим скетчем той же точности.
+
+        Args:
+            other: Скетч для объединения.
+        """
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        """Оценивает число уникальных значений.
+
+        Returns:
+            Приближенное количество уникальных значений.
+        """
+        size = len(self.registers)
+        zeros = self.registers.count(0)
+        if zeros == size:
+            return 0
+        raw = _alpha(size) * size * size / sum(2.0 ** -register for register in self.registers)
+        if raw <= 2.5 * size and zeros:
+            # Linear counting is far more accurate for small cardinalities.
+            return round(size * math.log(size / zeros))
+        return round(raw)
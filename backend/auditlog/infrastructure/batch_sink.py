@@ -0,0 +1,161 @@
+"""Per-process buffered audit writer flushing rows with `bulk_create`.
+
+Callers enqueue prepared payloads and get a `concurrent.futures.Future` that
+resolves once the row is committed. A daemon thread flushes the buffer when
+it reaches `batch_size` rows or when the oldest row waited `flush_interval`
+seconds, whichever comes first.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+
+from django.db import IntegrityError, OperationalError, ProgrammingError, close_old_connections
+
+logger = logging.getLogger("auditlog")
+
+_PERSIST_ERRORS = (OperationalError, ProgrammingError, IntegrityError)
+
+
+class AuditBatchSink:
+    """Bounded buffer of audit payloads drained by one writer thread."""
+
+    def __init__(
+        self,
+        *,
+        persist_many: Callable[[list[dict]], object],
+        persist_one: Callable[[dict], object],
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_buffer: int = 10000,
+        on_flush: Callable[[int, str], None] | None = None,
+    ):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_buffer = max(self.batch_size, int(max_buffer))
+        self._persist_many = persist_many
+        self._persist_one = persist_one
+        self._on_flush = on_flush
+        self._buffer: deque[tuple[dict, Future]] = deque()
+        self._in_flight: set[Future] = set()
+        self._oldest_at = 0.0
+        self._flush_requested = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def submit(self, payload: dict) -> Future | None:
+        """Enqueues one payload; returns None when the buffer is full."""
+        future: Future = Future()
+        with self._cond:
+            if self._stopping or len(self._buffer) >= self.max_buffer:
+                return None
+            if not self._buffer:
+                self._oldest_at = time.monotonic()
+            self._buffer.append((payload, future))
+            if len(self._buffer) >= self.batch_size or len(self._buffer) == 1:
+                self._cond.notify()
+            self._ensure_thread()
+        return future
+
+    def pending(self) -> list[Future]:
+        """Futures of rows that are buffered or being written right now."""
+        with self._cond:
+            return [future for _payload, future in self._buffer] + list(self._in_flight)
+
+    def flush(self) -> None:
+        """Writes everything buffered so far from the calling thread."""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def request_flush(self) -> None:
+        """Asks the writer thread to flush without waiting for the interval."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify()
+
+    def shutdown(self, timeout: float | None = 5.0) -> None:
+        """Stops accepting rows, lets the writer drain the buffer and joins it."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        # Anything left behind (writer never started or timed out) is written here.
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name="audit-batch-sink", daemon=True)
+        self._thread.start()
+
+    def _take_batch(self) -> list[tuple[dict, Future]]:
+        size = min(self.batch_size, len(self._buffer))
+        batch = [self._buffer.popleft() for _ in range(size)]
+        if self._buffer:
+            self._oldest_at = time.monotonic()
+        else:
+            self._flush_requested = False
+        self._in_flight.update(future for _payload, future in batch)
+        return batch
+
+    def _batch_due(self) -> bool:
+        if self._stopping or self._flush_requested or len(self._buffer) >= self.batch_size:
+            return True
+        return time.monotonic() - self._oldest_at >= self.flush_interval
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._stopping:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                while not self._batch_due():
+                    self._cond.wait(max(0.0, self._oldest_at + self.flush_interval - time.monotonic()))
+                batch = self._take_batch()
+            try:
+                self._write(batch)
+            finally:
+                # The writer thread owns its DB connection; drop it if it went stale.
+                close_old_connections()
+
+    def _write(self, batch: Iterable[tuple[dict, Future]]) -> None:
+        batch = list(batch)
+        payloads = [payload for payload, _future in batch]
+        try:
+            self._persist_many(payloads)
+            result = "batch"
+        except _PERSIST_ERRORS:
+            logger.exception("Failed to bulk persist %s audit events, retrying row by row", len(payloads))
+            result = "fallback"
+            for payload in payloads:
+                try:
+                    self._persist_one(payload)
+                except Exception:
+                    logger.exception("Failed to persist audit event")
+        except Exception:
+            logger.exception("Failed to persist audit batch")
+            result = "error"
+        finally:
+            with self._cond:
+                self._in_flight.difference_update(future for _payload, future in batch)
+            for _payload, future in batch:
+                if not future.done():
+                    future.set_result(None)
+        if self._on_flush is not None:
+            self._on_flush(len(payloads), result)
@@ -0,0 +1,39 @@
+"""Оценка числа строк по статистике планировщика вместо `COUNT(*)`."""
+
+from __future__ import annotations
+
+import json
+import logging
+
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+
+logger = logging.getLogger("auditlog")
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """Оценивает число строк выборки по статистике планировщика PostgreSQL.
+
+    Выполняется только `EXPLAIN`, поэтому стоимость не зависит от размера таблицы.
+    Точность зависит от свежести статистики (`ANALYZE`).
+
+    Args:
+        queryset: Выборка для оценки.
+
+    Returns:
+        Оценка числа строк или None, если СУБД не поддерживает оценку.
+    """
+    conn = connections[queryset.db]
+    if conn.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.exception("Failed to estimate audit row count")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -48,3 +48,68 @@ class AuditEvent(models.Model):
             Функция не возвращает значение.
         """
         return f"{self.created_at.isoformat()} {self.action}"
+
+
+class AuditActionAggregate(models.Model):
+    """Поминутный счетчик событий, которые по политике аудита не пишутся построчно."""
+    action = models.CharField(max_length=128)
+    bucket_start = models.DateTimeField(db_index=True)
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        """Класс Meta инкапсулирует связанную бизнес-логику модуля."""
+        constraints = [
+            models.UniqueConstraint(fields=["action", "bucket_start"], name="audit_agg_action_bucket_uniq"),
+        ]
+
+    def __str__(self):
+        """Возвращает человекочитаемое строковое представление объекта.
+        
+        Returns:
+            Строковое представление счетчика.
+        """
+        return f"{self.bucket_start.isoformat()} {self.action} x{self.count}"
+
+
+class AuditIpDailySummary(models.Model):
+    """Дневная сводка событий аудита по IP, поддерживаемая инкрементально."""
+    ip = models.CharField(max_length=64)
+    day = models.DateField()
+    total_events = models.PositiveBigIntegerField(default=0)
+    anonymous_events = models.PositiveBigIntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    account_sketch = models.BinaryField(default=bytes)
+    account_estimate = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """Класс Meta инкапсулирует связанную бизнес-логику модуля."""
+        constraints = [
+            models.UniqueConstraint(fields=["ip", "day"], name="audit_ip_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="audit_ip_day_idx"),
+        ]
+
+    def __str__(self):
+        """Возвращает человекочитаемое строковое представление объекта.
+
+        Returns:
+            Строковое представление сводки.
+        """
+        return f"{self.day.isoformat()} {self.ip} x{self.total_events}"
+
+
+class AuditRollupCheckpoint(models.Model):
+    """Последнее событие аудита, учтенное в сводной таблице."""
+    name = models.CharField(max_length=64, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Возвращает человекочитаемое строковое представление объекта.
+
+        Returns:
+            Строковое представление отметки.
+        """
+        return f"{self.name} @ {self.last_event_id}"
@@ -0,0 +1,267 @@
+"""PostgreSQL range partitioning of the audit table by `created_at`.
+
+The parent table keeps the name Django knows, so the ORM, the query builder
+and cursor pagination work unchanged; PostgreSQL routes rows and prunes
+partitions by `created_at`. Other backends (SQLite in tests and local runs)
+keep a plain table and every helper here becomes a no-op.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import DatabaseError, OperationalError, connection, transaction
+
+logger = logging.getLogger("auditlog")
+
+PARENT_TABLE = "auditlog_auditevent"
+LEGACY_PARTITION = f"{PARENT_TABLE}_legacy"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+INTERVALS = ("month", "day")
+# CREATE ... PARTITION OF and DETACH take ACCESS EXCLUSIVE on the parent: a waiting
+# request queues every audit insert behind it, so give up quickly and try again.
+LOCK_TIMEOUT = "2s"
+LOCK_RETRIES = 3
+LOCK_RETRY_DELAY = 1.0
+LOCK_NOT_AVAILABLE = "55P03"
+
+_BOUND_RE = re.compile(r"FOR VALUES FROM \((?P<lower>[^)]*)\) TO \((?P<upper>[^)]*)\)")
+
+
+@dataclass(frozen=True, slots=True)
+class AuditPartition:
+    """Партиция таблицы аудита; `None` в границе означает MINVALUE/MAXVALUE или DEFAULT."""
+    name: str
+    lower: datetime | None
+    upper: datetime | None
+    is_default: bool = False
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    """Возвращает начало периода партиции, содержащего момент времени.
+
+    Args:
+        moment: Момент времени.
+        interval: Размер партиции: `month` или `day`.
+
+    Returns:
+        Начало периода в UTC.
+    """
+    moment = moment.astimezone(dt_timezone.utc)
+    if interval == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    """Возвращает начало следующего периода.
+
+    Args:
+        start: Начало текущего периода.
+        interval: Размер партиции: `month` или `day`.
+
+    Returns:
+        Начало следующего периода.
+    """
+    if interval == "day":
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    """Возвращает имя партиции для периода.
+
+    Args:
+        start: Начало периода.
+        interval: Размер партиции: `month` или `day`.
+
+    Returns:
+        Имя таблицы партиции.
+    """
+    suffix = start.strftime("%Y%m%d" if interval == "day" else "%Y%m")
+    return f"{PARENT_TABLE}_p{suffix}"
+
+
+def _parse_bound(raw: str) -> datetime | None:
+    value = raw.strip()
+    if value.upper() in {"MINVALUE", "MAXVALUE"}:
+        return None
+    parsed = datetime.fromisoformat(value.strip("'"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def parse_partition_bound(name: str, expression: str) -> AuditPartition:
+    """Разбирает результат `pg_get_expr(relpartbound)`.
+
+    Args:
+        name: Имя партиции.
+        expression: Описание границ партиции от PostgreSQL.
+
+    Returns:
+        Объект AuditPartition.
+    """
+    if expression.strip().upper() == "DEFAULT":
+        return AuditPartition(name=name, lower=None, upper=None, is_default=True)
+    match = _BOUND_RE.search(expression)
+    if match is None:
+        raise ValueError(f"unsupported partition bound for {name}: {expression}")
+    return AuditPartition(name=name, lower=_parse_bound(match["lower"]), upper=_parse_bound(match["upper"]))
+
+
+def is_partitioned(using=None) -> bool:
+    """Проверяет, что таблица аудита секционирована.
+
+    Args:
+        using: Подключение к БД; по умолчанию основное.
+
+    Returns:
+        True для секционированной таблицы PostgreSQL.
+    """
+    conn = using or connection
+    if conn.vendor != "postgresql":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [PARENT_TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(using=None) -> list[AuditPartition]:
+    """Возвращает партиции таблицы аудита, отсортированные по нижней границе.
+
+    Args:
+        using: Подключение к БД; по умолчанию основное.
+
+    Returns:
+        Список AuditPartition; пустой, если таблица не секционирована.
+    """
+    conn = using or connection
+    if not is_partitioned(conn):
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [PARENT_TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = [parse_partition_bound(name, expression) for name, expression in rows]
+    oldest = datetime.min.replace(tzinfo=dt_timezone.utc)
+    return sorted(partitions, key=lambda item: (item.is_default, item.lower or oldest))
+
+
+def _is_lock_timeout(exc: OperationalError) -> bool:
+    return getattr(exc.__cause__, "pgcode", None) == LOCK_NOT_AVAILABLE
+
+
+def _execute_ddl(conn, statements: list[str]) -> bool:
+    for attempt in range(1, LOCK_RETRIES + 1):
+        try:
+            with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+                cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+                for statement in statements:
+                    cursor.execute(statement)
+        except OperationalError as exc:
+            if not _is_lock_timeout(exc):
+                raise
+            logger.warning("Audit partition DDL hit lock_timeout (attempt %s/%s)", attempt, LOCK_RETRIES)
+            if attempt < LOCK_RETRIES:
+                time.sleep(LOCK_RETRY_DELAY * attempt)
+        else:
+            return True
+    return False
+
+
+def _overlaps(partitions: list[AuditPartition], lower: datetime, upper: datetime) -> bool:
+    for partition in partitions:
+        if partition.is_default:
+            continue
+        starts_before_end = partition.lower is None or partition.lower < upper
+        ends_after_start = partition.upper is None or partition.upper > lower
+        if starts_before_end and ends_after_start:
+            return True
+    return False
+
+
+def ensure_future_partitions(ahead: int, interval: str = "month", now: datetime | None = None, using=None) -> list[str]:
+    """Создает недостающие партиции на текущий и `ahead` следующих периодов.
+
+    Args:
+        ahead: Сколько будущих периодов подготовить заранее.
+        interval: Размер партиции: `month` или `day`.
+        now: Текущий момент; по умолчанию системное время.
+        using: Подключение к БД; по умолчанию основное.
+
+    Returns:
+        Имена созданных партиций.
+    """
+    conn = using or connection
+    if not is_partitioned(conn):
+        return []
+    existing = list_partitions(conn)
+    start = period_start(now or datetime.now(dt_timezone.utc), interval)
+    created: list[str] = []
+    for _ in range(max(0, int(ahead)) + 1):
+        end = next_period(start, interval)
+        if not _overlaps(existing, start, end):
+            name = partition_name(start, interval)
+            statement = (
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT_TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            try:
+                done = _execute_ddl(conn, [statement])
+            except DatabaseError:
+                # Usually rows for this range already landed in the default partition.
+                logger.exception("Failed to create audit partition %s", name)
+            else:
+                if done:
+                    created.append(name)
+                    existing.append(AuditPartition(name=name, lower=start, upper=end))
+                else:
+                    # The next run creates it; until then rows go to the default partition.
+                    logger.warning("Audit partition %s not created: parent table is busy", name)
+        start = end
+    return created
+
+
+def drop_partitions_before(cutoff: datetime, using=None) -> list[str]:
+    """Отсоединяет и удаляет партиции, целиком лежащие раньше `cutoff`.
+
+    Партиция, для которой не удалось дождаться блокировки, пропускается до
+    следующего запуска.
+
+    Args:
+        cutoff: Граница хранения; строки старше нее больше не нужны.
+        using: Подключение к БД; по умолчанию основное.
+
+    Returns:
+        Имена удаленных партиций.
+    """
+    conn = using or connection
+    dropped: list[str] = []
+    for partition in list_partitions(conn):
+        if partition.is_default or partition.upper is None or partition.upper > cutoff:
+            continue
+        # DETACH ... CONCURRENTLY is not an option: it is refused while a default partition exists.
+        statements = [
+            f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{partition.name}"',
+            f'DROP TABLE "{partition.name}"',
+        ]
+        if not _execute_ddl(conn, statements):
+            logger.warning("Audit partition %s not dropped: parent table is busy", partition.name)
+            continue
+        dropped.append(partition.name)
+    return dropped
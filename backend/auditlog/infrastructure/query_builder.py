@@ -54,6 +54,9 @@ def apply_filters(
     parsed_cursor = decode_cursor(filters.cursor)
     if parsed_cursor:
         created_at, event_id = parsed_cursor
-        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=event_id))
+        # The plain upper bound lets PostgreSQL prune later partitions; the OR alone does not.
+        qs = qs.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=event_id)
+        )
 
     return qs
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from django.db.models import QuerySet
+from datetime import datetime
 
-from auditlog.models import AuditEvent
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet
+
+from auditlog.models import AuditActionAggregate, AuditEvent
 
 
 class AuditEventRepository:
@@ -19,6 +22,19 @@ class AuditEventRepository:
         """
         return AuditEvent.objects.create(**kwargs)
 
+    @staticmethod
+    def bulk_create(rows: list[dict], batch_size: int | None = None) -> list[AuditEvent]:
+        """Создает несколько записей одним INSERT.
+        
+        Args:
+            rows: Наборы полей создаваемых событий.
+            batch_size: Максимальное число строк в одном запросе.
+        
+        Returns:
+            Список созданных объектов AuditEvent.
+        """
+        return AuditEvent.objects.bulk_create([AuditEvent(**row) for row in rows], batch_size=batch_size)
+
     @staticmethod
     def all() -> QuerySet[AuditEvent]:
         """Вспомогательная функция `all` реализует внутренний шаг бизнес-логики.
@@ -27,3 +43,25 @@ class AuditEventRepository:
             Объект типа QuerySet[AuditEvent], сформированный в ходе выполнения.
         """
         return AuditEvent.objects.all()
+
+
+class AuditActionAggregateRepository:
+    """Хранилище поминутных счетчиков агрегируемых действий аудита."""
+    @staticmethod
+    def increment(action: str, bucket_start: datetime, count: int) -> None:
+        """Увеличивает счетчик действия в минутном интервале, создавая его при необходимости.
+        
+        Args:
+            action: Код действия аудита.
+            bucket_start: Начало минутного интервала.
+            count: На сколько увеличить счетчик.
+        """
+        rows = AuditActionAggregate.objects.filter(action=action, bucket_start=bucket_start)
+        if rows.update(count=F("count") + count):
+            return
+        try:
+            with transaction.atomic():
+                AuditActionAggregate.objects.create(action=action, bucket_start=bucket_start, count=count)
+        except IntegrityError:
+            # Another worker created the bucket first.
+            rows.update(count=F("count") + count)
@@ -1,20 +1,101 @@
 import csv
+import io
 import json
+import tempfile
+import textwrap
+import zlib
 from collections import defaultdict
+from collections.abc import Iterable, Iterator
 from datetime import date, datetime
 from typing import Any, cast
 
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
 from django.core.paginator import Paginator
-from django.db.models import Count, Max, Min, Q, QuerySet
-from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.db.models import Count, Max, Min, Q, QuerySet, Sum
+from django.http import FileResponse, HttpRequest, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.template.response import TemplateResponse
 from django.urls import NoReverseMatch, path, reverse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
-from auditlog.models import AuditEvent
+from auditlog.application.ip_rollup_service import estimate_accounts_by_ip, get_ip_rollup_checkpoint
+from auditlog.infrastructure.estimates import estimate_count
+from auditlog.models import AuditEvent, AuditIpDailySummary
+
+EXPORT_DB_CHUNK_SIZE = 1000
+EXPORT_STREAM_BUFFER_BYTES = 64 * 1024
+EXPORT_SPOOL_MEMORY_BYTES = 4 * 1024 * 1024
+EXPORT_CSV_FIELDS = [
+    "id",
+    "createdAt",
+    "action",
+    "protocol",
+    "actorUserId",
+    "actorUsername",
+    "isAuthenticated",
+    "method",
+    "path",
+    "statusCode",
+    "success",
+    "ip",
+    "requestId",
+    "metadata",
+]
+
+
+def _encode_export_chunks(chunks: Iterable[str], *, compress: bool) -> Iterator[bytes]:
+    """Кодирует фрагменты выгрузки в UTF-8, склеивая мелкие и при необходимости сжимая gzip.
+    
+    Args:
+        chunks: Текстовые фрагменты выгрузки.
+        compress: Сжимать ли поток gzip.
+    
+    Returns:
+        Итератор байтовых блоков ответа.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    pending: list[bytes] = []
+    pending_size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size < EXPORT_STREAM_BUFFER_BYTES:
+            continue
+        block = b"".join(pending)
+        pending, pending_size = [], 0
+        if compressor is not None:
+            block = compressor.compress(block)
+        if block:
+            yield block
+    block = b"".join(pending)
+    if compressor is not None:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+class EstimatedCountPaginator(Paginator):
+    """Класс EstimatedCountPaginator считает страницы журнала аудита по оценке планировщика."""
+
+    # Ниже этого порога точный COUNT(*) дешев и сохраняет точность на малых выборках.
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self) -> int:
+        """Возвращает число записей для пагинации.
+        
+        Returns:
+            Оценка планировщика для больших выборок или точный COUNT(*),
+            если выборка мала или СУБД не дает оценку.
+        """
+        estimate = estimate_count(self.object_list) if isinstance(self.object_list, QuerySet) else None
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
 
 
 class StatusFamilyFilter(admin.SimpleListFilter):
@@ -229,6 +310,9 @@ class AuditEventAdmin(admin.ModelAdmin):
     fields = readonly_fields
     ordering = ("-created_at", "-id")
     date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    # Не считать COUNT(*) по всей таблице рядом с отфильтрованной выборкой.
+    show_full_result_count = False
     actions = ("export_selected_as_csv", "export_selected_as_json", "export_selected_as_jsonl")
     _EXPORT_CONTROL_PARAMS = {
         "format",
@@ -237,6 +321,7 @@ class AuditEventAdmin(admin.ModelAdmin):
         "date_to",
         "selected_only",
         "_selected_action",
+        "gzip",
     }
     _IP_SORT_FIELDS = {
         "ip": "ip",
@@ -246,6 +331,9 @@ class AuditEventAdmin(admin.ModelAdmin):
         "account_count": "account_count",
         "anonymous_events": "anonymous_events",
     }
+    # The rollup keeps one HyperLogLog sketch per day, which SQL cannot merge, so the
+    # account column is ordered by the busiest day's estimate there.
+    _IP_ROLLUP_SORT_FIELDS = {**_IP_SORT_FIELDS, "account_count": "account_peak"}
     _IP_DEFAULT_SORT = ("last_seen", "desc")
     _IP_SUMMARY_PAGE_SIZE = 100
 
@@ -298,43 +386,43 @@ class AuditEventAdmin(admin.ModelAdmin):
         return False
 
     @admin.action(description="Экспортировать выбранные (CSV)")
-    def export_selected_as_csv(self, _request, queryset):
+    def export_selected_as_csv(self, request, queryset):
         """Экспортирует selected as csv в запрошенный формат.
         
         Args:
-            _request: HTTP-запрос, не используемый напрямую в теле функции.
+            request: HTTP-запрос; параметр `gzip=1` включает сжатие выгрузки.
             queryset: Набор записей, к которому применяются фильтры.
         
         Returns:
             Результат вычислений, сформированный в ходе выполнения функции.
         """
-        return self._build_export_response(queryset, export_format="csv")
+        return self._build_export_response(queryset, export_format="csv", request=request)
 
     @admin.action(description="Экспортировать выбранные (JSON)")
-    def export_selected_as_json(self, _request, queryset):
+    def export_selected_as_json(self, request, queryset):
         """Экспортирует selected as json в запрошенный формат.
         
         Args:
-            _request: HTTP-запрос, не используемый напрямую в теле функции.
+            request: HTTP-запрос; параметр `gzip=1` включает сжатие выгрузки.
             queryset: Набор записей, к которому применяются фильтры.
         
         Returns:
             Результат вычислений, сформированный в ходе выполнения функции.
         """
-        return self._build_export_response(queryset, export_format="json")
+        return self._build_export_response(queryset, export_format="json", request=request)
 
     @admin.action(description="Экспортировать выбранные (JSONL)")
-    def export_selected_as_jsonl(self, _request, queryset):
+    def export_selected_as_jsonl(self, request, queryset):
         """Экспортирует selected as jsonl в запрошенный формат.
         
         Args:
-            _request: HTTP-запрос, не используемый напрямую в теле функции.
+            request: HTTP-запрос; параметр `gzip=1` включает сжатие выгрузки.
             queryset: Набор записей, к которому применяются фильтры.
         
         Returns:
             Результат вычислений, сформированный в ходе выполнения функции.
         """
-        return self._build_export_response(queryset, export_format="jsonl")
+        return self._build_export_response(queryset, export_format="jsonl", request=request)
 
     def get_urls(self):
         """Возвращает urls из текущего контекста или хранилища.
@@ -388,29 +476,47 @@ class AuditEventAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context=context)
 
     def ip_summary_view(self, request: HttpRequest) -> HttpResponse:
-        """Renders a compact audit view grouped by unique IP addresses."""
+        """Renders a compact audit view grouped by unique IP addresses.
+
+        Reads the per-day rollup by default; ``source=raw`` and the actor filter,
+        which the rollup cannot answer, fall back to grouping raw events.
+        """
+        use_rollup = self._ip_summary_uses_rollup(request)
         base_queryset = self._get_ip_summary_base_queryset()
         try:
             filtered_queryset = self._apply_ip_summary_filters(base_queryset, request)
+            rollup_queryset = self._apply_ip_rollup_filters(AuditIpDailySummary.objects.all(), request)
         except ValueError as exc:
             return HttpResponseBadRequest(str(exc).encode("utf-8"))
-        sort_field, direction, order_expression = self._resolve_ip_sort(request)
-        grouped_queryset = (
-            filtered_queryset.values("ip")
-            .annotate(
+        sort_fields = self._IP_ROLLUP_SORT_FIELDS if use_rollup else self._IP_SORT_FIELDS
+        sort_field, direction, order_expression = self._resolve_ip_sort(request, sort_fields)
+        if use_rollup:
+            grouped_queryset = rollup_queryset.values("ip").annotate(
+                total_events=Sum("total_events"),
+                first_seen=Min("first_seen"),
+                last_seen=Max("last_seen"),
+                account_peak=Max("account_estimate"),
+                anonymous_events=Sum("anonymous_events"),
+            )
+        else:
+            grouped_queryset = filtered_queryset.values("ip").annotate(
                 total_events=Count("id"),
                 first_seen=Min("created_at"),
                 last_seen=Max("created_at"),
                 account_count=Count("actor_user_id_snapshot", distinct=True),
                 anonymous_events=Count("id", filter=Q(actor_user_id_snapshot__isnull=True)),
             )
-            .order_by(order_expression, "ip")
-        )
+        grouped_queryset = grouped_queryset.order_by(order_expression, "ip")
 
         paginator = Paginator(grouped_queryset, self._IP_SUMMARY_PAGE_SIZE)
         page_obj = paginator.get_page(request.GET.get("page"))
         page_items = list(page_obj.object_list)
         page_ips = [str(item["ip"]) for item in page_items if item.get("ip")]
+        if use_rollup:
+            account_counts = estimate_accounts_by_ip(rollup_queryset, page_ips)
+            for item in page_items:
+                item["account_count"] = account_counts.get(str(item["ip"]), 0)
+        # Only the IPs on the current page, served by the ip index.
         accounts_by_ip = self._collect_accounts_by_ip(filtered_queryset, page_ips)
         rows = [
             {
@@ -421,13 +527,17 @@ class AuditEventAdmin(admin.ModelAdmin):
                 "account_count": item["account_count"],
                 "anonymous_events": item["anonymous_events"],
                 "accounts": accounts_by_ip.get(str(item["ip"]), []),
+                "drilldown_url": self._build_query_string(
+                    request,
+                    {"source": "raw", "ip": str(item["ip"]), "page": None},
+                ),
             }
             for item in page_items
         ]
 
         sort_links = {
             field: self._build_ip_summary_sort_url(request, field, sort_field, direction)
-            for field in self._IP_SORT_FIELDS
+            for field in sort_fields
         }
         context = {
             **self.admin_site.each_context(request),
@@ -439,6 +549,10 @@ class AuditEventAdmin(admin.ModelAdmin):
             "sort_field": sort_field,
             "sort_direction": direction,
             "sort_links": sort_links,
+            "summary_source": "rollup" if use_rollup else "raw",
+            "rollup_checkpoint": get_ip_rollup_checkpoint() if use_rollup else None,
+            "raw_summary_url": self._build_query_string(request, {"source": "raw", "page": None}),
+            "rollup_summary_url": self._build_query_string(request, {"source": None, "page": None}),
             "ip_filter": (request.GET.get("ip") or "").strip(),
             "actor_filter": (request.GET.get("actor") or "").strip(),
             "date_from": (request.GET.get("date_from") or "").strip(),
@@ -452,6 +566,13 @@ class AuditEventAdmin(admin.ModelAdmin):
             context=context,
         )
 
+    @staticmethod
+    def _ip_summary_uses_rollup(request: HttpRequest) -> bool:
+        """Tells whether the IP summary can be served from the rollup table."""
+        if (request.GET.get("source") or "").strip().lower() == "raw":
+            return False
+        return not (request.GET.get("actor") or "").strip()
+
     def _get_ip_summary_base_queryset(self) -> QuerySet[AuditEvent]:
         """Returns audit events with a non-empty IP address."""
         return AuditEvent.objects.exclude(Q(ip__isnull=True) | Q(ip__exact=""))
@@ -474,25 +595,52 @@ class AuditEventAdmin(admin.ModelAdmin):
                 actor_match |= Q(actor_user_id_snapshot=int(actor_filter))
             filtered_queryset = filtered_queryset.filter(actor_match)
 
-        date_from = self._parse_iso_date(request.GET.get("date_from"), param="date_from")
-        date_to = self._parse_iso_date(request.GET.get("date_to"), param="date_to")
-        if date_from is not None and date_to is not None and date_from > date_to:
-            raise ValueError("Некорректный диапазон дат: date_from должен быть <= date_to")
+        date_from, date_to = self._parse_ip_summary_dates(request)
         if date_from is not None:
             filtered_queryset = filtered_queryset.filter(created_at__date__gte=date_from)
         if date_to is not None:
             filtered_queryset = filtered_queryset.filter(created_at__date__lte=date_to)
         return filtered_queryset
 
-    def _resolve_ip_sort(self, request: HttpRequest) -> tuple[str, str, str]:
+    def _apply_ip_rollup_filters(
+        self,
+        queryset: QuerySet[AuditIpDailySummary],
+        request: HttpRequest,
+    ) -> QuerySet[AuditIpDailySummary]:
+        """Applies the IP and date filters to the per-day rollup."""
+        filtered_queryset = queryset
+        ip_filter = (request.GET.get("ip") or "").strip()
+        if ip_filter:
+            filtered_queryset = filtered_queryset.filter(ip__icontains=ip_filter)
+        date_from, date_to = self._parse_ip_summary_dates(request)
+        if date_from is not None:
+            filtered_queryset = filtered_queryset.filter(day__gte=date_from)
+        if date_to is not None:
+            filtered_queryset = filtered_queryset.filter(day__lte=date_to)
+        return filtered_queryset
+
+    def _parse_ip_summary_dates(self, request: HttpRequest) -> tuple[date | None, date | None]:
+        """Parses and validates the date range of the IP summary."""
+        date_from = self._parse_iso_date(request.GET.get("date_from"), param="date_from")
+        date_to = self._parse_iso_date(request.GET.get("date_to"), param="date_to")
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise ValueError("Некорректный диапазон дат: date_from должен быть <= date_to")
+        return date_from, date_to
+
+    def _resolve_ip_sort(
+        self,
+        request: HttpRequest,
+        sort_fields: dict[str, str] | None = None,
+    ) -> tuple[str, str, str]:
         """Normalizes sorting arguments for the IP summary table."""
+        sort_fields = sort_fields or self._IP_SORT_FIELDS
         sort_field = (request.GET.get("sort") or "").strip().lower()
-        if sort_field not in self._IP_SORT_FIELDS:
+        if sort_field not in sort_fields:
             sort_field = self._IP_DEFAULT_SORT[0]
         direction = (request.GET.get("direction") or "").strip().lower()
         if direction not in {"asc", "desc"}:
             direction = self._IP_DEFAULT_SORT[1]
-        field_expression = self._IP_SORT_FIELDS[sort_field]
+        field_expression = sort_fields[sort_field]
         order_expression = field_expression if direction == "asc" else f"-{field_expression}"
         return sort_field, direction, order_expression
 
@@ -621,7 +769,7 @@ class AuditEventAdmin(admin.ModelAdmin):
             queryset = self._apply_export_selected_filters(queryset, request)
         except ValueError as exc:
             return HttpResponseBadRequest(str(exc).encode("utf-8"))
-        return self._build_export_response(queryset, export_format=export_format)
+        return self._build_export_response(queryset, export_format=export_format, request=request)
 
     def _get_filtered_queryset(self, request):
         """Возвращает filtered queryset из текущего контекста или хранилища.
@@ -782,96 +930,149 @@ class AuditEventAdmin(admin.ModelAdmin):
         timestamp = timezone.now().strftime("%Y%m%d-%H%M%S")
         return f"audit-events-{timestamp}.{slugify(export_format) or export_format}"
 
-    def _build_export_response(self, queryset, *, export_format: str) -> HttpResponse:
+    def _build_export_response(
+        self,
+        queryset,
+        *,
+        export_format: str,
+        request=None,
+    ) -> StreamingHttpResponse | HttpResponse:
         """Формирует export response для дальнейшего использования в потоке обработки.
         
         Args:
             queryset: Набор записей, к которому применяются фильтры.
             export_format: Формат выгрузки аудита, например csv или json.
+            request: HTTP-запрос; параметр `gzip=1` включает сжатие выгрузки.
         
         Returns:
             HTTP-ответ с данными результата операции.
         """
         if export_format == "csv":
-            return self._as_csv(queryset, filename=self._build_export_filename("csv"))
-        if export_format == "json":
-            return self._as_json(queryset, filename=self._build_export_filename("json"))
-        if export_format == "jsonl":
-            return self._as_jsonl(queryset, filename=self._build_export_filename("jsonl"))
-        return HttpResponseBadRequest("Неподдерживаемый формат экспорта".encode("utf-8"))
+            chunks, content_type = self._csv_chunks(queryset), "text/csv; charset=utf-8"
+        elif export_format == "json":
+            chunks, content_type = self._json_chunks(queryset), "application/json; charset=utf-8"
+        elif export_format == "jsonl":
+            chunks, content_type = self._jsonl_chunks(queryset), "application/x-ndjson; charset=utf-8"
+        else:
+            return HttpResponseBadRequest("Неподдерживаемый формат экспорта".encode("utf-8"))
+        return self._stream_export(
+            request,
+            chunks,
+            content_type=content_type,
+            filename=self._build_export_filename(export_format),
+            compress=self._wants_gzip(request),
+        )
+
+    @staticmethod
+    def _wants_gzip(request) -> bool:
+        """Определяет, запрошено ли сжатие выгрузки.
+        
+        Args:
+            request: HTTP-запрос с параметрами выгрузки.
+        
+        Returns:
+            Логическое значение результата проверки.
+        """
+        if request is None:
+            return False
+        raw = request.GET.get("gzip") or request.POST.get("gzip") or ""
+        return raw.strip().lower() in {"1", "true", "yes", "on"}
 
-    def _as_csv(self, queryset, *, filename: str) -> HttpResponse:
-        """Преобразует данные в представление csv.
+    def _iter_export_rows(self, queryset) -> Iterator[dict[str, object]]:
+        """Итерирует сериализованные события, читая БД порциями.
         
         Args:
             queryset: Набор записей, к которому применяются фильтры.
-            filename: Исходное имя файла, переданного в обработку.
         
         Returns:
-            HTTP-ответ с данными результата операции.
+            Итератор словарей событий.
         """
-        response = HttpResponse(content_type="text/csv; charset=utf-8")
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        for event in queryset.iterator(chunk_size=EXPORT_DB_CHUNK_SIZE):
+            yield self._serialize_event(event)
 
-        fieldnames = [
-            "id",
-            "createdAt",
-            "action",
-            "protocol",
-            "actorUserId",
-            "actorUsername",
-            "isAuthenticated",
-            "method",
-            "path",
-            "statusCode",
-            "success",
-            "ip",
-            "requestId",
-            "metadata",
-        ]
-        writer = csv.DictWriter(response, fieldnames=fieldnames)
+    def _csv_chunks(self, queryset) -> Iterator[str]:
+        """Формирует CSV по частям.
+        
+        Args:
+            queryset: Набор записей, к которому применяются фильтры.
+        
+        Returns:
+            Итератор фрагментов CSV.
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS)
         writer.writeheader()
-        for event in queryset.iterator(chunk_size=1000):
-            row = self._serialize_event(event)
+        for row in self._iter_export_rows(queryset):
             row["metadata"] = json.dumps(row["metadata"], ensure_ascii=False, separators=(",", ":"))
             writer.writerow(row)
-        return response
+            if buffer.tell() >= EXPORT_STREAM_BUFFER_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
 
-    def _as_json(self, queryset, *, filename: str) -> HttpResponse:
-        """Преобразует данные в представление json.
+    def _json_chunks(self, queryset) -> Iterator[str]:
+        """Формирует JSON-массив по частям, не собирая его целиком.
         
         Args:
             queryset: Набор записей, к которому применяются фильтры.
-            filename: Исходное имя файла, переданного в обработку.
         
         Returns:
-            HTTP-ответ с данными результата операции.
+            Итератор фрагментов JSON.
         """
-        payload = [self._serialize_event(event) for event in queryset.iterator(chunk_size=1000)]
-        response = HttpResponse(content_type="application/json; charset=utf-8")
-        response.write(
-            json.dumps(payload, ensure_ascii=False, indent=2, default=self._json_default).encode("utf-8")
-        )
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return response
+        separator = "[\n"
+        for row in self._iter_export_rows(queryset):
+            item = json.dumps(row, ensure_ascii=False, indent=2, default=self._json_default)
+            yield separator + textwrap.indent(item, "  ")
+            separator = ",\n"
+        yield "[]" if separator == "[\n" else "\n]"
 
-    def _as_jsonl(self, queryset, *, filename: str) -> HttpResponse:
-        """Преобразует данные в представление jsonl.
+    def _jsonl_chunks(self, queryset) -> Iterator[str]:
+        """Формирует JSONL по строкам.
         
         Args:
             queryset: Набор записей, к которому применяются фильтры.
-            filename: Исходное имя файла, переданного в обработку.
         
         Returns:
-            HTTP-ответ с данными результата операции.
+            Итератор строк JSONL.
         """
-        lines = []
-        for event in queryset.iterator(chunk_size=1000):
-            lines.append(
-                json.dumps(self._serialize_event(event), ensure_ascii=False, default=self._json_default)
-            )
-        response = HttpResponse(content_type="application/x-ndjson; charset=utf-8")
-        response.write(("\n".join(lines) + ("\n" if lines else "")).encode("utf-8"))
+        for row in self._iter_export_rows(queryset):
+            yield json.dumps(row, ensure_ascii=False, default=self._json_default) + "\n"
+
+    def _stream_export(
+        self,
+        request,
+        chunks: Iterable[str],
+        *,
+        content_type: str,
+        filename: str,
+        compress: bool,
+    ) -> StreamingHttpResponse:
+        """Отдает выгрузку потоком с постоянным расходом памяти.
+        
+        Args:
+            request: HTTP-запрос, для которого формируется ответ.
+            chunks: Текстовые фрагменты выгрузки.
+            content_type: MIME-тип несжатой выгрузки.
+            filename: Имя файла выгрузки.
+            compress: Сжимать ли выгрузку gzip на лету.
+        
+        Returns:
+            Потоковый HTTP-ответ.
+        """
+        body = _encode_export_chunks(chunks, compress=compress)
+        if compress:
+            content_type = "application/gzip"
+            filename = f"{filename}.gz"
+        if isinstance(request, ASGIRequest):
+            # Django 4.1 iterates streaming bodies on the event loop, where the ORM is off limits.
+            # Render in this worker thread into a spool that moves to disk past a small size.
+            spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MEMORY_BYTES)
+            for chunk in body:
+                spool.write(chunk)
+            spool.seek(0)
+            return FileResponse(spool, as_attachment=True, filename=filename, content_type=content_type)
+        response = StreamingHttpResponse(body, content_type=content_type)
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
         return response
 
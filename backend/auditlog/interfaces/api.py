@@ -27,7 +27,13 @@ def events_list_view(request):
 
     items, next_cursor = query_service.list_events(filters)
     serializer = AuditEventSerializer(items, many=True)
-    return Response({"items": serializer.data, "nextCursor": next_cursor})
+    return Response(
+        {
+            "items": serializer.data,
+            "nextCursor": next_cursor,
+            "estimatedTotal": query_service.estimate_events_total(filters),
+        }
+    )
 
 
 @api_view(["GET"])
@@ -4,12 +4,21 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
-from auditlog.models import AuditEvent
+from auditlog.application.ip_rollup_service import purge_ip_rollup_before
+from auditlog.application.retention_service import (
+    AuditPurgeBatch,
+    estimate_expired_events,
+    purge_expired_events,
+)
+from auditlog.infrastructure.partitions import drop_partitions_before, list_partitions
 
 
 class Command(BaseCommand):
     """Класс Command реализует management-команду Django."""
-    help = "Удаляет события аудита старше N дней."
+    help = (
+        "Удаляет события аудита старше N дней пакетами по диапазонам id; "
+        "в PostgreSQL целиком удаляет устаревшие партиции. Прерванный запуск можно просто повторить."
+    )
 
     def add_arguments(self, parser):
         """Добавляет arguments в целевую коллекцию.
@@ -23,6 +32,35 @@ class Command(BaseCommand):
             default=int(getattr(settings, "AUDIT_RETENTION_DAYS", 180)),
             help="Период хранения в днях (по умолчанию из AUDIT_RETENTION_DAYS).",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=int(getattr(settings, "AUDIT_CLEANUP_BATCH_SIZE", 5000)),
+            help="Количество строк в одном DELETE (по умолчанию из AUDIT_CLEANUP_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Максимальное число пакетов за запуск (по умолчанию без ограничения).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Пауза между пакетами в секундах.",
+        )
+        parser.add_argument(
+            "--start-after-id",
+            type=int,
+            default=0,
+            help="Продолжить с id больше указанного (последний id из отчета о прогрессе).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только оценить объем удаления, ничего не меняя.",
+        )
 
     def handle(self, *args, **options):
         """Обрабатывает данные.
@@ -34,7 +72,59 @@ class Command(BaseCommand):
         days = int(options["days"])
         if days < 1:
             raise CommandError("--days должно быть >= 1")
+        batch_size = int(options["batch_size"])
+        if batch_size < 1:
+            raise CommandError("--batch-size должно быть >= 1")
+        max_batches = options["max_batches"]
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches должно быть >= 1")
+        sleep_seconds = float(options["sleep"])
+        if sleep_seconds < 0:
+            raise CommandError("--sleep должно быть >= 0")
 
         cutoff = timezone.now() - timezone.timedelta(days=days)
-        deleted, _details = AuditEvent.objects.filter(created_at__lt=cutoff).delete()
+        if options["dry_run"]:
+            self._report_estimate(cutoff, days, batch_size)
+            return
+
+        # Whole partitions go with DETACH + DROP; only the straddling one needs a DELETE.
+        for name in drop_partitions_before(cutoff):
+            self.stdout.write(f"Удалена партиция {name}")
+
+        def report(batch: AuditPurgeBatch) -> None:
+            self.stdout.write(
+                f"Пакет {batch.number}: удалено {batch.deleted}, последний id {batch.last_id}, "
+                f"всего {batch.total_deleted}"
+            )
+
+        deleted = purge_expired_events(
+            cutoff,
+            batch_size=batch_size,
+            max_batches=max_batches,
+            sleep_seconds=sleep_seconds,
+            start_after_id=int(options["start_after_id"]),
+            on_batch=report,
+        )
         self.stdout.write(self.style.SUCCESS(f"Удалено {deleted} событий аудита старше {days} дней"))
+        summaries = purge_ip_rollup_before(timezone.localdate(cutoff))
+        if summaries:
+            self.stdout.write(f"Удалено {summaries} дневных сводок по IP")
+
+    def _report_estimate(self, cutoff, days: int, batch_size: int) -> None:
+        """Печатает оценку объема удаления для --dry-run.
+        
+        Args:
+            cutoff: Граница хранения.
+            days: Период хранения в днях.
+            batch_size: Количество строк в одном DELETE.
+        """
+        for partition in list_partitions():
+            if not partition.is_default and partition.upper is not None and partition.upper <= cutoff:
+                self.stdout.write(f"Будет удалена партиция {partition.name}")
+        expired = estimate_expired_events(cutoff)
+        batches = -(-expired // batch_size)
+        self.stdout.write(
+            self.style.WARNING(
+                f"Dry run: старше {days} дней {expired} событий аудита, примерно {batches} пакетов по {batch_size}"
+            )
+        )
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auditlog.infrastructure.partitions import INTERVALS, ensure_future_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    """Класс Command реализует management-команду Django."""
+    help = "Создает партиции таблицы аудита на текущий и следующие периоды."
+
+    def add_arguments(self, parser):
+        """Добавляет arguments в целевую коллекцию.
+
+        Args:
+            parser: Парсер аргументов management-команды.
+        """
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=int(getattr(settings, "AUDIT_PARTITION_PREMAKE", 3)),
+            help="Сколько будущих периодов создать заранее (по умолчанию из AUDIT_PARTITION_PREMAKE).",
+        )
+        parser.add_argument(
+            "--interval",
+            choices=INTERVALS,
+            default=getattr(settings, "AUDIT_PARTITION_INTERVAL", "month"),
+            help="Размер партиции (по умолчанию из AUDIT_PARTITION_INTERVAL).",
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает данные.
+
+        Args:
+            *args: Дополнительные позиционные аргументы вызова.
+            **options: Опции, переданные в management-команду.
+        """
+        ahead = int(options["ahead"])
+        if ahead < 0:
+            raise CommandError("--ahead должно быть >= 0")
+        if not is_partitioned():
+            self.stdout.write(self.style.WARNING("Таблица аудита не секционирована, партиции не нужны"))
+            return
+
+        created = ensure_future_partitions(ahead, options["interval"])
+        for name in created:
+            self.stdout.write(f"Создана партиция {name}")
+        self.stdout.write(self.style.SUCCESS(f"Создано партиций: {len(created)}"))
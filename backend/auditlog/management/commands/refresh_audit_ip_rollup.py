@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auditlog.application.ip_rollup_service import refresh_ip_rollup, reset_ip_rollup
+
+
+class Command(BaseCommand):
+    """Класс Command реализует management-команду Django."""
+    help = "Дополняет дневную сводку событий аудита по IP новыми событиями."
+
+    def add_arguments(self, parser):
+        """Добавляет arguments в целевую коллекцию.
+
+        Args:
+            parser: Парсер аргументов management-команды.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=int(getattr(settings, "AUDIT_IP_ROLLUP_BATCH_SIZE", 5000)),
+            help="Сколько событий учитывать за одну транзакцию (по умолчанию из AUDIT_IP_ROLLUP_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Максимальное число пакетов за запуск (по умолчанию без ограничения).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Очистить сводку и пересчитать ее по всем событиям.",
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает данные.
+
+        Args:
+            *args: Дополнительные позиционные аргументы вызова.
+            **options: Опции, переданные в management-команду.
+        """
+        batch_size = int(options["batch_size"])
+        if batch_size < 1:
+            raise CommandError("--batch-size должно быть >= 1")
+        max_batches = options["max_batches"]
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches должно быть >= 1")
+
+        if options["rebuild"]:
+            reset_ip_rollup()
+            self.stdout.write("Сводка по IP очищена")
+        processed = refresh_ip_rollup(
+            batch_size=batch_size,
+            max_batches=max_batches,
+            settle_seconds=float(getattr(settings, "AUDIT_IP_ROLLUP_SETTLE_SECONDS", 30)),
+        )
+        self.stdout.write(self.style.SUCCESS(f"В сводку по IP добавлено {processed} событий"))
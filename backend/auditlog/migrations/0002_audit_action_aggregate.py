@@ -0,0 +1,26 @@
+# Generated by Django 4.1.13 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditlog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditActionAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=128)),
+                ('bucket_start', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='auditactionaggregate',
+            constraint=models.UniqueConstraint(fields=('action', 'bucket_start'), name='audit_agg_action_bucket_uniq'),
+        ),
+    ]
@@ -0,0 +1,210 @@
+"""Convert the audit table into a PostgreSQL table range-partitioned by created_at.
+
+Existing rows are not copied: the old table is attached as the partition
+covering everything up to the start of next month. New partitions are created
+by the `create_audit_partitions` management command. No-op on other backends.
+
+Every HTTP and WS request writes to this table, so the slow work happens
+before the exclusive lock, with autocommit (the migration is not atomic):
+
+1. `CREATE UNIQUE INDEX CONCURRENTLY` on (id, created_at): the index the
+   partitioned primary key needs on the old table.
+2. A `NOT VALID` CHECK on the partition bound, validated under
+   SHARE UPDATE EXCLUSIVE; it lets ATTACH skip scanning the old table.
+
+The swap itself (rename, create the parent, attach, add the default
+partition) only touches the catalog and runs in one short transaction under
+ACCESS EXCLUSIVE with a lock timeout; re-running the migration after a
+timeout resumes safely. The migration is irreversible on PostgreSQL.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from django.db import migrations, transaction
+from django.db.migrations.exceptions import IrreversibleError
+
+PARENT = "auditlog_auditevent"
+LEGACY = "auditlog_auditevent_legacy"
+DEFAULT = "auditlog_auditevent_default"
+ID_CREATED_INDEX = "auditlog_auditevent_id_created_uniq"
+RANGE_CHECK = "auditlog_auditevent_legacy_range"
+LOCK_TIMEOUT = "10s"
+
+
+def _next_month_start(now):
+    if now.month == 12:
+        return now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _legacy_upper_bound(now):
+    # New rows must satisfy the CHECK until the swap commits: stay clear of a month boundary.
+    bound = _next_month_start(now)
+    if bound - now < timedelta(days=1):
+        bound = _next_month_start(bound)
+    return bound
+
+
+def _legacy_index_name(index_name: str, taken: set[str]) -> str:
+    # Identifiers are capped at 63 bytes; `..._like` siblings must not collide once truncated.
+    candidate = f"{index_name[:56]}_legacy"
+    suffix = 1
+    while candidate in taken:
+        candidate = f"{index_name[:52]}_{suffix}_legacy"
+        suffix += 1
+    taken.add(candidate)
+    return candidate
+
+
+def _is_partitioned(cursor) -> bool:
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [PARENT])
+    return cursor.fetchone() is not None
+
+
+def _prepare_id_created_index(cursor) -> None:
+    cursor.execute(
+        """
+        SELECT index_info.indisvalid
+        FROM pg_index index_info
+        JOIN pg_class index_class ON index_class.oid = index_info.indexrelid
+        WHERE index_class.relname = %s AND index_class.relnamespace = current_schema()::regnamespace
+        """,
+        [ID_CREATED_INDEX],
+    )
+    row = cursor.fetchone()
+    if row is not None and row[0]:
+        return
+    if row is not None:
+        # Leftover of an interrupted CONCURRENTLY build.
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{ID_CREATED_INDEX}"')
+    cursor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY "{ID_CREATED_INDEX}" ON "{PARENT}" (id, created_at)')
+
+
+def _prepare_range_check(cursor) -> str:
+    cursor.execute(
+        """
+        SELECT pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND conname = %s
+        """,
+        [PARENT, RANGE_CHECK],
+    )
+    row = cursor.fetchone()
+    if row is not None:
+        # Left by an interrupted run; its bound may be stale by now.
+        cursor.execute(f'ALTER TABLE "{PARENT}" DROP CONSTRAINT "{RANGE_CHECK}"')
+    bound = _legacy_upper_bound(datetime.now(timezone.utc)).isoformat()
+    cursor.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    try:
+        # NOT VALID only needs a brief catalog lock; VALIDATE scans under SHARE UPDATE EXCLUSIVE,
+        # which does not block reads or writes.
+        cursor.execute(
+            f'ALTER TABLE "{PARENT}" ADD CONSTRAINT "{RANGE_CHECK}" CHECK (created_at < \'{bound}\') NOT VALID'
+        )
+    finally:
+        cursor.execute("RESET lock_timeout")
+    cursor.execute(f'ALTER TABLE "{PARENT}" VALIDATE CONSTRAINT "{RANGE_CHECK}"')
+    return bound
+
+
+def _swap_in_partitioned_table(cursor, bound: str) -> None:
+    cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    cursor.execute(f'LOCK TABLE "{PARENT}" IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+        [PARENT],
+    )
+    indexes = [
+        (index_name, definition)
+        for index_name, definition in cursor.fetchall()
+        if index_name not in {f"{PARENT}_pkey", ID_CREATED_INDEX}
+    ]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        """,
+        [PARENT],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{PARENT}"')
+    next_id = cursor.fetchone()[0]
+
+    # The prebuilt (id, created_at) index becomes the constraint the partitioned
+    # primary key attaches to; USING INDEX reuses it without a rebuild.
+    cursor.execute(f'ALTER TABLE "{PARENT}" ADD CONSTRAINT "{ID_CREATED_INDEX}" UNIQUE USING INDEX "{ID_CREATED_INDEX}"')
+
+    # Free the names Django knows for the new parent table and its indexes.
+    cursor.execute(f'ALTER TABLE "{PARENT}" RENAME TO "{LEGACY}"')
+    cursor.execute(f'ALTER INDEX "{PARENT}_pkey" RENAME TO "{PARENT}_pkey_legacy"')
+    taken_names: set[str] = set()
+    for index_name, _definition in indexes:
+        cursor.execute(f'ALTER INDEX "{index_name}" RENAME TO "{_legacy_index_name(index_name, taken_names)}"')
+    cursor.execute(f'ALTER INDEX "{ID_CREATED_INDEX}" RENAME TO "{LEGACY}_id_created_uniq"')
+    # Identity columns drop their sequence with the identity; a serial one is dropped by its qualified name.
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [LEGACY])
+    sequence_name = cursor.fetchone()[0]
+    cursor.execute(f'ALTER TABLE "{LEGACY}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    cursor.execute(f'ALTER TABLE "{LEGACY}" ALTER COLUMN id DROP DEFAULT')
+    if sequence_name:
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {sequence_name}")
+
+    cursor.execute(
+        f'CREATE TABLE "{PARENT}" (LIKE "{LEGACY}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        "PARTITION BY RANGE (created_at)"
+    )
+    # The bound CHECK belongs to the old table only; the parent keeps the model's own CHECKs.
+    cursor.execute(f'ALTER TABLE "{PARENT}" DROP CONSTRAINT "{RANGE_CHECK}"')
+    cursor.execute(f'CREATE SEQUENCE "{PARENT}_id_seq" OWNED BY "{PARENT}".id START WITH {int(next_id)}')
+    cursor.execute(f"ALTER TABLE \"{PARENT}\" ALTER COLUMN id SET DEFAULT nextval('\"{PARENT}_id_seq\"')")
+    # A partitioned primary key must contain the partition key. The parent is
+    # still empty, so its indexes and constraints are catalog-only here; ATTACH
+    # adopts the matching indexes and foreign keys of the old table.
+    cursor.execute(f'ALTER TABLE "{PARENT}" ADD CONSTRAINT "{PARENT}_pkey" PRIMARY KEY (id, created_at)')
+    for _index_name, definition in indexes:
+        cursor.execute(definition)
+    for constraint_name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{PARENT}" ADD CONSTRAINT "{constraint_name}" {definition}')
+
+    cursor.execute(f"ALTER TABLE \"{PARENT}\" ATTACH PARTITION \"{LEGACY}\" FOR VALUES FROM (MINVALUE) TO ('{bound}')")
+    cursor.execute(f'ALTER TABLE "{LEGACY}" DROP CONSTRAINT "{RANGE_CHECK}"')
+    cursor.execute(f'CREATE TABLE "{DEFAULT}" PARTITION OF "{PARENT}" DEFAULT')
+
+
+def partition_audit_events(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            return
+        _prepare_id_created_index(cursor)
+        bound = _prepare_range_check(cursor)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        _swap_in_partitioned_table(cursor, bound)
+
+
+def unpartition_audit_events(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            raise IrreversibleError(
+                "auditlog 0003 cannot be reversed on PostgreSQL: the audit table is partitioned. "
+                "Restore it from a backup or merge the partitions back manually."
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("auditlog", "0002_audit_action_aggregate"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_events, unpartition_audit_events),
+    ]
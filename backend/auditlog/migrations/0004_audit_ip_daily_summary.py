@@ -0,0 +1,44 @@
+# Generated by Django 4.1.13 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditlog', '0003_partition_audit_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditIpDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip', models.CharField(max_length=64)),
+                ('day', models.DateField()),
+                ('total_events', models.PositiveBigIntegerField(default=0)),
+                ('anonymous_events', models.PositiveBigIntegerField(default=0)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('account_sketch', models.BinaryField(default=bytes)),
+                ('account_estimate', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditRollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='auditipdailysummary',
+            index=models.Index(fields=['day'], name='audit_ip_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='auditipdailysummary',
+            constraint=models.UniqueConstraint(fields=('ip', 'day'), name='audit_ip_day_uniq'),
+        ),
+    ]
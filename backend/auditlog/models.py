@@ -1,3 +1,3 @@
-from .infrastructure.models import AuditEvent
+from .infrastructure.models import AuditActionAggregate, AuditEvent, AuditIpDailySummary, AuditRollupCheckpoint
 
-__all__ = ["AuditEvent"]
+__all__ = ["AuditActionAggregate", "AuditEvent", "AuditIpDailySummary", "AuditRollupCheckpoint"]
@@ -1,8 +1,11 @@
+import gzip
 import json
 from datetime import timedelta
 
+from django.contrib import admin
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.http import FileResponse
+from django.test import AsyncRequestFactory, TestCase
 from django.urls import reverse
 from django.utils import timezone
 
@@ -65,7 +68,7 @@ class AuditAdminExportTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertIn("application/json", response["Content-Type"])
-        payload = json.loads(response.content.decode("utf-8"))
+        payload = json.loads(response.getvalue().decode("utf-8"))
         self.assertEqual(len(payload), 1)
         self.assertEqual(payload[0]["action"], "auth.login.success")
         self.assertEqual(payload[0]["statusCode"], 200)
@@ -79,7 +82,7 @@ class AuditAdminExportTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertIn("text/csv", response["Content-Type"])
-        body = response.content.decode("utf-8")
+        body = response.getvalue().decode("utf-8")
         self.assertIn("chat.message.forbidden", body)
         self.assertNotIn("auth.login.success", body)
 
@@ -97,7 +100,7 @@ class AuditAdminExportTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        payload = json.loads(response.content.decode("utf-8"))
+        payload = json.loads(response.getvalue().decode("utf-8"))
         self.assertEqual(len(payload), 1)
         self.assertEqual(payload[0]["id"], self.success_event.pk)
 
@@ -119,7 +122,7 @@ class AuditAdminExportTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 200)
-        payload = json.loads(response.content.decode("utf-8"))
+        payload = json.loads(response.getvalue().decode("utf-8"))
         event_ids = {item["id"] for item in payload}
         self.assertIn(self.forbidden_event.pk, event_ids)
         self.assertNotIn(self.success_event.pk, event_ids)
@@ -135,7 +138,7 @@ class AuditAdminExportTests(TestCase):
             },
         )
         self.assertEqual(response.status_code, 200)
-        payload = json.loads(response.content.decode("utf-8"))
+        payload = json.loads(response.getvalue().decode("utf-8"))
         self.assertEqual(len(payload), 1)
         self.assertEqual(payload[0]["id"], self.forbidden_event.pk)
 
@@ -183,3 +186,53 @@ class AuditAdminExportTests(TestCase):
         self.client.force_login(self.member)
         response = self.client.get(self.export_url, {"format": "json"})
         self.assertIn(response.status_code, {302, 403})
+
+    def test_exports_are_streamed(self):
+        self.client.force_login(self.admin_user)
+        for export_format in ("csv", "json", "jsonl"):
+            with self.subTest(export_format=export_format):
+                response = self.client.get(self.export_url, {"format": export_format})
+                self.assertTrue(response.streaming)
+                self.assertIn("attachment;", response["Content-Disposition"])
+
+    def test_json_stream_matches_single_document_framing(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(self.export_url, {"format": "json"})
+        body = response.getvalue().decode("utf-8")
+
+        self.assertEqual(body, json.dumps(json.loads(body), ensure_ascii=False, indent=2))
+        self.assertGreaterEqual(len(json.loads(body)), 2)
+
+        empty = self.client.get(self.export_url, {"format": "json", "action": "missing.action"})
+        self.assertEqual(empty.getvalue(), b"[]")
+
+    def test_jsonl_export_writes_one_event_per_line(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(self.export_url, {"format": "jsonl"})
+
+        lines = response.getvalue().decode("utf-8").splitlines()
+        self.assertLessEqual({"req-ok-1", "req-forbidden-1"}, {json.loads(line)["requestId"] for line in lines})
+
+    def test_gzip_export_is_compressed_on_the_fly(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(self.export_url, {"format": "jsonl", "gzip": "1"})
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('.jsonl.gz"', response["Content-Disposition"])
+        lines = gzip.decompress(response.getvalue()).decode("utf-8").splitlines()
+        self.assertIn("req-ok-1", {json.loads(line)["requestId"] for line in lines})
+
+    def test_asgi_requests_get_a_spooled_file_response(self):
+        model_admin = admin.site._registry[AuditEvent]
+        request = AsyncRequestFactory().get(self.export_url, {"gzip": "1"})
+
+        response = model_admin._build_export_response(
+            AuditEvent.objects.order_by("id"),
+            export_format="csv",
+            request=request,
+        )
+
+        self.assertIsInstance(response, FileResponse)
+        body = gzip.decompress(b"".join(response.streaming_content)).decode("utf-8")
+        self.assertIn("auth.login.success", body)
+        self.assertIn("chat.message.forbidden", body)
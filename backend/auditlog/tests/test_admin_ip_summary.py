@@ -5,7 +5,8 @@ from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
 
-from auditlog.models import AuditEvent
+from auditlog.application.ip_rollup_service import refresh_ip_rollup
+from auditlog.models import AuditEvent, AuditIpDailySummary
 
 User = get_user_model()
 
@@ -75,6 +76,7 @@ class AuditAdminIpSummaryTests(TestCase):
         AuditEvent.objects.filter(pk=event_a2.pk).update(created_at=now - timedelta(days=2))
         AuditEvent.objects.filter(pk=event_a3.pk).update(created_at=now - timedelta(days=1))
         AuditEvent.objects.filter(pk=event_b1.pk).update(created_at=now - timedelta(hours=1))
+        refresh_ip_rollup(settle_seconds=0)
 
     def test_staff_can_view_ip_summary(self):
         self.client.force_login(self.admin_user)
@@ -113,6 +115,24 @@ class AuditAdminIpSummaryTests(TestCase):
         self.assertEqual(len(ip_rows), 1)
         self.assertEqual(ip_rows[0]["ip"], self.ip_a)
 
+    def test_summary_reads_rollup_and_keeps_raw_drilldown(self):
+        self.client.force_login(self.admin_user)
+        AuditIpDailySummary.objects.filter(ip=self.ip_b).update(total_events=50)
+
+        rollup_response = self.client.get(self.summary_url, {"ip": self.ip_b})
+        raw_response = self.client.get(self.summary_url, {"ip": self.ip_b, "source": "raw"})
+
+        self.assertEqual(rollup_response.context["summary_source"], "rollup")
+        self.assertEqual(rollup_response.context["ip_rows"][0]["total_events"], 50)
+        self.assertIn("source=raw", rollup_response.context["ip_rows"][0]["drilldown_url"])
+        self.assertEqual(raw_response.context["summary_source"], "raw")
+        self.assertEqual(raw_response.context["ip_rows"][0]["total_events"], 1)
+
+    def test_actor_filter_falls_back_to_raw_events(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(self.summary_url, {"actor": self.actor_one.username})
+        self.assertEqual(response.context["summary_source"], "raw")
+
     def test_non_staff_cannot_view_ip_summary(self):
         self.client.force_login(self.member)
         response = self.client.get(self.summary_url)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
 from auditlog.models import AuditEvent
@@ -8,6 +9,7 @@ User = get_user_model()
 
 class AuditApiTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.staff = User.objects.create_user(username="audit_staff", password="pass12345", is_staff=True)
         self.member = User.objects.create_user(username="audit_member", password="pass12345")
         self.actor_one = User.objects.create_user(username="actor_one", password="pass12345")
@@ -88,6 +90,19 @@ class AuditApiTests(TestCase):
         self.assertEqual(by_action.get("auth.login.success"), 2)
         self.assertEqual(by_action.get("auth.logout"), 1)
 
+    def test_events_endpoint_returns_cursor_and_estimate_without_exact_total(self):
+        for _ in range(2):
+            AuditEvent.objects.create(action="auth.logout", success=True)
+
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/admin/audit/events/", {"limit": 1})
+
+        payload = response.json()
+        self.assertTrue(payload["nextCursor"])
+        self.assertNotIn("total", payload)
+        # SQLite has no planner estimate.
+        self.assertIsNone(payload["estimatedTotal"])
+
     def test_username_history_endpoint(self):
         AuditEvent.objects.create(
             action="user.username.changed",
@@ -0,0 +1,127 @@
+"""Tests for the buffered audit writer."""
+
+from __future__ import annotations
+
+import threading
+from unittest.mock import Mock, patch
+
+from asgiref.sync import async_to_sync
+from django.db import OperationalError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from auditlog.application import write_service
+from auditlog.infrastructure.batch_sink import AuditBatchSink
+from auditlog.models import AuditEvent
+
+
+class AuditBatchSinkTests(SimpleTestCase):
+    def _sink(self, **kwargs):
+        written: list[list[dict]] = []
+        options = {"batch_size": 3, "flush_interval": 30.0, "max_buffer": 5}
+        options.update(kwargs)
+        sink = AuditBatchSink(
+            persist_many=lambda rows: written.append(list(rows)),
+            persist_one=Mock(),
+            **options,
+        )
+        self.addCleanup(sink.shutdown, 1.0)
+        return sink, written
+
+    def test_flushes_when_batch_size_is_reached(self):
+        sink, written = self._sink()
+        futures = [sink.submit({"action": f"a{index}"}) for index in range(3)]
+
+        for future in futures:
+            future.result(timeout=2)
+        self.assertEqual([[row["action"] for row in batch] for batch in written], [["a0", "a1", "a2"]])
+
+    def test_flushes_partial_batch_after_interval(self):
+        sink, written = self._sink(flush_interval=0.05)
+        future = sink.submit({"action": "only"})
+
+        future.result(timeout=2)
+        self.assertEqual(written, [[{"action": "only"}]])
+
+    def test_full_buffer_rejects_new_rows(self):
+        release = threading.Event()
+        sink = AuditBatchSink(
+            persist_many=lambda rows: release.wait(2),
+            persist_one=Mock(),
+            batch_size=1,
+            flush_interval=30.0,
+            max_buffer=1,
+        )
+        self.addCleanup(sink.shutdown, 1.0)
+        self.addCleanup(release.set)
+
+        first = sink.submit({"action": "first"})
+        accepted = [sink.submit({"action": "next"}) for _ in range(3)]
+
+        self.assertIsNotNone(first)
+        self.assertIn(None, accepted)
+
+    def test_failed_batch_falls_back_to_row_writes(self):
+        persist_one = Mock()
+        on_flush = Mock()
+        sink = AuditBatchSink(
+            persist_many=Mock(side_effect=OperationalError),
+            persist_one=persist_one,
+            batch_size=2,
+            flush_interval=30.0,
+            on_flush=on_flush,
+        )
+        sink.submit({"action": "a"})
+        sink.submit({"action": "b"})
+
+        with patch("auditlog.infrastructure.batch_sink.logger.exception"):
+            sink.shutdown(2.0)
+
+        self.assertEqual(persist_one.call_count, 2)
+        on_flush.assert_called_with(2, "fallback")
+
+    def test_shutdown_drains_buffer_and_stops_accepting(self):
+        sink, written = self._sink()
+        future = sink.submit({"action": "late"})
+
+        sink.shutdown(2.0)
+
+        self.assertTrue(future.done())
+        self.assertEqual(written, [[{"action": "late"}]])
+        self.assertIsNone(sink.submit({"action": "after"}))
+        self.assertEqual(sink.pending(), [])
+
+
+@override_settings(AUDIT_BATCH_ENABLED=True, AUDIT_BATCH_SIZE=50, AUDIT_BATCH_FLUSH_MS=20)
+class AuditBatchWriteServiceTests(TransactionTestCase):
+    def setUp(self):
+        write_service.shutdown_audit_sink()
+        self.addCleanup(write_service.shutdown_audit_sink)
+
+    def test_wait_for_audit_event_waits_for_batched_row(self):
+        async def run():
+            task = write_service.audit_security_event("batch.event", reason="x")
+            await write_service.wait_for_audit_event(task)
+
+        async_to_sync(run)()
+
+        event = AuditEvent.objects.get(action="batch.event")
+        self.assertEqual(event.metadata, {"reason": "x"})
+
+    def test_sync_callers_are_buffered_and_drained_on_shutdown(self):
+        write_service.audit_security_event("batch.sync", reason="a")
+        write_service.audit_security_event("batch.sync", reason="b")
+
+        write_service.shutdown_audit_sink()
+
+        self.assertEqual(AuditEvent.objects.filter(action="batch.sync").count(), 2)
+
+    def test_overflow_writes_directly_and_is_counted(self):
+        sink = write_service.get_audit_sink()
+        with patch.object(sink, "submit", return_value=None), patch(
+            "auditlog.application.write_service.observe_audit_overflow"
+        ) as overflow_mock:
+            result = write_service.audit_security_event("batch.overflow")
+
+        self.assertIsNone(result)
+        overflow_mock.assert_called_once()
+        self.assertTrue(AuditEvent.objects.filter(action="batch.overflow").exists())
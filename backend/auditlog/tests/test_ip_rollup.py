@@ -0,0 +1,93 @@
+"""Tests for the per-(ip, day) audit rollup."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from auditlog.application import ip_rollup_service
+from auditlog.domain.sketch import DistinctSketch
+from auditlog.models import AuditEvent, AuditIpDailySummary
+
+
+class DistinctSketchTests(SimpleTestCase):
+    def test_small_counts_are_exact_and_duplicates_ignored(self):
+        sketch = DistinctSketch()
+        sketch.update([1, 2, 3, 2, 1])
+
+        self.assertEqual(DistinctSketch().estimate(), 0)
+        self.assertEqual(sketch.estimate(), 3)
+
+    def test_large_counts_stay_within_error_bound(self):
+        sketch = DistinctSketch()
+        sketch.update(range(20000))
+
+        self.assertAlmostEqual(sketch.estimate(), 20000, delta=20000 * 0.1)
+
+    def test_merge_is_union_and_survives_serialization(self):
+        first, second = DistinctSketch(), DistinctSketch()
+        first.update(range(0, 600))
+        second.update(range(400, 1000))
+
+        restored = DistinctSketch.from_bytes(first.to_bytes())
+        restored.merge(second)
+
+        self.assertAlmostEqual(restored.estimate(), 1000, delta=100)
+        with self.assertRaises(ValueError):
+            restored.merge(DistinctSketch(precision=8))
+
+
+class IpRollupRefreshTests(TestCase):
+    def _event(self, ip: str, user_id: int | None, age: timedelta) -> AuditEvent:
+        event = AuditEvent.objects.create(action="http.request", ip=ip, actor_user_id_snapshot=user_id, success=True)
+        AuditEvent.objects.filter(pk=event.pk).update(created_at=timezone.now() - age)
+        return event
+
+    def test_refresh_is_incremental(self):
+        self._event("10.0.0.1", 1, timedelta(hours=2))
+        self._event("10.0.0.1", None, timedelta(hours=1))
+        self._event("", 3, timedelta(hours=1))
+
+        self.assertEqual(ip_rollup_service.refresh_ip_rollup(settle_seconds=0), 3)
+        self._event("10.0.0.1", 2, timedelta(minutes=30))
+        self.assertEqual(ip_rollup_service.refresh_ip_rollup(settle_seconds=0), 1)
+        self.assertEqual(ip_rollup_service.refresh_ip_rollup(settle_seconds=0), 0)
+
+        summary = AuditIpDailySummary.objects.get(ip="10.0.0.1")
+        self.assertEqual((summary.total_events, summary.anonymous_events), (3, 1))
+        self.assertEqual(DistinctSketch.from_bytes(summary.account_sketch).estimate(), 2)
+        self.assertEqual(AuditIpDailySummary.objects.count(), 1)
+
+    def test_fresh_events_wait_for_settle_window(self):
+        self._event("10.0.0.2", 1, timedelta(hours=1))
+        fresh = AuditEvent.objects.create(action="http.request", ip="10.0.0.2", success=True)
+        self._event("10.0.0.2", 2, timedelta(hours=1))
+
+        self.assertEqual(ip_rollup_service.refresh_ip_rollup(settle_seconds=60), 1)
+        self.assertEqual(ip_rollup_service.get_ip_rollup_checkpoint().last_event_id, fresh.pk - 1)
+
+    def test_batches_and_days_are_split(self):
+        for days_ago in (0, 0, 1, 2):
+            self._event("10.0.0.3", days_ago, timedelta(days=days_ago, minutes=5))
+
+        processed = ip_rollup_service.refresh_ip_rollup(batch_size=1, max_batches=3, settle_seconds=0)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(ip_rollup_service.refresh_ip_rollup(batch_size=1, settle_seconds=0), 1)
+        self.assertEqual(AuditIpDailySummary.objects.filter(ip="10.0.0.3").count(), 3)
+        self.assertEqual(ip_rollup_service.purge_ip_rollup_before(timezone.localdate() - timedelta(days=1)), 1)
+
+    def test_command_rebuilds_from_scratch(self):
+        self._event("10.0.0.4", 1, timedelta(hours=1))
+        ip_rollup_service.refresh_ip_rollup(settle_seconds=0)
+        AuditIpDailySummary.objects.update(total_events=99)
+
+        out = StringIO()
+        call_command("refresh_audit_ip_rollup", "--rebuild", stdout=out)
+
+        self.assertIn("добавлено 1", out.getvalue())
+        self.assertEqual(AuditIpDailySummary.objects.get(ip="10.0.0.4").total_events, 1)
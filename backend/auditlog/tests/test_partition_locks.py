@@ -0,0 +1,92 @@
+"""Checks that partition DDL gives up on a busy parent table instead of queueing writes.
+
+Skipped on other backends; CI runs it in the PostgreSQL job. Each test builds a
+small partitioned `auditlog_auditevent` in a scratch schema and holds a lock on
+it from a second connection.
+"""
+
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.db import connection, connections
+from django.test import SimpleTestCase
+
+from auditlog.infrastructure import partitions
+
+SCRATCH_SCHEMA = "audit_partition_lock_test"
+PARENT = f'"{SCRATCH_SCHEMA}"."{partitions.PARENT_TABLE}"'
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+class AuditPartitionLockTimeoutTests(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{SCRATCH_SCHEMA}" CASCADE')
+            cursor.execute(f'CREATE SCHEMA "{SCRATCH_SCHEMA}"')
+            cursor.execute(f'SET search_path TO "{SCRATCH_SCHEMA}", public')
+            cursor.execute(
+                f'CREATE TABLE "{partitions.PARENT_TABLE}" (id bigint, created_at timestamptz NOT NULL) '
+                "PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(f'CREATE TABLE "{partitions.DEFAULT_PARTITION}" PARTITION OF "{partitions.PARENT_TABLE}" DEFAULT')
+            cursor.execute(
+                f'CREATE TABLE "{partitions.PARENT_TABLE}_p202601" PARTITION OF "{partitions.PARENT_TABLE}" '
+                "FOR VALUES FROM ('2026-01-01') TO ('2026-02-01')"
+            )
+        self.blocker = connections.create_connection("default")
+        self.addCleanup(self.blocker.close)
+        patcher = patch.multiple(partitions, LOCK_TIMEOUT="100ms", LOCK_RETRY_DELAY=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET search_path")
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{SCRATCH_SCHEMA}" CASCADE')
+
+    def _hold_parent_lock(self) -> None:
+        # ACCESS SHARE is what every running audit query holds; it conflicts with the DDL.
+        self.blocker.set_autocommit(False)
+        with self.blocker.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {PARENT} IN ACCESS SHARE MODE")
+
+    def _release_parent_lock(self, *args) -> None:
+        self.blocker.rollback()
+        self.blocker.set_autocommit(True)
+
+    def _partition_names(self) -> list[str]:
+        return [partition.name for partition in partitions.list_partitions()]
+
+    def test_busy_parent_skips_creation_and_drop(self):
+        self._hold_parent_lock()
+        try:
+            created = partitions.ensure_future_partitions(0, "month", now=_utc(2026, 3, 10))
+            dropped = partitions.drop_partitions_before(_utc(2026, 2, 10))
+        finally:
+            self._release_parent_lock()
+
+        self.assertEqual(created, [])
+        self.assertEqual(dropped, [])
+        self.assertIn(f"{partitions.PARENT_TABLE}_p202601", self._partition_names())
+
+    def test_lock_released_between_attempts_lets_ddl_through(self):
+        self._hold_parent_lock()
+        try:
+            with patch.object(partitions.time, "sleep", side_effect=self._release_parent_lock) as sleep:
+                dropped = partitions.drop_partitions_before(_utc(2026, 2, 10))
+        finally:
+            if not self.blocker.get_autocommit():
+                self._release_parent_lock()
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(dropped, [f"{partitions.PARENT_TABLE}_p202601"])
+        self.assertNotIn(f"{partitions.PARENT_TABLE}_p202601", self._partition_names())
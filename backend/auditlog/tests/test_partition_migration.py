@@ -0,0 +1,129 @@
+"""Runs the audit partitioning migration against a real PostgreSQL database.
+
+Skipped on other backends; CI runs it in the PostgreSQL job. The migration
+works on whatever `auditlog_auditevent` the search path resolves first, so
+each test builds a pre-0003 table in a scratch schema and partitions it.
+"""
+
+from __future__ import annotations
+
+import importlib
+import unittest
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase
+
+migration = importlib.import_module("auditlog.migrations.0003_partition_audit_events")
+
+SCRATCH_SCHEMA = "audit_partition_migration_test"
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+class AuditPartitionMigrationTests(SimpleTestCase):
+    # No transaction wrapping: CREATE INDEX CONCURRENTLY needs autocommit. Nothing
+    # outside the scratch schema is written, so there is nothing to flush either.
+    databases = {"default"}
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.apps = executor.loader.project_state(("auditlog", "0002_audit_action_aggregate")).apps
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{SCRATCH_SCHEMA}" CASCADE')
+            cursor.execute(f'CREATE SCHEMA "{SCRATCH_SCHEMA}"')
+            cursor.execute(f'SET search_path TO "{SCRATCH_SCHEMA}", public')
+        with connection.schema_editor(atomic=False) as editor:
+            editor.create_model(self.apps.get_model("auditlog", "AuditEvent"))
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET search_path")
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{SCRATCH_SCHEMA}" CASCADE')
+
+    def _insert_events(self, count: int) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO "{migration.PARENT}" (
+                    created_at, action, protocol, method, path, status_code, success,
+                    is_authenticated, actor_username_snapshot, ip, request_id, metadata
+                )
+                SELECT now() - make_interval(secs => g), 'http.request', 'http', 'GET', '/', 200, true,
+                    false, '', '198.51.100.1', '', '{{}}'
+                FROM generate_series(1, %s) AS g
+                """,
+                [count],
+            )
+
+    def _migrate(self) -> None:
+        with connection.schema_editor(atomic=False) as editor:
+            migration.partition_audit_events(self.apps, editor)
+
+    def _fetch(self, sql: str, params=None) -> list[tuple]:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params or [])
+            return cursor.fetchall()
+
+    def test_partitions_existing_table_without_rebuilding_indexes(self):
+        self._insert_events(500)
+        legacy_indexes_before = self._fetch(
+            "SELECT count(*) FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+            [SCRATCH_SCHEMA, migration.PARENT],
+        )[0][0]
+
+        self._migrate()
+
+        partitions = self._fetch(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY child.relname
+            """,
+            [migration.PARENT],
+        )
+        self.assertEqual([row[0] for row in partitions], [migration.DEFAULT, migration.LEGACY])
+        primary_key = self._fetch(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [migration.PARENT],
+        )
+        self.assertEqual(primary_key, [("PRIMARY KEY (id, created_at)",)])
+        # The legacy table keeps its own indexes plus the prebuilt (id, created_at) one; ATTACH adopted them.
+        legacy_indexes_after = self._fetch(
+            "SELECT count(*) FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+            [SCRATCH_SCHEMA, migration.LEGACY],
+        )[0][0]
+        self.assertEqual(legacy_indexes_after, legacy_indexes_before + 1)
+        checks = self._fetch(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'c'",
+            [migration.PARENT],
+        )
+        self.assertTrue(checks)
+        self.assertNotIn((migration.RANGE_CHECK,), checks)
+
+        self._insert_events(1)
+        self.assertEqual(self._fetch(f'SELECT count(*), max(id) FROM "{migration.PARENT}"'), [(501, 501)])
+
+        # Re-running is a no-op once the table is partitioned.
+        self._migrate()
+
+    def test_resumes_after_interrupted_preparation(self):
+        self._insert_events(10)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE UNIQUE INDEX "{migration.ID_CREATED_INDEX}" ON "{migration.PARENT}" (id, created_at)'
+            )
+            cursor.execute(
+                f'ALTER TABLE "{migration.PARENT}" ADD CONSTRAINT "{migration.RANGE_CHECK}" '
+                "CHECK (created_at < '2999-01-01') NOT VALID"
+            )
+
+        self._migrate()
+
+        bounds = self._fetch(
+            "SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE oid = to_regclass(%s)",
+            [migration.LEGACY],
+        )
+        self.assertNotIn("2999", bounds[0][0])
+        self.assertEqual(self._fetch(f'SELECT count(*) FROM "{migration.PARENT}"'), [(10,)])
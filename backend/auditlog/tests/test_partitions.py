@@ -0,0 +1,90 @@
+"""Tests for audit table partition helpers."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from auditlog.infrastructure import partitions
+from auditlog.infrastructure.partitions import AuditPartition
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class AuditPartitionHelpersTests(SimpleTestCase):
+    def test_periods_and_names(self):
+        moment = _utc(2026, 12, 31, 23, 59)
+
+        self.assertEqual(partitions.period_start(moment, "month"), _utc(2026, 12, 1))
+        self.assertEqual(partitions.next_period(_utc(2026, 12, 1), "month"), _utc(2027, 1, 1))
+        self.assertEqual(partitions.next_period(_utc(2026, 12, 31), "day"), _utc(2027, 1, 1))
+        self.assertEqual(partitions.partition_name(_utc(2026, 12, 1), "month"), "auditlog_auditevent_p202612")
+        self.assertEqual(partitions.partition_name(_utc(2026, 12, 31), "day"), "auditlog_auditevent_p20261231")
+
+    def test_parse_partition_bound(self):
+        ranged = partitions.parse_partition_bound(
+            "auditlog_auditevent_p202601",
+            "FOR VALUES FROM ('2026-01-01 00:00:00+00') TO ('2026-02-01 00:00:00+00')",
+        )
+        legacy = partitions.parse_partition_bound(
+            "auditlog_auditevent_legacy",
+            "FOR VALUES FROM (MINVALUE) TO ('2026-01-01 00:00:00+00')",
+        )
+        default = partitions.parse_partition_bound("auditlog_auditevent_default", "DEFAULT")
+
+        self.assertEqual((ranged.lower, ranged.upper), (_utc(2026, 1, 1), _utc(2026, 2, 1)))
+        self.assertEqual((legacy.lower, legacy.upper), (None, _utc(2026, 1, 1)))
+        self.assertTrue(default.is_default)
+
+    def test_ensure_future_partitions_skips_covered_periods(self):
+        existing = [
+            AuditPartition("auditlog_auditevent_legacy", None, _utc(2026, 2, 1)),
+            AuditPartition("auditlog_auditevent_default", None, None, is_default=True),
+        ]
+        conn = MagicMock(vendor="postgresql", alias="default")
+        cursor = conn.cursor.return_value.__enter__.return_value
+        with patch.object(partitions, "is_partitioned", return_value=True), patch.object(
+            partitions, "list_partitions", return_value=existing
+        ), patch.object(partitions.transaction, "atomic"):
+            created = partitions.ensure_future_partitions(2, "month", now=_utc(2026, 1, 15), using=conn)
+
+        self.assertEqual(created, ["auditlog_auditevent_p202602", "auditlog_auditevent_p202603"])
+        self.assertEqual(cursor.execute.call_args_list[0].args[0], "SET LOCAL lock_timeout = '2s'")
+        first_sql = cursor.execute.call_args_list[1].args[0]
+        self.assertIn("FROM ('2026-02-01T00:00:00+00:00') TO ('2026-03-01T00:00:00+00:00')", first_sql)
+
+    def test_drop_partitions_before_keeps_straddling_and_default(self):
+        existing = [
+            AuditPartition("auditlog_auditevent_legacy", None, _utc(2026, 1, 1)),
+            AuditPartition("auditlog_auditevent_p202601", _utc(2026, 1, 1), _utc(2026, 2, 1)),
+            AuditPartition("auditlog_auditevent_p202602", _utc(2026, 2, 1), _utc(2026, 3, 1)),
+            AuditPartition("auditlog_auditevent_default", None, None, is_default=True),
+        ]
+        conn = MagicMock(vendor="postgresql", alias="default")
+        cursor = conn.cursor.return_value.__enter__.return_value
+        with patch.object(partitions, "list_partitions", return_value=existing), patch.object(
+            partitions.transaction, "atomic"
+        ):
+            dropped = partitions.drop_partitions_before(_utc(2026, 2, 10), using=conn)
+
+        self.assertEqual(dropped, ["auditlog_auditevent_legacy", "auditlog_auditevent_p202601"])
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(statements[0], "SET LOCAL lock_timeout = '2s'")
+        self.assertEqual(statements[1], 'ALTER TABLE "auditlog_auditevent" DETACH PARTITION "auditlog_auditevent_legacy"')
+        self.assertEqual(statements[2], 'DROP TABLE "auditlog_auditevent_legacy"')
+
+
+class AuditPartitionCommandTests(TestCase):
+    def test_commands_are_noops_on_plain_tables(self):
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(partitions.drop_partitions_before(_utc(2030, 1, 1)), [])
+
+        out = StringIO()
+        call_command("create_audit_partitions", stdout=out)
+        self.assertIn("не секционирована", out.getvalue())
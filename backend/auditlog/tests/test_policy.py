@@ -0,0 +1,90 @@
+"""Tests for per-action audit sampling and tiering."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auditlog.application import aggregate_service, write_service
+from auditlog.domain.policy import AuditPolicy, AuditPolicyTable, AuditTier, parse_policy_spec
+from auditlog.models import AuditActionAggregate, AuditEvent
+
+
+class AuditPolicyTableTests(SimpleTestCase):
+    def test_parse_policy_spec(self):
+        self.assertEqual(parse_policy_spec("persist"), AuditPolicy())
+        self.assertEqual(parse_policy_spec(" LOG "), AuditPolicy(tier=AuditTier.LOG_ONLY))
+        self.assertEqual(parse_policy_spec("sample:0.25"), AuditPolicy(tier=AuditTier.SAMPLE, sample_rate=0.25))
+        for bad in ("sample", "sample:x", "sample:1.5", "drop"):
+            with self.subTest(spec=bad), self.assertRaises(ValueError):
+                parse_policy_spec(bad)
+
+    def test_exact_match_beats_longest_prefix(self):
+        table = AuditPolicyTable(["ws.*=log", "ws.message.*=aggregate", "ws.message.sent=sample:0.5"])
+
+        self.assertEqual(table.resolve("ws.message.sent").tier, AuditTier.SAMPLE)
+        self.assertEqual(table.resolve("ws.message.edited").tier, AuditTier.AGGREGATE)
+        self.assertEqual(table.resolve("ws.connect.accepted").tier, AuditTier.LOG_ONLY)
+        self.assertEqual(table.resolve("http.request").tier, AuditTier.PERSIST)
+
+    def test_security_and_failed_events_are_never_downgraded(self):
+        table = AuditPolicyTable(["*=aggregate"])
+
+        self.assertEqual(table.resolve("auth.login.success").tier, AuditTier.PERSIST)
+        self.assertEqual(table.resolve("ws.connect.denied").tier, AuditTier.PERSIST)
+        self.assertEqual(table.resolve("ws.message.rejected").tier, AuditTier.PERSIST)
+        self.assertEqual(table.resolve("http.request", success=False).tier, AuditTier.PERSIST)
+        self.assertEqual(table.resolve("http.request").tier, AuditTier.AGGREGATE)
+
+    def test_malformed_entry_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AuditPolicyTable(["http.request"])
+
+
+class AuditPolicyWriteTests(TestCase):
+    def setUp(self):
+        aggregate_service._counts.clear()
+        self.addCleanup(aggregate_service._counts.clear)
+
+    @override_settings(AUDIT_ACTION_POLICIES=["ws.message.sent=log"])
+    def test_log_only_action_logs_without_row(self):
+        with patch("auditlog.application.write_service._audit_logger.info") as logger_mock:
+            result = write_service.audit_security_event("ws.message.sent", room_id=1)
+
+        self.assertIsNone(result)
+        logger_mock.assert_called_once()
+        self.assertFalse(AuditEvent.objects.filter(action="ws.message.sent").exists())
+
+    @override_settings(AUDIT_ACTION_POLICIES=["http.request=sample:0.5"])
+    def test_sampled_action_keeps_rate_and_counts_the_rest(self):
+        with patch("auditlog.application.write_service.random.random", side_effect=[0.1, 0.9]):
+            write_service.write_event("http.request", protocol="http", status_code=200)
+            write_service.write_event("http.request", protocol="http", status_code=200)
+
+        event = AuditEvent.objects.get(action="http.request")
+        self.assertEqual(event.metadata["sample_rate"], 0.5)
+        self.assertEqual(sum(aggregate_service.pending_aggregate_counts().values()), 1)
+
+    @override_settings(AUDIT_ACTION_POLICIES=["http.request=aggregate"])
+    def test_failed_request_is_persisted_despite_aggregate_policy(self):
+        write_service.write_event("http.request", protocol="http", status_code=403)
+
+        self.assertTrue(AuditEvent.objects.filter(action="http.request", status_code=403).exists())
+        self.assertEqual(aggregate_service.pending_aggregate_counts(), {})
+
+    @override_settings(AUDIT_ACTION_POLICIES=["site.visit=aggregate"])
+    def test_aggregated_actions_flush_into_per_minute_counters(self):
+        minute = datetime(2026, 1, 1, 12, 30, tzinfo=dt_timezone.utc)
+        with patch("auditlog.application.aggregate_service.timezone.now", return_value=minute.replace(second=41)):
+            for _ in range(3):
+                self.assertIsNone(write_service.audit_security_event("site.visit"))
+        self.assertFalse(AuditEvent.objects.filter(action="site.visit").exists())
+
+        self.assertEqual(aggregate_service.flush_audit_aggregates(), 1)
+        aggregate_service.record_aggregated_event("site.visit", now=minute.replace(second=59))
+        aggregate_service.flush_audit_aggregates()
+
+        row = AuditActionAggregate.objects.get(action="site.visit")
+        self.assertEqual((row.bucket_start, row.count), (minute, 4))
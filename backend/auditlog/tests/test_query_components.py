@@ -5,15 +5,19 @@ from __future__ import annotations
 import base64
 import json
 from datetime import timedelta
+from unittest.mock import MagicMock, patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from auditlog.application import query_service
 from auditlog.domain.context import AuditQueryFilters
+from auditlog.infrastructure import estimates
 from auditlog.infrastructure.cursor import decode_cursor, encode_cursor
 from auditlog.infrastructure.models import AuditEvent
 from auditlog.infrastructure.query_builder import apply_filters
+from auditlog.interfaces.admin import EstimatedCountPaginator
 
 
 class AuditCursorTests(TestCase):
@@ -43,6 +47,7 @@ class AuditCursorTests(TestCase):
 
 class AuditQueryComponentsTests(TestCase):
     def setUp(self):
+        cache.clear()
         now = timezone.now()
         self.first = AuditEvent.objects.create(
             action="room.read",
@@ -156,3 +161,50 @@ class AuditQueryComponentsTests(TestCase):
         action_names = {item["action"] for item in counts}
         self.assertIn("room.read", action_names)
         self.assertIn("room.write", action_names)
+
+    @override_settings(AUDIT_ACTION_COUNTS_CACHE_SECONDS=60)
+    def test_action_counts_are_cached_per_filter_set(self):
+        first = query_service.list_action_counts(AuditQueryFilters(action="room.read", limit=5))
+        AuditEvent.objects.create(action="room.read", success=True)
+
+        cached = query_service.list_action_counts(AuditQueryFilters(action="room.write", cursor="x"))
+        filtered = query_service.list_action_counts(AuditQueryFilters(success=True))
+
+        self.assertEqual(cached, first)
+        self.assertEqual({item["action"]: item["count"] for item in filtered}, {"room.read": 2})
+        self.assertEqual(
+            {item["action"]: item["count"] for item in query_service.refresh_action_counts()},
+            {"room.read": 2, "room.write": 1},
+        )
+        self.assertEqual(query_service.list_action_counts(AuditQueryFilters()), query_service.refresh_action_counts())
+
+    @override_settings(AUDIT_ACTION_COUNTS_CACHE_SECONDS=0)
+    def test_action_counts_cache_can_be_disabled(self):
+        query_service.list_action_counts(AuditQueryFilters())
+        AuditEvent.objects.create(action="room.read", success=True)
+
+        counts = {item["action"]: item["count"] for item in query_service.list_action_counts(AuditQueryFilters())}
+        self.assertEqual(counts["room.read"], 2)
+
+
+class AuditCountEstimateTests(TestCase):
+    def test_estimate_reads_planner_rows_on_postgresql(self):
+        conn = MagicMock(vendor="postgresql")
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = [[{"Plan": {"Plan Rows": 123456}}]]
+        with patch.object(estimates, "connections", {"default": conn}):
+            estimate = estimates.estimate_count(AuditEvent.objects.filter(success=True))
+
+        self.assertEqual(estimate, 123456)
+        self.assertTrue(cursor.execute.call_args.args[0].startswith("EXPLAIN (FORMAT JSON) SELECT"))
+
+    def test_paginator_uses_estimate_only_for_large_results(self):
+        AuditEvent.objects.create(action="room.read", success=True)
+        queryset = AuditEvent.objects.order_by("-id")
+
+        self.assertIsNone(estimates.estimate_count(queryset))
+        self.assertEqual(EstimatedCountPaginator(queryset, 10).count, 1)
+        with patch("auditlog.interfaces.admin.estimate_count", return_value=50_000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 10).count, 50_000)
+        with patch("auditlog.interfaces.admin.estimate_count", return_value=5):
+            self.assertEqual(EstimatedCountPaginator(queryset, 10).count, 1)
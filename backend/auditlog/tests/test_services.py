@@ -1,10 +1,14 @@
 from datetime import timedelta
+from io import StringIO
 
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
+from auditlog.application.retention_service import purge_expired_events
 from auditlog.models import AuditEvent
 
 User = get_user_model()
@@ -49,3 +53,53 @@ class AuditSignalsAndCleanupTests(TestCase):
         self.assertFalse(AuditEvent.objects.filter(id=old_event.pk).exists())
         self.assertTrue(AuditEvent.objects.filter(id=fresh_event.pk).exists())
 
+
+    def _create_events(self, count, *, age_days):
+        ids = [
+            AuditEvent.objects.create(action="http.request", protocol="http", success=True, metadata={}).pk
+            for _ in range(count)
+        ]
+        AuditEvent.objects.filter(id__in=ids).update(created_at=timezone.now() - timedelta(days=age_days))
+        return ids
+
+    def test_cleanup_command_deletes_in_batches_and_reports_progress(self):
+        old_ids = self._create_events(5, age_days=365)
+        fresh_ids = self._create_events(2, age_days=1)
+        out = StringIO()
+
+        call_command("cleanup_audit_events", days=180, batch_size=2, stdout=out)
+
+        self.assertFalse(AuditEvent.objects.filter(id__in=old_ids).exists())
+        self.assertEqual(AuditEvent.objects.filter(id__in=fresh_ids).count(), 2)
+        self.assertIn("Пакет 3: удалено 1", out.getvalue())
+        self.assertIn("Удалено 5 событий", out.getvalue())
+
+    def test_cleanup_command_resumes_after_interrupted_run(self):
+        old_ids = self._create_events(5, age_days=365)
+
+        call_command("cleanup_audit_events", days=180, batch_size=2, max_batches=1, stdout=StringIO())
+        self.assertEqual(AuditEvent.objects.filter(id__in=old_ids).count(), 3)
+
+        call_command("cleanup_audit_events", days=180, batch_size=2, stdout=StringIO())
+        self.assertFalse(AuditEvent.objects.filter(id__in=old_ids).exists())
+
+    def test_purge_deletes_each_batch_with_one_statement_without_loading_rows(self):
+        old_ids = self._create_events(4, age_days=365)
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = purge_expired_events(timezone.now() - timedelta(days=180), batch_size=2)
+
+        self.assertEqual(deleted, 4)
+        self.assertFalse(AuditEvent.objects.filter(id__in=old_ids).exists())
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith("DELETE") for sql in statements), 2)
+        self.assertFalse(any('"metadata"' in sql for sql in statements))
+
+    def test_cleanup_command_dry_run_only_estimates(self):
+        old_ids = self._create_events(3, age_days=365)
+        out = StringIO()
+
+        call_command("cleanup_audit_events", days=180, batch_size=2, dry_run=True, stdout=out)
+
+        self.assertEqual(AuditEvent.objects.filter(id__in=old_ids).count(), 3)
+        self.assertIn("3 событий аудита, примерно 2 пакетов", out.getvalue())
@@ -1,5 +1,6 @@
 """API endpoints for the chat subsystem."""
 
+import io
 import json
 import time
 from uuid import UUID
@@ -28,7 +29,6 @@ from .attachment_uploads import (
     AttachmentUploadError,
     abort_attachment_upload,
     append_attachment_upload_chunk,
-    cleanup_expired_attachment_uploads,
     create_attachment_upload,
     ensure_attachment_upload_not_expired,
     finalize_attachment_uploads,
@@ -212,6 +212,16 @@ def _serialize_attachment_item(
             if attachment.thumbnail
             else None
         ),
+        "thumbnailStatus": attachment.thumbnail_status,
+        "thumbnails": [
+            {
+                "url": _build_attachment_url(request, variant.file, room_id),
+                "width": variant.width,
+                "height": variant.height,
+                "contentType": variant.content_type,
+            }
+            for variant in attachment.thumbnail_variants.all()
+        ],
         "width": attachment.width,
         "height": attachment.height,
     }
@@ -709,7 +719,7 @@ def room_messages(request, room_id: int):
         messages_qs = (
             Message.objects.filter(room=room, is_deleted=False)
             .select_related("user", "user__profile", "reply_to", "reply_to__user")
-            .prefetch_related("attachments", "reactions")
+            .prefetch_related("attachments__thumbnail_variants", "reactions")
         )
         if before_id is not None:
             messages_qs = messages_qs.filter(id__lt=before_id)
@@ -1107,6 +1117,7 @@ def _serialize_attachment_upload_session(
         "receivedBytes": upload.received_bytes,
         "chunkSize": upload.chunk_size,
         "status": upload.status,
+        "sha256": upload.checksum_sha256 or None,
         "expiresAt": upload.expires_at.isoformat(),
     }
 
@@ -1203,7 +1214,6 @@ def attachment_uploads_collection(request, room_id: int):
         content_type = str(content_type)
 
     try:
-        cleanup_expired_attachment_uploads(limit=20)
         upload = create_attachment_upload(
             room=room,
             user=request.user,
@@ -1293,7 +1303,12 @@ def attachment_upload_chunk(request, room_id: int, upload_id: UUID):
             code="invalid_offset",
         )
 
-    chunk = bytes(request.body or b"")
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0) or None
+    except ValueError:
+        content_length = None
+    # The body is streamed into the part file instead of being read via request.body.
+    chunk = request.stream or io.BytesIO()
     try:
         with transaction.atomic():
             upload = _get_attachment_upload(
@@ -1306,6 +1321,7 @@ def attachment_upload_chunk(request, room_id: int, upload_id: UUID):
                 upload,
                 offset=offset,
                 chunk=chunk,
+                content_length=content_length,
             )
     except AttachmentUploadError as exc:
         return _attachment_error_response(
@@ -1356,6 +1372,7 @@ def upload_attachments(request, room_id: int):
         qs = (
             MessageAttachment.objects.filter(message__room=room, message__is_deleted=False)
             .select_related("message", "message__user")
+            .prefetch_related("thumbnail_variants")
             .order_by("-id")
         )
         if before_id is not None:
@@ -2,27 +2,44 @@
 
 from __future__ import annotations
 
+import errno
+import hashlib
+import io
 import math
 import mimetypes
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, BinaryIO, cast
 from uuid import UUID, uuid4
 
 from django.conf import settings
 from django.core.files import File
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models.fields.files import FieldFile
 from django.utils import timezone
 
-from messages.models import Message, MessageAttachment, MessageAttachmentUpload
-from messages.thumbnail import generate_thumbnail
-
+from chat_app_django.metrics import observe_upload_sweep
+from messages.models import (
+    Message,
+    MessageAttachment,
+    MessageAttachmentContent,
+    MessageAttachmentUpload,
+    content_blob_name,
+)
+from messages.thumbnail import probe_image_dimensions
+
+from .blob_deletions import enqueue_blob_deletions
 from .services import _delete_attachment_blob
+from .thumbnail_pipeline import enqueue_attachment_thumbnails, share_content_thumbnails
 
 _GENERIC_CONTENT_TYPES = {
     "",
@@ -47,6 +64,15 @@ _ACTIVE_UPLOAD_STATUSES = {
     MessageAttachmentUpload.Status.UPLOADING,
     MessageAttachmentUpload.Status.COMPLETE,
 }
+_UPLOAD_SESSIONS_DIR = "chat_upload_sessions"
+_STREAM_BLOCK_SIZE = 256 * 1024
+_DIGEST_CACHE_SIZE = 512
+
+# Running SHA-256 per upload session, keyed by upload id with the offset it
+# covers. hashlib state cannot be persisted, so a miss (restart, eviction,
+# rolled-back chunk) re-hashes the already received prefix once.
+_digest_lock = threading.Lock()
+_upload_digests: OrderedDict[str, tuple[int, Any]] = OrderedDict()
 
 
 @dataclass(slots=True)
@@ -203,45 +229,168 @@ def build_attachment_upload_storage_name(
     if suffix:
         suffix = suffix[:20]
     now = timezone.now()
-    return f"chat_upload_sessions/{now:%Y/%m}/{upload_id.hex}{suffix}.part"
+    return f"{_UPLOAD_SESSIONS_DIR}/{now:%Y/%m}/{upload_id.hex}{suffix}.part"
+
 
+@dataclass(slots=True)
+class AttachmentUploadSweepResult:
+    """Counts of what one janitor pass removed."""
 
-def cleanup_expired_attachment_uploads(*, limit: int = 50) -> int:
-    """Deletes expired upload sessions and their temporary blobs."""
+    expired_sessions: int = 0
+    orphan_parts: int = 0
 
-    expired_uploads = list(
-        MessageAttachmentUpload.objects.filter(
-            status__in=_ACTIVE_UPLOAD_STATUSES,
-            expires_at__lt=timezone.now(),
-        ).order_by("expires_at")[: max(1, limit)]
-    )
-    if not expired_uploads:
-        return 0
-
-    for upload in expired_uploads:
-        _delete_attachment_blob(
-            default_storage,
-            upload.storage_name,
-            attachment_id=0,
-            field_name="chunk_upload",
+
+def cleanup_expired_attachment_uploads(
+    *,
+    batch_size: int = 100,
+    max_batches: int | None = None,
+    sleep_seconds: float = 0.0,
+) -> int:
+    """Deletes expired upload sessions in batches, then their temporary blobs.
+
+    Rows locked by an in-flight chunk request are skipped and picked up by a
+    later pass.
+    """
+
+    batch_size = max(1, int(batch_size))
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            expired_uploads = list(
+                MessageAttachmentUpload.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=_ACTIVE_UPLOAD_STATUSES,
+                    expires_at__lt=timezone.now(),
+                )
+                .order_by("expires_at")
+                .only("pk", "storage_name")[:batch_size]
+            )
+            if expired_uploads:
+                MessageAttachmentUpload.objects.filter(
+                    pk__in=[upload.pk for upload in expired_uploads]
+                ).delete()
+        if not expired_uploads:
+            break
+
+        for upload in expired_uploads:
+            _discard_upload_digest(upload)
+            _delete_attachment_blob(
+                default_storage,
+                upload.storage_name,
+                attachment_id=0,
+                field_name="chunk_upload",
+            )
+        deleted += len(expired_uploads)
+        batches += 1
+        if len(expired_uploads) < batch_size:
+            break
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)
+    return deleted
+
+
+def _iter_upload_part_names(storage, directory: str = _UPLOAD_SESSIONS_DIR):
+    try:
+        directories, files = storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for file_name in sorted(files):
+        if file_name.endswith(".part"):
+            yield f"{directory}/{file_name}"
+    for child in sorted(directories):
+        yield from _iter_upload_part_names(storage, f"{directory}/{child}")
+
+
+def _is_older_than(storage, name: str, threshold: datetime) -> bool:
+    try:
+        modified_at = storage.get_modified_time(name)
+    except (FileNotFoundError, NotImplementedError, OSError):
+        return False
+    if timezone.is_naive(modified_at):
+        modified_at = timezone.make_aware(modified_at, timezone.get_default_timezone())
+    return modified_at < threshold
+
+
+def cleanup_orphaned_attachment_upload_parts(
+    *,
+    batch_size: int = 100,
+    max_batches: int | None = None,
+    grace_seconds: int = 3600,
+) -> int:
+    """Deletes `chat_upload_sessions/*.part` files that no upload session references.
+
+    Files younger than `grace_seconds` are kept: a session saves its empty part
+    file before its row is committed.
+    """
+
+    batch_size = max(1, int(batch_size))
+    threshold = timezone.now() - timedelta(seconds=max(0, int(grace_seconds)))
+    names = _iter_upload_part_names(default_storage)
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = list(islice(names, batch_size))
+        if not batch:
+            break
+        batches += 1
+        referenced = set(
+            MessageAttachmentUpload.objects.filter(storage_name__in=batch).values_list(
+                "storage_name",
+                flat=True,
+            )
         )
+        for name in batch:
+            if name in referenced or not _is_older_than(default_storage, name, threshold):
+                continue
+            _delete_attachment_blob(
+                default_storage,
+                name,
+                attachment_id=0,
+                field_name="chunk_upload",
+            )
+            deleted += 1
+    return deleted
+
 
-    MessageAttachmentUpload.objects.filter(
-        pk__in=[upload.pk for upload in expired_uploads]
-    ).delete()
-    return len(expired_uploads)
+def sweep_attachment_upload_sessions(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    sleep_seconds: float = 0.0,
+) -> AttachmentUploadSweepResult:
+    """Runs one janitor pass over upload sessions and part files, recording metrics."""
+
+    if batch_size is None:
+        batch_size = int(getattr(settings, "CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE", 100))
+    started = time.perf_counter()
+    result = AttachmentUploadSweepResult(
+        expired_sessions=cleanup_expired_attachment_uploads(
+            batch_size=batch_size,
+            max_batches=max_batches,
+            sleep_seconds=sleep_seconds,
+        ),
+    )
+    result.orphan_parts = cleanup_orphaned_attachment_upload_parts(
+        batch_size=batch_size,
+        max_batches=max_batches,
+        grace_seconds=int(getattr(settings, "CHAT_ATTACHMENT_UPLOAD_ORPHAN_GRACE_SECONDS", 3600)),
+    )
+    observe_upload_sweep(
+        expired_sessions=result.expired_sessions,
+        orphan_parts=result.orphan_parts,
+        duration_seconds=time.perf_counter() - started,
+    )
+    return result
 
 
 def abort_attachment_upload(upload: MessageAttachmentUpload) -> None:
-    """Deletes an in-progress upload session and its temporary blob."""
+    """Deletes an in-progress upload session and queues its temporary blob for deletion."""
 
-    _delete_attachment_blob(
-        default_storage,
-        upload.storage_name,
-        attachment_id=0,
-        field_name="chunk_upload",
-    )
-    upload.delete()
+    with transaction.atomic():
+        enqueue_blob_deletions([(upload.storage_name, "chunk_upload")])
+        upload.delete()
+    _discard_upload_digest(upload)
 
 
 def ensure_attachment_upload_not_expired(
@@ -252,13 +401,10 @@ def ensure_attachment_upload_not_expired(
     if upload.expires_at >= timezone.now():
         return upload
 
-    _delete_attachment_blob(
-        default_storage,
-        upload.storage_name,
-        attachment_id=0,
-        field_name="chunk_upload",
-    )
-    upload.delete()
+    with transaction.atomic():
+        enqueue_blob_deletions([(upload.storage_name, "chunk_upload")])
+        upload.delete()
+    _discard_upload_digest(upload)
     raise AttachmentUploadError(
         "Сессия загрузки истекла. Начните загрузку заново.",
         code="upload_expired",
@@ -276,8 +422,6 @@ def create_attachment_upload(
 ) -> MessageAttachmentUpload:
     """Creates a chunked upload session backed by a temporary file on disk."""
 
-    cleanup_expired_attachment_uploads()
-
     normalized_filename = sanitize_attachment_filename(original_filename)
     if file_size < 0:
         raise AttachmentUploadError(
@@ -316,6 +460,7 @@ def create_attachment_upload(
         received_bytes=0,
         storage_name=saved_storage_name,
         chunk_size=chunk_size,
+        checksum_sha256=hashlib.sha256().hexdigest() if file_size == 0 else "",
         status=(
             MessageAttachmentUpload.Status.COMPLETE
             if file_size == 0
@@ -324,51 +469,52 @@ def create_attachment_upload(
         expires_at=build_attachment_upload_expiration(),
     )
     try:
-        upload.save()
+        with transaction.atomic():
+            upload.save()
     except Exception:
-        _delete_attachment_blob(
-            default_storage,
-            saved_storage_name,
-            attachment_id=0,
-            field_name="chunk_upload",
-        )
+        # Queued outside the failed savepoint; the worker removes the empty blob.
+        enqueue_blob_deletions([(saved_storage_name, "chunk_upload")])
         raise
     return upload
 
 
-def append_attachment_upload_chunk(
-    upload: MessageAttachmentUpload,
-    *,
-    offset: int,
-    chunk: bytes,
-) -> MessageAttachmentUpload:
-    """Appends a single chunk to an upload session after validating the expected offset."""
+def _take_upload_digest(upload: MessageAttachmentUpload, part_path: Path | None):
+    """Returns a SHA-256 object covering the first `received_bytes` of the part file."""
 
-    ensure_attachment_upload_not_expired(upload)
+    with _digest_lock:
+        cached = _upload_digests.pop(str(upload.pk), None)
+    if cached is not None and cached[0] == upload.received_bytes:
+        return cached[1]
 
-    if upload.status == MessageAttachmentUpload.Status.COMPLETE and (
-        upload.received_bytes >= upload.file_size
-    ):
-        raise AttachmentUploadError(
-            "Загрузка уже завершена",
-            code="upload_already_complete",
-            details={"receivedBytes": upload.received_bytes},
-            status_code=409,
-        )
+    digest = hashlib.sha256()
+    remaining = upload.received_bytes
+    if remaining <= 0:
+        return digest
+    source = open(part_path, "rb") if part_path is not None else default_storage.open(upload.storage_name, "rb")
+    with source:
+        while remaining > 0:
+            block = source.read(min(_STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
 
-    if offset != upload.received_bytes:
-        raise AttachmentUploadError(
-            "Смещение чанка не совпадает с прогрессом сервера",
-            code="offset_mismatch",
-            details={
-                "expectedOffset": upload.received_bytes,
-                "receivedOffset": offset,
-            },
-            status_code=409,
-        )
 
+def _store_upload_digest(upload: MessageAttachmentUpload, digest) -> None:
+    with _digest_lock:
+        _upload_digests[str(upload.pk)] = (upload.received_bytes, digest)
+        while len(_upload_digests) > _DIGEST_CACHE_SIZE:
+            _upload_digests.popitem(last=False)
+
+
+def _discard_upload_digest(upload: MessageAttachmentUpload) -> None:
+    with _digest_lock:
+        _upload_digests.pop(str(upload.pk), None)
+
+
+def _validate_chunk_size(upload: MessageAttachmentUpload, chunk_size: int) -> None:
     remaining_bytes = upload.file_size - upload.received_bytes
-    chunk_size = len(chunk)
     if chunk_size == 0:
         raise AttachmentUploadError(
             "Пустой chunk не поддерживается",
@@ -394,8 +540,94 @@ def append_attachment_upload_chunk(
             status_code=413,
         )
 
-    with default_storage.open(upload.storage_name, "ab") as destination:
-        destination.write(chunk)
+
+def _copy_chunk_stream(source: BinaryIO, destination: BinaryIO, digest, *, limit: int) -> int:
+    """Copies at most `limit + 1` bytes block by block, hashing them on the way."""
+
+    written = 0
+    while written <= limit:
+        block = source.read(min(_STREAM_BLOCK_SIZE, limit + 1 - written))
+        if not block:
+            break
+        destination.write(block)
+        digest.update(block)
+        written += len(block)
+    return written
+
+
+def append_attachment_upload_chunk(
+    upload: MessageAttachmentUpload,
+    *,
+    offset: int,
+    chunk: bytes | BinaryIO,
+    content_length: int | None = None,
+) -> MessageAttachmentUpload:
+    """Appends a single chunk to an upload session after validating the expected offset.
+
+    `chunk` may be the request body stream: with a local part file it is copied
+    block by block without holding the whole chunk in memory, and the running
+    SHA-256 of the upload is advanced on the same pass.
+    """
+
+    ensure_attachment_upload_not_expired(upload)
+
+    if upload.status == MessageAttachmentUpload.Status.COMPLETE and (
+        upload.received_bytes >= upload.file_size
+    ):
+        raise AttachmentUploadError(
+            "Загрузка уже завершена",
+            code="upload_already_complete",
+            details={"receivedBytes": upload.received_bytes},
+            status_code=409,
+        )
+
+    if offset != upload.received_bytes:
+        raise AttachmentUploadError(
+            "Смещение чанка не совпадает с прогрессом сервера",
+            code="offset_mismatch",
+            details={
+                "expectedOffset": upload.received_bytes,
+                "receivedOffset": offset,
+            },
+            status_code=409,
+        )
+
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        content_length = len(chunk)
+        chunk = io.BytesIO(chunk)
+    if content_length is not None:
+        _validate_chunk_size(upload, content_length)
+
+    limit = min(upload.file_size - upload.received_bytes, upload.chunk_size)
+    part_path = _storage_local_path(default_storage, upload.storage_name)
+    digest = _take_upload_digest(upload, part_path)
+
+    if part_path is not None:
+        with open(part_path, "r+b") as destination:
+            # Drops the tail of an earlier request that failed mid-stream.
+            destination.seek(upload.received_bytes)
+            destination.truncate()
+            try:
+                chunk_size = _copy_chunk_stream(chunk, destination, digest, limit=limit)
+                _validate_chunk_size(upload, chunk_size)
+                if content_length is not None and chunk_size != content_length:
+                    raise AttachmentUploadError(
+                        "Chunk получен не полностью",
+                        code="incomplete_chunk",
+                        details={"chunkSize": chunk_size, "expectedSize": content_length},
+                    )
+            except BaseException:
+                destination.seek(upload.received_bytes)
+                destination.truncate()
+                raise
+    else:
+        # Storages without a local path cannot truncate, so the bounded chunk
+        # is validated in memory before it is appended.
+        buffered = io.BytesIO()
+        chunk_size = _copy_chunk_stream(chunk, buffered, digest, limit=limit)
+        _validate_chunk_size(upload, chunk_size)
+        with default_storage.open(upload.storage_name, "ab") as destination:
+            destination.write(buffered.getbuffer())
 
     upload.received_bytes += chunk_size
     upload.status = (
@@ -403,8 +635,15 @@ def append_attachment_upload_chunk(
         if upload.received_bytes >= upload.file_size
         else MessageAttachmentUpload.Status.UPLOADING
     )
+    update_fields = ["received_bytes", "status", "expires_at", "updated_at"]
+    if upload.status == MessageAttachmentUpload.Status.COMPLETE:
+        upload.checksum_sha256 = digest.hexdigest()
+        update_fields.append("checksum_sha256")
+        _discard_upload_digest(upload)
+    else:
+        _store_upload_digest(upload, digest)
     upload.expires_at = build_attachment_upload_expiration()
-    upload.save(update_fields=["received_bytes", "status", "expires_at", "updated_at"])
+    upload.save(update_fields=update_fields)
     return upload
 
 
@@ -424,7 +663,11 @@ def _move_storage_blob(
     target_storage,
     target_name: str,
 ) -> bool:
-    """Moves a blob between storages when both resolve to local filesystem paths."""
+    """Moves a blob between storages when both resolve to local filesystem paths.
+
+    A rename is tried first; across filesystems `shutil.copyfile` lets the
+    kernel copy the data (sendfile/copy_file_range) before the source is removed.
+    """
 
     source_path = _storage_local_path(source_storage, source_name)
     target_path = _storage_local_path(target_storage, target_name)
@@ -434,11 +677,33 @@ def _move_storage_blob(
     target_path.parent.mkdir(parents=True, exist_ok=True)
     try:
         os.replace(source_path, target_path)
-    except OSError:
-        return False
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            return False
+        try:
+            shutil.copyfile(source_path, target_path)
+        except OSError:
+            target_path.unlink(missing_ok=True)
+            return False
+        source_path.unlink(missing_ok=True)
     return True
 
 
+def _attachment_target_name(attachment: MessageAttachment, upload: MessageAttachmentUpload) -> str:
+    """Content-addressed name for hashed uploads, the `upload_to` name otherwise.
+
+    A hashed blob may become shared content, served to every later uploader of
+    the same bytes, so it must not carry this uploader's file name or month.
+    """
+
+    if upload.checksum_sha256:
+        suffix = Path(upload.original_filename).suffix.lower()
+        if not (1 < len(suffix) <= 11 and suffix[1:].isascii() and suffix[1:].isalnum()):
+            suffix = ""
+        return content_blob_name("chat_attachments", upload.checksum_sha256, f"{upload.checksum_sha256}{suffix}")
+    return str(attachment.file.field.generate_filename(attachment, upload.original_filename))
+
+
 def _materialize_attachment_file(
     attachment: MessageAttachment,
     upload: MessageAttachmentUpload,
@@ -451,9 +716,7 @@ def _materialize_attachment_file(
 
     file_field = attachment.file.field
     target_storage = attachment.file.storage
-    target_name = str(
-        file_field.generate_filename(attachment, upload.original_filename)
-    ).replace("\\", "/")
+    target_name = _attachment_target_name(attachment, upload).replace("\\", "/")
     target_name = target_storage.get_available_name(
         target_name,
         max_length=file_field.max_length,
@@ -471,14 +734,67 @@ def _materialize_attachment_file(
         return True
 
     with default_storage.open(upload.storage_name, "rb") as source_file:
-        attachment.file.save(
-            upload.original_filename,
-            File(source_file),
-            save=False,
-        )
+        stored_name = target_storage.save(target_name, File(source_file), max_length=file_field.max_length)
+    attachment.file.name = str(stored_name).replace("\\", "/")
+    setattr(attachment.file, "_committed", True)
     return False
 
 
+def _claim_attachment_content(
+    upload: MessageAttachmentUpload,
+) -> MessageAttachmentContent | None:
+    """Locks an already stored blob with the upload's SHA-256 so it is not released meanwhile."""
+
+    if not upload.checksum_sha256:
+        return None
+    content = (
+        MessageAttachmentContent.objects.select_for_update()
+        .filter(sha256=upload.checksum_sha256, file_size=upload.file_size)
+        .first()
+    )
+    return content
+
+
+def _register_attachment_content(
+    upload: MessageAttachmentUpload,
+    stored_file_name: str,
+) -> MessageAttachmentContent | None:
+    """Records a freshly materialized blob as shared content."""
+
+    if not upload.checksum_sha256:
+        return None
+    try:
+        with transaction.atomic():
+            return MessageAttachmentContent.objects.create(
+                sha256=upload.checksum_sha256,
+                file=stored_file_name,
+                file_size=upload.file_size,
+            )
+    except IntegrityError:
+        # A concurrent finalize stored the same bytes first; this copy stays private.
+        return None
+
+
+def _finish_image_attachment(
+    attachment: MessageAttachment,
+    thumbnail_attachment_ids: list[int],
+) -> None:
+    """Reuses thumbnails of the same content or marks the image for the background pipeline."""
+
+    if not attachment.content_type.startswith("image/"):
+        return
+    if share_content_thumbnails(attachment):
+        return
+    # Only the header is read here; the thumbnail itself is rendered
+    # by the background pipeline after commit.
+    dimensions = probe_image_dimensions(attachment.file)
+    if dimensions is not None:
+        attachment.width, attachment.height = dimensions
+        attachment.thumbnail_status = MessageAttachment.ThumbnailStatus.PENDING
+        attachment.save(update_fields=["width", "height", "thumbnail_status"])
+        thumbnail_attachment_ids.append(attachment.pk)
+
+
 def finalize_attachment_uploads(
     *,
     room,
@@ -512,164 +828,138 @@ def finalize_attachment_uploads(
         )
 
     ordered_ids = [str(upload_id) for upload_id in upload_ids]
-    created_files: list[tuple] = []
+    created_files: list[str] = []
     moved_uploads: list[tuple[MessageAttachmentUpload, object, str]] = []
     temp_storage_names: list[str] = []
 
-    with cast(Any, transaction.atomic)():
-        uploads = list(
-            MessageAttachmentUpload.objects.select_for_update()
-            .filter(pk__in=upload_ids, room=room)
-            .order_by("created_at")
-        )
-        uploads_by_id = {str(upload.pk): upload for upload in uploads}
-        missing_upload_ids = [upload_id for upload_id in ordered_ids if upload_id not in uploads_by_id]
-        if missing_upload_ids:
-            raise AttachmentUploadError(
-                "Одна или несколько upload-сессий не найдены",
-                code="upload_not_found",
-                details={"uploadIds": missing_upload_ids},
-                status_code=404,
+    # Blobs written before a failure are queued only after the transaction has
+    # rolled back, so the queue rows survive it.
+    orphaned_blobs: list[tuple[str, str]] = []
+    try:
+        with cast(Any, transaction.atomic)():
+            uploads = list(
+                MessageAttachmentUpload.objects.select_for_update()
+                .filter(pk__in=upload_ids, room=room)
+                .order_by("created_at")
             )
-
-        ordered_uploads = [uploads_by_id[upload_id] for upload_id in ordered_ids]
-        for upload in ordered_uploads:
-            ensure_attachment_upload_not_expired(upload)
-            if upload.user_id != user.pk and not getattr(user, "is_superuser", False):
-                raise AttachmentUploadError(
-                    "Чужая upload-сессия недоступна",
-                    code="upload_forbidden",
-                    status_code=403,
-                )
-            if upload.status != MessageAttachmentUpload.Status.COMPLETE:
-                raise AttachmentUploadError(
-                    f"Файл '{upload.original_filename}' ещё не загружен полностью",
-                    code="upload_incomplete",
-                    details={
-                        "uploadId": str(upload.pk),
-                        "receivedBytes": upload.received_bytes,
-                        "fileSize": upload.file_size,
-                    },
-                    status_code=409,
-                )
-            if upload.received_bytes != upload.file_size:
+            uploads_by_id = {str(upload.pk): upload for upload in uploads}
+            missing_upload_ids = [upload_id for upload_id in ordered_ids if upload_id not in uploads_by_id]
+            if missing_upload_ids:
                 raise AttachmentUploadError(
-                    f"Файл '{upload.original_filename}' загружен не полностью",
-                    code="upload_size_mismatch",
-                    details={
-                        "uploadId": str(upload.pk),
-                        "receivedBytes": upload.received_bytes,
-                        "fileSize": upload.file_size,
-                    },
-                    status_code=409,
+                    "Одна или несколько upload-сессий не найдены",
+                    code="upload_not_found",
+                    details={"uploadIds": missing_upload_ids},
+                    status_code=404,
                 )
 
-        message_kwargs = {
-            "message_content": message_content,
-            "username": message_username,
-            "user": user,
-            "profile_pic": profile_pic,
-            "room": room,
-        }
-        if reply_to_id:
-            message_kwargs["reply_to_id"] = reply_to_id
-        message = Message.objects.create(**message_kwargs)
-
-        attachments: list[MessageAttachment] = []
-        try:
+            ordered_uploads = [uploads_by_id[upload_id] for upload_id in ordered_ids]
             for upload in ordered_uploads:
-                attachment = MessageAttachment(
-                    message=message,
-                    original_filename=upload.original_filename,
-                    content_type=upload.content_type,
-                    file_size=upload.file_size,
-                )
-                upload_blob_consumed = _materialize_attachment_file(attachment, upload)
-                stored_file_name = _require_stored_file_name(
-                    attachment.file,
-                    field_name="attachment.file",
-                )
-                if upload_blob_consumed:
-                    moved_uploads.append(
-                        (
-                            upload,
-                            attachment.file.storage,
-                            stored_file_name,
-                        )
+                ensure_attachment_upload_not_expired(upload)
+                if upload.user_id != user.pk and not getattr(user, "is_superuser", False):
+                    raise AttachmentUploadError(
+                        "Чужая upload-сессия недоступна",
+                        code="upload_forbidden",
+                        status_code=403,
                     )
-                else:
-                    created_files.append(
-                        (
-                            attachment.file.storage,
-                            stored_file_name,
-                            0,
-                            "file",
-                        )
+                if upload.status != MessageAttachmentUpload.Status.COMPLETE:
+                    raise AttachmentUploadError(
+                        f"Файл '{upload.original_filename}' ещё не загружен полностью",
+                        code="upload_incomplete",
+                        details={
+                            "uploadId": str(upload.pk),
+                            "receivedBytes": upload.received_bytes,
+                            "fileSize": upload.file_size,
+                        },
+                        status_code=409,
                     )
-                attachment.save()
-
-                if attachment.content_type.startswith("image/"):
-                    thumb_info = generate_thumbnail(attachment.file)
-                    if thumb_info and thumb_info.get("path") is not None:
-                        attachment.thumbnail = thumb_info["path"]
-                        attachment.width = thumb_info.get("width")
-                        attachment.height = thumb_info.get("height")
-                        attachment.save(update_fields=["thumbnail", "width", "height"])
-                        thumbnail_name = _require_stored_file_name(
-                            attachment.thumbnail,
-                            field_name="attachment.thumbnail",
-                        )
-                        created_files.append(
+                if upload.received_bytes != upload.file_size:
+                    raise AttachmentUploadError(
+                        f"Файл '{upload.original_filename}' загружен не полностью",
+                        code="upload_size_mismatch",
+                        details={
+                            "uploadId": str(upload.pk),
+                            "receivedBytes": upload.received_bytes,
+                            "fileSize": upload.file_size,
+                        },
+                        status_code=409,
+                    )
+
+            message_kwargs = {
+                "message_content": message_content,
+                "username": message_username,
+                "user": user,
+                "profile_pic": profile_pic,
+                "room": room,
+            }
+            if reply_to_id:
+                message_kwargs["reply_to_id"] = reply_to_id
+            message = Message.objects.create(**message_kwargs)
+
+            attachments: list[MessageAttachment] = []
+            thumbnail_attachment_ids: list[int] = []
+            try:
+                for upload in ordered_uploads:
+                    attachment = MessageAttachment(
+                        message=message,
+                        original_filename=upload.original_filename,
+                        content_type=upload.content_type,
+                        file_size=upload.file_size,
+                    )
+                    content = _claim_attachment_content(upload)
+                    if content is not None:
+                        # Same bytes are already stored: reference that blob and drop the upload.
+                        attachment.content = content
+                        attachment.file.name = content.file.name
+                        setattr(attachment.file, "_committed", True)
+                        attachment.save()
+                        _finish_image_attachment(attachment, thumbnail_attachment_ids)
+                        attachments.append(attachment)
+                        temp_storage_names.append(upload.storage_name)
+                        continue
+
+                    upload_blob_consumed = _materialize_attachment_file(attachment, upload)
+                    stored_file_name = _require_stored_file_name(
+                        attachment.file,
+                        field_name="attachment.file",
+                    )
+                    attachment.content = _register_attachment_content(upload, stored_file_name)
+                    if upload_blob_consumed:
+                        moved_uploads.append(
                             (
-                                attachment.thumbnail.storage,
-                                thumbnail_name,
-                                attachment.pk,
-                                "thumbnail",
+                                upload,
+                                attachment.file.storage,
+                                stored_file_name,
                             )
                         )
-                    elif thumb_info:
-                        attachment.width = thumb_info.get("width")
-                        attachment.height = thumb_info.get("height")
-                        attachment.save(update_fields=["width", "height"])
-
-                attachments.append(attachment)
-                if not upload_blob_consumed:
-                    temp_storage_names.append(upload.storage_name)
-        except Exception:
-            for upload, storage, blob_name in reversed(moved_uploads):
-                if _move_storage_blob(
-                    storage,
-                    blob_name,
-                    default_storage,
-                    upload.storage_name,
-                ):
-                    continue
-                _delete_attachment_blob(
-                    storage,
-                    blob_name,
-                    attachment_id=0,
-                    field_name="file",
-                )
-            for storage, blob_name, attachment_id, field_name in created_files:
-                _delete_attachment_blob(
-                    storage,
-                    blob_name,
-                    attachment_id=attachment_id,
-                    field_name=field_name,
-                )
-            raise
-
-        upload_pk_list = [upload.pk for upload in ordered_uploads]
-
-        def _cleanup_materialized_uploads() -> None:
-            for storage_name in temp_storage_names:
-                _delete_attachment_blob(
-                    default_storage,
-                    storage_name,
-                    attachment_id=0,
-                    field_name="chunk_upload",
-                )
-            MessageAttachmentUpload.objects.filter(pk__in=upload_pk_list).delete()
-
-        transaction.on_commit(_cleanup_materialized_uploads)
-        return message, attachments
+                    else:
+                        created_files.append(stored_file_name)
+                    attachment.save()
+                    _finish_image_attachment(attachment, thumbnail_attachment_ids)
+
+                    attachments.append(attachment)
+                    if not upload_blob_consumed:
+                        temp_storage_names.append(upload.storage_name)
+            except Exception:
+                for upload, storage, blob_name in reversed(moved_uploads):
+                    if not _move_storage_blob(
+                        storage,
+                        blob_name,
+                        default_storage,
+                        upload.storage_name,
+                    ):
+                        orphaned_blobs.append((blob_name, "file"))
+                orphaned_blobs.extend((blob_name, "file") for blob_name in created_files)
+                raise
+
+            upload_pk_list = [upload.pk for upload in ordered_uploads]
+            enqueue_blob_deletions((storage_name, "chunk_upload") for storage_name in temp_storage_names)
+            transaction.on_commit(
+                lambda: MessageAttachmentUpload.objects.filter(pk__in=upload_pk_list).delete(),
+            )
+            if thumbnail_attachment_ids:
+                transaction.on_commit(lambda: enqueue_attachment_thumbnails(thumbnail_attachment_ids))
+            return message, attachments
+    except Exception:
+        if orphaned_blobs:
+            enqueue_blob_deletions(orphaned_blobs)
+        raise
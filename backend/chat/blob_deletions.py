@@ -0,0 +1,148 @@
+"""Durable, batched deletion of attachment blobs.
+
+Request and websocket paths never touch storage when files go away: they
+insert `MessageAttachmentBlobDeletion` rows in the same transaction that
+removes the database rows. A background worker claims due rows in batches,
+deletes the blobs and persists retry/backoff state for failures (for
+example a file still locked on Windows), so slow or flaky storage never
+blocks a worker thread serving users.
+
+All attachment, thumbnail and upload-session fields use the default
+storage, so queue rows only record the storage name.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from chat_app_django.metrics import observe_blob_deletions
+from messages.models import MessageAttachmentBlobDeletion
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch is invisible to other workers for this long; rows of a
+# crashed worker become due again afterwards.
+_CLAIM_LEASE = timedelta(minutes=5)
+_MAX_BACKOFF_SECONDS = 3600
+
+
+def enqueue_blob_deletions(names: Iterable[tuple[str, str]]) -> int:
+    """Ставит blob-файлы в очередь на удаление в текущей транзакции.
+
+    Args:
+        names: Пары (имя в storage, имя поля модели) для журналирования.
+
+    Returns:
+        Количество добавленных записей очереди.
+    """
+    rows: list[MessageAttachmentBlobDeletion] = []
+    seen: set[str] = set()
+    for storage_name, field_name in names:
+        normalized_name = str(storage_name or "").strip()
+        if not normalized_name or normalized_name in seen:
+            continue
+        seen.add(normalized_name)
+        rows.append(MessageAttachmentBlobDeletion(storage_name=normalized_name, field_name=field_name))
+    if rows:
+        MessageAttachmentBlobDeletion.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _retry_delay_seconds(attempts: int) -> int:
+    base_delay = int(getattr(settings, "CHAT_ATTACHMENT_BLOB_DELETE_RETRY_SECONDS", 30))
+    return min(_MAX_BACKOFF_SECONDS, max(1, base_delay) * 2 ** max(0, attempts - 1))
+
+
+def _claim_due_batch(batch_size: int) -> list[MessageAttachmentBlobDeletion]:
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            MessageAttachmentBlobDeletion.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        if rows:
+            MessageAttachmentBlobDeletion.objects.filter(pk__in=[row.pk for row in rows]).update(
+                next_attempt_at=now + _CLAIM_LEASE,
+            )
+    return rows
+
+
+def _record_failures(failures: list[tuple[MessageAttachmentBlobDeletion, Exception]]) -> tuple[int, int]:
+    max_attempts = max(1, int(getattr(settings, "CHAT_ATTACHMENT_DELETE_RETRIES", 8)))
+    now = timezone.now()
+    retried = 0
+    dropped: list[int] = []
+    for row, exc in failures:
+        attempts = row.attempts + 1
+        if attempts >= max_attempts:
+            logger.error(
+                "Giving up deleting attachment %s blob path=%s after %s attempts: %s",
+                row.field_name,
+                row.storage_name,
+                attempts,
+                exc,
+            )
+            dropped.append(row.pk)
+            continue
+        MessageAttachmentBlobDeletion.objects.filter(pk=row.pk).update(
+            attempts=attempts,
+            next_attempt_at=now + timedelta(seconds=_retry_delay_seconds(attempts)),
+            last_error=f"{type(exc).__name__}: {exc}"[:1000],
+        )
+        retried += 1
+    if dropped:
+        MessageAttachmentBlobDeletion.objects.filter(pk__in=dropped).delete()
+    return retried, len(dropped)
+
+
+def process_blob_deletions(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    """Удаляет blob-файлы из очереди пакетами с сохранением состояния повторов.
+
+    Args:
+        batch_size: Размер пакета (по умолчанию CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE).
+        max_batches: Максимальное число пакетов за вызов.
+
+    Returns:
+        Количество удаленных blob-файлов.
+    """
+    if batch_size is None:
+        batch_size = int(getattr(settings, "CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE", 100))
+    batch_size = max(1, int(batch_size))
+    deleted_total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _claim_due_batch(batch_size)
+        if not rows:
+            break
+        batches += 1
+
+        deleted: list[int] = []
+        failures: list[tuple[MessageAttachmentBlobDeletion, Exception]] = []
+        for row in rows:
+            try:
+                default_storage.delete(row.storage_name)
+            except Exception as exc:
+                failures.append((row, exc))
+                continue
+            deleted.append(row.pk)
+
+        if deleted:
+            MessageAttachmentBlobDeletion.objects.filter(pk__in=deleted).delete()
+        retried, dropped = _record_failures(failures)
+        observe_blob_deletions(deleted=len(deleted), retried=retried, dropped=dropped)
+        deleted_total += len(deleted)
+        if len(rows) < batch_size:
+            break
+    return deleted_total
@@ -1,6 +1,5 @@
 """WebSocket consumer для комнатного чата."""
 
-import asyncio
 import json
 import logging
 import time
@@ -22,18 +21,24 @@ from chat_app_django.metrics import (
     observe_chat_message_rejected,
     observe_ws_connect,
     observe_ws_event,
+    observe_ws_handler_duration,
 )
-from chat_app_django.media_utils import build_profile_url, serialize_avatar_crop
+from chat_app_django.media_utils import build_profile_url, build_room_media_url, serialize_avatar_crop
 from chat_app_django.security.audit import (
     audit_ws_event,
-    drain_pending_audit_events,
-    wait_for_audit_event,
+    wait_for_connection_audit_events,
 )
-from chat_app_django.security.rate_limit import DbRateLimiter
+from chat_app_django.security.rate_limit import CacheRateLimiter, DbRateLimiter, TokenBucket
 from chat_app_django.security.rate_limit_config import (
+    chat_message_connection_rate_limit_policy,
+    chat_message_rate_limit_disabled,
+    chat_message_rate_limit_policy,
     ws_connect_rate_limit_disabled,
     ws_connect_rate_limit_policy,
 )
+from chat_app_django.sync_hops import timed_sync_to_async
+from chat_app_django.ws_multiplex import is_multiplexed_scope
+from chat_app_django.ws_timers import connection_timers
 
 from messages.models import Message
 from roles.access import can_read, can_write
@@ -52,6 +57,8 @@ from .unread_push import broadcast_room_unread_state_for_user
 
 logger = logging.getLogger(__name__)
 
+_CONTROL_EVENT_TYPES = frozenset({"set_active_room", "typing", "ping", "mark_read"})
+
 
 @dataclass(frozen=True, slots=True)
 class ChatActorSnapshot:
@@ -80,6 +87,19 @@ def _ws_connect_rate_limited(scope, endpoint: str) -> bool:
     return DbRateLimiter.is_limited(scope_key=scope_key, policy=policy)
 
 
+def _chat_message_user_rate_limited(user_id: int) -> int | None:
+    """Counts one message send in the cluster-wide per-user window.
+
+    Args:
+        user_id: Идентификатор отправителя сообщения.
+
+    Returns:
+        None when sending is allowed, otherwise retry-after in seconds.
+    """
+    scope_key = f"rl:chat:message:{user_id}"
+    return CacheRateLimiter.hit(scope_key, chat_message_rate_limit_policy())
+
+
 class NonCanonicalChatRouteConsumer(AsyncWebsocketConsumer):
     """Rejects non-canonical text websocket chat routes without surfacing Daphne route errors."""
 
@@ -116,7 +136,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self._metrics_room_kind = "unknown"
         self._last_activity = 0.0
         self._last_typing_broadcast = 0.0
-        self._idle_task = None
+        self._idle_timer = None
+        self._message_bucket: TokenBucket | None = None
+        self._message_throttle_reported = False
         self.room = None
         self.room_id = None
         self.room_name = ""
@@ -201,7 +223,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         self.actor_avatar_crop = None
         self.actor_profile_url = None
 
-    @sync_to_async
+    @timed_sync_to_async("actor_snapshot")
     def _resolve_actor_snapshot(self, user) -> ChatActorSnapshot:
         public_ref = (user_public_ref(user) or "").strip()
         username = (user_public_username(user) or "").strip() or public_ref
@@ -282,7 +304,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if isinstance(kwargs, dict):
                 room_id_raw = kwargs.get("room_id")
 
-        if await sync_to_async(_ws_connect_rate_limited)(self.scope, "chat"):
+        multiplexed = is_multiplexed_scope(self.scope)
+        if not multiplexed and await sync_to_async(_ws_connect_rate_limited)(self.scope, "chat"):
             observe_ws_connect(
                 "chat",
                 auth_state=self._metrics_auth_state,
@@ -378,9 +401,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         self._last_activity = time.monotonic()
         self._last_typing_broadcast = 0.0
-        self._idle_task = None
-        if self.chat_idle_timeout > 0:
-            self._idle_task = asyncio.create_task(self._idle_watchdog())
+        self._idle_timer = None
+        # Multiplexed sub-streams share the idle watchdog of the outer socket.
+        if self.chat_idle_timeout > 0 and not multiplexed:
+            self._idle_timer = connection_timers().schedule_every(
+                max(10, min(60, self.chat_idle_timeout)),
+                self._idle_tick,
+            )
 
     async def disconnect(self, code):
         """Корректно закрывает соединение и освобождает ресурсы.
@@ -390,13 +417,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
         """
         self._connection_closed = True
         self._refresh_metrics_context()
-        idle_task = getattr(self, "_idle_task", None)
-        if idle_task:
-            idle_task.cancel()
-            try:
-                await idle_task
-            except asyncio.CancelledError:
-                pass
+        idle_timer = getattr(self, "_idle_timer", None)
+        if idle_timer is not None:
+            idle_timer.cancel()
         delivery_dispatcher = getattr(self, "_delivery_dispatcher", None)
         if delivery_dispatcher is not None:
             await delivery_dispatcher.flush()
@@ -411,15 +434,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 room_kind=disconnect_room_kind,
             )
             observe_ws_event("chat", event_type="disconnect", result="accepted")
-        audit_task = audit_ws_event(
+        audit_ws_event(
             "ws.disconnect",
             self.scope,
             endpoint="chat",
             code=code,
             room_id=active_room_id,
         )
-        await wait_for_audit_event(audit_task)
-        await drain_pending_audit_events()
+        await wait_for_connection_audit_events(self.scope)
 
     @staticmethod
     def _is_closed_send_error(exc: Exception) -> bool:
@@ -452,7 +474,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return False
 
     async def receive(self, text_data=None, bytes_data=None):
-        """Принимает входящее сообщение и маршрутизирует его обработку.
+        """Принимает входящее сообщение и замеряет время его обработки.
+
+        Args:
+            text_data: Параметр text data, используемый в логике функции.
+            bytes_data: Параметр bytes data, используемый в логике функции.
+        """
+        started = time.perf_counter()
+        self._handled_event_type = "invalid"
+        try:
+            await self._receive(text_data, bytes_data)
+        finally:
+            observe_ws_handler_duration(
+                "chat",
+                event_type=self._handled_event_type,
+                duration_seconds=time.perf_counter() - started,
+            )
+
+    async def _receive(self, text_data=None, bytes_data=None):
+        """Маршрутизирует входящее сообщение по типу события.
 
         Args:
             text_data: Параметр text data, используемый в логике функции.
@@ -479,6 +519,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         event_type = text_data_json.get("type")
+        # Anything that is not a control event goes down the message send path.
+        self._handled_event_type = (
+            event_type if isinstance(event_type, str) and event_type in _CONTROL_EVENT_TYPES else "message_send"
+        )
         client_message_id = self._normalize_client_message_id(
             text_data_json.get("clientMessageId")
         )
@@ -551,6 +595,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
             audit_ws_event("ws.message.rejected", self.scope, endpoint="chat", reason="unauthorized")
             return
 
+        retry_after = await self._message_send_throttled(user)
+        if retry_after is not None:
+            observe_ws_event("chat", event_type="message_send", result="rejected")
+            observe_chat_message_rejected(room_kind=self._metrics_room_kind, reason="rate_limited")
+            if not self._message_throttle_reported:
+                # One audit row per throttled burst: flood traffic must not reach the DB.
+                self._message_throttle_reported = True
+                audit_ws_event(
+                    "ws.message.rate_limited",
+                    self.scope,
+                    endpoint="chat",
+                    room_id=active_room.pk,
+                    retry_after=retry_after,
+                )
+            await self._send_json(
+                self._message_error_payload(
+                    "rate_limited",
+                    client_message_id,
+                    retry_after=retry_after,
+                )
+            )
+            return
+        self._message_throttle_reported = False
+
         if active_room.kind == Room.Kind.DIRECT and await self._is_blocked_in_dm(active_room, user):
             observe_ws_event("chat", event_type="message_send", result="rejected")
             observe_chat_message_rejected(room_kind=self._metrics_room_kind, reason="forbidden")
@@ -644,6 +712,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
         )
 
+    async def _message_send_throttled(self, user) -> int | None:
+        """Applies per-connection and per-user send throttling without DB access.
+
+        Args:
+            user: Пользователь, отправляющий сообщение.
+
+        Returns:
+            None when sending is allowed, otherwise retry-after in seconds.
+        """
+        if chat_message_rate_limit_disabled():
+            return None
+        bucket = getattr(self, "_message_bucket", None)
+        if bucket is None:
+            bucket = TokenBucket.from_policy(chat_message_connection_rate_limit_policy())
+            self._message_bucket = bucket
+        retry_after = bucket.consume()
+        if retry_after is not None:
+            return retry_after
+        user_id = getattr(user, "pk", None)
+        if user_id is None:
+            return None
+        return await sync_to_async(_chat_message_user_rate_limited)(int(user_id))
+
     async def chat_message(self, event):
         """Транслирует событие нового сообщения в WebSocket-клиенты комнаты.
 
@@ -674,17 +765,18 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
 
-    async def _idle_watchdog(self):
-        """Выполняет вспомогательную обработку для idle watchdog."""
-        interval = max(10, min(60, self.chat_idle_timeout))
-        while True:
-            await asyncio.sleep(interval)
-            if (time.monotonic() - self._last_activity) <= self.chat_idle_timeout:
-                continue
-            await self.close(code=CHAT_CLOSE_IDLE_CODE)
-            break
+    async def _idle_tick(self) -> bool:
+        """Закрывает соединение, если в чате не было активности дольше idle-timeout.
 
-    @sync_to_async
+        Returns:
+            False после закрытия соединения.
+        """
+        if (time.monotonic() - self._last_activity) <= self.chat_idle_timeout:
+            return True
+        await self.close(code=CHAT_CLOSE_IDLE_CODE)
+        return False
+
+    @timed_sync_to_async("load_room")
     def _load_room(self, room_id: int):
         """Загружает room из хранилища с необходимыми проверками.
 
@@ -699,7 +791,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except (OperationalError, ProgrammingError, IntegrityError):
             return None
 
-    @sync_to_async
+    @timed_sync_to_async("can_read")
     def _can_read(self, room: Room, user) -> bool:
         """Проверяет условие read и возвращает логический результат.
 
@@ -712,7 +804,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         """
         return can_read(room, user)
 
-    @sync_to_async
+    @timed_sync_to_async("can_write")
     def _can_write(self, room: Room, user) -> bool:
         """Проверяет условие write и возвращает логический результат.
 
@@ -763,7 +855,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         """
         return user_display_name(user)
 
-    @sync_to_async
+    @timed_sync_to_async("save_message")
     def save_message(self, message, user, username, profile_pic, room, reply_to_id=None):
         """Сохраняет сообщение и готовит payload для дальнейшей рассылки.
 
@@ -813,7 +905,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except (AttributeError, ObjectDoesNotExist):
             return "", None
 
-    @sync_to_async
+    @timed_sync_to_async("dm_block_check")
     def _is_blocked_in_dm(self, room: Room, user) -> bool:
         """Проверяет условие blocked in dm и возвращает логический результат.
 
@@ -837,7 +929,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return False
         return is_blocked_between(user, other_user)
 
-    @sync_to_async
+    @timed_sync_to_async("direct_inbox_targets")
     def _build_direct_inbox_targets(self, room_id, sender_id, message, created_at):
         """Compatibility helper for direct-inbox fanout target construction."""
         from .delivery import _build_direct_inbox_events_sync
@@ -980,7 +1072,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         })
     # Формирование данных reply-сообщения.
 
-    @sync_to_async
+    @timed_sync_to_async("reply_data")
     def _get_reply_data(self, saved_message):
         """Возвращает reply data из текущего контекста или хранилища.
 
@@ -1042,6 +1134,33 @@ class ChatConsumer(AsyncWebsocketConsumer):
             "deletedBy": event["deletedBy"],
         })
 
+    async def chat_attachment_ready(self, event):
+        """Транслирует готовность миниатюры вложения.
+
+        Args:
+            event: Событие для логирования или трансляции.
+        """
+        self._last_activity = time.monotonic()
+        await self._send_json({
+            "type": "attachment_ready",
+            "messageId": event["messageId"],
+            "attachmentId": event["attachmentId"],
+            "roomId": event.get("roomId"),
+            "thumbnailUrl": build_room_media_url(self.scope, event.get("thumbnail"), event.get("roomId")),
+            "thumbnailStatus": event["thumbnailStatus"],
+            "thumbnails": [
+                {
+                    "url": build_room_media_url(self.scope, variant.get("name"), event.get("roomId")),
+                    "width": variant.get("width"),
+                    "height": variant.get("height"),
+                    "contentType": variant.get("contentType"),
+                }
+                for variant in event.get("thumbnails") or []
+            ],
+            "width": event.get("width"),
+            "height": event.get("height"),
+        })
+
     async def chat_reaction_add(self, event):
         """Транслирует добавление реакции на сообщение.
 
@@ -1135,7 +1254,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         observe_ws_event("chat", event_type="mark_read", result="accepted")
         await self._do_mark_read(user, room, last_read_id)
 
-    @sync_to_async
+    @timed_sync_to_async("mark_read")
     def _do_mark_read(self, user, room, last_read_id):
         """Выполняет вспомогательную обработку для do mark read.
 
@@ -7,11 +7,10 @@ import logging
 from dataclasses import dataclass
 from typing import Any
 
-from channels.db import database_sync_to_async
-
 from chat_app_django.media_utils import build_profile_url, serialize_avatar_crop
 from chat_app_django.metrics import observe_ws_event
 from chat_app_django.security.audit import audit_ws_event, wait_for_audit_event
+from chat_app_django.sync_hops import timed_sync_to_async
 from direct_inbox.state import (
     is_room_active,
     mark_read as mark_direct_read,
@@ -203,9 +202,8 @@ def _build_room_unread_events_sync(room_id: int) -> list[dict[str, Any]]:
     return build_room_unread_events_for_user_ids(get_room_unread_recipient_user_ids(room))
 
 
-_build_room_unread_events = database_sync_to_async(
+_build_room_unread_events = timed_sync_to_async("room_unread_build", database=True)(
     _build_room_unread_events_sync,
-    thread_sensitive=True,
 )
 
 
@@ -321,7 +319,6 @@ def _build_direct_inbox_events_sync(
     return events
 
 
-_build_direct_inbox_events = database_sync_to_async(
+_build_direct_inbox_events = timed_sync_to_async("direct_inbox_build", database=True)(
     _build_direct_inbox_events_sync,
-    thread_sensitive=True,
 )
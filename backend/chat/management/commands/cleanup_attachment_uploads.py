@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.attachment_uploads import sweep_attachment_upload_sessions
+
+
+class Command(BaseCommand):
+    """Класс Command реализует management-команду Django."""
+    help = "Удаляет истекшие upload-сессии вложений и осиротевшие .part-файлы пакетами."
+
+    def add_arguments(self, parser):
+        """Добавляет arguments в целевую коллекцию.
+
+        Args:
+            parser: Парсер аргументов management-команды.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Количество сессий или файлов в одном пакете "
+            "(по умолчанию CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Максимальное число пакетов на этап за запуск (по умолчанию без ограничения).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Пауза между пакетами сессий в секундах.",
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает данные.
+
+        Args:
+            *args: Дополнительные позиционные аргументы вызова.
+            **options: Опции, переданные в management-команду.
+        """
+        batch_size = options["batch_size"]
+        if batch_size is None:
+            batch_size = int(settings.CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE)
+        if batch_size < 1:
+            raise CommandError("--batch-size должно быть >= 1")
+        max_batches = options["max_batches"]
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches должно быть >= 1")
+        sleep_seconds = float(options["sleep"])
+        if sleep_seconds < 0:
+            raise CommandError("--sleep должно быть >= 0")
+
+        result = sweep_attachment_upload_sessions(
+            batch_size=batch_size,
+            max_batches=max_batches,
+            sleep_seconds=sleep_seconds,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Удалено {result.expired_sessions} истекших upload-сессий "
+                f"и {result.orphan_parts} осиротевших .part-файлов"
+            )
+        )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.blob_deletions import process_blob_deletions
+
+
+class Command(BaseCommand):
+    """Класс Command реализует management-команду Django."""
+    help = "Удаляет blob-файлы вложений из очереди удаления пакетами."
+
+    def add_arguments(self, parser):
+        """Добавляет arguments в целевую коллекцию.
+
+        Args:
+            parser: Парсер аргументов management-команды.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Количество записей очереди в одном пакете "
+            "(по умолчанию CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Максимальное число пакетов за запуск (по умолчанию без ограничения).",
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает данные.
+
+        Args:
+            *args: Дополнительные позиционные аргументы вызова.
+            **options: Опции, переданные в management-команду.
+        """
+        batch_size = options["batch_size"]
+        if batch_size is None:
+            batch_size = int(settings.CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE)
+        if batch_size < 1:
+            raise CommandError("--batch-size должно быть >= 1")
+        max_batches = options["max_batches"]
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches должно быть >= 1")
+
+        deleted = process_blob_deletions(batch_size=batch_size, max_batches=max_batches)
+        self.stdout.write(self.style.SUCCESS(f"Удалено {deleted} blob-файлов из очереди"))
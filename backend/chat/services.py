@@ -15,6 +15,8 @@ from django.utils import timezone
 from messages.models import (
     Message,
     MessageAttachment,
+    MessageAttachmentContent,
+    MessageAttachmentThumbnail,
     MessageReadReceipt,
     MessageReadState,
     Reaction,
@@ -23,6 +25,9 @@ from messages.models import (
 from roles.access import has_permission
 from roles.permissions import Perm
 from rooms.models import Room
+from users.application.media_access_service import invalidate_media_paths
+
+from .blob_deletions import enqueue_blob_deletions
 
 logger = logging.getLogger(__name__)
 
@@ -199,10 +204,10 @@ def _delete_attachment_blob(
 
 def _collect_attachment_blobs(message: Message) -> list[AttachmentBlob]:
     blobs: list[AttachmentBlob] = []
-    attachments = MessageAttachment.objects.filter(message=message).only(
-        "id",
-        "file",
-        "thumbnail",
+    attachments = (
+        MessageAttachment.objects.filter(message=message, content__isnull=True)
+        .only("id", "file", "thumbnail")
+        .prefetch_related("thumbnail_variants")
     )
     for attachment in attachments:
         file_field = attachment.file
@@ -216,8 +221,14 @@ def _collect_attachment_blobs(message: Message) -> list[AttachmentBlob]:
                 ),
             )
 
-        thumbnail_field = attachment.thumbnail
-        if thumbnail_field and thumbnail_field.name:
+        thumbnail_fields = [attachment.thumbnail]
+        thumbnail_fields.extend(variant.file for variant in attachment.thumbnail_variants.all())
+        # The legacy `thumbnail` field points at one of the variants; delete each blob once.
+        seen_thumbnail_names: set[str] = set()
+        for thumbnail_field in thumbnail_fields:
+            if not thumbnail_field or not thumbnail_field.name or thumbnail_field.name in seen_thumbnail_names:
+                continue
+            seen_thumbnail_names.add(thumbnail_field.name)
             blobs.append(
                 AttachmentBlob(
                     storage=thumbnail_field.storage,
@@ -230,14 +241,58 @@ def _collect_attachment_blobs(message: Message) -> list[AttachmentBlob]:
     return blobs
 
 
-def _delete_attachment_blobs(blobs: list[AttachmentBlob]) -> None:
-    for blob in blobs:
-        _delete_attachment_blob(
-            blob.storage,
-            blob.name,
-            attachment_id=blob.attachment_id,
-            field_name=blob.field_name,
-        )
+def attachment_thumbnail_names(attachment: MessageAttachment) -> list[str]:
+    """Возвращает имена всех миниатюр вложения, включая legacy-поле `thumbnail`.
+
+    Args:
+        attachment: Вложение, которое будет удалено.
+
+    Returns:
+        Уникальные имена blob-файлов миниатюр.
+    """
+    names = [attachment.thumbnail.name or ""]
+    names.extend(attachment.thumbnail_variants.values_list("file", flat=True))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def release_attachment_content(content_id: int, thumbnail_names: list[str]) -> bool:
+    """Удаляет общее содержимое, на которое больше не ссылается ни одно вложение.
+
+    Вызывается после удаления вложения в той же транзакции, в том числе при
+    каскадном удалении комнаты, сообщения или пользователя. Живость решается
+    подсчетом оставшихся вложений под блокировкой строки содержимого, поэтому
+    параллельные удаления и дедупликация новых загрузок не теряют ссылки.
+
+    Args:
+        content_id: Идентификатор общего содержимого удаленного вложения.
+        thumbnail_names: Миниатюры удаленного вложения; они общие для всех
+            вложений этого содержимого.
+
+    Returns:
+        True, если содержимое удалено и его blob-файлы поставлены в очередь.
+    """
+    content = MessageAttachmentContent.objects.select_for_update().filter(pk=content_id).first()
+    if content is None or content.attachments.exists():
+        return False
+    blob_names = [(content.file.name, "file"), *((name, "thumbnail") for name in thumbnail_names)]
+    content.delete()
+    if getattr(settings, "CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE", True):
+        enqueue_blob_deletions(blob_names)
+    return True
+
+
+def _attachment_media_paths(message: Message) -> list[str]:
+    """Storage names of the message's files and thumbnails, for media-access cache invalidation."""
+    names: set[str] = set()
+    for file_name, thumbnail_name in MessageAttachment.objects.filter(message=message).values_list(
+        "file",
+        "thumbnail",
+    ):
+        names.update(name for name in (file_name, thumbnail_name) if name)
+    names.update(
+        MessageAttachmentThumbnail.objects.filter(attachment__message=message).values_list("file", flat=True)
+    )
+    return sorted(names)
 
 
 def edit_message(user, room: Room, message_id: int, new_content: str) -> Message:
@@ -305,17 +360,18 @@ def delete_message(user, room: Room, message_id: int) -> DeletedMessage:
             deleted_by_id=user.pk,
         )
 
-        attachment_blobs = (
-            _collect_attachment_blobs(msg)
-            if getattr(settings, "CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE", True)
-            else []
-        )
+        delete_files = getattr(settings, "CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE", True)
+        attachment_blobs = _collect_attachment_blobs(msg) if delete_files else []
+        media_paths = _attachment_media_paths(msg)
 
+        # Shared contents are released by the attachment post_delete handler (messages.signals).
         msg.delete()
-        if attachment_blobs:
+        if media_paths:
             transaction.on_commit(
-                lambda blobs=attachment_blobs: _delete_attachment_blobs(blobs),
+                lambda room_id=room.pk, paths=media_paths: invalidate_media_paths(room_id, paths),
             )
+        if attachment_blobs:
+            enqueue_blob_deletions((blob.name, blob.field_name) for blob in attachment_blobs)
 
     return deleted
 
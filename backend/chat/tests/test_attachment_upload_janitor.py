@@ -0,0 +1,94 @@
+"""Tests for the upload-session janitor."""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat import attachment_uploads
+from chat.attachment_uploads import create_attachment_upload, sweep_attachment_upload_sessions
+from chat.blob_deletions import process_blob_deletions
+from chat.tests.media_utils import workspace_media_root
+from messages.models import MessageAttachmentBlobDeletion, MessageAttachmentUpload
+from rooms.models import Room
+
+User = get_user_model()
+
+
+@override_settings(CHAT_ATTACHMENT_UPLOAD_ORPHAN_GRACE_SECONDS=3600)
+class AttachmentUploadJanitorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="janitor_user", password="pass12345")
+        self.room = Room.objects.create(name="janitor", kind=Room.Kind.PRIVATE, created_by=self.user)
+
+    def _upload(self, name: str, *, expired: bool) -> MessageAttachmentUpload:
+        upload = create_attachment_upload(
+            room=self.room,
+            user=self.user,
+            original_filename=name,
+            content_type="application/octet-stream",
+            file_size=10,
+        )
+        if expired:
+            MessageAttachmentUpload.objects.filter(pk=upload.pk).update(
+                expires_at=timezone.now() - timedelta(minutes=1),
+            )
+        return upload
+
+    def test_command_sweeps_expired_sessions_in_batches_off_the_request_path(self):
+        with workspace_media_root():
+            expired = [self._upload(f"old{index}.bin", expired=True) for index in range(3)]
+            # Creating a session no longer cleans up somebody else's expired uploads.
+            active = self._upload("fresh.bin", expired=False)
+            self.assertEqual(MessageAttachmentUpload.objects.count(), 4)
+
+            out = StringIO()
+            call_command("cleanup_attachment_uploads", "--batch-size", "2", stdout=out)
+
+            self.assertIn("3", out.getvalue())
+            self.assertEqual(list(MessageAttachmentUpload.objects.values_list("pk", flat=True)), [active.pk])
+            self.assertTrue(default_storage.exists(active.storage_name))
+            self.assertFalse(any(default_storage.exists(upload.storage_name) for upload in expired))
+
+    def test_failed_session_save_queues_empty_blob_for_the_worker(self):
+        with workspace_media_root():
+            with patch.object(MessageAttachmentUpload, "save", side_effect=IntegrityError("boom")), patch.object(
+                attachment_uploads,
+                "_delete_attachment_blob",
+            ) as delete_inline:
+                with self.assertRaises(IntegrityError):
+                    self._upload("broken.bin", expired=False)
+
+            delete_inline.assert_not_called()
+            queued = list(MessageAttachmentBlobDeletion.objects.values_list("storage_name", flat=True))
+            self.assertEqual(len(queued), 1)
+            self.assertTrue(default_storage.exists(queued[0]))
+            self.assertEqual(process_blob_deletions(), 1)
+            self.assertFalse(default_storage.exists(queued[0]))
+
+    def test_sweep_removes_only_old_unreferenced_part_files(self):
+        with workspace_media_root():
+            referenced = self._upload("kept.bin", expired=False)
+            old_orphan = default_storage.save("chat_upload_sessions/2020/01/old.part", ContentFile(b"x"))
+            young_orphan = default_storage.save("chat_upload_sessions/2020/01/young.part", ContentFile(b"x"))
+            two_hours_ago = time.time() - 7200
+            for name in (old_orphan, referenced.storage_name):
+                os.utime(default_storage.path(name), (two_hours_ago, two_hours_ago))
+
+            result = sweep_attachment_upload_sessions(batch_size=1)
+
+            self.assertEqual((result.expired_sessions, result.orphan_parts), (0, 1))
+            self.assertFalse(default_storage.exists(old_orphan))
+            self.assertTrue(default_storage.exists(young_orphan))
+            self.assertTrue(default_storage.exists(referenced.storage_name))
@@ -15,6 +15,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.test import TransactionTestCase, override_settings
 
+from auditlog.models import AuditEvent
 from chat.consumers import ChatConsumer
 from messages.models import Message
 from roles.models import Membership, Role
@@ -23,6 +24,7 @@ from rooms.models import Room
 from chat.routing import websocket_urlpatterns as chat_ws
 from direct_inbox.routing import websocket_urlpatterns as di_ws
 from users.identity import user_public_ref, user_public_username
+from users.models import SecurityRateLimitBucket
 
 User = get_user_model()
 application = URLRouter(chat_ws + di_ws)
@@ -556,11 +558,11 @@ class ChatConsumerTests(TransactionTestCase):
 
     @override_settings(
         RATE_LIMITS={
-            "chat_message_send": {"limit": 1, "window_seconds": 30},
+            "chat_message_send": {"limit": 2, "window_seconds": 30},
         }
     )
-    def test_fast_consecutive_messages_are_not_rate_limited(self):
-        """Message cooldown is intentionally not applied to chat sending."""
+    def test_fast_consecutive_messages_within_limit_are_accepted(self):
+        """Consecutive messages below the send limit are delivered without errors."""
         async def run():
             """Проверяет сценарий `run`."""
             communicator, connected, _ = await self._connect(
@@ -583,4 +585,119 @@ class ChatConsumerTests(TransactionTestCase):
             Message.objects.filter(room=self.private_room, message_content='second').exists()
         )
 
+    @override_settings(
+        RATE_LIMITS={
+            "chat_message_send": {"limit": 5, "window_seconds": 60},
+            "chat_message_send_connection": {"limit": 100, "window_seconds": 60},
+        }
+    )
+    def test_message_flood_is_rate_limited_before_reaching_database(self):
+        """Load test: a flood of sends persists only the allowed messages and one audit row."""
+        flood_size = 60
+
+        async def run():
+            """Проверяет сценарий `run`."""
+            communicator, connected, _ = await self._connect(
+                f'/ws/chat/{self.private_room.pk}/',
+                user=self.member,
+            )
+            self.assertTrue(connected)
+
+            for index in range(flood_size):
+                await communicator.send_to(
+                    text_data=json.dumps({'message': f'flood-{index}', 'clientMessageId': f'c-{index}'})
+                )
+
+            accepted = 0
+            limited = []
+            for _ in range(flood_size):
+                payload = json.loads(await communicator.receive_from(timeout=5))
+                if payload.get('error') == 'rate_limited':
+                    limited.append(payload)
+                else:
+                    accepted += 1
+            await communicator.disconnect()
+            return accepted, limited
+
+        accepted, limited = async_to_sync(run)()
+
+        self.assertEqual(accepted, 5)
+        self.assertEqual(len(limited), flood_size - 5)
+        self.assertTrue(all(item.get('retry_after', 0) >= 1 for item in limited))
+        self.assertEqual(limited[0].get('clientMessageId'), 'c-5')
+        self.assertEqual(
+            Message.objects.filter(room=self.private_room, message_content__startswith='flood-').count(),
+            5,
+        )
+        self.assertEqual(AuditEvent.objects.filter(action='ws.message.rate_limited').count(), 1)
+        self.assertFalse(
+            SecurityRateLimitBucket.objects.filter(scope_key__startswith='rl:chat:message:').exists()
+        )
+
+    @override_settings(
+        RATE_LIMITS={
+            "chat_message_send": {"limit": 100, "window_seconds": 60},
+            "chat_message_send_connection": {"limit": 2, "window_seconds": 60},
+        }
+    )
+    def test_connection_burst_bucket_limits_single_socket(self):
+        """The per-connection bucket rejects bursts while the user window is still open."""
+        async def run():
+            """Проверяет сценарий `run`."""
+            communicator, connected, _ = await self._connect(
+                f'/ws/chat/{self.private_room.pk}/',
+                user=self.member,
+            )
+            self.assertTrue(connected)
+            for text in ('one', 'two', 'three'):
+                await communicator.send_to(text_data=json.dumps({'message': text}))
+            first = json.loads(await communicator.receive_from(timeout=2))
+            second = json.loads(await communicator.receive_from(timeout=2))
+            third = json.loads(await communicator.receive_from(timeout=2))
+            await communicator.disconnect()
+            return first, second, third
+
+        first, second, third = async_to_sync(run)()
+        self.assertEqual(first.get('message'), 'one')
+        self.assertEqual(second.get('message'), 'two')
+        self.assertEqual(third.get('error'), 'rate_limited')
+        self.assertGreaterEqual(third.get('retry_after'), 1)
+        self.assertFalse(Message.objects.filter(message_content='three').exists())
+
+    @override_settings(
+        RATE_LIMITS={
+            "chat_message_send": {"limit": 1, "window_seconds": 60},
+        }
+    )
+    def test_user_send_limit_is_shared_between_connections(self):
+        """The per-user counter is shared by every socket of the same user."""
+        async def run():
+            """Проверяет сценарий `run`."""
+            first_socket, first_connected, _ = await self._connect(
+                f'/ws/chat/{self.private_room.pk}/',
+                user=self.member,
+            )
+            second_socket, second_connected, _ = await self._connect(
+                f'/ws/chat/{self.private_room.pk}/',
+                user=self.member,
+            )
+            self.assertTrue(first_connected)
+            self.assertTrue(second_connected)
+
+            await first_socket.send_to(text_data=json.dumps({'message': 'from-first'}))
+            accepted = json.loads(await first_socket.receive_from(timeout=2))
+            await second_socket.receive_from(timeout=2)
+
+            await second_socket.send_to(text_data=json.dumps({'message': 'from-second'}))
+            rejected = json.loads(await second_socket.receive_from(timeout=2))
+
+            await first_socket.disconnect()
+            await second_socket.disconnect()
+            return accepted, rejected
+
+        accepted, rejected = async_to_sync(run)()
+        self.assertEqual(accepted.get('message'), 'from-first')
+        self.assertEqual(rejected.get('error'), 'rate_limited')
+        self.assertFalse(Message.objects.filter(message_content='from-second').exists())
+
 
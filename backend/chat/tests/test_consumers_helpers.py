@@ -137,29 +137,54 @@ class ChatConsumerInternalTests(TestCase):
 
     @override_settings(
         RATE_LIMITS={
-            "chat_message_send": {"limit": 2, "window_seconds": 60},
+            "chat_message_send": {"limit": 1, "window_seconds": 60},
         }
     )
-    def test_message_send_rate_limit_is_not_applied(self):
-        """Chat message send no longer uses server-side cooldown."""
+    def test_message_send_rate_limit_uses_cache_not_db_buckets(self):
+        """Chat send throttling keeps its counters out of SecurityRateLimitBucket."""
         consumer = self._consumer()
 
+        self.assertIsNone(async_to_sync(consumer._message_send_throttled)(self.user))
+        retry_after = async_to_sync(consumer._message_send_throttled)(self.user)
+
+        self.assertIsNotNone(retry_after)
+        self.assertGreaterEqual(retry_after, 1)
         key = f'rl:chat:message:{self.user.pk}'
         self.assertFalse(hasattr(consumer, '_rate_limited'))
         self.assertFalse(SecurityRateLimitBucket.objects.filter(scope_key=key).exists())
 
     @override_settings(
         RATE_LIMITS={
-            "chat_message_send": {"limit": 1, "window_seconds": 60},
+            "chat_message_send": {"limit": 1, "window_seconds": 60, "disabled": True},
+            "chat_message_send_connection": {"limit": 1, "window_seconds": 60},
         }
     )
-    def test_message_send_rate_limit_is_not_applied_for_superuser(self):
-        """Superusers also bypass the removed chat message cooldown path."""
-        consumer = self._consumer(user=self.superuser)
+    def test_message_send_rate_limit_can_be_disabled(self):
+        """The emergency switch disables both connection and user throttles."""
+        consumer = self._consumer()
 
-        key = f'rl:chat:message:{self.superuser.pk}'
-        self.assertFalse(hasattr(consumer, '_rate_limited'))
-        self.assertFalse(SecurityRateLimitBucket.objects.filter(scope_key=key).exists())
+        for _ in range(3):
+            self.assertIsNone(async_to_sync(consumer._message_send_throttled)(self.user))
+        self.assertIsNone(consumer._message_bucket)
+
+    def test_receive_rate_limited_message_skips_persistence(self):
+        """A throttled send answers with retry_after and never calls save_message."""
+        consumer = self._consumer()
+        consumer.save_message = AsyncMock()
+        consumer._message_send_throttled = AsyncMock(return_value=7)
+
+        with patch("chat.consumers.audit_ws_event") as audit_mock:
+            async_to_sync(consumer.receive)(json.dumps({'message': 'hello', 'clientMessageId': 'm-1'}))
+            async_to_sync(consumer.receive)(json.dumps({'message': 'again'}))
+
+        consumer.save_message.assert_not_awaited()
+        consumer._can_write.assert_not_awaited()
+        self.assertEqual(audit_mock.call_count, 1)
+        payload = json.loads(consumer.send.await_args_list[0].kwargs['text_data'])
+        self.assertEqual(
+            payload,
+            {'error': 'rate_limited', 'clientMessageId': 'm-1', 'retry_after': 7},
+        )
 
     def test_chat_message_serializes_and_sends_payload(self):
         """Проверяет сценарий `test_chat_message_serializes_and_sends_payload`."""
@@ -241,26 +266,12 @@ class ChatConsumerInternalTests(TestCase):
     def test_disconnect_discards_group_when_present(self):
         """Проверяет сценарий `test_disconnect_discards_group_when_present`."""
         consumer = self._consumer()
-        class _IdleTask:
-            """Группирует тестовые сценарии класса `_IdleTask`."""
-            def __init__(self):
-                """Проверяет сценарий `__init__`."""
-                self.cancel = Mock()
-
-            def __await__(self):
-                """Проверяет сценарий `__await__`."""
-                async def _done():
-                    """Проверяет сценарий `_done`."""
-                    return None
-
-                return _done().__await__()
-
-        idle_task = _IdleTask()
-        consumer._idle_task = idle_task
+        idle_timer = Mock()
+        consumer._idle_timer = idle_timer
 
         async_to_sync(consumer.disconnect)(1000)
 
-        idle_task.cancel.assert_called_once()
+        idle_timer.cancel.assert_called_once()
         consumer.channel_layer.group_discard.assert_awaited_once_with(
             'chat_private123',
             'chat.channel',
@@ -272,17 +283,22 @@ class ChatConsumerInternalTests(TestCase):
         consumer.chat_idle_timeout = 1
         consumer._last_activity = 0.0
 
-        async def _fast_sleep(_interval):
-            """Проверяет сценарий `_fast_sleep`."""
-            return None
-
-        with patch('chat.consumers.asyncio.sleep', new=_fast_sleep), patch(
-            'chat.consumers.time.monotonic', return_value=10.0
-        ):
-            async_to_sync(consumer._idle_watchdog)()
+        with patch('chat.consumers.time.monotonic', return_value=10.0):
+            self.assertFalse(async_to_sync(consumer._idle_tick)())
 
         consumer.close.assert_awaited_once_with(code=CHAT_CLOSE_IDLE_CODE)
 
+    def test_idle_tick_keeps_active_connection_open(self):
+        """Не закрывает соединение, пока активность укладывается в idle-timeout."""
+        consumer = self._consumer()
+        consumer.chat_idle_timeout = 60
+        consumer._last_activity = 0.0
+
+        with patch('chat.consumers.time.monotonic', return_value=10.0):
+            self.assertTrue(async_to_sync(consumer._idle_tick)())
+
+        consumer.close.assert_not_awaited()
+
 
 class PresenceConsumerInternalTests(TestCase):
     """Группирует тестовые сценарии класса `PresenceConsumerInternalTests`."""
@@ -375,12 +391,7 @@ class PresenceConsumerInternalTests(TestCase):
         consumer = self._consumer()
         consumer.send = AsyncMock(side_effect=RuntimeError('boom'))
 
-        async def _fast_sleep(_interval):
-            """Проверяет сценарий `_fast_sleep`."""
-            return None
-
-        with patch('presence.consumers.asyncio.sleep', new=_fast_sleep):
-            async_to_sync(consumer._heartbeat)()
+        self.assertFalse(async_to_sync(consumer._heartbeat_tick)())
 
         consumer.send.assert_awaited_once()
 
@@ -389,14 +400,8 @@ class PresenceConsumerInternalTests(TestCase):
         consumer = self._consumer()
         consumer._last_client_activity = 0.0
 
-        async def _fast_sleep(_interval):
-            """Проверяет сценарий `_fast_sleep`."""
-            return None
-
-        with patch('presence.consumers.asyncio.sleep', new=_fast_sleep), patch(
-            'presence.consumers.time.monotonic', return_value=10.0
-        ):
-            async_to_sync(consumer._idle_watchdog)()
+        with patch('presence.consumers.time.monotonic', return_value=10.0):
+            self.assertFalse(async_to_sync(consumer._idle_tick)())
 
         consumer.close.assert_awaited_once_with(code=PRESENCE_CLOSE_IDLE_CODE)
 
@@ -486,8 +491,8 @@ class PresenceConsumerInternalTests(TestCase):
         guest_consumer = self._consumer(user=AnonymousUser())
         guest_consumer.is_guest = True
         guest_consumer.group_name = guest_consumer.group_name_guest
-        guest_consumer._heartbeat_task = None
-        guest_consumer._idle_task = None
+        guest_consumer._heartbeat_timer = None
+        guest_consumer._idle_timer = None
         guest_consumer._remove_guest = AsyncMock()
         guest_consumer._broadcast = AsyncMock()
 
@@ -500,8 +505,8 @@ class PresenceConsumerInternalTests(TestCase):
         auth_consumer = self._consumer()
         auth_consumer.is_guest = False
         auth_consumer.group_name = auth_consumer.group_name_auth
-        auth_consumer._heartbeat_task = None
-        auth_consumer._idle_task = None
+        auth_consumer._heartbeat_timer = None
+        auth_consumer._idle_timer = None
         auth_consumer._remove_user = AsyncMock()
         auth_consumer._broadcast = AsyncMock()
 
@@ -517,13 +522,9 @@ class PresenceConsumerInternalTests(TestCase):
         guest_consumer._add_user = AsyncMock()
         guest_consumer._broadcast = AsyncMock()
 
-        def _fake_task(coro):
-            """Проверяет сценарий `_fake_task`."""
-            coro.close()
-            return AsyncMock(cancel=Mock())
-
-        with patch('presence.consumers.asyncio.create_task', side_effect=_fake_task):
+        with patch('presence.consumers.connection_timers') as timers_mock:
             async_to_sync(guest_consumer.connect)()
+        self.assertEqual(timers_mock.return_value.schedule_every.call_count, 2)
 
         guest_consumer._add_guest.assert_awaited_once_with('session-presence-helper')
         guest_consumer._add_user.assert_not_awaited()
@@ -534,7 +535,7 @@ class PresenceConsumerInternalTests(TestCase):
         auth_consumer._add_user = AsyncMock()
         auth_consumer._broadcast = AsyncMock()
 
-        with patch('presence.consumers.asyncio.create_task', side_effect=_fake_task):
+        with patch('presence.consumers.connection_timers'):
             async_to_sync(auth_consumer.connect)()
 
         auth_consumer._add_guest.assert_not_awaited()
@@ -696,21 +697,14 @@ class DirectInboxConsumerInternalTests(TestCase):
         heartbeat_consumer = self._consumer()
         heartbeat_consumer.send = AsyncMock(side_effect=RuntimeError('boom'))
 
-        async def _fast_sleep(_interval):
-            """Проверяет сценарий `_fast_sleep`."""
-            return None
-
-        with patch('direct_inbox.consumers.asyncio.sleep', new=_fast_sleep):
-            async_to_sync(heartbeat_consumer._heartbeat)()
+        self.assertFalse(async_to_sync(heartbeat_consumer._heartbeat_tick)())
 
         idle_consumer = self._consumer()
         idle_consumer.idle_timeout = 1
         idle_consumer._last_client_activity = 0.0
 
-        with patch('direct_inbox.consumers.asyncio.sleep', new=_fast_sleep), patch(
-            'direct_inbox.consumers.time.monotonic', return_value=10.0
-        ):
-            async_to_sync(idle_consumer._idle_watchdog)()
+        with patch('direct_inbox.consumers.time.monotonic', return_value=10.0):
+            self.assertFalse(async_to_sync(idle_consumer._idle_tick)())
 
         idle_consumer.close.assert_awaited_once()
 
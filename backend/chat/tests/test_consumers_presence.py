@@ -1,7 +1,9 @@
 # pyright: reportAttributeAccessIssue=false, reportGeneralTypeIssues=false
 """Тесты PresenceConsumer."""
 
+import asyncio
 import json
+import time
 from types import SimpleNamespace
 
 from asgiref.sync import async_to_sync
@@ -11,6 +13,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.test import TransactionTestCase
 
+from auditlog.application import write_service
 from presence.routing import websocket_urlpatterns as presence_urlpatterns
 from users.identity import user_public_username
 
@@ -125,3 +128,30 @@ class PresenceConsumerTests(TransactionTestCase):
             self.assertEqual(close_code, 4401)
 
         async_to_sync(run)()
+
+    def test_disconnect_latency_ignores_unrelated_audit_writes(self):
+        async def disconnect_seconds(port):
+            communicator, connected, _ = await self._connect(port=port)
+            self.assertTrue(connected)
+            await communicator.receive_from(timeout=2)
+            started = time.monotonic()
+            await communicator.disconnect(timeout=3)
+            return time.monotonic() - started
+
+        async def run():
+            baseline = await disconnect_seconds(55010)
+
+            # Simulate a stalled DB: hundreds of unrelated writes that never finish on their own.
+            release = asyncio.Event()
+            unrelated = [asyncio.create_task(release.wait()) for _ in range(500)]
+            write_service._pending_persist_tasks.update(unrelated)
+            try:
+                loaded = await disconnect_seconds(55011)
+            finally:
+                release.set()
+                await asyncio.gather(*unrelated)
+                write_service._pending_persist_tasks.difference_update(unrelated)
+
+            self.assertLess(loaded, baseline + 0.5)
+
+        async_to_sync(run)()
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from datetime import timedelta
+import io
 import json
 from urllib.parse import parse_qs, quote, urlparse
 from contextlib import AbstractContextManager
@@ -16,12 +17,15 @@ from django.test import Client, TestCase, override_settings
 from django.utils import timezone
 
 from chat import api, attachment_uploads
+from chat.blob_deletions import process_blob_deletions
 from chat.services import MessageForbiddenError
 from chat.tests.media_utils import workspace_media_root
 from chat.unread_push import build_room_unread_state
 from messages.models import (
     Message,
     MessageAttachment,
+    MessageAttachmentBlobDeletion,
+    MessageAttachmentContent,
     MessageAttachmentUpload,
     MessageReadReceipt,
     MessageReadState,
@@ -623,11 +627,16 @@ class ChatMessageFeatureApiTests(TestCase):
         )
         self.assertEqual(session_response.status_code, 201)
         upload_id = session_response.json()["uploadId"]
+        temp_name = MessageAttachmentUpload.objects.get(pk=upload_id).storage_name
 
         delete_response = self.client.delete(
             f"/api/chat/{self.direct_room.pk}/attachments/uploads/{upload_id}/"
         )
         self.assertEqual(delete_response.status_code, 204)
+        self.assertTrue(
+            MessageAttachmentBlobDeletion.objects.filter(storage_name=temp_name, field_name="chunk_upload").exists()
+        )
+        self.assertEqual(process_blob_deletions(), 1)
 
         detail_response = self.client.get(
             f"/api/chat/{self.direct_room.pk}/attachments/uploads/{upload_id}/"
@@ -675,6 +684,275 @@ class ChatMessageFeatureApiTests(TestCase):
                 MessageAttachmentUpload.objects.filter(pk=upload_id).exists()
             )
 
+    def test_failed_finalize_queues_unreturned_blob_instead_of_deleting_inline(self):
+        self.client.force_login(self.owner)
+
+        with workspace_media_root():
+            upload_id = self._complete_attachment_upload(
+                self.direct_room.pk,
+                filename="rollback.txt",
+                content=b"rollback me",
+                content_type="text/plain",
+            )
+            real_move = attachment_uploads._move_storage_blob
+            moved_names: list[str] = []
+
+            def move_once(storage, name, target_storage, target_name):
+                # The blob moves into place, but cannot be moved back on rollback.
+                if moved_names:
+                    return False
+                moved_names.append(target_name)
+                return real_move(storage, name, target_storage, target_name)
+
+            with patch.object(attachment_uploads, "_move_storage_blob", side_effect=move_once), patch.object(
+                attachment_uploads,
+                "_finish_image_attachment",
+                side_effect=RuntimeError("boom"),
+            ), patch.object(attachment_uploads, "_delete_attachment_blob") as delete_inline:
+                with self.assertRaises(RuntimeError):
+                    self._finalize_attachment_uploads(self.direct_room.pk, upload_ids=[upload_id])
+
+            delete_inline.assert_not_called()
+            self.assertFalse(Message.objects.filter(room=self.direct_room).exists())
+            self.assertEqual(
+                list(MessageAttachmentBlobDeletion.objects.values_list("storage_name", flat=True)),
+                moved_names,
+            )
+            self.assertEqual(process_blob_deletions(), 1)
+            self.assertFalse(attachment_uploads.default_storage.exists(moved_names[0]))
+
+    @override_settings(
+        CHAT_ATTACHMENT_CHUNK_MIN_SIZE_KB=1,
+        CHAT_ATTACHMENT_CHUNK_MAX_SIZE_MB=1,
+        CHAT_ATTACHMENT_TARGET_CHUNKS=1024,
+    )
+    def test_attachment_upload_streams_chunks_and_tracks_running_sha256(self):
+        import hashlib
+
+        self.client.force_login(self.owner)
+        content = bytes(range(256)) * 12
+
+        with workspace_media_root():
+            session = self._create_attachment_upload_session(
+                self.direct_room.pk,
+                filename="stream.bin",
+                content_type="application/octet-stream",
+                file_size=len(content),
+            ).json()
+            upload_id = session["uploadId"]
+            self.assertIsNone(session["sha256"])
+            self._upload_attachment_chunks(
+                self.direct_room.pk,
+                upload_id=upload_id,
+                content=content[:2048],
+                chunk_size=1024,
+            )
+
+            upload = MessageAttachmentUpload.objects.get(pk=upload_id)
+            with self.assertRaises(attachment_uploads.AttachmentUploadError) as raised:
+                attachment_uploads.append_attachment_upload_chunk(
+                    upload,
+                    offset=2048,
+                    chunk=io.BytesIO(content[2048:2100]),
+                    content_length=1024,
+                )
+            self.assertEqual(raised.exception.code, "incomplete_chunk")
+            with attachment_uploads.default_storage.open(upload.storage_name, "rb") as part:
+                self.assertEqual(part.read(), content[:2048])
+
+            # A lost running digest (restart) is rebuilt from the received prefix.
+            attachment_uploads._upload_digests.clear()
+            response = self.client.put(
+                f"/api/chat/{self.direct_room.pk}/attachments/uploads/{upload_id}/chunk/?offset=2048",
+                data=content[2048:],
+                content_type="application/octet-stream",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "complete")
+        self.assertEqual(response.json()["sha256"], hashlib.sha256(content).hexdigest())
+
+    @override_settings(
+        CHAT_THUMBNAIL_PIPELINE="inline",
+        CHAT_THUMBNAIL_MAX_SIDE=100,
+        CHAT_THUMBNAIL_SIZES=[100, 400],
+        CHAT_THUMBNAIL_FORMATS=["webp"],
+    )
+    def test_attachment_upload_returns_original_size_and_builds_thumbnail_after_commit(self):
+        from PIL import Image
+
+        image_buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), color=(10, 20, 30)).save(image_buffer, format="PNG")
+        self.client.force_login(self.owner)
+
+        with workspace_media_root():
+            upload_id = self._complete_attachment_upload(
+                self.direct_room.pk,
+                filename="photo.png",
+                content=image_buffer.getvalue(),
+                content_type="image/png",
+            )
+            with patch("chat.thumbnail_pipeline.async_to_sync") as async_to_sync_mock:
+                with _capture_on_commit_callbacks(self, execute=False) as callbacks:
+                    response = self._finalize_attachment_uploads(
+                        self.direct_room.pk,
+                        upload_ids=[upload_id],
+                    )
+
+                self.assertEqual(response.status_code, 201)
+                payload = response.json()["attachments"][0]
+                self.assertEqual((payload["width"], payload["height"]), (800, 600))
+                self.assertEqual(payload["thumbnailStatus"], "pending")
+                self.assertIsNone(payload["thumbnailUrl"])
+                self.assertEqual(payload["thumbnails"], [])
+
+                for callback in callbacks:
+                    cast(Any, callback)()
+
+            attachment = MessageAttachment.objects.get(pk=payload["id"])
+            self.assertEqual(attachment.thumbnail_status, MessageAttachment.ThumbnailStatus.READY)
+            self.assertEqual((attachment.width, attachment.height), (800, 600))
+            self.assertTrue(_attachment_thumbnail_name(attachment).startswith("chat_thumbnails/"))
+            group_name, event = async_to_sync_mock.return_value.call_args.args
+            self.assertEqual(group_name, f"chat_room_{self.direct_room.pk}")
+            self.assertEqual(event["type"], "chat_attachment_ready")
+            self.assertEqual(event["attachmentId"], attachment.pk)
+            self.assertEqual(event["thumbnail"], _attachment_thumbnail_name(attachment))
+            self.assertEqual(
+                [(item["width"], item["height"], item["contentType"]) for item in event["thumbnails"]],
+                [(100, 75, "image/webp"), (400, 300, "image/webp")],
+            )
+
+            listing = self.client.get(f"/api/chat/{self.direct_room.pk}/messages/")
+            listed = next(
+                item
+                for message in listing.json()["messages"]
+                for item in message["attachments"]
+                if item["id"] == attachment.pk
+            )
+            self.assertEqual([item["width"] for item in listed["thumbnails"]], [100, 400])
+            self.assertTrue(all(item["url"] for item in listed["thumbnails"]))
+
+    @override_settings(
+        CHAT_THUMBNAIL_PIPELINE="inline",
+        CHAT_THUMBNAIL_MAX_SIDE=100,
+        CHAT_THUMBNAIL_SIZES=[100],
+        CHAT_THUMBNAIL_FORMATS=["webp"],
+    )
+    def test_duplicate_uploads_share_blob_and_thumbnails_until_last_reference(self):
+        from PIL import Image
+
+        from chat import thumbnail_pipeline
+
+        image_buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), color=(40, 50, 60)).save(image_buffer, format="PNG")
+        self.client.force_login(self.owner)
+
+        with workspace_media_root(), patch("chat.thumbnail_pipeline.async_to_sync"), patch.object(
+            thumbnail_pipeline,
+            "_render",
+            wraps=thumbnail_pipeline._render,
+        ) as render:
+            attachments: list[MessageAttachment] = []
+            for _ in range(2):
+                upload_id = self._complete_attachment_upload(
+                    self.direct_room.pk,
+                    filename="meme.png",
+                    content=image_buffer.getvalue(),
+                    content_type="image/png",
+                )
+                temp_name = MessageAttachmentUpload.objects.get(pk=upload_id).storage_name
+                with _capture_on_commit_callbacks(self, execute=True):
+                    response = self._finalize_attachment_uploads(
+                        self.direct_room.pk,
+                        upload_ids=[upload_id],
+                    )
+                self.assertEqual(response.status_code, 201)
+                process_blob_deletions()
+                self.assertFalse(attachment_uploads.default_storage.exists(temp_name))
+                attachments.append(MessageAttachment.objects.get(pk=response.json()["attachments"][0]["id"]))
+
+            first, second = attachments
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.content_id, second.content_id)
+            self.assertEqual(_attachment_file_name(first), _attachment_file_name(second))
+            self.assertEqual(second.thumbnail_status, MessageAttachment.ThumbnailStatus.READY)
+            self.assertEqual(_attachment_thumbnail_name(first), _attachment_thumbnail_name(second))
+            content = MessageAttachmentContent.objects.get(pk=first.content_id)
+            self.assertEqual(content.attachments.count(), 2)
+            file_name = _attachment_file_name(first)
+            thumb_name = _attachment_thumbnail_name(first)
+
+            with _capture_on_commit_callbacks(self, execute=True):
+                self.client.delete(f"/api/chat/{self.direct_room.pk}/messages/{first.message_id}/")
+            self.assertEqual(process_blob_deletions(), 0)
+            self.assertEqual(content.attachments.count(), 1)
+            self.assertTrue(attachment_uploads.default_storage.exists(file_name))
+            self.assertTrue(attachment_uploads.default_storage.exists(thumb_name))
+
+            with _capture_on_commit_callbacks(self, execute=True):
+                self.client.delete(f"/api/chat/{self.direct_room.pk}/messages/{second.message_id}/")
+            process_blob_deletions()
+            self.assertFalse(MessageAttachmentContent.objects.filter(pk=content.pk).exists())
+            self.assertFalse(attachment_uploads.default_storage.exists(file_name))
+            self.assertFalse(attachment_uploads.default_storage.exists(thumb_name))
+
+    @override_settings(
+        CHAT_THUMBNAIL_PIPELINE="inline",
+        CHAT_THUMBNAIL_MAX_SIDE=100,
+        CHAT_THUMBNAIL_SIZES=[100],
+        CHAT_THUMBNAIL_FORMATS=["webp"],
+    )
+    def test_shared_blob_url_does_not_reveal_first_uploader_filename(self):
+        import hashlib
+
+        from PIL import Image
+
+        image_buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), color=(90, 10, 10)).save(image_buffer, format="PNG")
+        content = image_buffer.getvalue()
+        digest = hashlib.sha256(content).hexdigest()
+        peer_client = Client()
+        peer_client.force_login(self.peer)
+        self.client.force_login(self.owner)
+
+        with workspace_media_root(), patch("chat.thumbnail_pipeline.async_to_sync"):
+            payloads = []
+            for client, filename in ((self.client, "owner-secret-plans.png"), (peer_client, "meme.png")):
+                upload_id = self._complete_attachment_upload(
+                    self.direct_room.pk,
+                    filename=filename,
+                    content=content,
+                    content_type="image/png",
+                    client=client,
+                )
+                with _capture_on_commit_callbacks(self, execute=True):
+                    response = self._finalize_attachment_uploads(
+                        self.direct_room.pk,
+                        upload_ids=[upload_id],
+                        client=client,
+                    )
+                self.assertEqual(response.status_code, 201)
+                payloads.append(response.json()["attachments"][0])
+
+            first, second = (MessageAttachment.objects.get(pk=payload["id"]) for payload in payloads)
+            listing = peer_client.get(f"/api/chat/{self.direct_room.pk}/messages/")
+
+        self.assertEqual(first.content_id, second.content_id)
+        self.assertEqual(_attachment_file_name(second), f"chat_attachments/sha256/{digest[:2]}/{digest[2:4]}/{digest}.png")
+        self.assertTrue(_attachment_thumbnail_name(second).startswith(f"chat_thumbnails/sha256/{digest[:2]}/"))
+        self.assertEqual(payloads[1]["originalFilename"], "meme.png")
+        listed = next(
+            item
+            for message in listing.json()["messages"]
+            for item in message["attachments"]
+            if item["id"] == second.pk
+        )
+        urls = [listed["url"], listed["thumbnailUrl"], *(item["url"] for item in listed["thumbnails"])]
+        self.assertTrue(all(urls))
+        for url in urls:
+            self.assertNotIn("secret", url)
+
     def test_attachment_upload_returns_code_when_upload_ids_missing(self):
         self.client.force_login(self.owner)
         response = self._finalize_attachment_uploads(
@@ -1070,6 +1348,8 @@ class ChatMessageFeatureApiTests(TestCase):
             self.assertEqual(response.content, b"")
             self.assertFalse(Message.objects.filter(pk=message.pk).exists())
             self.assertFalse(MessageAttachment.objects.filter(pk=attachment.pk).exists())
+            self.assertTrue(file_storage.exists(file_name))
+            self.assertEqual(process_blob_deletions(), 2)
             self.assertFalse(file_storage.exists(file_name))
             self.assertFalse(thumb_storage.exists(thumb_name))
 
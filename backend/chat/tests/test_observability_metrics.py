@@ -253,3 +253,48 @@ class WebSocketObservabilityMetricsTests(TransactionTestCase):
         )
         self.assertEqual(event_after, event_before + 1)
         self.assertEqual(open_after, open_before)
+
+    def test_chat_handlers_and_db_hops_record_latency_histograms(self):
+        def handler_count(event_type: str) -> float:
+            return _sample_value(
+                metrics.WS_HANDLER_DURATION_SECONDS,
+                "devils_ws_handler_duration_seconds_count",
+                {"endpoint": "chat", "event_type": event_type},
+            )
+
+        def hop_count(metric, sample_name: str, function: str) -> float:
+            return _sample_value(metric, sample_name, {"function": function})
+
+        ping_before = handler_count("ping")
+        send_before = handler_count("message_send")
+        save_before = hop_count(metrics.SYNC_HOP_DURATION_SECONDS, "devils_sync_hop_duration_seconds_count", "save_message")
+        can_write_before = hop_count(
+            metrics.SYNC_EXECUTOR_QUEUE_WAIT_SECONDS,
+            "devils_sync_executor_queue_wait_seconds_count",
+            "can_write",
+        )
+
+        async def run():
+            communicator, connected, _ = await self._connect_chat(self.private_room.pk, user=self.member)
+            self.assertTrue(connected)
+            await communicator.send_to(text_data=json.dumps({"type": "ping"}))
+            await communicator.send_to(text_data=json.dumps({"message": "timed message"}))
+            await communicator.receive_from(timeout=2)
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+        self.assertEqual(handler_count("ping"), ping_before + 1)
+        self.assertEqual(handler_count("message_send"), send_before + 1)
+        self.assertEqual(
+            hop_count(metrics.SYNC_HOP_DURATION_SECONDS, "devils_sync_hop_duration_seconds_count", "save_message"),
+            save_before + 1,
+        )
+        self.assertEqual(
+            hop_count(
+                metrics.SYNC_EXECUTOR_QUEUE_WAIT_SECONDS,
+                "devils_sync_executor_queue_wait_seconds_count",
+                "can_write",
+            ),
+            can_write_before + 1,
+        )
@@ -12,11 +12,15 @@ from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from chat import services
+from chat.blob_deletions import process_blob_deletions
 from chat.services import MessageForbiddenError, MessageNotFoundError, MessageValidationError
 from chat.tests.media_utils import workspace_media_root
+from groups.application.group_service import create_group, delete_group
 from messages.models import (
     Message,
     MessageAttachment,
+    MessageAttachmentBlobDeletion,
+    MessageAttachmentContent,
     MessageReadReceipt,
     MessageReadState,
     Reaction,
@@ -140,8 +144,17 @@ class ChatServicesTests(TestCase):
             with _capture_on_commit_callbacks(self, execute=True):
                 deleted = services.delete_message(self.owner, self.room, msg.pk)
 
+            # The request path only queues the blobs; the worker removes them.
+            self.assertTrue(file_storage.exists(file_name))
+            self.assertEqual(
+                set(MessageAttachmentBlobDeletion.objects.values_list("storage_name", flat=True)),
+                {file_name, thumb_name},
+            )
+            self.assertEqual(process_blob_deletions(), 2)
+
             self.assertFalse(file_storage.exists(file_name))
             self.assertFalse(thumb_storage.exists(thumb_name))
+            self.assertFalse(MessageAttachmentBlobDeletion.objects.exists())
             self.assertFalse(Message.objects.filter(pk=msg.pk).exists())
             self.assertFalse(MessageAttachment.objects.filter(pk=attachment.pk).exists())
             self.assertEqual(deleted.message_id, msg.pk)
@@ -170,12 +183,61 @@ class ChatServicesTests(TestCase):
 
             self.assertTrue(file_storage.exists(file_name))
             self.assertTrue(thumb_storage.exists(thumb_name))
+            self.assertFalse(MessageAttachmentBlobDeletion.objects.exists())
             self.assertFalse(Message.objects.filter(pk=msg.pk).exists())
             self.assertFalse(MessageAttachment.objects.filter(pk=attachment.pk).exists())
             self.assertEqual(deleted.message_id, msg.pk)
 
     @override_settings(CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE=True)
-    def test_delete_message_logs_storage_errors_and_continues(self):
+    def test_deleting_group_releases_deduplicated_attachment_content(self):
+        with workspace_media_root():
+            group = create_group(self.owner, name="Dedup group")
+            content = MessageAttachmentContent.objects.create(
+                sha256="a" * 64,
+                file=SimpleUploadedFile("meme.png", b"meme", content_type="image/png"),
+                file_size=4,
+            )
+            file_name = require_stored_file_name(content.file, field_name="content.file")
+            thumb_name = ""
+            for room in (group, group, self.room):
+                message = Message.objects.create(
+                    username=self.owner.username,
+                    user=self.owner,
+                    room=room,
+                    message_content="",
+                )
+                attachment = MessageAttachment.objects.create(
+                    message=message,
+                    content=content,
+                    file=file_name,
+                    original_filename="meme.png",
+                    content_type="image/png",
+                    file_size=4,
+                    thumbnail=thumb_name or SimpleUploadedFile("meme.webp", b"thumb", content_type="image/webp"),
+                )
+                thumb_name = _attachment_thumbnail_name(attachment)
+
+            # The copy in another room keeps the shared blob alive.
+            delete_group(self.owner, group.pk)
+            self.assertTrue(MessageAttachmentContent.objects.filter(pk=content.pk).exists())
+            self.assertFalse(MessageAttachmentBlobDeletion.objects.exists())
+
+            # A bulk delete (as in the admin) frees it with the last reference.
+            Message.objects.filter(room=self.room).delete()
+
+            self.assertFalse(MessageAttachmentContent.objects.filter(pk=content.pk).exists())
+            self.assertEqual(
+                set(MessageAttachmentBlobDeletion.objects.values_list("storage_name", flat=True)),
+                {file_name, thumb_name},
+            )
+            self.assertEqual(process_blob_deletions(), 2)
+            self.assertFalse(content.file.storage.exists(file_name))
+
+    @override_settings(
+        CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE=True,
+        CHAT_ATTACHMENT_BLOB_DELETE_RETRY_SECONDS=30,
+    )
+    def test_blob_deletion_storage_errors_persist_retry_state(self):
         with workspace_media_root():
             msg = self._message(user=self.owner)
             attachment = MessageAttachment.objects.create(
@@ -187,23 +249,32 @@ class ChatServicesTests(TestCase):
                 thumbnail=SimpleUploadedFile("thumb.txt", b"thumb", content_type="text/plain"),
             )
             storage = attachment.file.storage
-
-            with patch.object(storage, "delete", side_effect=OSError("storage down")) as delete_mock, patch(
-                "chat.services.logger.warning",
-            ) as logger_warning:
-                with _capture_on_commit_callbacks(self, execute=True):
-                    deleted = services.delete_message(self.owner, self.room, msg.pk)
-
-            self.assertGreaterEqual(delete_mock.call_count, 1)
-            self.assertGreaterEqual(logger_warning.call_count, 1)
+            deleted = services.delete_message(self.owner, self.room, msg.pk)
             self.assertFalse(Message.objects.filter(pk=msg.pk).exists())
             self.assertEqual(deleted.message_id, msg.pk)
 
+            started = timezone.now()
+            with patch.object(storage, "delete", side_effect=OSError("storage down")) as delete_mock:
+                self.assertEqual(process_blob_deletions(), 0)
+
+            self.assertEqual(delete_mock.call_count, 2)
+            rows = list(MessageAttachmentBlobDeletion.objects.all())
+            self.assertEqual(len(rows), 2)
+            for row in rows:
+                self.assertEqual(row.attempts, 1)
+                self.assertIn("storage down", row.last_error)
+                self.assertGreaterEqual(row.next_attempt_at, started + timedelta(seconds=30))
+
+            # Rows in backoff are not picked up again until they are due.
+            with patch.object(storage, "delete") as delete_mock:
+                self.assertEqual(process_blob_deletions(), 0)
+            delete_mock.assert_not_called()
+
     @override_settings(
         CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE=True,
         CHAT_ATTACHMENT_DELETE_RETRIES=3,
     )
-    def test_delete_message_retries_locked_file_delete_on_windows(self):
+    def test_blob_deletion_retries_locked_file_without_blocking(self):
         with workspace_media_root():
             msg = self._message(user=self.owner)
             attachment = MessageAttachment.objects.create(
@@ -217,17 +288,46 @@ class ChatServicesTests(TestCase):
             locked_error = PermissionError("locked")
             setattr(locked_error, "winerror", 32)
 
+            deleted = services.delete_message(self.owner, self.room, msg.pk)
+            self.assertEqual(deleted.message_id, msg.pk)
+
             with patch.object(storage, "delete", side_effect=[locked_error, None]) as delete_mock, patch(
-                "chat.services.time.sleep",
-            ) as sleep_mock, patch("chat.services.logger.warning") as logger_warning:
-                with _capture_on_commit_callbacks(self, execute=True):
-                    deleted = services.delete_message(self.owner, self.room, msg.pk)
+                "chat.blob_deletions.logger.error",
+            ) as logger_error:
+                self.assertEqual(process_blob_deletions(), 0)
+                MessageAttachmentBlobDeletion.objects.update(next_attempt_at=timezone.now())
+                self.assertEqual(process_blob_deletions(), 1)
 
             self.assertEqual(delete_mock.call_count, 2)
-            sleep_mock.assert_called_once()
-            logger_warning.assert_not_called()
-            self.assertFalse(Message.objects.filter(pk=msg.pk).exists())
-            self.assertEqual(deleted.message_id, msg.pk)
+            logger_error.assert_not_called()
+            self.assertFalse(MessageAttachmentBlobDeletion.objects.exists())
+
+    @override_settings(
+        CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE=True,
+        CHAT_ATTACHMENT_DELETE_RETRIES=2,
+    )
+    def test_blob_deletion_drops_row_after_max_attempts(self):
+        with workspace_media_root():
+            msg = self._message(user=self.owner)
+            attachment = MessageAttachment.objects.create(
+                message=msg,
+                file=SimpleUploadedFile("doc.txt", b"file", content_type="text/plain"),
+                original_filename="doc.txt",
+                content_type="text/plain",
+                file_size=4,
+            )
+            storage = attachment.file.storage
+            services.delete_message(self.owner, self.room, msg.pk)
+
+            with patch.object(storage, "delete", side_effect=OSError("storage down")), patch(
+                "chat.blob_deletions.logger.error",
+            ) as logger_error:
+                process_blob_deletions()
+                MessageAttachmentBlobDeletion.objects.update(next_attempt_at=timezone.now())
+                process_blob_deletions()
+
+            logger_error.assert_called_once()
+            self.assertFalse(MessageAttachmentBlobDeletion.objects.exists())
 
     def test_add_reaction_validates_permission_and_missing_message(self):
         msg = self._message(user=self.owner)
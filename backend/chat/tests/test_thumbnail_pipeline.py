@@ -0,0 +1,158 @@
+"""Tests for the background attachment thumbnail pipeline."""
+
+from __future__ import annotations
+
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from chat import thumbnail_pipeline
+from chat.tests.media_utils import workspace_media_root
+from chat_app_django import media_pipeline
+from messages.models import Message, MessageAttachment, MessageAttachmentThumbnail
+from messages.thumbnail import render_thumbnails
+from rooms.models import Room
+from testsupport.users import typed_user_model
+
+User = typed_user_model()
+
+
+def _png_bytes(size: tuple[int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(200, 10, 10)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@override_settings(
+    CHAT_THUMBNAIL_PIPELINE="inline",
+    CHAT_THUMBNAIL_MAX_SIDE=64,
+    CHAT_THUMBNAIL_SIZES=[32, 64, 96],
+    CHAT_THUMBNAIL_FORMATS=["webp"],
+)
+class ThumbnailPipelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="thumb_owner", password="pass12345")
+        self.room = Room.objects.create(name="thumbs", kind=Room.Kind.PUBLIC, created_by=self.user)
+        self.message = Message.objects.create(
+            username=self.user.username,
+            user=self.user,
+            room=self.room,
+            message_content="",
+        )
+
+    def _pending_attachment(self, name: str, content: bytes) -> MessageAttachment:
+        return MessageAttachment.objects.create(
+            message=self.message,
+            file=ContentFile(content, name=name),
+            original_filename=name,
+            content_type="image/png",
+            file_size=len(content),
+            thumbnail_status=MessageAttachment.ThumbnailStatus.PENDING,
+        )
+
+    def test_small_image_becomes_ready_without_thumbnail_and_is_processed_once(self):
+        with workspace_media_root(), patch.object(thumbnail_pipeline, "_broadcast_attachment_ready") as broadcast:
+            attachment = self._pending_attachment("small.png", _png_bytes((32, 16)))
+
+            self.assertTrue(thumbnail_pipeline.process_attachment_thumbnail(attachment.pk))
+            self.assertFalse(thumbnail_pipeline.process_attachment_thumbnail(attachment.pk))
+
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.thumbnail_status, MessageAttachment.ThumbnailStatus.READY)
+        self.assertFalse(attachment.thumbnail)
+        broadcast.assert_called_once()
+
+    def test_undecodable_image_is_marked_failed(self):
+        with workspace_media_root(), patch.object(thumbnail_pipeline, "_broadcast_attachment_ready"):
+            attachment = self._pending_attachment("broken.png", b"not an image")
+            thumbnail_pipeline.process_attachment_thumbnail(attachment.pk)
+
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.thumbnail_status, MessageAttachment.ThumbnailStatus.FAILED)
+
+    @override_settings(CHAT_THUMBNAIL_STALE_SECONDS=60)
+    def test_requeue_picks_only_stale_pending_attachments(self):
+        with workspace_media_root(), patch.object(thumbnail_pipeline, "_broadcast_attachment_ready"):
+            stale = self._pending_attachment("stale.png", _png_bytes((128, 128)))
+            fresh = self._pending_attachment("fresh.png", _png_bytes((128, 128)))
+            MessageAttachment.objects.filter(pk=stale.pk).update(
+                uploaded_at=timezone.now() - timedelta(minutes=5),
+            )
+
+            self.assertEqual(thumbnail_pipeline.requeue_stale_thumbnails(), 1)
+
+            stale.refresh_from_db()
+            fresh.refresh_from_db()
+            self.assertEqual(stale.thumbnail_status, MessageAttachment.ThumbnailStatus.READY)
+            self.assertEqual((stale.thumbnail.width, stale.thumbnail.height), (64, 64))
+            self.assertTrue(stale.thumbnail.name.endswith("_64.webp"))
+            self.assertEqual(fresh.thumbnail_status, MessageAttachment.ThumbnailStatus.PENDING)
+
+    @override_settings(CHAT_THUMBNAIL_STALE_SECONDS=60)
+    def test_requeue_skips_attachments_with_unexpired_lease(self):
+        with workspace_media_root():
+            attachment = self._pending_attachment("stuck.png", _png_bytes((128, 128)))
+            MessageAttachment.objects.filter(pk=attachment.pk).update(
+                uploaded_at=timezone.now() - timedelta(minutes=5),
+            )
+
+            with patch.object(thumbnail_pipeline, "enqueue_attachment_thumbnails") as enqueue:
+                self.assertEqual(thumbnail_pipeline.requeue_stale_thumbnails(), 1)
+                self.assertEqual(thumbnail_pipeline.requeue_stale_thumbnails(), 0)
+                enqueue.assert_called_once_with([attachment.pk])
+
+                MessageAttachment.objects.filter(pk=attachment.pk).update(
+                    thumbnail_claimed_at=timezone.now() - timedelta(minutes=2),
+                )
+                self.assertEqual(thumbnail_pipeline.requeue_stale_thumbnails(), 1)
+                self.assertEqual(enqueue.call_count, 2)
+
+    def test_ready_attachment_gets_variant_per_size_and_broadcasts_them(self):
+        with workspace_media_root(), patch.object(thumbnail_pipeline, "_broadcast_attachment_ready") as broadcast:
+            attachment = self._pending_attachment("photo.png", _png_bytes((200, 100)))
+            self.assertTrue(thumbnail_pipeline.process_attachment_thumbnail(attachment.pk))
+
+            variants = list(MessageAttachmentThumbnail.objects.filter(attachment=attachment))
+
+        self.assertEqual([(item.width, item.height) for item in variants], [(32, 16), (64, 32), (96, 48)])
+        self.assertEqual({item.content_type for item in variants}, {"image/webp"})
+        self.assertCountEqual(broadcast.call_args.args[2], variants)
+
+    @override_settings(CHAT_THUMBNAIL_PIPELINE="process", CHAT_THUMBNAIL_WORKERS=1)
+    def test_process_mode_renders_in_worker_process(self):
+        self.addCleanup(media_pipeline.shutdown_media_pipeline)
+
+        result = thumbnail_pipeline._render(_png_bytes((300, 150)), "wide.png")
+
+        self.assertEqual((result["width"], result["height"]), (300, 150))
+        self.assertEqual(
+            [(variant["filename"], variant["width"]) for variant in result["variants"]],
+            [("thumb_wide_96.webp", 96), ("thumb_wide_64.webp", 64), ("thumb_wide_32.webp", 32)],
+        )
+
+
+class RenderThumbnailsTests(TestCase):
+    def test_jpeg_source_renders_every_format_and_skips_upscaling(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), color=(10, 120, 200)).save(buffer, format="JPEG")
+
+        result = render_thumbnails(
+            buffer.getvalue(),
+            "photo.jpg",
+            sizes=[100, 320, 1024],
+            formats=["webp", "jpeg"],
+            max_source_pixels=10_000_000,
+        )
+
+        self.assertEqual(
+            [(variant["max_side"], variant["format"], variant["width"], variant["height"]) for variant in result["variants"]],
+            [(320, "webp", 320, 240), (320, "jpeg", 320, 240), (100, "webp", 100, 75), (100, "jpeg", 100, 75)],
+        )
+        for variant in result["variants"]:
+            with Image.open(io.BytesIO(variant["content"])) as decoded:
+                self.assertEqual(decoded.size, (variant["width"], variant["height"]))
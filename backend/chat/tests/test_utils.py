@@ -81,6 +81,27 @@ class UtilityHelpersTests(SimpleTestCase):
         parsed_cyr = urlparse(signed_cyr or "")
         self.assertNotIn("%25D0", parsed_cyr.path)
 
+    @override_settings(MEDIA_URL_TTL_SECONDS=300, MEDIA_URL_EXPIRY_BUCKET_SECONDS=600)
+    def test_media_url_expiry_is_rounded_up_to_bucket(self):
+        """Срок подписи выравнивается по окну и не короче TTL."""
+        self.assertEqual(utils.media_url_expiry(now=1000), 1800)
+        self.assertEqual(utils.media_url_expiry(now=1499), 1800)
+        self.assertEqual(utils.media_url_expiry(now=1501), 2400)
+        with override_settings(MEDIA_URL_EXPIRY_BUCKET_SECONDS=0):
+            self.assertEqual(utils.media_url_expiry(now=1501), 1801)
+
+    @override_settings(MEDIA_URL="/media/", MEDIA_SIGNING_KEY="test-key", MEDIA_URL_EXPIRY_BUCKET_SECONDS=3600)
+    def test_signed_media_url_is_stable_within_bucket_and_memoized(self):
+        """В пределах окна выдается одна и та же ссылка без повторного HMAC."""
+        first = utils._signed_media_url_path("profile_pics/a.jpg")
+        hits_before = utils._signed_media_url_for.cache_info().hits
+        second = utils._signed_media_url_path("/media/profile_pics/a.jpg")
+
+        self.assertEqual(first, second)
+        self.assertEqual(utils._signed_media_url_for.cache_info().hits, hits_before + 1)
+        with override_settings(MEDIA_SIGNING_KEY="rotated-key"):
+            self.assertNotEqual(utils._signed_media_url_path("profile_pics/a.jpg"), first)
+
     @override_settings(MEDIA_SIGNING_KEY="test-key")
     def test_media_signature_validation_rejects_bad_signature(self):
         """Отклоняет некорректную подпись media URL."""
@@ -0,0 +1,314 @@
+"""Background thumbnail generation for chat image attachments.
+
+Finalizing an upload only records the original dimensions and marks image
+attachments `pending`. After the transaction commits the attachment ids are
+handed to the shared media pipeline (`chat_app_django.media_pipeline`); each
+job reads the source blob, renders every configured size/format variant in
+one decode pass (in a process pool for the CPU-bound Pillow work), stores
+them, flips the status and announces `chat_attachment_ready` to the room.
+
+Attachments that share stored content (same SHA-256) also share thumbnail
+blobs: a ready sibling's variant rows are copied instead of rendering again.
+Those blobs are named after the hash, like the content itself, so they never
+reveal the file name of the first uploader.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chat_app_django.media_pipeline import run_media_render, submit_media_job
+from messages.models import (
+    MessageAttachment,
+    MessageAttachmentContent,
+    MessageAttachmentThumbnail,
+    content_blob_name,
+)
+from messages.thumbnail import render_thumbnails, supported_thumbnail_formats, thumbnail_source_limit_bytes
+
+from .services import _delete_attachment_blob
+
+logger = logging.getLogger(__name__)
+
+
+def _primary_side() -> int:
+    return int(getattr(settings, "CHAT_THUMBNAIL_MAX_SIDE", 400))
+
+
+def _thumbnail_formats() -> list[str]:
+    return supported_thumbnail_formats(list(getattr(settings, "CHAT_THUMBNAIL_FORMATS", ["webp"])))
+
+
+def _render(data: bytes, name: str) -> dict | None:
+    kwargs = {
+        "sizes": sorted({*map(int, getattr(settings, "CHAT_THUMBNAIL_SIZES", [])), _primary_side()}),
+        # Resolved here so the worker process never has to read Django settings.
+        "formats": _thumbnail_formats(),
+        "max_source_pixels": int(getattr(settings, "CHAT_THUMBNAIL_MAX_SOURCE_PIXELS", 50_000_000)),
+    }
+    return run_media_render(render_thumbnails, data, name, **kwargs)
+
+
+def _source_name(attachment: MessageAttachment) -> str:
+    """Name the variant file names derive from: the hash for shared content."""
+    if attachment.content is not None:
+        return attachment.content.sha256
+    return attachment.file.name or ""
+
+
+def _read_source(attachment: MessageAttachment) -> bytes | None:
+    if int(attachment.file_size or 0) > thumbnail_source_limit_bytes():
+        return None
+    with attachment.file.open("rb") as source:
+        return source.read()
+
+
+def _broadcast_attachment_ready(
+    attachment: MessageAttachment,
+    room_id: int,
+    variants: list[MessageAttachmentThumbnail],
+) -> None:
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        f"chat_room_{room_id}",
+        {
+            "type": "chat_attachment_ready",
+            "roomId": room_id,
+            "messageId": attachment.message_id,
+            "attachmentId": attachment.pk,
+            "thumbnail": attachment.thumbnail.name or None,
+            "thumbnailStatus": attachment.thumbnail_status,
+            "thumbnails": [
+                {
+                    "name": variant.file.name,
+                    "width": variant.width,
+                    "height": variant.height,
+                    "contentType": variant.content_type,
+                }
+                for variant in sorted(variants, key=lambda item: item.width)
+            ],
+            "width": attachment.width,
+            "height": attachment.height,
+        },
+    )
+
+
+def _store_variants(attachment: MessageAttachment, result: dict) -> list[MessageAttachmentThumbnail]:
+    """Saves rendered variant blobs; rows are inserted later together with the status flip."""
+    stored: list[MessageAttachmentThumbnail] = []
+    try:
+        for variant in result["variants"]:
+            row = MessageAttachmentThumbnail(
+                attachment=attachment,
+                width=variant["width"],
+                height=variant["height"],
+                content_type=variant["content_type"],
+            )
+            if attachment.content is not None:
+                name = content_blob_name("chat_thumbnails", attachment.content.sha256, variant["filename"])
+                row.file.name = row.file.storage.save(name, ContentFile(variant["content"]))
+            else:
+                row.file.save(variant["filename"], ContentFile(variant["content"]), save=False)
+            stored.append(row)
+    except Exception:
+        _delete_variant_blobs(stored)
+        raise
+    return stored
+
+
+def _delete_variant_blobs(rows: list[MessageAttachmentThumbnail]) -> None:
+    for row in rows:
+        _delete_attachment_blob(
+            row.file.storage,
+            row.file.name,
+            attachment_id=row.attachment_id,
+            field_name="thumbnail",
+        )
+
+
+def _pick_primary_variant(
+    rows: list[MessageAttachmentThumbnail],
+    result: dict,
+) -> MessageAttachmentThumbnail | None:
+    """Variant kept in the legacy `thumbnail` field: primary format at CHAT_THUMBNAIL_MAX_SIDE."""
+    primary_format = _thumbnail_formats()[0]
+    for row, variant in zip(rows, result["variants"]):
+        if variant["format"] == primary_format and variant["max_side"] == _primary_side():
+            return row
+    return None
+
+
+def _ready_sibling(attachment: MessageAttachment) -> MessageAttachment | None:
+    """Another attachment of the same stored content whose thumbnails are ready."""
+    if attachment.content_id is None:
+        return None
+    return (
+        MessageAttachment.objects.filter(
+            content_id=attachment.content_id,
+            thumbnail_status=MessageAttachment.ThumbnailStatus.READY,
+        )
+        .exclude(pk=attachment.pk)
+        .prefetch_related("thumbnail_variants")
+        .order_by("pk")
+        .first()
+    )
+
+
+def _copy_variant_rows(
+    attachment: MessageAttachment,
+    sibling: MessageAttachment,
+) -> list[MessageAttachmentThumbnail]:
+    """Unsaved variant rows pointing at the sibling's blobs."""
+    return [
+        MessageAttachmentThumbnail(
+            attachment=attachment,
+            file=variant.file.name,
+            width=variant.width,
+            height=variant.height,
+            content_type=variant.content_type,
+        )
+        for variant in sibling.thumbnail_variants.all()
+    ]
+
+
+def share_content_thumbnails(attachment: MessageAttachment) -> bool:
+    """Копирует готовые миниатюры другого вложения с тем же содержимым.
+
+    Args:
+        attachment: Сохраненное вложение с привязкой к общему содержимому.
+
+    Returns:
+        True, если миниатюры переиспользованы и рендер не нужен.
+    """
+    sibling = _ready_sibling(attachment)
+    if sibling is None:
+        return False
+    MessageAttachmentThumbnail.objects.bulk_create(_copy_variant_rows(attachment, sibling))
+    attachment.thumbnail.name = sibling.thumbnail.name
+    attachment.width = sibling.width
+    attachment.height = sibling.height
+    attachment.thumbnail_status = MessageAttachment.ThumbnailStatus.READY
+    attachment.save(update_fields=["thumbnail", "width", "height", "thumbnail_status"])
+    return True
+
+
+def process_attachment_thumbnail(attachment_id: int) -> bool:
+    """Генерирует миниатюру для вложения в статусе `pending`.
+
+    Повторный или параллельный вызов безопасен: статус меняется условным UPDATE,
+    проигравший вызов удаляет свою копию миниатюры.
+
+    Args:
+        attachment_id: Идентификатор вложения.
+
+    Returns:
+        True, если статус вложения был обновлен этим вызовом.
+    """
+    attachment = (
+        MessageAttachment.objects.select_related("message", "content")
+        .filter(pk=attachment_id, thumbnail_status=MessageAttachment.ThumbnailStatus.PENDING)
+        .first()
+    )
+    if attachment is None:
+        return False
+
+    update_fields: dict[str, object] = {"thumbnail_status": MessageAttachment.ThumbnailStatus.FAILED}
+    rendered: list[MessageAttachmentThumbnail] = []
+    try:
+        if _ready_sibling(attachment) is None:
+            data = _read_source(attachment)
+            result = _render(data, _source_name(attachment)) if data is not None else None
+            if result is not None:
+                rendered = _store_variants(attachment, result)
+                primary = _pick_primary_variant(rendered, result)
+                if primary is not None:
+                    attachment.thumbnail.name = primary.file.name
+                    update_fields["thumbnail"] = primary.file.name
+                update_fields["thumbnail_status"] = MessageAttachment.ThumbnailStatus.READY
+    except Exception:
+        logger.warning("Thumbnail generation failed for attachment id=%s", attachment_id, exc_info=True)
+
+    variants = rendered
+    with transaction.atomic():
+        if attachment.content_id is not None:
+            # Serializes renders of one content so every copy ends up on the same blobs.
+            list(MessageAttachmentContent.objects.select_for_update().filter(pk=attachment.content_id))
+            sibling = _ready_sibling(attachment)
+            if sibling is not None:
+                variants = _copy_variant_rows(attachment, sibling)
+                attachment.thumbnail.name = sibling.thumbnail.name
+                update_fields = {
+                    "thumbnail_status": MessageAttachment.ThumbnailStatus.READY,
+                    "thumbnail": sibling.thumbnail.name,
+                }
+        updated = MessageAttachment.objects.filter(
+            pk=attachment_id,
+            thumbnail_status=MessageAttachment.ThumbnailStatus.PENDING,
+        ).update(**update_fields)
+        if updated and variants:
+            MessageAttachmentThumbnail.objects.bulk_create(variants)
+    if not updated or variants is not rendered:
+        _delete_variant_blobs(rendered)
+    if not updated:
+        return False
+
+    attachment.thumbnail_status = update_fields["thumbnail_status"]
+    _broadcast_attachment_ready(attachment, attachment.message.room_id, variants)
+    return True
+
+
+def enqueue_attachment_thumbnails(attachment_ids: list[int]) -> None:
+    """Ставит генерацию миниатюр в фоновую очередь процесса.
+
+    В режиме `inline` (CHAT_THUMBNAIL_PIPELINE) миниатюры строятся сразу в
+    вызывающем потоке.
+
+    Args:
+        attachment_ids: Идентификаторы вложений в статусе `pending`.
+    """
+    for attachment_id in attachment_ids:
+        submit_media_job(process_attachment_thumbnail, attachment_id)
+
+
+def requeue_stale_thumbnails(*, limit: int = 100) -> int:
+    """Повторно ставит в очередь миниатюры, зависшие в `pending` (например, после рестарта).
+
+    Вложение получает аренду на CHAT_THUMBNAIL_STALE_SECONDS: пока она не истекла,
+    следующие запуски (в том числе из других процессов) его не трогают.
+
+    Args:
+        limit: Максимальное число вложений за вызов.
+
+    Returns:
+        Количество поставленных в очередь вложений.
+    """
+    stale_before = timezone.now() - timedelta(
+        seconds=int(getattr(settings, "CHAT_THUMBNAIL_STALE_SECONDS", 300)),
+    )
+    with transaction.atomic():
+        attachment_ids = list(
+            MessageAttachment.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(thumbnail_claimed_at__isnull=True) | Q(thumbnail_claimed_at__lt=stale_before),
+                thumbnail_status=MessageAttachment.ThumbnailStatus.PENDING,
+                uploaded_at__lt=stale_before,
+            )
+            .order_by("uploaded_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if attachment_ids:
+            MessageAttachment.objects.filter(pk__in=attachment_ids).update(thumbnail_claimed_at=timezone.now())
+    if attachment_ids:
+        enqueue_attachment_thumbnails(attachment_ids)
+    return len(attachment_ids)
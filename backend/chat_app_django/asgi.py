@@ -8,18 +8,26 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chat_app_django.settings')
 django.setup()
 
 from channels.auth import AuthMiddlewareStack
+from django.conf import settings
+from django.urls import re_path
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 import chat.routing
 import presence.routing
 import direct_inbox.routing
+from chat_app_django.background import start_background_jobs
 from chat_app_django.ws_auth_middleware import WebSocketTokenAuthMiddleware
+from chat_app_django.ws_multiplex import MultiplexConsumer
 
 websocket_urlpatterns = (
     chat.routing.websocket_urlpatterns
     + presence.routing.websocket_urlpatterns
     + direct_inbox.routing.websocket_urlpatterns
 )
+if settings.WS_MULTIPLEX_ENABLED:
+    websocket_urlpatterns = websocket_urlpatterns + [
+        re_path(r"ws/mux/$", MultiplexConsumer.as_asgi()),
+    ]
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
@@ -31,3 +39,5 @@ application = ProtocolTypeRouter({
         )
     )
 })
+
+start_background_jobs()
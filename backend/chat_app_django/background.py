@@ -0,0 +1,211 @@
+"""Lightweight in-process periodic jobs for long-running ASGI workers."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_jobs_lock = threading.Lock()
+_registered_jobs: dict[str, "PeriodicJob"] = {}
+
+
+class PeriodicJob:
+    """Runs one callable on a fixed interval in a daemon thread."""
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], object]):
+        self.name = name
+        self.interval_seconds = max(0.01, float(interval_seconds))
+        self.func = func
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def run_once(self) -> None:
+        """Runs the job body once; failures are logged and never propagate."""
+        try:
+            self.func()
+        except Exception:
+            logger.exception("Periodic job %s failed", self.name)
+        finally:
+            # The job thread owns its DB connection; drop it if it went stale.
+            close_old_connections()
+
+    def _loop(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            self.run_once()
+
+    def start(self) -> bool:
+        """Starts the worker thread; returns False when it is already running."""
+        if self.is_running:
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            name=f"periodic-{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Signals the worker thread to exit and waits for it."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+
+def start_periodic_job(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], object],
+) -> PeriodicJob | None:
+    """Starts a named job once per process; a non-positive interval disables it."""
+    if interval_seconds <= 0:
+        return None
+    with _jobs_lock:
+        existing = _registered_jobs.get(name)
+        if existing is not None and existing.is_running:
+            return existing
+        job = PeriodicJob(name, interval_seconds, func)
+        job.start()
+        _registered_jobs[name] = job
+        return job
+
+
+def stop_periodic_jobs() -> None:
+    """Stops every job started in this process."""
+    with _jobs_lock:
+        jobs = list(_registered_jobs.values())
+        _registered_jobs.clear()
+    for job in jobs:
+        job.stop()
+
+
+def _sweep_rate_limit_buckets() -> None:
+    from chat_app_django.security.rate_limit import DbRateLimiter
+
+    DbRateLimiter.purge_expired(
+        batch_size=int(settings.SECURITY_RATE_LIMIT_SWEEP_BATCH_SIZE),
+        max_batches=int(settings.SECURITY_RATE_LIMIT_SWEEP_MAX_BATCHES),
+    )
+
+
+def _flush_audit_aggregates() -> None:
+    from auditlog.application.aggregate_service import flush_audit_aggregates
+
+    flush_audit_aggregates()
+
+
+def _maintain_audit_partitions() -> None:
+    from auditlog.infrastructure.partitions import ensure_future_partitions
+
+    ensure_future_partitions(
+        int(settings.AUDIT_PARTITION_PREMAKE),
+        settings.AUDIT_PARTITION_INTERVAL,
+    )
+
+
+def _refresh_audit_ip_rollup() -> None:
+    from auditlog.application.ip_rollup_service import refresh_ip_rollup
+
+    refresh_ip_rollup(
+        batch_size=int(settings.AUDIT_IP_ROLLUP_BATCH_SIZE),
+        settle_seconds=float(settings.AUDIT_IP_ROLLUP_SETTLE_SECONDS),
+    )
+
+
+def _refresh_audit_action_counts() -> None:
+    from auditlog.application.query_service import refresh_action_counts
+
+    refresh_action_counts()
+
+
+def _requeue_stale_media_jobs() -> None:
+    from chat.thumbnail_pipeline import requeue_stale_thumbnails
+    from users.avatar_pipeline import requeue_stale_avatars
+
+    requeue_stale_thumbnails()
+    requeue_stale_avatars()
+
+
+def _sweep_attachment_uploads() -> None:
+    from chat.attachment_uploads import sweep_attachment_upload_sessions
+
+    sweep_attachment_upload_sessions(
+        max_batches=int(settings.CHAT_ATTACHMENT_UPLOAD_SWEEP_MAX_BATCHES),
+    )
+
+
+def _process_blob_deletions() -> None:
+    from chat.blob_deletions import process_blob_deletions
+
+    process_blob_deletions(
+        max_batches=int(settings.CHAT_ATTACHMENT_BLOB_DELETE_MAX_BATCHES),
+    )
+
+
+def _refresh_presence_metrics() -> None:
+    from chat_app_django.metrics import refresh_presence_gauges
+
+    refresh_presence_gauges()
+
+
+def start_background_jobs() -> None:
+    """Starts the optional maintenance jobs enabled in settings."""
+    start_periodic_job(
+        "rate_limit_bucket_sweeper",
+        int(getattr(settings, "SECURITY_RATE_LIMIT_SWEEP_INTERVAL", 0) or 0),
+        _sweep_rate_limit_buckets,
+    )
+    start_periodic_job(
+        "presence_metrics_refresher",
+        int(getattr(settings, "METRICS_PRESENCE_REFRESH_INTERVAL", 0) or 0),
+        _refresh_presence_metrics,
+    )
+    start_periodic_job(
+        "chat_thumbnail_recovery",
+        int(getattr(settings, "CHAT_THUMBNAIL_RECOVERY_INTERVAL", 0) or 0),
+        _requeue_stale_media_jobs,
+    )
+    start_periodic_job(
+        "chat_upload_session_janitor",
+        int(getattr(settings, "CHAT_ATTACHMENT_UPLOAD_SWEEP_INTERVAL", 0) or 0),
+        _sweep_attachment_uploads,
+    )
+    start_periodic_job(
+        "chat_attachment_blob_deleter",
+        int(getattr(settings, "CHAT_ATTACHMENT_BLOB_DELETE_INTERVAL", 0) or 0),
+        _process_blob_deletions,
+    )
+    start_periodic_job(
+        "audit_aggregate_flusher",
+        int(getattr(settings, "AUDIT_AGGREGATE_FLUSH_INTERVAL", 0) or 0),
+        _flush_audit_aggregates,
+    )
+    start_periodic_job(
+        "audit_partition_maintenance",
+        int(getattr(settings, "AUDIT_PARTITION_MAINTENANCE_INTERVAL", 0) or 0),
+        _maintain_audit_partitions,
+    )
+    start_periodic_job(
+        "audit_ip_rollup",
+        int(getattr(settings, "AUDIT_IP_ROLLUP_INTERVAL", 0) or 0),
+        _refresh_audit_ip_rollup,
+    )
+    start_periodic_job(
+        "audit_action_counts",
+        int(getattr(settings, "AUDIT_ACTION_COUNTS_REFRESH_INTERVAL", 0) or 0),
+        _refresh_audit_action_counts,
+    )
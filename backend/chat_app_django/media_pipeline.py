@@ -0,0 +1,112 @@
+"""Process-local executors shared by background media jobs.
+
+Jobs (attachment thumbnails, avatar derivatives) are handed to a small
+dispatcher thread pool. The CPU-bound Pillow rendering inside a job is sent
+to a spawn-context process pool when CHAT_THUMBNAIL_PIPELINE is `process`;
+`thread` renders in the dispatcher thread and `inline` runs the whole job
+synchronously in the caller.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_pool_lock = threading.Lock()
+_dispatch_pool: ThreadPoolExecutor | None = None
+_render_pool: ProcessPoolExecutor | None = None
+
+
+def pipeline_mode() -> str:
+    """Returns the configured mode: `process`, `thread` or `inline`."""
+    return str(getattr(settings, "CHAT_THUMBNAIL_PIPELINE", "process") or "process")
+
+
+def _worker_count() -> int:
+    return max(1, int(getattr(settings, "CHAT_THUMBNAIL_WORKERS", 2)))
+
+
+def _get_dispatch_pool() -> ThreadPoolExecutor:
+    global _dispatch_pool
+    with _pool_lock:
+        if _dispatch_pool is None:
+            _dispatch_pool = ThreadPoolExecutor(
+                max_workers=_worker_count(),
+                thread_name_prefix="media-pipeline",
+            )
+        return _dispatch_pool
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _pool_lock:
+        if _render_pool is None:
+            # Spawned workers do not inherit the threads and sockets of the ASGI process.
+            _render_pool = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_pool
+
+
+def _discard_render_pool(pool: Executor) -> None:
+    global _render_pool
+    with _pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_media_pipeline(wait: bool = True) -> None:
+    """Stops the dispatcher and render pools of this process."""
+    global _dispatch_pool, _render_pool
+    with _pool_lock:
+        pools = [pool for pool in (_dispatch_pool, _render_pool) if pool is not None]
+        _dispatch_pool = None
+        _render_pool = None
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def run_media_render(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Runs a Django-free render function, in the process pool when configured.
+
+    `func` must be importable at module level so spawned workers can unpickle it.
+    """
+    if pipeline_mode() != "process":
+        return func(*args, **kwargs)
+
+    pool = _get_render_pool()
+    try:
+        future = pool.submit(func, *args, **kwargs)
+        return future.result(timeout=float(getattr(settings, "CHAT_THUMBNAIL_RENDER_TIMEOUT_SECONDS", 30)))
+    except BrokenProcessPool:
+        _discard_render_pool(pool)
+        raise
+
+
+def _run_job(func: Callable[..., Any], args: tuple) -> None:
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Background media job %s crashed for %s", getattr(func, "__name__", func), args)
+    finally:
+        close_old_connections()
+
+
+def submit_media_job(func: Callable[..., Any], *args: Any) -> None:
+    """Queues `func(*args)` on the dispatcher pool; `inline` mode calls it right away."""
+    if pipeline_mode() == "inline":
+        func(*args)
+        return
+    _get_dispatch_pool().submit(_run_job, func, args)
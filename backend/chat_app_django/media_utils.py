@@ -1,5 +1,6 @@
 """Утилиты media URL: signed-ссылки, room-scoped ссылки и crop аватарок."""
 
+import functools
 import hashlib
 import hmac
 import posixpath
@@ -26,18 +27,27 @@ INTERNAL_HOSTNAMES: set[str] = set(
     getattr(settings, "MEDIA_INTERNAL_HOSTNAMES", _DEFAULT_INTERNAL_HOSTNAMES)
 )
 
+# Per-process memo of signed URLs; one entry per (path, expiry bucket, key).
+SIGNED_MEDIA_URL_CACHE_SIZE = int(getattr(settings, "MEDIA_SIGNED_URL_CACHE_SIZE", 4096))
 
-def serialize_avatar_crop(profile) -> dict[str, float] | None:
+
+def serialize_avatar_crop(profile, *, original: bool = False) -> dict[str, float] | None:
     """Сериализует avatar crop в формат, пригодный для передачи клиенту.
     
     Args:
         profile: Профиль пользователя, для которого вычисляется состояние.
+        original: Клиент получает исходный файл аватара, а не предобрезанную копию.
     
     Returns:
         Словарь типа dict[str, float] | None с результатами операции.
     """
     if not profile:
         return None
+    if not original and getattr(profile, "avatar_status", None) == "ready" and getattr(
+        profile, "avatar_variants", None
+    ):
+        # The avatar URL already points at a pre-cropped square derivative.
+        return None
 
     raw_x = getattr(profile, "avatar_crop_x", None)
     raw_y = getattr(profile, "avatar_crop_y", None)
@@ -334,18 +344,20 @@ def _media_signing_key() -> bytes:
     return str(key).encode("utf-8")
 
 
-def _media_signature(path: str, expires_at: int) -> str:
+def _media_signature(path: str, expires_at: int, signing_key: bytes | None = None) -> str:
     """Вспомогательная функция `_media_signature` реализует внутренний шаг бизнес-логики.
     
     Args:
         path: Путь ресурса в storage или URL-маршруте.
         expires_at: Параметр expires at, используемый в логике функции.
+        signing_key: Ключ подписи; по умолчанию берется из настроек.
     
     Returns:
         Строковое значение, сформированное функцией.
     """
     payload = f"{path}:{expires_at}".encode("utf-8")
-    return hmac.new(_media_signing_key(), payload, hashlib.sha256).hexdigest()
+    key = signing_key if signing_key is not None else _media_signing_key()
+    return hmac.new(key, payload, hashlib.sha256).hexdigest()
 
 
 def is_valid_media_signature(path: str, expires_at: int, signature: str | None) -> bool:
@@ -366,6 +378,45 @@ def is_valid_media_signature(path: str, expires_at: int, signature: str | None)
     return hmac.compare_digest(expected, str(signature))
 
 
+def media_url_expiry(now: float | None = None) -> int:
+    """Возвращает срок действия подписи, выровненный по окну MEDIA_URL_EXPIRY_BUCKET_SECONDS.
+    
+    Срок округляется вверх до границы окна, поэтому в пределах окна один и тот же
+    путь получает одинаковые `exp` и `sig` (ссылку могут переиспользовать кэши
+    браузера и прокси), а ссылка живет не меньше MEDIA_URL_TTL_SECONDS.
+    
+    Args:
+        now: Текущее время в секундах epoch; по умолчанию `time.time()`.
+    
+    Returns:
+        Метка времени истечения подписи.
+    """
+    ttl_seconds = int(getattr(settings, "MEDIA_URL_TTL_SECONDS", 300))
+    bucket_seconds = int(getattr(settings, "MEDIA_URL_EXPIRY_BUCKET_SECONDS", 0) or 0)
+    earliest = int(time.time() if now is None else now) + ttl_seconds
+    if bucket_seconds <= 1:
+        return earliest
+    return -(-earliest // bucket_seconds) * bucket_seconds
+
+
+@functools.lru_cache(maxsize=SIGNED_MEDIA_URL_CACHE_SIZE)
+def _signed_media_url_for(normalized: str, expiry: int, signing_key: bytes) -> str:
+    """Собирает подписанный URL для нормализованного пути (результат мемоизируется).
+    
+    Args:
+        normalized: Нормализованный путь в media-хранилище.
+        expiry: Метка времени истечения подписи.
+        signing_key: Ключ подписи; входит в ключ кэша, чтобы смена ключа не отдавала старые подписи.
+    
+    Returns:
+        Относительный URL защищенного media-ресурса.
+    """
+    signature = _media_signature(normalized, expiry, signing_key)
+    encoded_path = quote(normalized, safe="/")
+    query = urlencode({"exp": expiry, "sig": signature})
+    return f"/api/auth/media/{encoded_path}?{query}"
+
+
 def _signed_media_url_path(image_name: str | None, expires_at: int | None = None) -> str | None:
     """Вспомогательная функция `_signed_media_url_path` реализует внутренний шаг бизнес-логики.
     
@@ -380,12 +431,8 @@ def _signed_media_url_path(image_name: str | None, expires_at: int | None = None
     if not normalized:
         return None
 
-    ttl_seconds = int(getattr(settings, "MEDIA_URL_TTL_SECONDS", 300))
-    expiry = int(expires_at) if expires_at is not None else int(time.time()) + ttl_seconds
-    signature = _media_signature(normalized, expiry)
-    encoded_path = quote(normalized, safe="/")
-    query = urlencode({"exp": expiry, "sig": signature})
-    return f"/api/auth/media/{encoded_path}?{query}"
+    expiry = int(expires_at) if expires_at is not None else media_url_expiry()
+    return _signed_media_url_for(normalized, expiry, _media_signing_key())
 
 
 def is_chat_attachment_media_path(path: str | None) -> bool:
@@ -512,6 +559,37 @@ def build_room_media_url_from_request(
     return path
 
 
+def build_room_media_url(scope, image_name: str | None, room_id: int | str | None) -> str | None:
+    """Формирует room-scoped media url по ASGI-scope WebSocket-соединения.
+    
+    Args:
+        scope: ASGI-scope с метаданными соединения.
+        image_name: Имя файла в media-хранилище.
+        room_id: Идентификатор room, используемый для проверки доступа.
+    
+    Returns:
+        Объект типа str | None, сформированный в рамках обработки.
+    """
+    path = _room_scoped_media_url_path(image_name, room_id)
+    if not path:
+        return None
+
+    configured_base = _normalize_base_url(getattr(settings, "PUBLIC_BASE_URL", None))
+    origin_base = _normalize_base_url(_first_value(_get_header(scope, b"origin")))
+    forwarded_base = _base_from_host_and_scheme(
+        _get_header(scope, b"x-forwarded-host"),
+        _get_header(scope, b"x-forwarded-proto"),
+    )
+    host_base = _base_from_host_and_scheme(
+        _get_header(scope, b"host"),
+        "https" if scope.get("scheme") in {"wss", "https"} else "http",
+    )
+    base = _pick_base_url(configured_base, forwarded_base, host_base, origin_base)
+    if base:
+        return f"{base}{path}"
+    return path
+
+
 def build_profile_url_from_request(request, image_name: str | None) -> str | None:
     """Формирует profile url from request для дальнейшего использования в потоке обработки.
     
@@ -1,19 +1,38 @@
-"""Prometheus metrics for application and business observability."""
+"""Prometheus metrics for application and business observability.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set before the process starts, every worker
+writes its samples to mmap files in that directory and ``/metrics/`` merges
+them, so one scrape covers all workers behind the same host.
+"""
 
 from __future__ import annotations
 
+import atexit
+import os
 import time
 
 from django.conf import settings
 from django.core.cache import cache
 from django.http import HttpResponse
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
 
 from presence.constants import PRESENCE_CACHE_KEY_AUTH, PRESENCE_CACHE_KEY_GUEST
 
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR", "").strip()
+
 HTTP_INFLIGHT_REQUESTS = Gauge(
     "devils_http_inflight_requests",
     "Current number of in-flight HTTP requests.",
+    multiprocess_mode="livesum",
 )
 HTTP_REQUESTS_TOTAL = Counter(
     "devils_http_requests_total",
@@ -44,6 +63,7 @@ WS_OPEN_CONNECTIONS = Gauge(
     "devils_ws_open_connections",
     "Current number of open WebSocket connections.",
     ["endpoint", "auth_state", "room_kind"],
+    multiprocess_mode="livesum",
 )
 WS_CONNECT_TOTAL = Counter(
     "devils_ws_connect_total",
@@ -55,6 +75,24 @@ WS_EVENTS_TOTAL = Counter(
     "Total number of WebSocket events handled by endpoint.",
     ["endpoint", "event_type", "result"],
 )
+WS_HANDLER_DURATION_SECONDS = Histogram(
+    "devils_ws_handler_duration_seconds",
+    "Time spent handling one inbound WebSocket event.",
+    ["endpoint", "event_type"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+SYNC_HOP_DURATION_SECONDS = Histogram(
+    "devils_sync_hop_duration_seconds",
+    "Time spent running a sync_to_async / database_sync_to_async hop in the worker thread.",
+    ["function"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+SYNC_EXECUTOR_QUEUE_WAIT_SECONDS = Histogram(
+    "devils_sync_executor_queue_wait_seconds",
+    "Time a sync_to_async hop waited for a free executor thread.",
+    ["function"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
 CHAT_MESSAGE_REJECTED_TOTAL = Counter(
     "devils_chat_message_rejected_total",
     "Total number of rejected chat message submissions.",
@@ -86,10 +124,52 @@ CHAT_ATTACHMENTS_BYTES_TOTAL = Counter(
     "Total bytes persisted in chat attachments by content type group.",
     ["content_group"],
 )
+CHAT_UPLOAD_SWEEP_DELETED_TOTAL = Counter(
+    "devils_chat_upload_sweep_deleted_total",
+    "Total number of expired upload sessions and orphaned part files removed by the janitor.",
+    ["kind"],
+)
+CHAT_UPLOAD_SWEEP_DURATION_SECONDS = Histogram(
+    "devils_chat_upload_sweep_duration_seconds",
+    "Duration of one upload-session janitor pass.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+CHAT_BLOB_DELETIONS_TOTAL = Counter(
+    "devils_chat_blob_deletions_total",
+    "Total number of queued attachment blob deletions processed by the deletion worker.",
+    ["result"],
+)
 SITE_ONLINE_USERS = Gauge(
     "devils_site_online_users",
     "Cluster-wide online users derived from Redis-backed presence state.",
     ["kind"],
+    # Every worker refreshes the same cluster-wide value; export the latest one.
+    multiprocess_mode="livemostrecent",
+)
+METRICS_SCRAPE_DURATION_SECONDS = Histogram(
+    "devils_metrics_scrape_duration_seconds",
+    "Time spent rendering the /metrics/ response.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+AUDIT_SINK_FLUSHES_TOTAL = Counter(
+    "devils_audit_sink_flushes_total",
+    "Total number of audit buffer flushes by result.",
+    ["result"],
+)
+AUDIT_SINK_ROWS_TOTAL = Counter(
+    "devils_audit_sink_rows_total",
+    "Total number of audit rows flushed from the buffer by result.",
+    ["result"],
+)
+AUDIT_SINK_BATCH_ROWS = Histogram(
+    "devils_audit_sink_batch_rows",
+    "Number of audit rows written per buffer flush.",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+AUDIT_SINK_OVERFLOW_TOTAL = Counter(
+    "devils_audit_sink_overflow_total",
+    "Total number of audit events written directly because the buffer was full.",
 )
 
 
@@ -148,13 +228,35 @@ def _count_guest_online_users() -> int:
     return sum(1 for info in data.values() if _presence_entry_alive(info, now=now, ttl=ttl))
 
 
-SITE_ONLINE_USERS.labels(kind="authenticated").set_function(_count_authenticated_online_users)
-SITE_ONLINE_USERS.labels(kind="guest").set_function(_count_guest_online_users)
+def refresh_presence_gauges() -> None:
+    """Recomputes online-user gauges from presence state; run by a background job."""
+    SITE_ONLINE_USERS.labels(kind="authenticated").set(_count_authenticated_online_users())
+    SITE_ONLINE_USERS.labels(kind="guest").set(_count_guest_online_users())
+
+
+# Export zeros until the first refresh instead of omitting the series.
+SITE_ONLINE_USERS.labels(kind="authenticated")
+SITE_ONLINE_USERS.labels(kind="guest")
+
+if MULTIPROCESS_DIR:
+    # Drops this worker's live gauges from the merged view once it exits.
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
+
+
+def _scrape_registry() -> CollectorRegistry:
+    if not MULTIPROCESS_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROCESS_DIR)
+    return registry
 
 
 def render_metrics_response(_request) -> HttpResponse:
     """Expose Prometheus metrics for internal scraping."""
-    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+    started = time.perf_counter()
+    payload = generate_latest(_scrape_registry())
+    METRICS_SCRAPE_DURATION_SECONDS.observe(time.perf_counter() - started)
+    return HttpResponse(payload, content_type=CONTENT_TYPE_LATEST)
 
 
 def normalize_http_method(method: str | None) -> str:
@@ -257,6 +359,18 @@ def observe_ws_event(endpoint: str, *, event_type: str, result: str) -> None:
     ).inc()
 
 
+def observe_ws_handler_duration(endpoint: str, *, event_type: str, duration_seconds: float) -> None:
+    WS_HANDLER_DURATION_SECONDS.labels(
+        endpoint=str(endpoint),
+        event_type=str(event_type),
+    ).observe(max(0.0, float(duration_seconds)))
+
+
+def observe_sync_hop(function: str, *, queue_wait_seconds: float, duration_seconds: float) -> None:
+    SYNC_EXECUTOR_QUEUE_WAIT_SECONDS.labels(function=str(function)).observe(max(0.0, float(queue_wait_seconds)))
+    SYNC_HOP_DURATION_SECONDS.labels(function=str(function)).observe(max(0.0, float(duration_seconds)))
+
+
 def observe_chat_message_rejected(*, room_kind: str, reason: str) -> None:
     CHAT_MESSAGE_REJECTED_TOTAL.labels(
         room_kind=normalize_room_kind(room_kind),
@@ -293,3 +407,25 @@ def observe_attachment_created(*, content_type: str | None, file_size: int | Non
     CHAT_ATTACHMENTS_CREATED_TOTAL.labels(content_group=group).inc()
     size = _coerce_int(file_size or 0)
     CHAT_ATTACHMENTS_BYTES_TOTAL.labels(content_group=group).inc(max(0, size))
+
+
+def observe_upload_sweep(*, expired_sessions: int, orphan_parts: int, duration_seconds: float) -> None:
+    CHAT_UPLOAD_SWEEP_DELETED_TOTAL.labels(kind="expired_session").inc(max(0, int(expired_sessions)))
+    CHAT_UPLOAD_SWEEP_DELETED_TOTAL.labels(kind="orphan_part").inc(max(0, int(orphan_parts)))
+    CHAT_UPLOAD_SWEEP_DURATION_SECONDS.observe(max(0.0, float(duration_seconds)))
+
+
+def observe_blob_deletions(*, deleted: int, retried: int, dropped: int) -> None:
+    CHAT_BLOB_DELETIONS_TOTAL.labels(result="deleted").inc(max(0, int(deleted)))
+    CHAT_BLOB_DELETIONS_TOTAL.labels(result="retried").inc(max(0, int(retried)))
+    CHAT_BLOB_DELETIONS_TOTAL.labels(result="dropped").inc(max(0, int(dropped)))
+
+
+def observe_audit_flush(rows: int, result: str) -> None:
+    AUDIT_SINK_FLUSHES_TOTAL.labels(result=str(result)).inc()
+    AUDIT_SINK_ROWS_TOTAL.labels(result=str(result)).inc(max(0, int(rows)))
+    AUDIT_SINK_BATCH_ROWS.observe(max(0, int(rows)))
+
+
+def observe_audit_overflow() -> None:
+    AUDIT_SINK_OVERFLOW_TOTAL.inc()
@@ -1,19 +1,23 @@
 """Facade for centralized security audit."""
 
 from auditlog.application.write_service import (
+    AUDIT_PENDING_SCOPE_KEY,
     LOGGER_NAME,
     audit_http_event,
     audit_security_event,
     audit_ws_event,
     drain_pending_audit_events,
     wait_for_audit_event,
+    wait_for_connection_audit_events,
 )
 
 __all__ = [
+    "AUDIT_PENDING_SCOPE_KEY",
     "LOGGER_NAME",
     "audit_security_event",
     "audit_http_event",
     "audit_ws_event",
     "drain_pending_audit_events",
     "wait_for_audit_event",
+    "wait_for_connection_audit_events",
 ]
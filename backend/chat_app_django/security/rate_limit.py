@@ -1,11 +1,19 @@
-"""Centralized persistent rate-limit service backed by the DB."""
+"""Centralized rate-limit services.
+
+`DbRateLimiter` keeps persistent buckets for low-frequency security checks
+(auth attempts, WS connects). Hot paths such as chat message sending use the
+in-memory `TokenBucket` plus the cache-backed `CacheRateLimiter` instead, so
+throttling never costs a database round trip.
+"""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
 import math
+import time
 
+from django.core.cache import cache
 from django.db import IntegrityError, transaction
 from django.utils import timezone
 
@@ -36,10 +44,27 @@ class RateLimitPolicy:
         return max(1, int(self.window_seconds))
 
 
+def rate_limit_bucket_family(scope_key: str) -> str:
+    """Определяет семейство bucket (раздел индекса) для ключа rate-limit.
+
+    Args:
+        scope_key: Уникальный ключ области действия для счетчика лимитов.
+
+    Returns:
+        Значение `SecurityRateLimitBucket.Family` для ключа.
+    """
+    if scope_key.startswith("rl:auth:"):
+        return SecurityRateLimitBucket.Family.AUTH
+    if scope_key.startswith("rl:ws:connect:"):
+        return SecurityRateLimitBucket.Family.WS_CONNECT
+    return SecurityRateLimitBucket.Family.OTHER
+
+
 class DbRateLimiter:
     """Класс DbRateLimiter инкапсулирует связанную бизнес-логику модуля."""
 
     _MAX_RETRIES = 3
+    PURGE_BATCH_SIZE = 500
 
     @classmethod
     def is_limited(cls, scope_key: str, policy: RateLimitPolicy) -> bool:
@@ -58,6 +83,7 @@ class DbRateLimiter:
 
         limit = policy.normalized_limit()
         window = policy.normalized_window()
+        family = rate_limit_bucket_family(scope_key)
 
         for _attempt in range(cls._MAX_RETRIES):
             now = timezone.now()
@@ -66,12 +92,13 @@ class DbRateLimiter:
                 with transaction.atomic():
                     bucket = (
                         SecurityRateLimitBucket.objects.select_for_update()
-                        .filter(scope_key=scope_key)
+                        .filter(family=family, scope_key=scope_key)
                         .first()
                     )
 
                     if bucket is None:
                         SecurityRateLimitBucket.objects.create(
+                            family=family,
                             scope_key=scope_key,
                             count=1,
                             reset_at=next_reset_at,
@@ -117,7 +144,7 @@ class DbRateLimiter:
         try:
             reset_at = (
                 SecurityRateLimitBucket.objects
-                .filter(scope_key=scope_key)
+                .filter(family=rate_limit_bucket_family(scope_key), scope_key=scope_key)
                 .values_list("reset_at", flat=True)
                 .first()
             )
@@ -133,3 +160,136 @@ class DbRateLimiter:
         except Exception:
             return None
 
+    @classmethod
+    def purge_expired(
+        cls,
+        *,
+        batch_size: int | None = None,
+        max_batches: int | None = None,
+        sleep_seconds: float = 0.0,
+        family: str | None = None,
+    ) -> int:
+        """Удаляет истекшие bucket небольшими пакетами по id.
+
+        Истекший bucket не хранит состояния: следующее обращение все равно
+        сбросит его. Короткие пакеты ограничивают блокировки строк и нагрузку
+        на индекс, поэтому параллельные вызовы `is_limited` не ждут долго.
+
+        Args:
+            batch_size: Количество строк, удаляемых одним запросом.
+            max_batches: Необязательное ограничение числа пакетов за вызов.
+            sleep_seconds: Пауза между пакетами, чтобы уступить живому трафику.
+            family: Необязательное семейство bucket для очистки.
+
+        Returns:
+            Количество удаленных bucket.
+        """
+        size = max(1, int(batch_size or cls.PURGE_BATCH_SIZE))
+        cutoff = timezone.now()
+        queryset = SecurityRateLimitBucket.objects.filter(reset_at__lte=cutoff)
+        if family:
+            queryset = queryset.filter(family=family)
+
+        deleted_total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = list(queryset.order_by("reset_at").values_list("pk", flat=True)[:size])
+            if not ids:
+                break
+            deleted, _details = SecurityRateLimitBucket.objects.filter(
+                pk__in=ids,
+                reset_at__lte=cutoff,
+            ).delete()
+            deleted_total += deleted
+            batches += 1
+            if len(ids) < size:
+                break
+            if sleep_seconds > 0:
+                time.sleep(sleep_seconds)
+        return deleted_total
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    """Класс TokenBucket реализует token bucket одного соединения в памяти процесса без I/O."""
+
+    capacity: float
+    refill_per_second: float
+    tokens: float = field(default=-1.0)
+    updated_at: float = field(default=0.0)
+
+    @classmethod
+    def from_policy(cls, policy: RateLimitPolicy) -> TokenBucket:
+        """Создает заполненный bucket, допускающий `limit` действий за `window_seconds`.
+
+        Args:
+            policy: Политика rate-limit с лимитом и временным окном.
+
+        Returns:
+            Объект типа TokenBucket с полным запасом токенов.
+        """
+        capacity = float(policy.normalized_limit())
+        return cls(
+            capacity=capacity,
+            refill_per_second=capacity / float(policy.normalized_window()),
+            tokens=capacity,
+            updated_at=time.monotonic(),
+        )
+
+    def consume(self, now: float | None = None) -> int | None:
+        """Списывает один токен из bucket.
+
+        Args:
+            now: Момент времени по `time.monotonic()`; по умолчанию текущий.
+
+        Returns:
+            None, если действие разрешено, иначе задержку до повтора в секундах.
+        """
+        current = time.monotonic() if now is None else now
+        if self.tokens < 0:
+            self.tokens = self.capacity
+            self.updated_at = current
+        elapsed = max(0.0, current - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = current
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return None
+        missing = 1.0 - self.tokens
+        return max(1, math.ceil(missing / self.refill_per_second))
+
+
+class CacheRateLimiter:
+    """Класс CacheRateLimiter реализует счетчик фиксированного окна, общий для процессов через Django cache."""
+
+    @classmethod
+    def hit(cls, scope_key: str, policy: RateLimitPolicy) -> int | None:
+        """Учитывает одно действие для `scope_key`.
+
+        Args:
+            scope_key: Уникальный ключ области действия для счетчика лимитов.
+            policy: Политика rate-limit с лимитом и временным окном.
+
+        Returns:
+            None, если действие разрешено, иначе задержку до повтора в секундах.
+        """
+        limit = policy.normalized_limit()
+        window = policy.normalized_window()
+        now = time.time()
+        window_index = int(now // window)
+        key = f"{scope_key}:{window_index}"
+        try:
+            cache.add(key, 0, timeout=window + 1)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # The key expired between add() and incr().
+                cache.set(key, 1, timeout=window + 1)
+                count = 1
+        except Exception:
+            # Cache outage must not block chat; per-connection buckets still apply.
+            return None
+        if count <= limit:
+            return None
+        remaining = (window_index + 1) * window - now
+        return max(1, math.ceil(remaining))
@@ -128,6 +128,16 @@ def chat_message_rate_limit_policy() -> RateLimitPolicy:
     )
 
 
+def chat_message_connection_rate_limit_policy() -> RateLimitPolicy:
+    """Returns the per-connection burst policy for chat message sending."""
+
+    return _section_policy(
+        section_name="chat_message_send_connection",
+        default_limit=10,
+        default_window=5,
+    )
+
+
 def chat_message_rate_limit_disabled() -> bool:
     """Returns whether chat message throttling is disabled."""
 
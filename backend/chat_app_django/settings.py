@@ -83,16 +83,30 @@ if not IS_PYTEST_RUN:
                 "CHAT_ATTACHMENT_ALLOWED_TYPES",
                 "CHAT_ATTACHMENT_DELETE_FILES_ON_MESSAGE_DELETE",
                 "CHAT_ATTACHMENT_UPLOAD_TTL_SECONDS",
+                "CHAT_ATTACHMENT_UPLOAD_SWEEP_INTERVAL",
+                "CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE",
+                "CHAT_ATTACHMENT_UPLOAD_SWEEP_MAX_BATCHES",
+                "CHAT_ATTACHMENT_UPLOAD_ORPHAN_GRACE_SECONDS",
+                "CHAT_ATTACHMENT_BLOB_DELETE_INTERVAL",
+                "CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE",
+                "CHAT_ATTACHMENT_BLOB_DELETE_MAX_BATCHES",
+                "CHAT_ATTACHMENT_BLOB_DELETE_RETRY_SECONDS",
                 "CHAT_ATTACHMENT_CHUNK_MIN_SIZE_KB",
                 "CHAT_ATTACHMENT_CHUNK_MAX_SIZE_MB",
                 "CHAT_ATTACHMENT_TARGET_CHUNKS",
                 "CHAT_THUMBNAIL_MAX_SIDE",
                 "CHAT_THUMBNAIL_MAX_SOURCE_SIZE_MB",
                 "CHAT_THUMBNAIL_MAX_SOURCE_PIXELS",
+                "CHAT_THUMBNAIL_PIPELINE",
+                "CHAT_THUMBNAIL_WORKERS",
+                "CHAT_THUMBNAIL_SIZES",
+                "CHAT_THUMBNAIL_FORMATS",
                 "USER_PASSWORD_DEFAULT_AVATAR",
                 "USER_OAUTH_DEFAULT_AVATAR",
                 "GROUP_DEFAULT_AVATAR",
                 "USER_AVATAR_UPLOAD_DIR",
+                "USER_AVATAR_SIZES",
+                "USER_AVATAR_SERVED_SIZE",
                 "GROUP_AVATAR_UPLOAD_DIR",
             },
         )
@@ -413,6 +427,15 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 USER_AVATAR_UPLOAD_DIR = os.getenv("USER_AVATAR_UPLOAD_DIR", "avatars/users").strip()
 GROUP_AVATAR_UPLOAD_DIR = os.getenv("GROUP_AVATAR_UPLOAD_DIR", "avatars/groups").strip()
+# Square pre-cropped avatar derivatives (side, px) rendered by the media pipeline;
+# lists and messages reference the smallest one of at least USER_AVATAR_SERVED_SIZE.
+try:
+    USER_AVATAR_SIZES = sorted({int(item) for item in env_list("USER_AVATAR_SIZES", ["64", "128", "256"])})
+except ValueError as error:
+    raise ImproperlyConfigured("USER_AVATAR_SIZES должен быть списком целых чисел.") from error
+if not USER_AVATAR_SIZES or any(size < 16 for size in USER_AVATAR_SIZES):
+    raise ImproperlyConfigured("USER_AVATAR_SIZES: размер аватара не может быть меньше 16 px.")
+USER_AVATAR_SERVED_SIZE = env_int("USER_AVATAR_SERVED_SIZE", 128, minimum=16)
 USER_PASSWORD_DEFAULT_AVATAR = os.getenv(
     "USER_PASSWORD_DEFAULT_AVATAR",
     "avatars/Password_defualt.jpg",
@@ -458,7 +481,13 @@ CORS_ALLOW_CREDENTIALS = env_bool("DJANGO_CORS_ALLOW_CREDENTIALS", True)
 CORS_URLS_REGEX = r"^/api/.*$"
 PUBLIC_BASE_URL = os.getenv("DJANGO_PUBLIC_BASE_URL", "").strip() or None
 MEDIA_URL_TTL_SECONDS = env_int("DJANGO_MEDIA_URL_TTL_SECONDS", 300, minimum=1)
+# Expiry of signed media URLs is rounded up to this window so repeated responses reuse one URL.
+MEDIA_URL_EXPIRY_BUCKET_SECONDS = env_int("DJANGO_MEDIA_URL_EXPIRY_BUCKET_SECONDS", 300, minimum=0)
+MEDIA_SIGNED_URL_CACHE_SIZE = env_int("DJANGO_MEDIA_SIGNED_URL_CACHE_SIZE", 4096, minimum=1)
 MEDIA_SIGNING_KEY = os.getenv("DJANGO_MEDIA_SIGNING_KEY", "").strip() or SECRET_KEY
+# TTL of cached room read grants and path -> attachment lookups for chat media (0 disables).
+# Membership and role changes drop the grant immediately; other permission edits apply after the TTL.
+MEDIA_ACCESS_CACHE_SECONDS = env_int("DJANGO_MEDIA_ACCESS_CACHE_SECONDS", 30, minimum=0)
 TRUSTED_PROXY_IPS = env_list("DJANGO_TRUSTED_PROXY_IPS", [])
 TRUSTED_PROXY_RANGES = env_list(
     "DJANGO_TRUSTED_PROXY_RANGES",
@@ -474,6 +503,20 @@ TRUSTED_PROXY_RANGES = env_list(
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 SESSION_COOKIE_SECURE = env_bool("DJANGO_SESSION_COOKIE_SECURE", not DEBUG)
+
+_SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+}
+_session_engine_name = os.getenv("DJANGO_SESSION_ENGINE", "db").strip().lower() or "db"
+if _session_engine_name not in _SESSION_ENGINES:
+    raise ImproperlyConfigured("DJANGO_SESSION_ENGINE должен быть одним из: db, cached_db, cache.")
+if _session_engine_name == "cache" and not REDIS_URL:
+    # Process-local locmem cache would log users out on every restart/worker switch.
+    raise ImproperlyConfigured("DJANGO_SESSION_ENGINE=cache требует REDIS_URL.")
+SESSION_ENGINE = _SESSION_ENGINES[_session_engine_name]
+SESSION_CACHE_ALIAS = "default"
 CSRF_COOKIE_SECURE = env_bool("DJANGO_CSRF_COOKIE_SECURE", not DEBUG)
 SECURE_SSL_REDIRECT = env_bool("DJANGO_SECURE_SSL_REDIRECT", not DEBUG)
 SECURE_REDIRECT_EXEMPT = env_list(
@@ -516,6 +559,11 @@ RATE_LIMITS = {
         "window_seconds": env_int("CHAT_MESSAGE_RATE_WINDOW", 10, minimum=1),
         "disabled": env_bool("CHAT_MESSAGE_RATE_LIMIT_DISABLED", False),
     },
+    # Chat message burst throttle per websocket connection (in-memory bucket).
+    "chat_message_send_connection": {
+        "limit": env_int("CHAT_MESSAGE_CONNECTION_RATE_LIMIT", 10, minimum=1),
+        "window_seconds": env_int("CHAT_MESSAGE_CONNECTION_RATE_WINDOW", 5, minimum=1),
+    },
     # Default websocket connect throttle per endpoint/IP pair.
     "ws_connect_default": {
         "limit": env_int("WS_CONNECT_RATE_LIMIT", 60, minimum=1),
@@ -532,6 +580,11 @@ RATE_LIMITS = {
     },
 }
 
+# Optional in-process sweeper for expired SecurityRateLimitBucket rows (0 disables).
+SECURITY_RATE_LIMIT_SWEEP_INTERVAL = env_int("SECURITY_RATE_LIMIT_SWEEP_INTERVAL", 0, minimum=0)
+SECURITY_RATE_LIMIT_SWEEP_BATCH_SIZE = env_int("SECURITY_RATE_LIMIT_SWEEP_BATCH_SIZE", 500, minimum=1)
+SECURITY_RATE_LIMIT_SWEEP_MAX_BATCHES = env_int("SECURITY_RATE_LIMIT_SWEEP_MAX_BATCHES", 20, minimum=1)
+
 USERNAME_MAX_LENGTH = env_int("USERNAME_MAX_LENGTH", 30, minimum=1)
 if USERNAME_MAX_LENGTH > 150:
     raise ImproperlyConfigured("USERNAME_MAX_LENGTH должен быть <= 150.")
@@ -561,6 +614,24 @@ CHAT_ATTACHMENT_UPLOAD_TTL_SECONDS = env_int(
     21600,
     minimum=60,
 )
+# Periodic jobs below are off by default so that every ASGI worker does not start its own
+# polling threads; docker-compose.prod.yml and example.env enable them for the backend.
+# In-process janitor for expired upload sessions and orphaned .part files (0 disables;
+# `manage.py cleanup_attachment_uploads` does the same pass from cron).
+CHAT_ATTACHMENT_UPLOAD_SWEEP_INTERVAL = env_int("CHAT_ATTACHMENT_UPLOAD_SWEEP_INTERVAL", 0, minimum=0)
+CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE = env_int("CHAT_ATTACHMENT_UPLOAD_SWEEP_BATCH_SIZE", 100, minimum=1)
+CHAT_ATTACHMENT_UPLOAD_SWEEP_MAX_BATCHES = env_int("CHAT_ATTACHMENT_UPLOAD_SWEEP_MAX_BATCHES", 20, minimum=1)
+CHAT_ATTACHMENT_UPLOAD_ORPHAN_GRACE_SECONDS = env_int(
+    "CHAT_ATTACHMENT_UPLOAD_ORPHAN_GRACE_SECONDS",
+    3600,
+    minimum=60,
+)
+# Blob deletions are queued in messages_attachment_blob_deletion and processed by an
+# in-process worker (0 disables; `manage.py process_attachment_blob_deletions` from cron).
+CHAT_ATTACHMENT_BLOB_DELETE_INTERVAL = env_int("CHAT_ATTACHMENT_BLOB_DELETE_INTERVAL", 0, minimum=0)
+CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE = env_int("CHAT_ATTACHMENT_BLOB_DELETE_BATCH_SIZE", 100, minimum=1)
+CHAT_ATTACHMENT_BLOB_DELETE_MAX_BATCHES = env_int("CHAT_ATTACHMENT_BLOB_DELETE_MAX_BATCHES", 10, minimum=1)
+CHAT_ATTACHMENT_BLOB_DELETE_RETRY_SECONDS = env_int("CHAT_ATTACHMENT_BLOB_DELETE_RETRY_SECONDS", 30, minimum=1)
 CHAT_ATTACHMENT_CHUNK_MIN_SIZE_KB = env_int(
     "CHAT_ATTACHMENT_CHUNK_MIN_SIZE_KB",
     512,
@@ -587,17 +658,48 @@ CHAT_THUMBNAIL_MAX_SOURCE_PIXELS = env_int(
     50_000_000,
     minimum=1,
 )
+# Thumbnails are rendered after the upload commits: "process" (CPU work in a process pool),
+# "thread" (same dispatcher threads) or "inline" (synchronously in the committing thread).
+CHAT_THUMBNAIL_PIPELINE = os.getenv("CHAT_THUMBNAIL_PIPELINE", "process").strip().lower() or "process"
+if CHAT_THUMBNAIL_PIPELINE not in {"process", "thread", "inline"}:
+    raise ImproperlyConfigured("CHAT_THUMBNAIL_PIPELINE должен быть process, thread или inline.")
+CHAT_THUMBNAIL_WORKERS = env_int("CHAT_THUMBNAIL_WORKERS", 2, minimum=1)
+CHAT_THUMBNAIL_RENDER_TIMEOUT_SECONDS = env_int("CHAT_THUMBNAIL_RENDER_TIMEOUT_SECONDS", 30, minimum=1)
+# Pending thumbnails older than CHAT_THUMBNAIL_STALE_SECONDS are re-queued (e.g. after a restart),
+# at most once per CHAT_THUMBNAIL_STALE_SECONDS lease (0 disables).
+CHAT_THUMBNAIL_RECOVERY_INTERVAL = env_int("CHAT_THUMBNAIL_RECOVERY_INTERVAL", 0, minimum=0)
+CHAT_THUMBNAIL_STALE_SECONDS = env_int("CHAT_THUMBNAIL_STALE_SECONDS", 300, minimum=1)
+# Extra derivative sizes (max side, px) rendered next to CHAT_THUMBNAIL_MAX_SIDE for `srcset`.
+try:
+    CHAT_THUMBNAIL_SIZES = sorted({int(item) for item in env_list("CHAT_THUMBNAIL_SIZES", ["160", "400", "800"])})
+except ValueError as error:
+    raise ImproperlyConfigured("CHAT_THUMBNAIL_SIZES должен быть списком целых чисел.") from error
+if any(size < 16 for size in CHAT_THUMBNAIL_SIZES):
+    raise ImproperlyConfigured("CHAT_THUMBNAIL_SIZES: размер миниатюры не может быть меньше 16 px.")
+# Output formats in order of preference; ones Pillow cannot encode here are skipped.
+CHAT_THUMBNAIL_FORMATS = [item.lower() for item in env_list("CHAT_THUMBNAIL_FORMATS", ["webp"])]
+if set(CHAT_THUMBNAIL_FORMATS) - {"webp", "avif", "jpeg"}:
+    raise ImproperlyConfigured("CHAT_THUMBNAIL_FORMATS может содержать только webp, avif и jpeg.")
 PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", "40"))
 PRESENCE_GRACE = int(os.getenv("PRESENCE_GRACE", "5"))
 PRESENCE_HEARTBEAT = int(os.getenv("PRESENCE_HEARTBEAT", "20"))
 PRESENCE_IDLE_TIMEOUT = int(os.getenv("PRESENCE_IDLE_TIMEOUT", "90"))
 PRESENCE_TOUCH_INTERVAL = int(os.getenv("PRESENCE_TOUCH_INTERVAL", "30"))
+# How often online-user gauges are recomputed off the scrape path (0 disables).
+METRICS_PRESENCE_REFRESH_INTERVAL = env_int("METRICS_PRESENCE_REFRESH_INTERVAL", 0, minimum=0)
 
 DIRECT_INBOX_UNREAD_TTL = int(os.getenv("DIRECT_INBOX_UNREAD_TTL", str(30 * 24 * 60 * 60)))
 DIRECT_INBOX_ACTIVE_TTL = int(os.getenv("DIRECT_INBOX_ACTIVE_TTL", "90"))
 DIRECT_INBOX_HEARTBEAT = int(os.getenv("DIRECT_INBOX_HEARTBEAT", "20"))
 DIRECT_INBOX_IDLE_TIMEOUT = int(os.getenv("DIRECT_INBOX_IDLE_TIMEOUT", "90"))
 
+# Optional `ws/mux/` endpoint carrying chat, presence and inbox over one socket.
+WS_MULTIPLEX_ENABLED = env_bool("WS_MULTIPLEX_ENABLED", False)
+WS_MULTIPLEX_HEARTBEAT = env_int("WS_MULTIPLEX_HEARTBEAT", 20, minimum=5)
+WS_MULTIPLEX_IDLE_TIMEOUT = env_int("WS_MULTIPLEX_IDLE_TIMEOUT", 90, minimum=0)
+# Resolution of the shared heartbeat / idle timer wheel (seconds).
+WS_TIMER_TICK_SECONDS = env_int("WS_TIMER_TICK_SECONDS", 1, minimum=1)
+
 # -- Groups -------------------------------------------------------------
 GROUP_INVITE_CODE_LENGTH = env_int("GROUP_INVITE_CODE_LENGTH", 12, minimum=8)
 GROUP_MAX_INVITES_PER_ROOM = env_int("GROUP_MAX_INVITES_PER_ROOM", 50, minimum=1)
@@ -605,8 +707,33 @@ GROUP_MAX_PINNED_MESSAGES = env_int("GROUP_MAX_PINNED_MESSAGES", 100, minimum=1)
 GROUP_DEFAULT_MAX_MEMBERS = env_int("GROUP_DEFAULT_MAX_MEMBERS", 200000, minimum=1)
 
 AUDIT_RETENTION_DAYS = env_int("AUDIT_RETENTION_DAYS", 180, minimum=1)
+AUDIT_CLEANUP_BATCH_SIZE = env_int("AUDIT_CLEANUP_BATCH_SIZE", 5000, minimum=1)
 AUDIT_API_DEFAULT_LIMIT = env_int("AUDIT_API_DEFAULT_LIMIT", 50, minimum=1)
 AUDIT_API_MAX_LIMIT = env_int("AUDIT_API_MAX_LIMIT", 200, minimum=1)
+# Cached action histograms for /api/admin/audit/actions/ (0 disables the cache).
+AUDIT_ACTION_COUNTS_CACHE_SECONDS = env_int("AUDIT_ACTION_COUNTS_CACHE_SECONDS", 60, minimum=0)
+AUDIT_ACTION_COUNTS_REFRESH_INTERVAL = env_int("AUDIT_ACTION_COUNTS_REFRESH_INTERVAL", 0, minimum=0)
+# Buffered audit writes: rows are flushed with bulk_create by size or age.
+# Off by default so local runs and tests see rows as soon as they are written.
+AUDIT_BATCH_ENABLED = env_bool("AUDIT_BATCH_ENABLED", False)
+AUDIT_BATCH_SIZE = env_int("AUDIT_BATCH_SIZE", 500, minimum=1)
+AUDIT_BATCH_FLUSH_MS = env_int("AUDIT_BATCH_FLUSH_MS", 200, minimum=0)
+AUDIT_BATCH_MAX_BUFFER = env_int("AUDIT_BATCH_MAX_BUFFER", 10000, minimum=1)
+# Per-action tiering, e.g. "http.request=sample:0.1,ws.message.*=log,site.visit=aggregate".
+# Failed and security-relevant actions are always persisted.
+AUDIT_ACTION_POLICIES = env_list("AUDIT_ACTION_POLICIES", [])
+# Aggregated counters are flushed every AUDIT_AGGREGATE_FLUSH_INTERVAL seconds (0: only on exit).
+AUDIT_AGGREGATE_FLUSH_INTERVAL = env_int("AUDIT_AGGREGATE_FLUSH_INTERVAL", 0, minimum=0)
+# PostgreSQL range partitions of the audit table (see `create_audit_partitions`).
+AUDIT_PARTITION_INTERVAL = os.getenv("AUDIT_PARTITION_INTERVAL", "month").strip().lower() or "month"
+if AUDIT_PARTITION_INTERVAL not in {"month", "day"}:
+    raise ImproperlyConfigured("AUDIT_PARTITION_INTERVAL должен быть month или day.")
+AUDIT_PARTITION_PREMAKE = env_int("AUDIT_PARTITION_PREMAKE", 3, minimum=0)
+AUDIT_PARTITION_MAINTENANCE_INTERVAL = env_int("AUDIT_PARTITION_MAINTENANCE_INTERVAL", 0, minimum=0)
+# Per-(ip, day) rollup behind the admin IP summary (see `refresh_audit_ip_rollup`; 0 disables).
+AUDIT_IP_ROLLUP_INTERVAL = env_int("AUDIT_IP_ROLLUP_INTERVAL", 0, minimum=0)
+AUDIT_IP_ROLLUP_BATCH_SIZE = env_int("AUDIT_IP_ROLLUP_BATCH_SIZE", 5000, minimum=1)
+AUDIT_IP_ROLLUP_SETTLE_SECONDS = env_int("AUDIT_IP_ROLLUP_SETTLE_SECONDS", 30, minimum=0)
 
 if REDIS_URL:
     redis_cache_config = {
@@ -635,6 +762,8 @@ else:
     }
 
 WS_AUTH_CACHE_ALIAS = "ws_auth"
+# TTL of cached `(session_key, user_id) -> user` lookups for WS connects (0 disables).
+WS_AUTH_USER_CACHE_TTL = env_int("WS_AUTH_USER_CACHE_TTL", 30, minimum=0)
 
 
 LOG_LEVEL = os.getenv("DJANGO_LOG_LEVEL", "INFO").upper()
@@ -0,0 +1,53 @@
+"""`sync_to_async` wrappers that time each hop for Prometheus.
+
+Every call records how long it waited for an executor thread (queue wait,
+which grows when the pool is saturated) and how long the sync body ran.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+
+from chat_app_django.metrics import observe_sync_hop
+
+
+def timed_sync_to_async(
+    label: str,
+    *,
+    database: bool = False,
+    thread_sensitive: bool = True,
+) -> Callable[[Callable[..., Any]], Callable[..., Awaitable[Any]]]:
+    """Decorates a sync function like `sync_to_async`, observing hop timings under `label`.
+
+    With ``database=True`` the hop goes through `database_sync_to_async`, which
+    also closes stale DB connections around the call.
+    """
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+        def run(submitted_at: float, args: tuple, kwargs: dict) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_sync_hop(
+                    label,
+                    queue_wait_seconds=started - submitted_at,
+                    duration_seconds=time.perf_counter() - started,
+                )
+
+        hop = database_sync_to_async if database else sync_to_async
+        runner = hop(run, thread_sensitive=thread_sensitive)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await runner(time.perf_counter(), args, kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,56 @@
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from chat_app_django import background
+
+
+class PeriodicJobTests(SimpleTestCase):
+    def tearDown(self):
+        background.stop_periodic_jobs()
+
+    def test_job_runs_repeatedly_until_stopped(self):
+        ran = threading.Event()
+        calls = []
+
+        def _tick():
+            calls.append(1)
+            if len(calls) >= 2:
+                ran.set()
+
+        job = background.start_periodic_job("test-tick", 0.01, _tick)
+
+        self.assertIsNotNone(job)
+        self.assertTrue(ran.wait(2))
+        background.stop_periodic_jobs()
+        self.assertFalse(job.is_running)
+
+    def test_non_positive_interval_disables_job(self):
+        self.assertIsNone(background.start_periodic_job("test-off", 0, lambda: None))
+
+    def test_same_job_is_started_once_per_process(self):
+        first = background.start_periodic_job("test-once", 60, lambda: None)
+        second = background.start_periodic_job("test-once", 60, lambda: None)
+        self.assertIs(first, second)
+
+    def test_job_failure_is_logged_and_swallowed(self):
+        job = background.PeriodicJob("test-fail", 60, lambda: 1 / 0)
+        with patch("chat_app_django.background.close_old_connections") as close_mock:
+            with self.assertLogs("chat_app_django.background", level="ERROR"):
+                job.run_once()
+        close_mock.assert_called_once()
+
+    @override_settings(SECURITY_RATE_LIMIT_SWEEP_INTERVAL=0)
+    def test_rate_limit_sweeper_is_disabled_by_default(self):
+        with patch("chat_app_django.background.start_periodic_job") as start_mock:
+            background.start_background_jobs()
+        intervals = {call.args[0]: call.args[1] for call in start_mock.call_args_list}
+        self.assertEqual(intervals["rate_limit_bucket_sweeper"], 0)
+
+    @override_settings(AUDIT_AGGREGATE_FLUSH_INTERVAL=15)
+    def test_audit_aggregate_flusher_uses_configured_interval(self):
+        with patch("chat_app_django.background.start_periodic_job") as start_mock:
+            background.start_background_jobs()
+        intervals = {call.args[0]: call.args[1] for call in start_mock.call_args_list}
+        self.assertEqual(intervals["audit_aggregate_flusher"], 15)
@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
+import subprocess
+import sys
+import tempfile
 import time
 from contextlib import AbstractContextManager
 from pathlib import Path
@@ -164,6 +168,7 @@ class HttpMetricsTests(TestCase):
             },
             timeout=60,
         )
+        metrics.refresh_presence_gauges()
 
         self.assertEqual(
             _sample_value(
@@ -183,6 +188,31 @@ class HttpMetricsTests(TestCase):
         )
 
 
+    def test_scrape_does_not_read_presence_state(self):
+        with patch.object(metrics, "_safe_cache_mapping") as presence_mock:
+            response = cast(Any, self.client.get("/metrics/"))
+
+        self.assertEqual(response.status_code, 200)
+        presence_mock.assert_not_called()
+        self.assertIn("devils_metrics_scrape_duration_seconds_count", response.content.decode("utf-8"))
+
+    def test_multiprocess_mode_merges_samples_from_other_workers(self):
+        with tempfile.TemporaryDirectory() as multiproc_dir:
+            worker = (
+                "from prometheus_client import Counter\n"
+                "Counter('devils_worker_probe_total', 'probe').inc(3)\n"
+            )
+            subprocess.run(
+                [sys.executable, "-c", worker],
+                check=True,
+                env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir},
+            )
+            with patch.object(metrics, "MULTIPROCESS_DIR", multiproc_dir):
+                response = cast(Any, self.client.get("/metrics/"))
+
+        self.assertIn("devils_worker_probe_total 3.0", response.content.decode("utf-8"))
+
+
 @override_settings(GOOGLE_OAUTH_CLIENT_ID="client-id")
 class BusinessMetricsTests(TestCase):
     def setUp(self):
@@ -3,6 +3,7 @@ from django.test import SimpleTestCase, override_settings
 from chat_app_django.security.rate_limit_config import (
     auth_rate_limit_disabled,
     auth_rate_limit_policy,
+    chat_message_connection_rate_limit_policy,
     chat_message_rate_limit_disabled,
     chat_message_rate_limit_policy,
     ws_connect_rate_limit_disabled,
@@ -15,6 +16,7 @@ class RateLimitConfigTests(SimpleTestCase):
         RATE_LIMITS={
             "auth_attempts": {"limit": 11, "window_seconds": 44, "disabled": True},
             "chat_message_send": {"limit": 22, "window_seconds": 55, "disabled": True},
+            "chat_message_send_connection": {"limit": 12, "window_seconds": 6},
             "ws_connect_default": {"limit": 33, "window_seconds": 66},
             "ws_connect_presence": {"limit": 77, "window_seconds": 88},
             "ws_connect": {"disabled": True},
@@ -31,6 +33,10 @@ class RateLimitConfigTests(SimpleTestCase):
         self.assertEqual(chat.window_seconds, 55)
         self.assertTrue(chat_message_rate_limit_disabled())
 
+        chat_connection = chat_message_connection_rate_limit_policy()
+        self.assertEqual(chat_connection.limit, 12)
+        self.assertEqual(chat_connection.window_seconds, 6)
+
         ws_default = ws_connect_rate_limit_policy("chat")
         self.assertEqual(ws_default.limit, 33)
         self.assertEqual(ws_default.window_seconds, 66)
@@ -55,6 +61,10 @@ class RateLimitConfigTests(SimpleTestCase):
         self.assertEqual(chat.window_seconds, 10)
         self.assertFalse(chat_message_rate_limit_disabled())
 
+        chat_connection = chat_message_connection_rate_limit_policy()
+        self.assertEqual(chat_connection.limit, 10)
+        self.assertEqual(chat_connection.window_seconds, 5)
+
         ws_default = ws_connect_rate_limit_policy("chat")
         self.assertEqual(ws_default.limit, 60)
         self.assertEqual(ws_default.window_seconds, 60)
@@ -1,11 +1,20 @@
+from io import StringIO
 from unittest.mock import patch
 from datetime import timedelta
 
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
 from django.utils import timezone
 
-from chat_app_django.security.rate_limit import DbRateLimiter, RateLimitPolicy
+from chat_app_django.security.rate_limit import (
+    CacheRateLimiter,
+    DbRateLimiter,
+    RateLimitPolicy,
+    TokenBucket,
+    rate_limit_bucket_family,
+)
 from users.models import SecurityRateLimitBucket
 
 
@@ -63,3 +72,113 @@ class RateLimitServiceTests(TestCase):
 
     def test_retry_after_seconds_empty_scope_is_fail_closed_value(self):
         self.assertEqual(DbRateLimiter.retry_after_seconds(""), 1)
+
+
+class TokenBucketTests(TestCase):
+    def test_bucket_allows_burst_then_refills_over_time(self):
+        bucket = TokenBucket.from_policy(RateLimitPolicy(limit=2, window_seconds=10))
+        bucket.updated_at = 100.0
+
+        self.assertIsNone(bucket.consume(now=100.0))
+        self.assertIsNone(bucket.consume(now=100.0))
+        self.assertEqual(bucket.consume(now=100.0), 5)
+
+        self.assertIsNone(bucket.consume(now=105.0))
+        self.assertIsNotNone(bucket.consume(now=105.0))
+
+    def test_bucket_never_exceeds_capacity(self):
+        bucket = TokenBucket.from_policy(RateLimitPolicy(limit=3, window_seconds=3))
+        bucket.updated_at = 0.0
+
+        bucket.consume(now=1_000.0)
+        self.assertEqual(bucket.tokens, 2.0)
+
+
+class CacheRateLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counter_limits_within_window_without_db_rows(self):
+        policy = RateLimitPolicy(limit=2, window_seconds=60)
+
+        self.assertIsNone(CacheRateLimiter.hit("rl:test:cache", policy))
+        self.assertIsNone(CacheRateLimiter.hit("rl:test:cache", policy))
+        retry_after = CacheRateLimiter.hit("rl:test:cache", policy)
+
+        self.assertIsNotNone(retry_after)
+        self.assertGreaterEqual(retry_after, 1)
+        self.assertLessEqual(retry_after, 60)
+        self.assertFalse(SecurityRateLimitBucket.objects.exists())
+
+    def test_counter_starts_over_in_next_window(self):
+        policy = RateLimitPolicy(limit=1, window_seconds=10)
+        with patch("chat_app_django.security.rate_limit.time.time", return_value=1_000.0):
+            self.assertIsNone(CacheRateLimiter.hit("rl:test:window", policy))
+            self.assertEqual(CacheRateLimiter.hit("rl:test:window", policy), 10)
+        with patch("chat_app_django.security.rate_limit.time.time", return_value=1_010.0):
+            self.assertIsNone(CacheRateLimiter.hit("rl:test:window", policy))
+
+    def test_cache_failure_is_fail_open(self):
+        policy = RateLimitPolicy(limit=1, window_seconds=10)
+        with patch(
+            "chat_app_django.security.rate_limit.cache.add",
+            side_effect=RuntimeError("cache down"),
+        ):
+            self.assertIsNone(CacheRateLimiter.hit("rl:test:down", policy))
+
+
+class RateLimitBucketFamilyTests(TestCase):
+    def _bucket(self, key: str, *, expired: bool):
+        delta = timedelta(seconds=-5) if expired else timedelta(seconds=60)
+        return SecurityRateLimitBucket.objects.create(
+            scope_key=key,
+            family=rate_limit_bucket_family(key),
+            count=1,
+            reset_at=timezone.now() + delta,
+        )
+
+    def test_family_is_derived_from_scope_prefix(self):
+        self.assertEqual(rate_limit_bucket_family("rl:auth:login:1.2.3.4"), "auth")
+        self.assertEqual(rate_limit_bucket_family("rl:ws:connect:chat:1.2.3.4"), "ws_connect")
+        self.assertEqual(rate_limit_bucket_family("rl:chat:message:1"), "other")
+
+    def test_is_limited_stores_bucket_in_its_family(self):
+        policy = RateLimitPolicy(limit=2, window_seconds=10)
+        self.assertFalse(DbRateLimiter.is_limited("rl:auth:login:9.9.9.9", policy))
+
+        bucket = SecurityRateLimitBucket.objects.get(scope_key="rl:auth:login:9.9.9.9")
+        self.assertEqual(bucket.family, SecurityRateLimitBucket.Family.AUTH)
+
+    def test_purge_expired_deletes_only_expired_rows_in_batches(self):
+        for index in range(5):
+            self._bucket(f"rl:auth:login:10.0.0.{index}", expired=True)
+        live = self._bucket("rl:auth:login:10.0.1.1", expired=False)
+
+        with patch("chat_app_django.security.rate_limit.time.sleep") as sleep_mock:
+            deleted = DbRateLimiter.purge_expired(batch_size=2, sleep_seconds=0.01)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(sleep_mock.call_count, 2)
+        self.assertEqual(list(SecurityRateLimitBucket.objects.values_list("pk", flat=True)), [live.pk])
+
+    def test_purge_expired_respects_max_batches_and_family(self):
+        for index in range(4):
+            self._bucket(f"rl:ws:connect:chat:10.0.0.{index}", expired=True)
+        self._bucket("rl:auth:login:10.0.0.1", expired=True)
+
+        deleted = DbRateLimiter.purge_expired(batch_size=1, max_batches=2, family="ws_connect")
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(SecurityRateLimitBucket.objects.filter(family="ws_connect").count(), 2)
+        self.assertEqual(SecurityRateLimitBucket.objects.filter(family="auth").count(), 1)
+
+    def test_cleanup_command_purges_expired_buckets(self):
+        self._bucket("rl:auth:login:10.0.0.1", expired=True)
+        self._bucket("rl:chat:message:1", expired=True)
+        self._bucket("rl:auth:login:10.0.0.2", expired=False)
+        out = StringIO()
+
+        call_command("cleanup_rate_limit_buckets", "--batch-size", "1", stdout=out)
+
+        self.assertIn("2", out.getvalue())
+        self.assertEqual(SecurityRateLimitBucket.objects.count(), 1)
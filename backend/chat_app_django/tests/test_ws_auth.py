@@ -8,7 +8,7 @@ import tempfile
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache.backends.filebased import FileBasedCache
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from unittest.mock import patch
 
 from chat_app_django import ws_auth as ws_auth_module
@@ -16,6 +16,7 @@ from chat_app_django.ws_auth import (
     issue_authenticated_ws_auth_token,
     issue_guest_ws_auth_token,
 )
+from chat_app_django import ws_auth_middleware as ws_auth_middleware_module
 from chat_app_django.ws_auth_middleware import WebSocketTokenAuthMiddleware
 from users.application import auth_service
 
@@ -68,6 +69,120 @@ class WebSocketTokenAuthMiddlewareTests(TestCase):
         self.assertTrue(getattr(restored_user, "is_authenticated", False))
         self.assertEqual(getattr(restored_user, "pk", None), self.user.pk)
 
+    def _issue_logged_in_token(self, client: Client) -> tuple[str, str]:
+        client.force_login(self.user)
+        session_key = client.session.session_key
+        assert session_key is not None
+        token = issue_authenticated_ws_auth_token(user_id=self.user.pk, session_key=session_key)
+        return token, session_key
+
+    def test_repeat_connect_is_served_from_user_cache(self):
+        token, _session_key = self._issue_logged_in_token(Client())
+
+        with patch.object(
+            ws_auth_middleware_module,
+            "_load_authenticated_user",
+            wraps=ws_auth_middleware_module._load_authenticated_user,
+        ) as load_mock:
+            first_user = self._run_middleware(query_string=f"wst={token}").get("user")
+            second_user = self._run_middleware(query_string=f"wst={token}").get("user")
+            third_user = self._run_middleware(query_string=f"wst={token}").get("user")
+
+        self.assertEqual(load_mock.call_count, 1)
+        for restored_user in (first_user, second_user, third_user):
+            self.assertTrue(getattr(restored_user, "is_authenticated", False))
+            self.assertEqual(getattr(restored_user, "pk", None), self.user.pk)
+        self.assertEqual(getattr(third_user, "username", None), self.user.username)
+        self.assertIn("password", third_user.get_deferred_fields())
+
+    @override_settings(WS_AUTH_USER_CACHE_TTL=0)
+    def test_user_cache_can_be_disabled(self):
+        token, _session_key = self._issue_logged_in_token(Client())
+
+        with patch.object(
+            ws_auth_middleware_module,
+            "_load_authenticated_user",
+            wraps=ws_auth_middleware_module._load_authenticated_user,
+        ) as load_mock:
+            self._run_middleware(query_string=f"wst={token}")
+            self._run_middleware(query_string=f"wst={token}")
+
+        self.assertEqual(load_mock.call_count, 2)
+
+    def test_password_change_invalidates_cached_user(self):
+        token, _session_key = self._issue_logged_in_token(Client())
+        self._run_middleware(query_string=f"wst={token}")
+
+        auth_service.change_password(
+            self.user,
+            old_password="pass12345",
+            new_password="NewPass12345!",
+            new_password_confirm="NewPass12345!",
+        )
+
+        with patch.object(
+            ws_auth_middleware_module,
+            "_load_authenticated_user",
+            wraps=ws_auth_middleware_module._load_authenticated_user,
+        ) as load_mock:
+            self._run_middleware(query_string=f"wst={token}")
+
+        self.assertEqual(load_mock.call_count, 1)
+
+    def test_logout_drops_cached_user(self):
+        client = Client()
+        token, session_key = self._issue_logged_in_token(client)
+        self._run_middleware(query_string=f"wst={token}")
+
+        auth_service.logout_session(session_key)
+        client.logout()
+
+        scope = self._run_middleware(query_string=f"wst={token}")
+        self.assertFalse(getattr(scope.get("user"), "is_authenticated", False))
+
+    def test_deactivation_invalidates_cached_user(self):
+        token, _session_key = self._issue_logged_in_token(Client())
+        self._run_middleware(query_string=f"wst={token}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=["is_active"])
+
+        scope = self._run_middleware(query_string=f"wst={token}")
+        self.assertFalse(getattr(scope.get("user"), "is_authenticated", False))
+
+    def test_demotion_invalidates_cached_user(self):
+        self.user.is_staff = True
+        self.user.save()
+        token, _session_key = self._issue_logged_in_token(Client())
+        self.assertTrue(self._run_middleware(query_string=f"wst={token}")["user"].is_staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = False
+            self.user.save(update_fields=["is_staff"])
+
+        self.assertFalse(self._run_middleware(query_string=f"wst={token}")["user"].is_staff)
+
+    def test_session_deleted_outside_logout_drops_cached_user(self):
+        from django.contrib.sessions.models import Session
+
+        token, session_key = self._issue_logged_in_token(Client())
+        self._run_middleware(query_string=f"wst={token}")
+
+        # Admin deletion or `clearsessions`: no logout hook runs.
+        Session.objects.filter(session_key=session_key).delete()
+
+        scope = self._run_middleware(query_string=f"wst={token}")
+        self.assertFalse(getattr(scope.get("user"), "is_authenticated", False))
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_db_session_engine_restores_user(self):
+        token, _session_key = self._issue_logged_in_token(Client())
+
+        scope = self._run_middleware(query_string=f"wst={token}")
+
+        self.assertEqual(getattr(scope.get("user"), "pk", None), self.user.pk)
+
     def test_guest_token_restores_guest_session_key(self):
         client = Client()
         response = client.get("/api/auth/presence-session/")
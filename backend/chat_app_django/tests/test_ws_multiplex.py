@@ -0,0 +1,176 @@
+"""Tests for the multiplexed chat/presence/inbox websocket endpoint."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import re_path
+
+from chat_app_django.security.audit import AUDIT_PENDING_SCOPE_KEY
+from chat_app_django.ws_multiplex import MultiplexConsumer
+
+User = get_user_model()
+application = URLRouter([re_path(r"ws/mux/$", MultiplexConsumer.as_asgi())])
+
+
+class MultiplexConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="mux_user", password="pass12345")
+
+    async def _connect(self, user=None, session_key="mux-session"):
+        communicator = WebsocketCommunicator(application, "/ws/mux/", headers=[(b"host", b"localhost")])
+        communicator.scope["user"] = user if user is not None else AnonymousUser()
+        communicator.scope["client"] = ("198.51.100.40", 56000)
+        communicator.scope["session"] = SimpleNamespace(session_key=session_key)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def _receive_until(self, communicator, predicate):
+        for _ in range(10):
+            frame = json.loads(await communicator.receive_from(timeout=2))
+            if predicate(frame):
+                return frame
+        self.fail("expected frame was not received")
+
+    def test_streams_share_one_socket(self):
+        async def run():
+            communicator = await self._connect(user=self.user)
+
+            await communicator.send_json_to({"op": "open", "stream": "presence"})
+            await communicator.send_json_to({"op": "open", "stream": "inbox"})
+
+            payloads: dict[str, dict] = {}
+            while not ({"presence", "inbox"} <= payloads.keys()):
+                frame = json.loads(await communicator.receive_from(timeout=2))
+                if "payload" in frame:
+                    payloads.setdefault(frame["stream"], frame["payload"])
+            self.assertIn("online", payloads["presence"])
+            self.assertEqual(payloads["inbox"]["type"], "direct_unread_state")
+
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_stream_payload_is_dispatched_to_existing_consumer_logic(self):
+        async def run():
+            communicator = await self._connect(user=self.user)
+            await communicator.send_json_to({"op": "open", "stream": "inbox"})
+            await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+
+            await communicator.send_json_to(
+                {"stream": "inbox", "payload": {"type": "set_active_room", "roomId": "bad"}},
+            )
+            error_frame = await self._receive_until(
+                communicator,
+                lambda frame: frame.get("payload", {}).get("type") == "error",
+            )
+            self.assertEqual(error_frame, {"stream": "inbox", "payload": {"type": "error", "code": "invalid_payload"}})
+
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_rejected_stream_does_not_close_socket(self):
+        async def run():
+            communicator = await self._connect()
+
+            await communicator.send_json_to({"op": "open", "stream": "inbox"})
+            closed_frame = await self._receive_until(communicator, lambda frame: frame.get("op") == "closed")
+            self.assertEqual(closed_frame, {"stream": "inbox", "op": "closed", "code": 4401})
+
+            await communicator.send_json_to({"op": "open", "stream": "presence"})
+            presence_frame = await self._receive_until(
+                communicator,
+                lambda frame: frame.get("stream") == "presence" and "payload" in frame,
+            )
+            self.assertIn("guests", presence_frame["payload"])
+
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_sub_streams_skip_per_endpoint_connect_rate_limit(self):
+        async def run():
+            with patch("presence.consumers._ws_connect_rate_limited") as presence_limit:
+                communicator = await self._connect(user=self.user)
+                await communicator.send_json_to({"op": "open", "stream": "presence"})
+                await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+                await communicator.disconnect()
+            presence_limit.assert_not_called()
+
+        async_to_sync(run)()
+
+    def test_unknown_and_unopened_streams_are_reported(self):
+        async def run():
+            communicator = await self._connect(user=self.user)
+
+            await communicator.send_json_to({"op": "open", "stream": "admin"})
+            self.assertEqual(
+                await communicator.receive_json_from(timeout=2),
+                {"op": "error", "error": "unknown_stream", "stream": "admin"},
+            )
+            await communicator.send_json_to({"stream": "chat", "payload": {"type": "typing"}})
+            self.assertEqual(
+                await communicator.receive_json_from(timeout=2),
+                {"op": "error", "error": "stream_not_open", "stream": "chat"},
+            )
+
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_close_op_disconnects_only_that_stream(self):
+        async def run():
+            communicator = await self._connect(user=self.user)
+            await communicator.send_json_to({"op": "open", "stream": "chat"})
+            await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+
+            await communicator.send_json_to({"op": "close", "stream": "chat"})
+            closed_frame = await self._receive_until(communicator, lambda frame: frame.get("op") == "closed")
+            self.assertEqual(closed_frame, {"stream": "chat", "op": "closed", "code": 1000})
+
+            await communicator.send_json_to({"op": "open", "stream": "chat"})
+            opened_frame = await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+            self.assertEqual(opened_frame, {"stream": "chat", "op": "opened"})
+
+            await communicator.disconnect()
+
+        async_to_sync(run)()
+
+    def test_sub_streams_do_not_share_outer_audit_writes(self):
+        async def run():
+            outer_write = asyncio.get_running_loop().create_future()
+            outer_pending = {outer_write}
+            communicator = WebsocketCommunicator(application, "/ws/mux/", headers=[(b"host", b"localhost")])
+            communicator.scope["user"] = self.user
+            communicator.scope["client"] = ("198.51.100.40", 56000)
+            communicator.scope["session"] = SimpleNamespace(session_key="mux-session")
+            communicator.scope[AUDIT_PENDING_SCOPE_KEY] = outer_pending
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await communicator.send_json_to({"op": "open", "stream": "presence"})
+            await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+            await communicator.send_json_to({"op": "close", "stream": "presence"})
+            # Closing a sub-stream must not wait for (or clear) the outer socket's writes.
+            closed_frame = await self._receive_until(communicator, lambda frame: frame.get("op") == "closed")
+            self.assertEqual(closed_frame["stream"], "presence")
+            await communicator.send_json_to({"op": "open", "stream": "inbox"})
+            opened_frame = await self._receive_until(communicator, lambda frame: frame.get("op") == "opened")
+            self.assertEqual(opened_frame, {"stream": "inbox", "op": "opened"})
+            self.assertIn(outer_write, outer_pending)
+
+            outer_write.set_result(None)
+            await communicator.disconnect()
+
+        async_to_sync(run)()
@@ -0,0 +1,143 @@
+"""Tests for the shared websocket timer wheel."""
+
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from chat_app_django.ws_timers import TimerWheel, connection_timers
+
+
+class TimerWheelTests(SimpleTestCase):
+    def test_many_timers_share_one_scheduler_task(self):
+        async def run():
+            wheel = TimerWheel(tick_seconds=0.01)
+            calls: dict[int, int] = {}
+
+            def _callback(index):
+                async def _tick():
+                    calls[index] = calls.get(index, 0) + 1
+                return _tick
+
+            tasks_before = len(asyncio.all_tasks())
+            handles = [wheel.schedule_every(0.02, _callback(index)) for index in range(50)]
+            self.assertEqual(len(asyncio.all_tasks()) - tasks_before, 1)
+
+            await asyncio.sleep(0.15)
+            self.assertEqual(len(calls), 50)
+            self.assertTrue(all(count >= 2 for count in calls.values()))
+
+            for handle in handles:
+                handle.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(len(wheel), 0)
+            self.assertEqual(len(asyncio.all_tasks()), tasks_before)
+
+        async_to_sync(run)()
+
+    def test_callback_returning_false_or_raising_is_not_rescheduled(self):
+        async def run():
+            wheel = TimerWheel(tick_seconds=0.01)
+            calls = {"stop": 0, "boom": 0, "keep": 0}
+
+            async def _stop():
+                calls["stop"] += 1
+                return False
+
+            async def _boom():
+                calls["boom"] += 1
+                raise RuntimeError("boom")
+
+            async def _keep():
+                calls["keep"] += 1
+
+            wheel.schedule_every(0.01, _stop)
+            wheel.schedule_every(0.01, _boom)
+            keep = wheel.schedule_every(0.01, _keep)
+
+            with self.assertLogs("chat_app_django.ws_timers", level="ERROR"):
+                await asyncio.sleep(0.1)
+
+            self.assertEqual(calls["stop"], 1)
+            self.assertEqual(calls["boom"], 1)
+            self.assertGreater(calls["keep"], 1)
+            self.assertEqual(len(wheel), 1)
+            keep.cancel()
+            keep.cancel()
+            self.assertEqual(len(wheel), 0)
+
+        async_to_sync(run)()
+
+    def test_slow_callback_does_not_delay_other_timers(self):
+        async def run():
+            wheel = TimerWheel(tick_seconds=0.01)
+            calls = {"slow": 0, "fast": 0}
+            release = asyncio.Event()
+
+            async def _slow():
+                calls["slow"] += 1
+                await release.wait()
+
+            async def _fast():
+                calls["fast"] += 1
+
+            slow = wheel.schedule_every(0.01, _slow)
+            fast = wheel.schedule_every(0.01, _fast)
+            await asyncio.sleep(0.1)
+
+            # The slow handle skips its beats while the first call is in flight.
+            self.assertEqual(calls["slow"], 1)
+            self.assertGreater(calls["fast"], 3)
+            release.set()
+            slow.cancel()
+            fast.cancel()
+            await asyncio.sleep(0)
+
+        async_to_sync(run)()
+
+    def test_rescheduling_after_last_cancel_keeps_single_scheduler(self):
+        async def run():
+            wheel = TimerWheel(tick_seconds=0.01)
+            replacement: list = []
+            calls = {"new": 0}
+
+            async def _new():
+                calls["new"] += 1
+
+            async def _restart():
+                # Cancelling the last handle from a callback and scheduling again.
+                handle.cancel()
+                replacement.append(wheel.schedule_every(0.01, _new))
+
+            handle = wheel.schedule_every(0.01, _restart)
+            first_scheduler = wheel._task
+            await asyncio.sleep(0.1)
+
+            self.assertEqual(len(replacement), 1)
+            self.assertGreater(calls["new"], 3)
+            schedulers = [
+                task
+                for task in asyncio.all_tasks()
+                if getattr(task.get_coro(), "__qualname__", "") == "TimerWheel._run" and not task.done()
+            ]
+            self.assertEqual(schedulers, [wheel._task])
+            self.assertIsNot(wheel._task, first_scheduler)
+            self.assertTrue(first_scheduler.done())
+
+            replacement[0].cancel()
+            for _ in range(50):
+                if not wheel._inflight and wheel._task is None:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(wheel._inflight, set())
+            self.assertIsNone(wheel._task)
+
+        async_to_sync(run)()
+
+    def test_connection_timers_is_per_event_loop(self):
+        async def _wheel():
+            first = connection_timers()
+            self.assertIs(first, connection_timers())
+            return first
+
+        self.assertIsNot(async_to_sync(_wheel)(), async_to_sync(_wheel)())
@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import secrets
+import time
 from dataclasses import dataclass
-from typing import Literal
+from typing import Any, Literal
 
 from django.conf import settings
 from django.core.cache import caches
@@ -12,6 +13,8 @@ from django.core.cache.backends.base import InvalidCacheBackendError
 
 
 WS_AUTH_CACHE_PREFIX = "ws_auth:"
+WS_AUTH_USER_CACHE_PREFIX = "ws_auth:user:"
+WS_AUTH_USER_GENERATION_PREFIX = "ws_auth:user_gen:"
 
 
 @dataclass(frozen=True)
@@ -126,3 +129,87 @@ def resolve_ws_auth_claims(token: str | None) -> WebSocketAuthClaims | None:
         session_key=session_key,
         user_id=user_id,
     )
+
+
+def _ws_auth_user_cache_ttl() -> int:
+    return max(0, int(getattr(settings, "WS_AUTH_USER_CACHE_TTL", 0) or 0))
+
+
+def _ws_user_snapshot_key(session_key: str) -> str:
+    return f"{WS_AUTH_USER_CACHE_PREFIX}{session_key}"
+
+
+def _ws_user_generation_key(user_id: int) -> str:
+    return f"{WS_AUTH_USER_GENERATION_PREFIX}{user_id}"
+
+
+def get_ws_user_snapshot(*, session_key: str, user_id: int) -> tuple[dict[str, Any] | None, int]:
+    """Returns the cached user snapshot for a session and the current user generation.
+
+    The generation must be passed back to `store_ws_user_snapshot` on a miss so
+    a password change racing with the DB lookup cannot resurrect a stale entry.
+    """
+    if _ws_auth_user_cache_ttl() <= 0 or not session_key:
+        return None, 0
+
+    snapshot_key = _ws_user_snapshot_key(session_key)
+    generation_key = _ws_user_generation_key(user_id)
+    try:
+        values = _get_ws_auth_cache().get_many([snapshot_key, generation_key])
+    except Exception:
+        return None, 0
+
+    generation = values.get(generation_key) or 0
+    payload = values.get(snapshot_key)
+    if not isinstance(payload, dict):
+        return None, generation
+    if payload.get("user_id") != user_id or payload.get("generation") != generation:
+        return None, generation
+    fields = payload.get("fields")
+    if not isinstance(fields, dict):
+        return None, generation
+    return fields, generation
+
+
+def store_ws_user_snapshot(
+    *,
+    session_key: str,
+    user_id: int,
+    generation: int,
+    fields: dict[str, Any],
+) -> None:
+    """Caches resolved user fields for a session for `WS_AUTH_USER_CACHE_TTL` seconds."""
+    ttl = _ws_auth_user_cache_ttl()
+    if ttl <= 0 or not session_key:
+        return
+    try:
+        _get_ws_auth_cache().set(
+            _ws_user_snapshot_key(session_key),
+            {"user_id": int(user_id), "generation": generation, "fields": fields},
+            timeout=ttl,
+        )
+    except Exception:
+        return
+
+
+def forget_ws_session_user(session_key: str | None) -> None:
+    """Drops the cached user snapshot of one session (logout)."""
+    normalized_session_key = str(session_key or "").strip()
+    if not normalized_session_key:
+        return
+    try:
+        _get_ws_auth_cache().delete(_ws_user_snapshot_key(normalized_session_key))
+    except Exception:
+        return
+
+
+def invalidate_ws_user_snapshots(user_id: int) -> None:
+    """Invalidates cached snapshots of every session of a user (any save or deletion)."""
+    if user_id <= 0:
+        return
+    # Outlive every snapshot written under the previous generation.
+    timeout = _ws_auth_user_cache_ttl() + 60
+    try:
+        _get_ws_auth_cache().set(_ws_user_generation_key(user_id), time.time_ns(), timeout=timeout)
+    except Exception:
+        return
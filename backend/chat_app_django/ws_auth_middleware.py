@@ -3,28 +3,41 @@
 from __future__ import annotations
 
 from collections.abc import MutableMapping
+from importlib import import_module
 from typing import Any, cast
 from urllib.parse import parse_qs
 
 from asgiref.sync import sync_to_async
 from channels.middleware import BaseMiddleware
+from django.conf import settings
 from django.contrib.auth import SESSION_KEY, get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.contrib.sessions.models import Session
+from django.db import router
 
-from .ws_auth import resolve_ws_auth_claims
+from .ws_auth import (
+    forget_ws_session_user,
+    get_ws_user_snapshot,
+    resolve_ws_auth_claims,
+    store_ws_user_snapshot,
+)
 
 WS_AUTH_QUERY_PARAM = "wst"
 
+# Never keep credentials in the shared ws-auth cache; the field stays deferred.
+_USER_SNAPSHOT_EXCLUDED_FIELDS = frozenset({"password"})
+
 User = get_user_model()
 
 
+def _session_store(session_key: str):
+    """Builds a store for the configured engine (db, cached_db or cache)."""
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(session_key=session_key)
+
+
 def _session_contains_user(session_key: str, user_id: int) -> bool:
-    session = Session.objects.filter(session_key=session_key).first()
-    if session is None:
-        return False
     try:
-        session_data = session.get_decoded()
+        session_data = _session_store(session_key).load()
     except Exception:
         return False
     return str(session_data.get(SESSION_KEY) or "") == str(user_id)
@@ -35,7 +48,55 @@ def _load_authenticated_user(user_id: int):
 
 
 def _session_exists(session_key: str) -> bool:
-    return Session.objects.filter(session_key=session_key).exists()
+    return _session_store(session_key).exists(session_key)
+
+
+def _user_snapshot(user) -> dict[str, Any]:
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if field.attname not in _USER_SNAPSHOT_EXCLUDED_FIELDS
+    }
+
+
+def _user_from_snapshot(snapshot: dict[str, Any]):
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in snapshot]
+    return User.from_db(
+        router.db_for_read(User),
+        field_names,
+        [snapshot[name] for name in field_names],
+    )
+
+
+def _resolve_session_user(session_key: str, user_id: int):
+    """Resolves the user of an auth token, serving the user row from cache.
+
+    The session is checked on every connect (a cache read with the `cache` and
+    `cached_db` engines), so a session deleted by the admin, flushed or expired
+    stops authenticating at once; snapshots are dropped on every user save or
+    deletion (see `users.signals`), so only the user query is skipped.
+
+    Returns None when the session no longer belongs to the user, and
+    AnonymousUser when the session is valid but the user is gone or inactive.
+    """
+    if not _session_contains_user(session_key, user_id):
+        forget_ws_session_user(session_key)
+        return None
+
+    snapshot, generation = get_ws_user_snapshot(session_key=session_key, user_id=user_id)
+    if snapshot is not None and snapshot.get("is_active", True):
+        return _user_from_snapshot(snapshot)
+
+    user = _load_authenticated_user(user_id)
+    if user is None:
+        return AnonymousUser()
+    store_ws_user_snapshot(
+        session_key=session_key,
+        user_id=user_id,
+        generation=generation,
+        fields=_user_snapshot(user),
+    )
+    return user
 
 
 class WebSocketTokenAuthMiddleware(BaseMiddleware):
@@ -58,16 +119,12 @@ class WebSocketTokenAuthMiddleware(BaseMiddleware):
                 and claims.user_id is not None
                 and not getattr(current_user, "is_authenticated", False)
             ):
-                session_matches_user = await sync_to_async(
-                    _session_contains_user,
+                user = await sync_to_async(
+                    _resolve_session_user,
                     thread_sensitive=True,
                 )(claims.session_key, claims.user_id)
-                if session_matches_user:
-                    user = await sync_to_async(
-                        _load_authenticated_user,
-                        thread_sensitive=True,
-                    )(claims.user_id)
-                    scope_map["user"] = user if user is not None else AnonymousUser()
+                if user is not None:
+                    scope_map["user"] = user
             elif claims.kind == "guest" and not scope_map.get("ws_guest_session_key"):
                 session_exists = await sync_to_async(
                     _session_exists,
@@ -0,0 +1,330 @@
+"""Optional single WebSocket endpoint carrying chat, presence and inbox sub-streams.
+
+Frames exchanged with the client are JSON objects:
+
+* client -> server: ``{"op": "open", "stream": "chat", "roomId": 12}``,
+  ``{"op": "close", "stream": "chat"}``, ``{"op": "ping"}`` and
+  ``{"stream": "presence", "payload": {...}}`` for protocol messages;
+* server -> client: ``{"stream": "chat", "op": "opened"}``,
+  ``{"stream": "chat", "op": "closed", "code": 4403}``, ``{"op": "ping"}``,
+  ``{"op": "error", "error": "...", "stream": ...}`` and
+  ``{"stream": "chat", "payload": {...}}`` for protocol messages.
+
+Every sub-stream runs the regular consumer application in-process, so the
+protocol logic stays in `chat`, `presence` and `direct_inbox`. The outer
+connection owns the single auth pass, connect rate-limit check, heartbeat and
+idle timers; consumers skip theirs when `is_multiplexed_scope` is true.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Callable, Mapping
+from functools import lru_cache
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from chat_app_django.ip_utils import get_client_ip_from_scope
+from chat_app_django.metrics import (
+    dec_ws_open_connection,
+    inc_ws_open_connection,
+    normalize_ws_auth_state,
+    observe_ws_connect,
+    observe_ws_event,
+)
+from chat_app_django.security.audit import (
+    AUDIT_PENDING_SCOPE_KEY,
+    audit_ws_event,
+    wait_for_connection_audit_events,
+)
+from chat_app_django.security.rate_limit import DbRateLimiter, TokenBucket
+from chat_app_django.security.rate_limit_config import (
+    ws_connect_rate_limit_disabled,
+    ws_connect_rate_limit_policy,
+)
+from chat_app_django.ws_timers import TimerHandle, connection_timers
+
+logger = logging.getLogger(__name__)
+
+WS_MULTIPLEXED_SCOPE_KEY = "ws_multiplexed"
+WS_MULTIPLEX_ENDPOINT = "multiplex"
+WS_MULTIPLEX_CLOSE_IDLE_CODE = 4003
+
+STREAM_CHAT = "chat"
+STREAM_PRESENCE = "presence"
+STREAM_INBOX = "inbox"
+
+
+def is_multiplexed_scope(scope: Mapping[str, Any] | None) -> bool:
+    """Tells a consumer it runs as a sub-stream of the multiplexed endpoint."""
+    return bool(scope and scope.get(WS_MULTIPLEXED_SCOPE_KEY))
+
+
+@lru_cache(maxsize=1)
+def _stream_applications() -> dict[str, Callable]:
+    # Imported lazily: the consumers import `is_multiplexed_scope` from here.
+    from chat.consumers import ChatConsumer
+    from direct_inbox.consumers import DirectInboxConsumer
+    from presence.consumers import PresenceConsumer
+
+    return {
+        STREAM_CHAT: ChatConsumer.as_asgi(),
+        STREAM_PRESENCE: PresenceConsumer.as_asgi(),
+        STREAM_INBOX: DirectInboxConsumer.as_asgi(),
+    }
+
+
+def _stream_path(stream: str, room_id: int | None) -> str:
+    if stream == STREAM_CHAT:
+        return f"/ws/chat/{room_id}/" if room_id is not None else "/ws/chat/"
+    if stream == STREAM_PRESENCE:
+        return "/ws/presence/"
+    return "/ws/inbox/"
+
+
+def _ws_connect_rate_limited(scope) -> bool:
+    if ws_connect_rate_limit_disabled():
+        return False
+    ip = get_client_ip_from_scope(scope) or "unknown"
+    scope_key = f"rl:ws:connect:{WS_MULTIPLEX_ENDPOINT}:{ip}"
+    policy = ws_connect_rate_limit_policy(WS_MULTIPLEX_ENDPOINT)
+    return DbRateLimiter.is_limited(scope_key=scope_key, policy=policy)
+
+
+class _SubStream:
+    """State of one in-process consumer attached to the outer socket."""
+
+    __slots__ = ("name", "queue", "task", "closed")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: asyncio.Task | None = None
+        self.closed = False
+
+
+class MultiplexConsumer(AsyncWebsocketConsumer):
+    """Carries chat, presence and inbox protocols over one WebSocket."""
+
+    heartbeat_seconds = int(settings.WS_MULTIPLEX_HEARTBEAT)
+    idle_timeout = int(settings.WS_MULTIPLEX_IDLE_TIMEOUT)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._streams: dict[str, _SubStream] = {}
+        self._socket_closed = False
+        self._metrics_connected = False
+        self._metrics_auth_state = "unknown"
+        self._last_client_activity = 0.0
+        self._heartbeat_timer: TimerHandle | None = None
+        self._idle_timer: TimerHandle | None = None
+        self._open_bucket: TokenBucket | None = None
+
+    async def connect(self):
+        """Accepts the socket after the single shared connect rate-limit check."""
+        user = self.scope.get("user")
+        self._metrics_auth_state = normalize_ws_auth_state(user)
+        if await sync_to_async(_ws_connect_rate_limited)(self.scope):
+            observe_ws_connect(
+                WS_MULTIPLEX_ENDPOINT,
+                auth_state=self._metrics_auth_state,
+                room_kind="none",
+                result="rejected",
+                reason="rate_limited",
+            )
+            audit_ws_event(
+                "ws.connect.denied",
+                self.scope,
+                endpoint=WS_MULTIPLEX_ENDPOINT,
+                reason="rate_limited",
+                code=4429,
+            )
+            await self.close(code=4429)
+            return
+
+        await self.accept()
+        self._metrics_connected = True
+        observe_ws_connect(
+            WS_MULTIPLEX_ENDPOINT,
+            auth_state=self._metrics_auth_state,
+            room_kind="none",
+            result="accepted",
+        )
+        inc_ws_open_connection(WS_MULTIPLEX_ENDPOINT, auth_state=self._metrics_auth_state, room_kind="none")
+        audit_ws_event("ws.connect.accepted", self.scope, endpoint=WS_MULTIPLEX_ENDPOINT)
+
+        # Stream re-opens are throttled per socket with the connect policy,
+        # so the shared DB check above is not bypassed by open/close churn.
+        self._open_bucket = TokenBucket.from_policy(ws_connect_rate_limit_policy(WS_MULTIPLEX_ENDPOINT))
+        self._last_client_activity = time.monotonic()
+        timers = connection_timers()
+        self._heartbeat_timer = timers.schedule_every(max(5, self.heartbeat_seconds), self._heartbeat_tick)
+        if self.idle_timeout > 0:
+            self._idle_timer = timers.schedule_every(
+                max(5, min(self.heartbeat_seconds, self.idle_timeout)),
+                self._idle_tick,
+            )
+
+    async def disconnect(self, code):
+        """Stops the shared timers and disconnects every sub-stream."""
+        self._socket_closed = True
+        for timer in (self._heartbeat_timer, self._idle_timer):
+            if timer is not None:
+                timer.cancel()
+
+        await asyncio.gather(
+            *(self._close_stream(name, code=code, notify=False) for name in list(self._streams)),
+        )
+        if self._metrics_connected:
+            dec_ws_open_connection(WS_MULTIPLEX_ENDPOINT, auth_state=self._metrics_auth_state, room_kind="none")
+            observe_ws_event(WS_MULTIPLEX_ENDPOINT, event_type="disconnect", result="accepted")
+        audit_ws_event("ws.disconnect", self.scope, endpoint=WS_MULTIPLEX_ENDPOINT, code=code)
+        await wait_for_connection_audit_events(self.scope)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Routes control frames and forwards stream payloads to sub-consumers."""
+        if not text_data:
+            return
+        self._last_client_activity = time.monotonic()
+        try:
+            frame = json.loads(text_data)
+        except json.JSONDecodeError:
+            await self._send_error("invalid_json")
+            return
+        if not isinstance(frame, dict):
+            await self._send_error("invalid_payload")
+            return
+
+        op = frame.get("op")
+        stream = frame.get("stream")
+        if op == "ping":
+            return
+        if op == "open":
+            await self._open_stream(stream, frame)
+            return
+        if op == "close":
+            if isinstance(stream, str) and stream in self._streams:
+                await self._close_stream(stream, code=1000)
+            return
+
+        sub_stream = self._streams.get(stream) if isinstance(stream, str) else None
+        if sub_stream is None or sub_stream.closed:
+            await self._send_error("stream_not_open", stream=stream)
+            return
+        payload = frame.get("payload")
+        if payload is None:
+            await self._send_error("invalid_payload", stream=stream)
+            return
+        sub_stream.queue.put_nowait({"type": "websocket.receive", "text": json.dumps(payload)})
+
+    async def _open_stream(self, stream: object, frame: dict[str, Any]) -> None:
+        applications = _stream_applications()
+        if not isinstance(stream, str) or stream not in applications:
+            await self._send_error("unknown_stream", stream=stream)
+            return
+
+        bucket = self._open_bucket
+        retry_after = bucket.consume() if bucket is not None else None
+        if retry_after is not None:
+            observe_ws_event(WS_MULTIPLEX_ENDPOINT, event_type="open", result="rejected")
+            await self._send_error("rate_limited", stream=stream, retry_after=retry_after)
+            return
+
+        room_id = None
+        if stream == STREAM_CHAT and frame.get("roomId") is not None:
+            room_id = frame.get("roomId")
+        if stream in self._streams:
+            await self._close_stream(stream, code=1000, notify=False)
+
+        scope = dict(self.scope)
+        # The copy is shallow: each sub-stream tracks (and waits for) only its own audit writes.
+        scope.pop(AUDIT_PENDING_SCOPE_KEY, None)
+        scope[WS_MULTIPLEXED_SCOPE_KEY] = True
+        scope["path"] = _stream_path(stream, room_id)
+        scope["url_route"] = {"args": (), "kwargs": {"room_id": str(room_id)} if room_id is not None else {}}
+
+        sub_stream = _SubStream(stream)
+        self._streams[stream] = sub_stream
+        sub_stream.queue.put_nowait({"type": "websocket.connect"})
+        sub_stream.task = asyncio.create_task(self._run_stream(sub_stream, applications[stream], scope))
+        observe_ws_event(WS_MULTIPLEX_ENDPOINT, event_type="open", result="accepted")
+
+    async def _run_stream(self, sub_stream: _SubStream, application: Callable, scope: dict[str, Any]) -> None:
+        async def send(message: dict[str, Any]) -> None:
+            await self._forward_from_stream(sub_stream, message)
+
+        try:
+            await application(scope, sub_stream.queue.get, send)
+        except Exception:
+            logger.exception("Multiplexed %s stream crashed", sub_stream.name)
+            if not sub_stream.closed:
+                sub_stream.closed = True
+                await self._send_frame({"stream": sub_stream.name, "op": "closed", "code": 1011})
+        finally:
+            if self._streams.get(sub_stream.name) is sub_stream:
+                self._streams.pop(sub_stream.name, None)
+
+    async def _forward_from_stream(self, sub_stream: _SubStream, message: dict[str, Any]) -> None:
+        message_type = message.get("type")
+        if message_type == "websocket.send":
+            text = message.get("text")
+            if text is None or sub_stream.closed:
+                return
+            # Consumers already send JSON text; splice it instead of re-encoding.
+            await self._send_raw(f'{{"stream":{json.dumps(sub_stream.name)},"payload":{text}}}')
+        elif message_type == "websocket.accept":
+            await self._send_frame({"stream": sub_stream.name, "op": "opened"})
+        elif message_type == "websocket.close":
+            if sub_stream.closed:
+                return
+            sub_stream.closed = True
+            code = message.get("code") or 1000
+            await self._send_frame({"stream": sub_stream.name, "op": "closed", "code": code})
+            # A real server answers a close with websocket.disconnect; do the same.
+            sub_stream.queue.put_nowait({"type": "websocket.disconnect", "code": code})
+
+    async def _close_stream(self, name: str, *, code: int, notify: bool = True) -> None:
+        sub_stream = self._streams.pop(name, None)
+        if sub_stream is None:
+            return
+        if not sub_stream.closed:
+            sub_stream.closed = True
+            sub_stream.queue.put_nowait({"type": "websocket.disconnect", "code": code})
+            if notify:
+                await self._send_frame({"stream": name, "op": "closed", "code": code})
+        if sub_stream.task is not None:
+            await asyncio.gather(sub_stream.task, return_exceptions=True)
+
+    async def _send_raw(self, text: str) -> None:
+        if self._socket_closed:
+            return
+        try:
+            await self.send(text_data=text)
+        except Exception:
+            self._socket_closed = True
+
+    async def _send_frame(self, frame: dict[str, Any]) -> None:
+        await self._send_raw(json.dumps(frame))
+
+    async def _send_error(self, error: str, *, stream: object = None, **extra: Any) -> None:
+        frame: dict[str, Any] = {"op": "error", "error": error}
+        if stream is not None:
+            frame["stream"] = stream
+        frame.update(extra)
+        await self._send_frame(frame)
+
+    async def _heartbeat_tick(self) -> bool:
+        await self._send_frame({"op": "ping"})
+        return not self._socket_closed
+
+    async def _idle_tick(self) -> bool:
+        if (time.monotonic() - self._last_client_activity) <= self.idle_timeout:
+            return True
+        await self.close(code=WS_MULTIPLEX_CLOSE_IDLE_CODE)
+        return False
@@ -0,0 +1,150 @@
+"""Shared per-event-loop timer wheel for WebSocket heartbeats and idle checks.
+
+Instead of one sleeping `asyncio` task per socket and timer, consumers register
+periodic callbacks here. Callbacks are bucketed by tick and a single scheduler
+task per event loop fires every due bucket as one batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import weakref
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+TimerCallback = Callable[[], Awaitable[bool | None]]
+
+_wheels: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel] = weakref.WeakKeyDictionary()
+
+
+class TimerHandle:
+    """Registration of one periodic callback; `cancel()` is idempotent."""
+
+    __slots__ = ("_wheel", "interval_ticks", "callback", "due_tick", "active", "running")
+
+    def __init__(self, wheel: TimerWheel, interval_ticks: int, callback: TimerCallback, due_tick: int):
+        self._wheel = wheel
+        self.interval_ticks = interval_ticks
+        self.callback = callback
+        self.due_tick = due_tick
+        self.active = True
+        self.running: asyncio.Task | None = None
+
+    def cancel(self) -> None:
+        if self.active:
+            self.active = False
+            self._wheel._release()
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self.running = None
+        if task.cancelled():
+            self.cancel()
+            return
+        exc = task.exception()
+        if exc is not None:
+            if self.active:
+                logger.error("WebSocket timer callback failed", exc_info=exc)
+            self.cancel()
+            return
+        if task.result() is False:
+            self.cancel()
+
+
+class TimerWheel:
+    """Buckets periodic callbacks by tick; one scheduler task drives all of them.
+
+    Due callbacks run as separate tasks, so a slow callback never delays other
+    sockets; a beat is skipped while the previous call of the same handle is
+    still running. A callback returning ``False`` (or raising) is not
+    rescheduled.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = max(0.01, float(tick_seconds))
+        self._buckets: dict[int, list[TimerHandle]] = {}
+        self._live = 0
+        self._next_tick: int | None = None
+        self._task: asyncio.Task | None = None
+        # Strong references to in-flight callback tasks (the loop only keeps weak ones).
+        self._inflight: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _now_tick(self) -> int:
+        return int(asyncio.get_running_loop().time() // self.tick_seconds)
+
+    def schedule_every(self, interval_seconds: float, callback: TimerCallback) -> TimerHandle:
+        """Calls `callback` every `interval_seconds` until cancelled.
+
+        Must be called from the event loop that owns the wheel.
+        """
+        interval_ticks = max(1, math.ceil(float(interval_seconds) / self.tick_seconds))
+        handle = TimerHandle(self, interval_ticks, callback, self._now_tick() + interval_ticks)
+        self._buckets.setdefault(handle.due_tick, []).append(handle)
+        self._live += 1
+        if self._task is None:
+            self._next_tick = self._now_tick() + 1
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return handle
+
+    def _release(self) -> None:
+        self._live -= 1
+        if self._live <= 0:
+            self._live = 0
+            self._buckets.clear()
+            task = self._task
+            self._task = None
+            # Do not leave an idle scheduler behind once the last socket is gone.
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        current = asyncio.current_task()
+        try:
+            # A scheduler that lost ownership (the wheel went idle and a new one
+            # was started) must stop instead of sharing `_next_tick`.
+            while self._live > 0 and self._task is current:
+                now_tick = self._now_tick()
+                while self._next_tick is not None and self._next_tick <= now_tick:
+                    bucket = self._buckets.pop(self._next_tick, None)
+                    self._next_tick += 1
+                    if bucket:
+                        self._fire(bucket, now_tick)
+                if self._live <= 0 or self._next_tick is None or self._task is not current:
+                    break
+                await asyncio.sleep(max(0.0, self._next_tick * self.tick_seconds - loop.time()))
+        finally:
+            if self._task is current:
+                self._task = None
+
+    def _fire(self, bucket: list[TimerHandle], now_tick: int) -> None:
+        loop = asyncio.get_running_loop()
+        for handle in bucket:
+            if not handle.active:
+                continue
+            handle.due_tick = now_tick + handle.interval_ticks
+            self._buckets.setdefault(handle.due_tick, []).append(handle)
+            if handle.running is not None:
+                continue
+            task = loop.create_task(handle.callback())
+            handle.running = task
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(handle._finished)
+
+
+def connection_timers() -> TimerWheel:
+    """Returns the timer wheel of the running event loop."""
+    loop = asyncio.get_running_loop()
+    wheel = _wheels.get(loop)
+    if wheel is None:
+        from django.conf import settings
+
+        wheel = TimerWheel(tick_seconds=float(getattr(settings, "WS_TIMER_TICK_SECONDS", 1)))
+        _wheels[loop] = wheel
+    return wheel
@@ -1,6 +1,5 @@
 """WebSocket consumer for direct message inbox state."""
 
-import asyncio
 import json
 import time
 import uuid
@@ -21,14 +20,15 @@ from chat_app_django.metrics import (
 )
 from chat_app_django.security.audit import (
     audit_ws_event,
-    drain_pending_audit_events,
-    wait_for_audit_event,
+    wait_for_connection_audit_events,
 )
 from chat_app_django.security.rate_limit import DbRateLimiter
 from chat_app_django.security.rate_limit_config import (
     ws_connect_rate_limit_disabled,
     ws_connect_rate_limit_policy,
 )
+from chat_app_django.ws_multiplex import is_multiplexed_scope
+from chat_app_django.ws_timers import connection_timers
 from roles.access import can_read
 from rooms.models import Room
 from chat.unread_push import build_room_unread_state
@@ -102,7 +102,8 @@ class DirectInboxConsumer(AsyncWebsocketConsumer):
             await self.close(code=4401)
             return
 
-        if await _to_async(_ws_connect_rate_limited)(self.scope, "direct_inbox"):
+        multiplexed = is_multiplexed_scope(self.scope)
+        if not multiplexed and await _to_async(_ws_connect_rate_limited)(self.scope, "direct_inbox"):
             observe_ws_connect(
                 "direct_inbox",
                 auth_state=self._metrics_auth_state,
@@ -135,10 +136,17 @@ class DirectInboxConsumer(AsyncWebsocketConsumer):
         audit_ws_event("ws.connect.accepted", self.scope, endpoint="direct_inbox")
 
         self._last_client_activity = time.monotonic()
-        self._heartbeat_task = asyncio.create_task(self._heartbeat())
-        self._idle_task = None
-        if self.idle_timeout > 0:
-            self._idle_task = asyncio.create_task(self._idle_watchdog())
+        self._heartbeat_timer = None
+        self._idle_timer = None
+        # Multiplexed sub-streams share the heartbeat and idle watchdog of the outer socket.
+        if not multiplexed:
+            timers = connection_timers()
+            self._heartbeat_timer = timers.schedule_every(max(5, self.heartbeat_seconds), self._heartbeat_tick)
+            if self.idle_timeout > 0:
+                self._idle_timer = timers.schedule_every(
+                    max(5, min(self.heartbeat_seconds, self.idle_timeout)),
+                    self._idle_tick,
+                )
 
         await self._send_unread_state()
         await self._send_room_unread_state()
@@ -149,15 +157,10 @@ class DirectInboxConsumer(AsyncWebsocketConsumer):
         Args:
             code: Код ошибки или состояния.
         """
-        for task_name in ("_heartbeat_task", "_idle_task"):
-            task = getattr(self, task_name, None)
-            if not task:
-                continue
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+        for timer_name in ("_heartbeat_timer", "_idle_timer"):
+            timer = getattr(self, timer_name, None)
+            if timer is not None:
+                timer.cancel()
 
         user = getattr(self, "user", None)
         if user and user.is_authenticated:
@@ -172,14 +175,13 @@ class DirectInboxConsumer(AsyncWebsocketConsumer):
                 room_kind=self._metrics_room_kind,
             )
             observe_ws_event("direct_inbox", event_type="disconnect", result="accepted")
-        audit_task = audit_ws_event(
+        audit_ws_event(
             "ws.disconnect",
             self.scope,
             endpoint="direct_inbox",
             code=code,
         )
-        await wait_for_audit_event(audit_task)
-        await drain_pending_audit_events()
+        await wait_for_connection_audit_events(self.scope)
 
     async def receive(self, text_data=None, bytes_data=None):
         """Принимает входящее сообщение и маршрутизирует его обработку.
@@ -385,25 +387,28 @@ class DirectInboxConsumer(AsyncWebsocketConsumer):
             )
         )
 
-    async def _heartbeat(self):
-        """Выполняет вспомогательную обработку для heartbeat."""
-        interval = max(5, self.heartbeat_seconds)
-        while True:
-            await asyncio.sleep(interval)
-            try:
-                await self.send(text_data=json.dumps({"type": "ping"}))
-            except Exception:
-                break
-
-    async def _idle_watchdog(self):
-        """Выполняет вспомогательную обработку для idle watchdog."""
-        interval = max(5, min(self.heartbeat_seconds, self.idle_timeout))
-        while True:
-            await asyncio.sleep(interval)
-            if (time.monotonic() - self._last_client_activity) <= self.idle_timeout:
-                continue
-            await self.close(code=DIRECT_INBOX_CLOSE_IDLE_CODE)
-            break
+    async def _heartbeat_tick(self) -> bool:
+        """Отправляет heartbeat-ping; таймер останавливается, если сокет уже закрыт.
+
+        Returns:
+            False, когда дальнейшие heartbeat не нужны.
+        """
+        try:
+            await self.send(text_data=json.dumps({"type": "ping"}))
+        except Exception:
+            return False
+        return True
+
+    async def _idle_tick(self) -> bool:
+        """Закрывает соединение, если клиент молчит дольше idle-timeout.
+
+        Returns:
+            False после закрытия соединения.
+        """
+        if (time.monotonic() - self._last_client_activity) <= self.idle_timeout:
+            return True
+        await self.close(code=DIRECT_INBOX_CLOSE_IDLE_CODE)
+        return False
 
     def _load_room_sync(self, room_id: int) -> Room | None:
         """Загружает room sync из хранилища с необходимыми проверками.
@@ -1,7 +1,18 @@
 #!/bin/sh
 set -e
 
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 python manage.py migrate --noinput
+python manage.py create_audit_partitions
 python manage.py collectstatic --noinput
 
+# Samples left by the commands above or a previous run would be merged into /metrics/.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec daphne -b 0.0.0.0 -p 8000 chat_app_django.asgi:application
\ No newline at end of file
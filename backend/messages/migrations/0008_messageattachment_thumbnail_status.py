@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+def mark_existing_thumbnails_ready(apps, schema_editor):
+    MessageAttachment = apps.get_model("chat_messages", "MessageAttachment")
+    MessageAttachment.objects.exclude(thumbnail="").exclude(thumbnail__isnull=True).update(
+        thumbnail_status="ready",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0007_purge_soft_deleted_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messageattachment',
+            name='thumbnail_status',
+            field=models.CharField(choices=[('none', 'None'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=16),
+        ),
+        migrations.RunPython(
+            mark_existing_thumbnails_ready,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='messageattachment',
+            index=models.Index(condition=models.Q(('thumbnail_status', 'pending')), fields=['uploaded_at'], name='attachment_thumb_pending_idx'),
+        ),
+    ]
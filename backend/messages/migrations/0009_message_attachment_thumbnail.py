@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-19 08:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0008_messageattachment_thumbnail_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageAttachmentThumbnail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, upload_to='chat_thumbnails/%Y/%m/')),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('content_type', models.CharField(max_length=50)),
+                ('attachment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnail_variants', to='chat_messages.messageattachment')),
+            ],
+            options={
+                'db_table': 'messages_attachment_thumbnail',
+                'ordering': ['width', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='messageattachmentthumbnail',
+            index=models.Index(fields=['file'], name='attachment_thumb_file_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0009_message_attachment_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messageattachmentupload',
+            name='checksum_sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
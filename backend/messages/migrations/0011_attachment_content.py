@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0010_attachment_upload_checksum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageAttachmentContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='chat_attachments/%Y/%m/')),
+                ('file_size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'messages_attachment_content',
+            },
+        ),
+        migrations.AddField(
+            model_name='messageattachment',
+            name='content',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='chat_messages.messageattachmentcontent'),
+        ),
+    ]
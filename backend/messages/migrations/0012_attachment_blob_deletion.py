@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0011_attachment_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageAttachmentBlobDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage_name', models.CharField(max_length=500)),
+                ('field_name', models.CharField(max_length=32)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'messages_attachment_blob_deletion',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='messageattachmentblobdeletion',
+            index=models.Index(fields=['next_attempt_at'], name='att_blob_del_next_idx'),
+        ),
+    ]
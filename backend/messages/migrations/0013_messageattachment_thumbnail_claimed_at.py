@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0012_attachment_blob_deletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messageattachment',
+            name='thumbnail_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
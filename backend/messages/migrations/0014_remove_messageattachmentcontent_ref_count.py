@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-19 10:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_messages', '0013_messageattachment_thumbnail_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='messageattachmentcontent',
+            name='ref_count',
+        ),
+    ]
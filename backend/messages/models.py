@@ -114,13 +114,55 @@ class Reaction(models.Model):
         return f"{self.user_id}:{self.emoji}:msg{self.message_id}"
 
 
+def content_blob_name(root: str, sha256: str, filename: str) -> str:
+    """Storage name of a content-addressed blob: `<root>/sha256/ab/cd/<filename>`.
+
+    Shared blobs are served to everyone who uploads the same bytes, so their
+    names must not carry the first uploader's file name or upload month.
+    """
+    return f"{root}/sha256/{sha256[:2]}/{sha256[2:4]}/{filename}"
+
+
+class MessageAttachmentContent(models.Model):
+    """One stored attachment blob per SHA-256, shared by every attachment with that content.
+
+    There is no reference counter: the row is deleted together with its last
+    attachment (see `messages.signals`), whichever path deletes it.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="chat_attachments/%Y/%m/")
+    file_size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "messages_attachment_content"
+
+    def __str__(self):
+        return self.sha256
+
+
 class MessageAttachment(models.Model):
     """Модель MessageAttachment описывает структуру и поведение данных в приложении."""
+
+    class ThumbnailStatus(models.TextChoices):
+        NONE = "none", "None"
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     message = models.ForeignKey(
         Message,
         on_delete=models.CASCADE,
         related_name="attachments",
     )
+    content = models.ForeignKey(
+        MessageAttachmentContent,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="attachments",
+    )
     file = models.FileField(upload_to="chat_attachments/%Y/%m/")
     original_filename = models.CharField(max_length=255)
     content_type = models.CharField(max_length=100)
@@ -130,10 +172,18 @@ class MessageAttachment(models.Model):
         null=True,
         blank=True,
     )
+    thumbnail_status = models.CharField(
+        max_length=16,
+        choices=ThumbnailStatus.choices,
+        default=ThumbnailStatus.NONE,
+    )
+    # Lease of the recovery job that requeued a stuck render; later sweeps skip the row until it expires.
+    thumbnail_claimed_at = models.DateTimeField(null=True, blank=True)
     width = models.PositiveIntegerField(null=True, blank=True)
     height = models.PositiveIntegerField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     message_id: int
+    content_id: int | None
 
     class Meta:
         """Класс Meta инкапсулирует связанную бизнес-логику модуля."""
@@ -141,6 +191,11 @@ class MessageAttachment(models.Model):
         ordering = ["uploaded_at"]
         indexes = [
             models.Index(fields=["message"], name="attachment_message_idx"),
+            models.Index(
+                fields=["uploaded_at"],
+                name="attachment_thumb_pending_idx",
+                condition=models.Q(thumbnail_status="pending"),
+            ),
         ]
 
     def __str__(self):
@@ -152,6 +207,31 @@ class MessageAttachment(models.Model):
         return f"{self.message_id}:{self.original_filename}"
 
 
+class MessageAttachmentThumbnail(models.Model):
+    """One derived preview of an image attachment (size x format) for `srcset`."""
+
+    attachment = models.ForeignKey(
+        MessageAttachment,
+        on_delete=models.CASCADE,
+        related_name="thumbnail_variants",
+    )
+    file = models.FileField(upload_to="chat_thumbnails/%Y/%m/", max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    content_type = models.CharField(max_length=50)
+    attachment_id: int
+
+    class Meta:
+        db_table = "messages_attachment_thumbnail"
+        ordering = ["width", "id"]
+        indexes = [
+            models.Index(fields=["file"], name="attachment_thumb_file_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.attachment_id}:{self.width}x{self.height}:{self.content_type}"
+
+
 class MessageAttachmentUpload(models.Model):
     """Tracks an in-progress chunked attachment upload before message creation."""
 
@@ -177,6 +257,7 @@ class MessageAttachmentUpload(models.Model):
     received_bytes = models.PositiveBigIntegerField(default=0)
     storage_name = models.CharField(max_length=500, unique=True)
     chunk_size = models.PositiveIntegerField()
+    checksum_sha256 = models.CharField(max_length=64, blank=True, default="")
     status = models.CharField(
         max_length=16,
         choices=Status.choices,
@@ -200,6 +281,26 @@ class MessageAttachmentUpload(models.Model):
         return f"{self.user_id}:{self.room_id}:{self.original_filename}"
 
 
+class MessageAttachmentBlobDeletion(models.Model):
+    """Durable queue entry for a storage blob that a background worker must delete."""
+
+    storage_name = models.CharField(max_length=500)
+    field_name = models.CharField(max_length=32)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "messages_attachment_blob_deletion"
+        indexes = [
+            models.Index(fields=["next_attempt_at"], name="att_blob_del_next_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.field_name}:{self.storage_name}"
+
+
 class MessageReadState(models.Model):
     """Модель MessageReadState описывает структуру и поведение данных в приложении."""
     user = models.ForeignKey(
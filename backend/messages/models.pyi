@@ -42,17 +42,48 @@ class Reaction(models.Model):
     def __str__(self) -> str: ...
 
 
+def content_blob_name(root: str, sha256: str, filename: str) -> str: ...
+
+
+class MessageAttachmentContent(models.Model):
+    sha256: str
+    file: FieldFile
+    file_size: int
+    created_at: datetime
+    def __str__(self) -> str: ...
+
+
 class MessageAttachment(models.Model):
+    class ThumbnailStatus(models.TextChoices):
+        NONE: str
+        PENDING: str
+        READY: str
+        FAILED: str
+
     message: Message
+    content: MessageAttachmentContent | None
     file: FieldFile
     original_filename: str
     content_type: str
     file_size: int
     thumbnail: FieldFile
+    thumbnail_status: str
+    thumbnail_claimed_at: datetime | None
     width: int | None
     height: int | None
     uploaded_at: datetime
     message_id: int
+    content_id: int | None
+    def __str__(self) -> str: ...
+
+
+class MessageAttachmentThumbnail(models.Model):
+    attachment: MessageAttachment
+    file: FieldFile
+    width: int
+    height: int
+    content_type: str
+    attachment_id: int
     def __str__(self) -> str: ...
 
 
@@ -71,6 +102,7 @@ class MessageAttachmentUpload(models.Model):
     received_bytes: int
     storage_name: str
     chunk_size: int
+    checksum_sha256: str
     status: str
     expires_at: datetime
     created_at: datetime
@@ -80,6 +112,16 @@ class MessageAttachmentUpload(models.Model):
     def __str__(self) -> str: ...
 
 
+class MessageAttachmentBlobDeletion(models.Model):
+    storage_name: str
+    field_name: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: str
+    created_at: datetime
+    def __str__(self) -> str: ...
+
+
 class MessageReadState(models.Model):
     user: Any
     room: Room
@@ -13,16 +13,18 @@ class AttachmentSerializer(serializers.ModelSerializer):
     """Класс AttachmentSerializer сериализует и валидирует данные API."""
     url = serializers.SerializerMethodField()
     thumbnailUrl = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     originalFilename = serializers.CharField(source="original_filename")
     contentType = serializers.CharField(source="content_type")
     fileSize = serializers.IntegerField(source="file_size")
+    thumbnailStatus = serializers.CharField(source="thumbnail_status")
 
     class Meta:
         """Класс Meta инкапсулирует связанную бизнес-логику модуля."""
         model = MessageAttachment
         fields = (
             "id", "originalFilename", "contentType", "fileSize",
-            "url", "thumbnailUrl", "width", "height",
+            "url", "thumbnailUrl", "thumbnailStatus", "thumbnails", "width", "height",
         )
         read_only_fields = fields
 
@@ -75,6 +77,25 @@ class AttachmentSerializer(serializers.ModelSerializer):
         """
         return self._build_url(obj.thumbnail, obj)
 
+    def get_thumbnails(self, obj):
+        """Возвращает варианты миниатюры (размер x формат) для `srcset`.
+        
+        Args:
+            obj: Объект доменной модели или ORM-сущность.
+        
+        Returns:
+            Список вариантов, отсортированный по ширине.
+        """
+        return [
+            {
+                "url": self._build_url(variant.file, obj),
+                "width": variant.width,
+                "height": variant.height,
+                "contentType": variant.content_type,
+            }
+            for variant in obj.thumbnail_variants.all()
+        ]
+
 
 class MessageSerializer(serializers.ModelSerializer):
     """Класс MessageSerializer сериализует и валидирует данные API."""
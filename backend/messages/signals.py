@@ -1,9 +1,9 @@
-"""Signals for message-related observability counters."""
+"""Signals for message-related observability counters and shared attachment content."""
 
 from __future__ import annotations
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from chat_app_django.metrics import observe_attachment_created, observe_message_created
@@ -40,3 +40,23 @@ def observe_attachment_created_signal(sender, instance, created, **kwargs):
             file_size=file_size,
         )
     )
+
+
+@receiver(pre_delete, sender=MessageAttachment)
+def remember_shared_thumbnails_signal(sender, instance, **kwargs):
+    # Variant rows are gone by post_delete; deduplicated attachments share them with their content.
+    if instance.content_id is None:
+        return
+    from chat.services import attachment_thumbnail_names
+
+    instance._shared_thumbnail_names = attachment_thumbnail_names(instance)
+
+
+@receiver(post_delete, sender=MessageAttachment)
+def release_attachment_content_signal(sender, instance, **kwargs):
+    # Runs for every delete path (message, room, user, admin), so no reference count can drift.
+    if instance.content_id is None:
+        return
+    from chat.services import release_attachment_content
+
+    release_attachment_content(instance.content_id, getattr(instance, "_shared_thumbnail_names", []))
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import io
 import logging
+import math
 from pathlib import Path
 
 from django.conf import settings
@@ -23,44 +24,140 @@ def _resolve_source_size(source_field) -> int | None:
     return None
 
 
-def generate_thumbnail(source_field) -> dict | None:
-    """Генерирует thumbnail по заданным правилам.
+def thumbnail_source_limit_bytes() -> int:
+    """Возвращает максимальный размер исходника, для которого строится миниатюра."""
+    return int(getattr(settings, "CHAT_THUMBNAIL_MAX_SOURCE_SIZE_MB", 25)) * 1024 * 1024
+
+
+def probe_image_dimensions(source_field) -> tuple[int, int] | None:
+    """Читает размеры изображения из заголовка файла без декодирования пикселей.
     
     Args:
-        source_field: Параметр source field, используемый в логике функции.
+        source_field: Файл или файловое поле с изображением.
     
     Returns:
-        Словарь типа dict | None с данными результата.
+        Пара (ширина, высота) или None, если файл не распознан как изображение.
     """
     try:
         from PIL import Image
     except ImportError:
-        logger.warning("Pillow not installed — skipping thumbnail generation")
         return None
 
-    max_side = int(getattr(settings, "CHAT_THUMBNAIL_MAX_SIDE", 400))
-    max_source_size_bytes = (
-        int(getattr(settings, "CHAT_THUMBNAIL_MAX_SOURCE_SIZE_MB", 25)) * 1024 * 1024
-    )
-    max_source_pixels = int(
-        getattr(settings, "CHAT_THUMBNAIL_MAX_SOURCE_PIXELS", 50_000_000)
-    )
-    source_size = _resolve_source_size(source_field)
-    if source_size is not None and source_size > max_source_size_bytes:
-        logger.info(
-            "Skipping thumbnail generation for %s: source size %s exceeds %s bytes",
-            getattr(source_field, "name", "file"),
-            source_size,
-            max_source_size_bytes,
-        )
+    try:
+        source_field.seek(0)
+        with Image.open(source_field) as img:
+            width, height = img.size
+    except Exception:
+        logger.debug("Не удалось прочитать размеры изображения", exc_info=True)
         return None
+    finally:
+        try:
+            source_field.seek(0)
+        except Exception:
+            pass
+    return int(width), int(height)
+
 
+# Output encoders: name -> (Pillow format, extension, content type, save options).
+_OUTPUT_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", "avif", "image/avif", {"quality": 60}),
+}
+
+
+def supported_thumbnail_formats(requested: list[str]) -> list[str]:
+    """Оставляет форматы миниатюр, которые умеет кодировать установленный Pillow.
+    
+    `jpeg` (JPEG, либо PNG для изображений с прозрачностью) поддерживается всегда
+    и используется, если ни один из запрошенных форматов недоступен.
+    
+    Args:
+        requested: Запрошенные форматы в порядке предпочтения.
+    
+    Returns:
+        Непустой список поддерживаемых форматов.
+    """
     try:
-        source_field.seek(0)
-        img = Image.open(source_field)
+        from PIL import features
+    except ImportError:
+        return ["jpeg"]
+
+    supported: list[str] = []
+    for raw_format in requested:
+        output_format = str(raw_format or "").strip().lower()
+        if output_format in supported:
+            continue
+        if output_format == "jpeg":
+            supported.append(output_format)
+        elif output_format in _OUTPUT_FORMATS:
+            try:
+                available = bool(features.check(output_format))
+            except Exception:
+                available = False
+            if available:
+                supported.append(output_format)
+    return supported or ["jpeg"]
+
+
+def _fit_size(width: int, height: int, max_side: int) -> tuple[int, int]:
+    ratio = min(max_side / width, max_side / height)
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+
+def _encode_variant(img, output_format: str, *, has_alpha: bool) -> tuple[bytes, str, str]:
+    buf = io.BytesIO()
+    if output_format in _OUTPUT_FORMATS:
+        pil_format, ext, content_type, options = _OUTPUT_FORMATS[output_format]
+        img.save(buf, format=pil_format, **options)
+    elif has_alpha:
+        ext, content_type = "png", "image/png"
+        img.save(buf, format="PNG")
+    else:
+        ext, content_type = "jpg", "image/jpeg"
+        img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue(), ext, content_type
+
+
+def render_thumbnails(
+    data: bytes,
+    name: str,
+    *,
+    sizes: list[int],
+    formats: list[str],
+    max_source_pixels: int,
+    crop: tuple[float, float, float, float] | None = None,
+) -> dict | None:
+    """Строит набор миниатюр нескольких размеров за один проход декодирования.
+    
+    JPEG декодируется сразу в уменьшенном масштабе (`draft`), каждый следующий
+    размер получается из предыдущего (reduce-then-resize через `reducing_gap`).
+    Размеры не меньше исходного изображения (или области `crop`) пропускаются.
+    Функция не обращается к Django и может выполняться в дочернем процессе.
+    
+    Args:
+        data: Содержимое исходного изображения.
+        name: Имя исходного файла (используется для имен миниатюр).
+        sizes: Максимальные стороны миниатюр.
+        formats: Форматы вывода (`webp`, `avif`, `jpeg`).
+        max_source_pixels: Максимальное число пикселей исходника.
+        crop: Область (x, y, width, height) в долях исходника, из которой
+            строятся миниатюры.
+    
+    Returns:
+        Словарь с исходными `width`, `height` и списком `variants`
+        (`content`, `filename`, `width`, `height`, `format`, `content_type`, `max_side`)
+        или None, если миниатюры построить нельзя.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Pillow not installed — skipping thumbnail generation")
+        return None
+
+    try:
+        img = Image.open(io.BytesIO(data))
         img.verify()
-        source_field.seek(0)
-        img = Image.open(source_field)
+        img = Image.open(io.BytesIO(data))
     except Exception:
         logger.debug("Не удалось открыть изображение для миниатюры", exc_info=True)
         return None
@@ -70,51 +167,116 @@ def generate_thumbnail(source_field) -> dict | None:
     if total_pixels > max_source_pixels:
         logger.info(
             "Skipping thumbnail generation for %s: %s pixels exceeds %s",
-            getattr(source_field, "name", "file"),
+            name or "file",
             total_pixels,
             max_source_pixels,
         )
         return None
 
-    if original_width <= max_side and original_height <= max_side:
-        return {
-            "path": None,
-            "width": original_width,
-            "height": original_height,
-        }
+    result: dict = {"width": original_width, "height": original_height, "variants": []}
+    if crop is not None:
+        crop_x, crop_y, crop_width, crop_height = (float(value) for value in crop)
+        source_width = max(1, round(crop_width * original_width))
+        source_height = max(1, round(crop_height * original_height))
+    else:
+        source_width, source_height = original_width, original_height
+    targets = sorted(
+        {int(side) for side in sizes if 0 < int(side) < max(source_width, source_height)},
+        reverse=True,
+    )
+    if not targets:
+        return result
 
-    ratio = min(max_side / original_width, max_side / original_height)
-    new_size = (int(original_width * ratio), int(original_height * ratio))
+    resampling = getattr(Image, "Resampling", None)
+    if resampling is not None:
+        resize_filter = getattr(resampling, "LANCZOS", 1)
+    else:
+        resize_filter = getattr(Image, "LANCZOS", 1)
 
+    stem = Path(name).stem if name else "thumb"
     try:
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGBA")
-            fmt = "PNG"
-            ext = "png"
-        else:
-            img = img.convert("RGB")
-            fmt = "JPEG"
-            ext = "jpg"
-
-        resampling = getattr(Image, "Resampling", None)
-        if resampling is not None:
-            resize_filter = getattr(resampling, "LANCZOS", 1)
-        else:
-            resize_filter = getattr(Image, "LANCZOS", 1)
-
-        img = img.resize(new_size, resize_filter)
-        buf = io.BytesIO()
-        img.save(buf, format=fmt, quality=85)
-        buf.seek(0)
-
-        stem = Path(source_field.name).stem if source_field.name else "thumb"
-        filename = f"thumb_{stem}.{ext}"
-
-        return {
-            "path": ContentFile(buf.read(), name=filename),
-            "width": new_size[0],
-            "height": new_size[1],
-        }
+        has_alpha = img.mode in ("RGBA", "LA", "P")
+        if img.format == "JPEG":
+            # Let libjpeg decode at 1/2..1/8 scale, still no smaller than the largest target.
+            scale = targets[0] / max(source_width, source_height)
+            img.draft("RGB", (math.ceil(original_width * scale), math.ceil(original_height * scale)))
+        current = img.convert("RGBA" if has_alpha else "RGB")
+        if crop is not None:
+            # Crop after draft(): the box is relative, so it holds at any decode scale.
+            current = current.crop(
+                (
+                    round(crop_x * current.width),
+                    round(crop_y * current.height),
+                    round((crop_x + crop_width) * current.width),
+                    round((crop_y + crop_height) * current.height),
+                )
+            )
+        for side in targets:
+            current = current.resize(
+                _fit_size(source_width, source_height, side),
+                resize_filter,
+                reducing_gap=3.0,
+            )
+            for output_format in formats:
+                content, ext, content_type = _encode_variant(current, output_format, has_alpha=has_alpha)
+                result["variants"].append(
+                    {
+                        "content": content,
+                        "filename": f"thumb_{stem}_{side}.{ext}",
+                        "width": current.width,
+                        "height": current.height,
+                        "format": output_format,
+                        "content_type": content_type,
+                        "max_side": side,
+                    }
+                )
     except Exception:
         logger.debug("Не удалось сгенерировать миниатюру", exc_info=True)
         return None
+    return result
+
+
+def generate_thumbnail(source_field) -> dict | None:
+    """Генерирует thumbnail по заданным правилам.
+    
+    Args:
+        source_field: Параметр source field, используемый в логике функции.
+    
+    Returns:
+        Словарь типа dict | None с данными результата.
+    """
+    max_source_size_bytes = thumbnail_source_limit_bytes()
+    source_size = _resolve_source_size(source_field)
+    if source_size is not None and source_size > max_source_size_bytes:
+        logger.info(
+            "Skipping thumbnail generation for %s: source size %s exceeds %s bytes",
+            getattr(source_field, "name", "file"),
+            source_size,
+            max_source_size_bytes,
+        )
+        return None
+
+    try:
+        source_field.seek(0)
+        data = source_field.read()
+    except Exception:
+        logger.debug("Не удалось прочитать изображение для миниатюры", exc_info=True)
+        return None
+
+    result = render_thumbnails(
+        data,
+        str(getattr(source_field, "name", "") or ""),
+        sizes=[int(getattr(settings, "CHAT_THUMBNAIL_MAX_SIDE", 400))],
+        formats=["jpeg"],
+        max_source_pixels=int(getattr(settings, "CHAT_THUMBNAIL_MAX_SOURCE_PIXELS", 50_000_000)),
+    )
+    if result is None:
+        return None
+    if not result["variants"]:
+        return {"path": None, "width": result["width"], "height": result["height"]}
+    variant = result["variants"][0]
+    return {
+        "path": ContentFile(variant["content"], name=variant["filename"]),
+        "width": variant["width"],
+        "height": variant["height"],
+    }
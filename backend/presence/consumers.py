@@ -1,6 +1,5 @@
 """WebSocket consumer for user online presence tracking."""
 
-import asyncio
 import json
 import time
 from collections.abc import Awaitable, Callable
@@ -22,14 +21,15 @@ from chat_app_django.metrics import (
 from chat_app_django.media_utils import serialize_avatar_crop
 from chat_app_django.security.audit import (
     audit_ws_event,
-    drain_pending_audit_events,
-    wait_for_audit_event,
+    wait_for_connection_audit_events,
 )
 from chat_app_django.security.rate_limit import DbRateLimiter
 from chat_app_django.security.rate_limit_config import (
     ws_connect_rate_limit_disabled,
     ws_connect_rate_limit_policy,
 )
+from chat_app_django.ws_multiplex import is_multiplexed_scope
+from chat_app_django.ws_timers import connection_timers
 from users.avatar_service import resolve_user_avatar_url_from_scope
 from users.identity import user_public_ref, user_public_username
 
@@ -111,7 +111,8 @@ class PresenceConsumer(AsyncWebsocketConsumer):
             await self.close(code=4401)
             return
 
-        if await _to_async(_ws_connect_rate_limited)(self.scope, "presence"):
+        multiplexed = is_multiplexed_scope(self.scope)
+        if not multiplexed and await _to_async(_ws_connect_rate_limited)(self.scope, "presence"):
             observe_ws_connect(
                 "presence",
                 auth_state=self._metrics_auth_state,
@@ -141,10 +142,17 @@ class PresenceConsumer(AsyncWebsocketConsumer):
 
         self._last_client_activity = time.monotonic()
         self._next_presence_touch_at = 0.0
-        self._heartbeat_task = asyncio.create_task(self._heartbeat())
-        self._idle_task = None
-        if self.presence_idle_timeout > 0:
-            self._idle_task = asyncio.create_task(self._idle_watchdog())
+        self._heartbeat_timer = None
+        self._idle_timer = None
+        # Multiplexed sub-streams share the heartbeat and idle watchdog of the outer socket.
+        if not multiplexed:
+            timers = connection_timers()
+            self._heartbeat_timer = timers.schedule_every(max(5, self.presence_heartbeat), self._heartbeat_tick)
+            if self.presence_idle_timeout > 0:
+                self._idle_timer = timers.schedule_every(
+                    max(5, min(self.presence_heartbeat, self.presence_idle_timeout)),
+                    self._idle_tick,
+                )
 
         if self.is_guest:
             await self._add_guest(self.guest_key)
@@ -158,15 +166,10 @@ class PresenceConsumer(AsyncWebsocketConsumer):
         Args:
             code: Код ошибки или состояния.
         """
-        for task_name in ("_heartbeat_task", "_idle_task"):
-            task = getattr(self, task_name, None)
-            if not task:
-                continue
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+        for timer_name in ("_heartbeat_timer", "_idle_timer"):
+            timer = getattr(self, timer_name, None)
+            if timer is not None:
+                timer.cancel()
 
         user = self.scope.get("user")
         graceful = code in (1000, 1001)
@@ -184,14 +187,13 @@ class PresenceConsumer(AsyncWebsocketConsumer):
                 room_kind=self._metrics_room_kind,
             )
             observe_ws_event("presence", event_type="disconnect", result="accepted")
-        audit_task = audit_ws_event(
+        audit_ws_event(
             "ws.disconnect",
             self.scope,
             endpoint="presence",
             code=code,
         )
-        await wait_for_audit_event(audit_task)
-        await drain_pending_audit_events()
+        await wait_for_connection_audit_events(self.scope)
 
     async def receive(self, text_data=None, bytes_data=None):
         """Принимает входящее сообщение и маршрутизирует его обработку.
@@ -259,25 +261,28 @@ class PresenceConsumer(AsyncWebsocketConsumer):
         if payload:
             await self.send(text_data=json.dumps(payload))
 
-    async def _heartbeat(self):
-        """Выполняет вспомогательную обработку для heartbeat."""
-        interval = max(5, self.presence_heartbeat)
-        while True:
-            await asyncio.sleep(interval)
-            try:
-                await self.send(text_data=json.dumps({"type": "ping"}))
-            except Exception:
-                break
-
-    async def _idle_watchdog(self):
-        """Выполняет вспомогательную обработку для idle watchdog."""
-        interval = max(5, min(self.presence_heartbeat, self.presence_idle_timeout))
-        while True:
-            await asyncio.sleep(interval)
-            if (time.monotonic() - self._last_client_activity) <= self.presence_idle_timeout:
-                continue
-            await self.close(code=PRESENCE_CLOSE_IDLE_CODE)
-            break
+    async def _heartbeat_tick(self) -> bool:
+        """Отправляет heartbeat-ping; таймер останавливается, если сокет уже закрыт.
+
+        Returns:
+            False, когда дальнейшие heartbeat не нужны.
+        """
+        try:
+            await self.send(text_data=json.dumps({"type": "ping"}))
+        except Exception:
+            return False
+        return True
+
+    async def _idle_tick(self) -> bool:
+        """Закрывает соединение, если клиент молчит дольше idle-timeout.
+
+        Returns:
+            False после закрытия соединения.
+        """
+        if (time.monotonic() - self._last_client_activity) <= self.presence_idle_timeout:
+            return True
+        await self.close(code=PRESENCE_CLOSE_IDLE_CODE)
+        return False
 
     @staticmethod
     def _normalize_presence_value(value: object) -> str:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
 from chat_app_django.security.audit import audit_security_event
@@ -83,3 +84,37 @@ def audit_role_delete(sender, instance: Role, **kwargs):
         room_id=getattr(instance.room, "pk", None),
         role_name=instance.name,
     )
+
+
+def _drop_media_read_grant(instance: Membership) -> None:
+    from users.application.media_access_service import invalidate_media_read_grant
+
+    room_id, user_id = instance.room_id, instance.user_id
+    transaction.on_commit(lambda: invalidate_media_read_grant(room_id, user_id))
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def drop_media_read_grant_on_membership_change(sender, instance: Membership, **kwargs):
+    """Сбрасывает кэш права чтения media при изменении membership (бан, выход).
+
+    Args:
+        sender: Параметр sender, используемый в логике функции.
+        instance: Экземпляр модели или доменного объекта.
+        **kwargs: Дополнительные именованные аргументы вызова.
+    """
+    _drop_media_read_grant(instance)
+
+
+@receiver(m2m_changed, sender=Membership.roles.through)
+def drop_media_read_grant_on_roles_change(sender, instance, action: str, **kwargs):
+    """Сбрасывает кэш права чтения media при смене ролей участника.
+
+    Args:
+        sender: Параметр sender, используемый в логике функции.
+        instance: Экземпляр модели или доменного объекта.
+        action: Тип изменения m2m-связи.
+        **kwargs: Дополнительные именованные аргументы вызова.
+    """
+    if isinstance(instance, Membership) and action in {"post_add", "post_remove", "post_clear"}:
+        _drop_media_read_grant(instance)
@@ -53,11 +53,12 @@ from users.application.media_access_service import (
 from users.application.media_range_service import (
     InvalidByteRangeError,
     build_invalid_range_response,
-    build_partial_media_response,
+    build_range_media_response,
     open_protected_media_source,
-    parse_single_byte_range_header,
+    parse_byte_ranges_header,
 )
 from users.avatar_service import (
+    resolve_avatar_url_from_request,
     resolve_bundled_default_avatar_file,
     resolve_user_avatar_url_from_request,
 )
@@ -270,18 +271,18 @@ def _protected_media_response(
                 normalized_path,
                 file_path_override=file_path_override,
             )
-            requested_range = parse_single_byte_range_header(
+            requested_ranges = parse_byte_ranges_header(
                 request.headers.get("Range") or request.META.get("HTTP_RANGE"),
                 file_size=file_size,
             )
-            if requested_range is not None:
-                response = build_partial_media_response(
+            if requested_ranges is not None:
+                # The streaming response owns the file and closes it after the body is sent.
+                response = build_range_media_response(
                     file_obj,
-                    byte_range=requested_range,
+                    byte_ranges=requested_ranges,
                     content_type=content_type,
                     cache_control=cache_control,
                 )
-                file_obj.close()
                 file_obj = None
                 return response
 
@@ -335,6 +336,25 @@ def _resolve_email(user) -> str:
     return ""
 
 
+def _serialize_avatar_variants(request, profile) -> list[dict]:
+    """Сериализует предобрезанные квадратные копии аватара для `srcset`.
+    
+    Args:
+        request: HTTP-запрос с контекстом пользователя и параметрами вызова.
+        profile: Профиль пользователя.
+    
+    Returns:
+        Список копий (`url`, `size`) по возрастанию размера.
+    """
+    if getattr(profile, "avatar_status", None) != "ready":
+        return []
+    variants = getattr(profile, "avatar_variants", None) or {}
+    return [
+        {"url": resolve_avatar_url_from_request(request, variants[side]), "size": int(side)}
+        for side in sorted(variants, key=int)
+    ]
+
+
 def _serialize_user(request, user):
     """Сериализует user для передачи клиенту.
     
@@ -346,7 +366,8 @@ def _serialize_user(request, user):
         Результат вычислений, сформированный в ходе выполнения функции.
     """
     profile = ensure_profile(user)
-    profile_image = resolve_user_avatar_url_from_request(request, user)
+    # The profile payload feeds the crop editor, so it keeps the original upload.
+    profile_image = resolve_user_avatar_url_from_request(request, user, original=True)
 
     last_seen = getattr(profile, "last_seen", None)
     handle = user_public_handle(user)
@@ -361,7 +382,8 @@ def _serialize_user(request, user):
         "isSuperuser": bool(getattr(user, "is_superuser", False)),
         "email": _resolve_email(user),
         "profileImage": profile_image,
-        "avatarCrop": serialize_avatar_crop(profile),
+        "avatarCrop": serialize_avatar_crop(profile, original=True),
+        "avatarVariants": _serialize_avatar_variants(request, profile),
         "bio": getattr(profile, "bio", "") or "",
         "lastSeen": last_seen.isoformat() if last_seen else None,
         "registeredAt": user.date_joined.isoformat() if getattr(user, "date_joined", None) else None,
@@ -583,6 +605,7 @@ def logout_view(request):
             pass
 
     _clear_two_factor_challenge(request)
+    auth_service.logout_session(request.session.session_key)
     logout(request)
     audit_http_event("auth.logout", request)
     return Response({"ok": True})
@@ -16,6 +16,7 @@ from django.db import IntegrityError, transaction
 from django.utils.html import strip_tags
 
 from chat_app_django.metrics import observe_account_created
+from chat_app_django.ws_auth import forget_ws_session_user, invalidate_ws_user_snapshots
 from users.identity import (
     ensure_profile,
     ensure_user_identity_core,
@@ -867,6 +868,8 @@ def change_password(
         user.set_password(next_password)
         user.save(update_fields=["password"])
 
+    invalidate_ws_user_snapshots(user.pk)
+
 
 def update_security_settings(
     user: AbstractUser,
@@ -935,6 +938,16 @@ def update_security_settings(
         login_identity = _ensure_login_identity(user)
         login_identity.password_hash = make_password(str(new_password))
         login_identity.save(update_fields=["password_hash", "updated_at"])
+        invalidate_ws_user_snapshots(user.pk)
+
+
+def logout_session(session_key: str | None) -> None:
+    """Forgets cached websocket auth state of a session that is being logged out.
+
+    Args:
+        session_key: Ключ завершаемой Django-сессии.
+    """
+    forget_ws_session_user(session_key)
 
 
 def get_user_by_ref(ref: str):
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import hashlib
 import mimetypes
 from dataclasses import dataclass
 from typing import Any
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.db.models import Q
 
@@ -14,6 +17,9 @@ from roles.access import can_read
 from rooms.models import Room
 
 
+MEDIA_READ_GRANT_CACHE_PREFIX = "media_access:grant:"
+MEDIA_PATH_CACHE_PREFIX = "media_access:path:"
+
 _GENERIC_MEDIA_CONTENT_TYPES = {
     "application/octet-stream",
     "application/xml",
@@ -87,6 +93,40 @@ def resolve_media_content_type(
     return "application/octet-stream"
 
 
+def _media_access_cache_seconds() -> int:
+    return max(0, int(getattr(settings, "MEDIA_ACCESS_CACHE_SECONDS", 30) or 0))
+
+
+def _read_grant_cache_key(room_id: int, user_id: int) -> str:
+    return f"{MEDIA_READ_GRANT_CACHE_PREFIX}{room_id}:{user_id}"
+
+
+def _media_path_cache_key(room_id: int, normalized_path: str) -> str:
+    path_hash = hashlib.sha256(normalized_path.encode("utf-8")).hexdigest()[:32]
+    return f"{MEDIA_PATH_CACHE_PREFIX}{room_id}:{path_hash}"
+
+
+def invalidate_media_read_grant(room_id: int, user_id: int) -> None:
+    """Сбрасывает кэшированное право чтения media комнаты для пользователя.
+
+    Args:
+        room_id: Идентификатор комнаты.
+        user_id: Идентификатор пользователя.
+    """
+    cache.delete(_read_grant_cache_key(room_id, user_id))
+
+
+def invalidate_media_paths(room_id: int, normalized_paths: list[str]) -> None:
+    """Сбрасывает кэшированные сопоставления путей с вложениями комнаты.
+
+    Args:
+        room_id: Идентификатор комнаты.
+        normalized_paths: Пути файлов и миниатюр удаленных вложений.
+    """
+    if normalized_paths:
+        cache.delete_many([_media_path_cache_key(room_id, path) for path in normalized_paths])
+
+
 def resolve_attachment_media_access(
     *,
     normalized_path: str,
@@ -110,19 +150,58 @@ def resolve_attachment_media_access(
     if not user or not getattr(user, "is_authenticated", False):
         raise MediaAccessNotFoundError
 
-    room = Room.objects.filter(pk=room_id).first()
-    if room is None:
-        raise MediaAccessNotFoundError
+    # Authorized repeats (a history page full of images) are answered from cache:
+    # a short-lived per-(room, user) read grant plus a per-(room, path) lookup.
+    ttl = _media_access_cache_seconds()
+    grant_key = _read_grant_cache_key(room_id, user.pk)
+    path_key = _media_path_cache_key(room_id, normalized_path)
+    cached = cache.get_many([grant_key, path_key]) if ttl else {}
+    fresh: dict[str, object] = {}
+
+    if grant_key not in cached:
+        room = Room.objects.filter(pk=room_id).first()
+        if room is None:
+            raise MediaAccessNotFoundError
+
+        if not can_read(room, user):
+            raise MediaAccessNotFoundError
+        fresh[grant_key] = True
+
+    if path_key in cached:
+        preferred_content_type = cached[path_key] or None
+    else:
+        preferred_content_type = _resolve_room_attachment_content_type(room_id, normalized_path)
+        fresh[path_key] = preferred_content_type or ""
 
-    if not can_read(room, user):
-        raise MediaAccessNotFoundError
+    if ttl and fresh:
+        cache.set_many(fresh, timeout=ttl)
+
+    return AttachmentMediaAccessResult(
+        room_id=room_id,
+        preferred_content_type=preferred_content_type,
+    )
+
+
+def _resolve_room_attachment_content_type(room_id: int, normalized_path: str) -> str | None:
+    """Находит вложение комнаты по пути файла и возвращает предпочтительный MIME-тип.
+
+    Args:
+        room_id: Идентификатор комнаты.
+        normalized_path: Нормализованный путь к файлу или миниатюре.
 
+    Returns:
+        MIME-тип для ответа или None, если его нужно угадать по расширению.
+    """
     attachment = (
         MessageAttachment.objects.filter(
             message__room_id=room_id,
             message__is_deleted=False,
         )
-        .filter(Q(file=normalized_path) | Q(thumbnail=normalized_path))
+        .filter(
+            Q(file=normalized_path)
+            | Q(thumbnail=normalized_path)
+            | Q(thumbnail_variants__file=normalized_path)
+        )
         .only("content_type", "file", "thumbnail")
         .first()
     )
@@ -132,15 +211,8 @@ def resolve_attachment_media_access(
     if not default_storage.exists(normalized_path):
         raise MediaAccessNotFoundError
 
-    preferred_content_type: str | None = None
     file_name = str(getattr(attachment.file, "name", "") or "")
-    thumbnail_name = str(getattr(attachment.thumbnail, "name", "") or "")
     if file_name == normalized_path:
-        preferred_content_type = str(getattr(attachment, "content_type", "") or "")
-    elif thumbnail_name == normalized_path:
-        preferred_content_type = mimetypes.guess_type(normalized_path)[0]
-
-    return AttachmentMediaAccessResult(
-        room_id=room_id,
-        preferred_content_type=preferred_content_type,
-    )
+        return str(getattr(attachment, "content_type", "") or "")
+    # Legacy thumbnail or one of the thumbnail variants.
+    return mimetypes.guess_type(normalized_path)[0]
@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import io
+import secrets
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
 from django.core.files.base import File
 from django.core.files.storage import default_storage
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+# Bytes read per iteration; memory per response stays at one chunk whatever the range size.
+MEDIA_STREAM_CHUNK_SIZE = 64 * 1024
+# Requests asking for more (coalesced) ranges than this are answered with 416.
+MAX_BYTE_RANGES = 16
 
 
 class InvalidByteRangeError(Exception):
@@ -27,6 +35,46 @@ class ByteRange:
         """Возвращает длину выбранного диапазона в байтах."""
         return self.end - self.start + 1
 
+    @property
+    def content_range(self) -> str:
+        """Возвращает значение заголовка Content-Range для диапазона."""
+        return f"bytes {self.start}-{self.end}/{self.total_size}"
+
+
+class RangeFile:
+    """Read-only window over `[start, start + length)` of an open file.
+
+    `read()` never crosses the window, so generic streaming stops at the range
+    end. `fileno()` exposes the underlying descriptor, already positioned at
+    `start`, so WSGI servers with `wsgi.file_wrapper` can hand the range to
+    `os.sendfile` using the response Content-Length.
+    """
+
+    name = ""
+
+    def __init__(self, file_obj, *, start: int, length: int):
+        self._file = file_obj
+        self._remaining = max(0, int(length))
+        file_obj.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        fileno = getattr(self._file, "fileno", None)
+        if fileno is None:
+            raise io.UnsupportedOperation("fileno")
+        return fileno()
+
+    def close(self) -> None:
+        self._file.close()
+
 
 def open_protected_media_source(
     normalized_path: str,
@@ -47,27 +95,12 @@ def open_protected_media_source(
     return file_obj, size
 
 
-def parse_single_byte_range_header(
-    range_header: str | None,
-    *,
-    file_size: int,
-) -> ByteRange | None:
-    """Parse a single HTTP Range header for byte serving."""
-    if not range_header:
-        return None
-
-    normalized_header = range_header.strip()
-    if not normalized_header.startswith("bytes="):
+def _parse_range_spec(range_spec: str, *, file_size: int) -> ByteRange | None:
+    """Parse one `first-last` spec; returns None for a well-formed but unsatisfiable one."""
+    if "-" not in range_spec:
         raise InvalidByteRangeError
 
-    if file_size < 1:
-        raise InvalidByteRangeError
-
-    range_spec = normalized_header[6:].strip()
-    if not range_spec or "," in range_spec or "-" not in range_spec:
-        raise InvalidByteRangeError
-
-    start_raw, end_raw = range_spec.split("-", 1)
+    start_raw, end_raw = (part.strip() for part in range_spec.split("-", 1))
     if not start_raw and not end_raw:
         raise InvalidByteRangeError
 
@@ -91,7 +124,7 @@ def parse_single_byte_range_header(
     except ValueError as error:
         raise InvalidByteRangeError from error
 
-    if start < 0 or start >= file_size:
+    if start < 0:
         raise InvalidByteRangeError
 
     if end_raw:
@@ -105,33 +138,174 @@ def parse_single_byte_range_header(
     else:
         end = file_size - 1
 
+    if start >= file_size:
+        return None
     return ByteRange(start=start, end=end, total_size=file_size)
 
 
+def _coalesce_byte_ranges(byte_ranges: list[ByteRange]) -> list[ByteRange]:
+    """Merge overlapping and adjacent ranges into ascending, disjoint ranges."""
+    merged: list[ByteRange] = []
+    for byte_range in sorted(byte_ranges, key=lambda item: item.start):
+        if merged and byte_range.start <= merged[-1].end + 1:
+            last = merged[-1]
+            merged[-1] = ByteRange(
+                start=last.start,
+                end=max(last.end, byte_range.end),
+                total_size=last.total_size,
+            )
+        else:
+            merged.append(byte_range)
+    return merged
+
+
+def parse_byte_ranges_header(
+    range_header: str | None,
+    *,
+    file_size: int,
+) -> list[ByteRange] | None:
+    """Parse an HTTP Range header with one or more byte ranges.
+
+    Unsatisfiable specs are skipped as long as at least one range remains;
+    overlapping ranges are coalesced.
+    """
+    if not range_header:
+        return None
+
+    normalized_header = range_header.strip()
+    if not normalized_header.startswith("bytes="):
+        raise InvalidByteRangeError
+
+    if file_size < 1:
+        raise InvalidByteRangeError
+
+    specs = [spec.strip() for spec in normalized_header[6:].split(",")]
+    if not any(specs):
+        raise InvalidByteRangeError
+
+    byte_ranges = [
+        byte_range
+        for spec in specs
+        if spec
+        for byte_range in [_parse_range_spec(spec, file_size=file_size)]
+        if byte_range is not None
+    ]
+    byte_ranges = _coalesce_byte_ranges(byte_ranges)
+    if not byte_ranges or len(byte_ranges) > MAX_BYTE_RANGES:
+        raise InvalidByteRangeError
+    return byte_ranges
+
+
+def parse_single_byte_range_header(
+    range_header: str | None,
+    *,
+    file_size: int,
+) -> ByteRange | None:
+    """Parse a single HTTP Range header for byte serving."""
+    if range_header and "," in range_header:
+        raise InvalidByteRangeError
+    byte_ranges = parse_byte_ranges_header(range_header, file_size=file_size)
+    return byte_ranges[0] if byte_ranges else None
+
+
 def build_partial_media_response(
     file_obj: File,
     *,
     byte_range: ByteRange,
     content_type: str,
     cache_control: str,
-) -> HttpResponse:
-    """Build a partial content response for a single byte-range."""
-    if hasattr(file_obj, "seek"):
-        file_obj.seek(byte_range.start)
-        content = file_obj.read(byte_range.length)
-    else:
-        content = file_obj.read()[byte_range.start : byte_range.end + 1]
+) -> FileResponse:
+    """Build a streaming partial content response for a single byte-range.
 
-    response = HttpResponse(content, status=206, content_type=content_type)
+    The response owns `file_obj` and closes it once the body has been sent.
+    """
+    response = FileResponse(
+        RangeFile(file_obj, start=byte_range.start, length=byte_range.length),
+        status=206,
+        content_type=content_type,
+    )
+    response.block_size = MEDIA_STREAM_CHUNK_SIZE
     response["Accept-Ranges"] = "bytes"
     response["Cache-Control"] = cache_control
-    response["Content-Length"] = str(len(content))
-    response["Content-Range"] = (
-        f"bytes {byte_range.start}-{byte_range.end}/{byte_range.total_size}"
+    response["Content-Length"] = str(byte_range.length)
+    response["Content-Range"] = byte_range.content_range
+    return response
+
+
+def _multipart_part_header(boundary: str, content_type: str, byte_range: ByteRange) -> bytes:
+    return (
+        f"\r\n--{boundary}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Range: {byte_range.content_range}\r\n\r\n"
+    ).encode("ascii")
+
+
+def _iter_multipart_ranges(
+    file_obj: File,
+    byte_ranges: list[ByteRange],
+    *,
+    boundary: str,
+    content_type: str,
+) -> Iterator[bytes]:
+    for byte_range in byte_ranges:
+        yield _multipart_part_header(boundary, content_type, byte_range)
+        window = RangeFile(file_obj, start=byte_range.start, length=byte_range.length)
+        while chunk := window.read(MEDIA_STREAM_CHUNK_SIZE):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("ascii")
+
+
+def build_multipart_range_response(
+    file_obj: File,
+    *,
+    byte_ranges: list[ByteRange],
+    content_type: str,
+    cache_control: str,
+) -> StreamingHttpResponse:
+    """Build a streaming `multipart/byteranges` response for several ranges.
+
+    The response owns `file_obj` and closes it once the body has been sent.
+    """
+    boundary = secrets.token_hex(16)
+    content_length = sum(
+        len(_multipart_part_header(boundary, content_type, byte_range)) + byte_range.length
+        for byte_range in byte_ranges
+    ) + len(f"\r\n--{boundary}--\r\n")
+    response = StreamingHttpResponse(
+        _iter_multipart_ranges(file_obj, byte_ranges, boundary=boundary, content_type=content_type),
+        status=206,
+        content_type=f"multipart/byteranges; boundary={boundary}",
     )
+    response._resource_closers.append(file_obj.close)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = cache_control
+    response["Content-Length"] = str(content_length)
     return response
 
 
+def build_range_media_response(
+    file_obj: File,
+    *,
+    byte_ranges: list[ByteRange],
+    content_type: str,
+    cache_control: str,
+) -> HttpResponse | StreamingHttpResponse:
+    """Build a single-part or multipart partial content response."""
+    if len(byte_ranges) == 1:
+        return build_partial_media_response(
+            file_obj,
+            byte_range=byte_ranges[0],
+            content_type=content_type,
+            cache_control=cache_control,
+        )
+    return build_multipart_range_response(
+        file_obj,
+        byte_ranges=byte_ranges,
+        content_type=content_type,
+        cache_control=cache_control,
+    )
+
+
 def build_invalid_range_response(
     *,
     file_size: int,
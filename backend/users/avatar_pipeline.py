@@ -0,0 +1,177 @@
+"""Background avatar normalization and square derivatives.
+
+`Profile.save` only marks a new raster avatar (or a new crop) as `pending`;
+after commit the profile id is handed to the shared media pipeline. The job
+stores pre-cropped square copies in USER_AVATAR_SIZES, so lists and messages
+can serve a small square image instead of the full upload plus a CSS crop.
+An oversized original is downscaled into a new blob; the profile switches to
+it in the same conditional UPDATE that marks the avatar ready, so the live
+file is never rewritten in place.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import timedelta
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chat_app_django.media_pipeline import run_media_render, submit_media_job
+from messages.thumbnail import supported_thumbnail_formats
+
+from .avatar_rendering import render_avatar
+from .avatar_service import user_avatar_upload_dir
+from .models import MAX_PROFILE_IMAGE_PIXELS, MAX_PROFILE_IMAGE_SIDE, Profile
+
+logger = logging.getLogger(__name__)
+
+
+def _store_variants(storage, image_name: str, variants: list[dict]) -> dict[str, str]:
+    """Saves one blob per side (first format in preference order wins)."""
+    stem = PurePosixPath(image_name).stem or "avatar"
+    stored: dict[str, str] = {}
+    try:
+        for variant in variants:
+            side = str(variant["max_side"])
+            if side in stored:
+                continue
+            ext = PurePosixPath(variant["filename"]).suffix
+            stored[side] = storage.save(
+                f"{user_avatar_upload_dir()}/derived/{stem}_{side}{ext}",
+                ContentFile(variant["content"]),
+            )
+    except Exception:
+        _delete_blobs(storage, stored.values())
+        raise
+    return stored
+
+
+def _store_normalized(storage, image_name: str, content: bytes) -> str:
+    """Saves the downscaled original next to the upload; the live file is never rewritten."""
+    path = PurePosixPath(image_name)
+    return storage.save(str(path.with_name(f"{uuid.uuid4().hex}{path.suffix}")), ContentFile(content))
+
+
+def _delete_blobs(storage, names) -> None:
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("Failed to delete avatar derivative %s", name, exc_info=True)
+
+
+def process_profile_avatar(profile_id: int) -> bool:
+    """Строит производные аватара для профиля в статусе `pending`.
+
+    Результат записывается условным UPDATE: если за время обработки аватар
+    или обрезка изменились, построенные копии удаляются. Уменьшенный исходник
+    сохраняется под новым именем и подменяет старый в том же UPDATE.
+
+    Args:
+        profile_id: Идентификатор профиля.
+
+    Returns:
+        True, если статус профиля был обновлен этим вызовом.
+    """
+    profile = Profile.objects.filter(pk=profile_id, avatar_status=Profile.AvatarStatus.PENDING).first()
+    if profile is None:
+        return False
+
+    image_name = profile.image.name
+    crop = profile.avatar_crop_box()
+    storage = profile.image.storage
+    update_fields: dict[str, object] = {"avatar_status": Profile.AvatarStatus.FAILED}
+    stored: dict[str, str] = {}
+    normalized_name: str | None = None
+    try:
+        with storage.open(image_name, "rb") as source:
+            data = source.read()
+        result = run_media_render(
+            render_avatar,
+            data,
+            image_name,
+            crop=crop,
+            sizes=list(getattr(settings, "USER_AVATAR_SIZES", [64, 128, 256])),
+            formats=supported_thumbnail_formats(list(getattr(settings, "CHAT_THUMBNAIL_FORMATS", ["webp"]))),
+            max_side=MAX_PROFILE_IMAGE_SIDE,
+            max_source_pixels=MAX_PROFILE_IMAGE_PIXELS,
+        )
+        if result is not None:
+            if result["normalized"] is not None:
+                normalized_name = _store_normalized(storage, image_name, result["normalized"])
+            stored = _store_variants(storage, image_name, result["variants"])
+            update_fields = {"avatar_status": Profile.AvatarStatus.READY, "avatar_variants": stored}
+            if normalized_name is not None:
+                update_fields["image"] = normalized_name
+    except Exception:
+        logger.warning("Avatar processing failed for profile id=%s", profile_id, exc_info=True)
+        if normalized_name is not None:
+            _delete_blobs(storage, [normalized_name])
+
+    crop_filter = dict(
+        zip(
+            ("avatar_crop_x", "avatar_crop_y", "avatar_crop_width", "avatar_crop_height"),
+            crop or (None, None, None, None),
+        )
+    )
+    updated = Profile.objects.filter(
+        pk=profile_id,
+        avatar_status=Profile.AvatarStatus.PENDING,
+        image=image_name,
+        **crop_filter,
+    ).update(**update_fields)
+    if not updated:
+        _delete_blobs(storage, [*stored.values(), *filter(None, [normalized_name])])
+        return False
+
+    if "image" in update_fields:
+        _delete_blobs(storage, [image_name])
+    return True
+
+
+def enqueue_profile_avatar(profile_id: int) -> None:
+    """Ставит обработку аватара профиля в фоновую очередь процесса.
+
+    Args:
+        profile_id: Идентификатор профиля в статусе `pending`.
+    """
+    submit_media_job(process_profile_avatar, profile_id)
+
+
+def requeue_stale_avatars(*, limit: int = 100) -> int:
+    """Повторно ставит в очередь аватары, зависшие в `pending`.
+
+    Профиль получает аренду на CHAT_THUMBNAIL_STALE_SECONDS: пока она не истекла,
+    следующие запуски (в том числе из других процессов) его не трогают.
+
+    Args:
+        limit: Максимальное число профилей за вызов.
+
+    Returns:
+        Количество поставленных в очередь профилей.
+    """
+    stale_before = timezone.now() - timedelta(
+        seconds=int(getattr(settings, "CHAT_THUMBNAIL_STALE_SECONDS", 300)),
+    )
+    with transaction.atomic():
+        profile_ids = list(
+            Profile.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(avatar_claimed_at__isnull=True) | Q(avatar_claimed_at__lt=stale_before),
+                avatar_status=Profile.AvatarStatus.PENDING,
+                updated_at__lt=stale_before,
+            )
+            .order_by("updated_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if profile_ids:
+            Profile.objects.filter(pk__in=profile_ids).update(avatar_claimed_at=timezone.now())
+    for profile_id in profile_ids:
+        enqueue_profile_avatar(profile_id)
+    return len(profile_ids)
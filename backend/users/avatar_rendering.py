@@ -0,0 +1,92 @@
+"""Django-free avatar rendering executed by the shared media pipeline."""
+
+from __future__ import annotations
+
+import io
+import logging
+
+from messages.thumbnail import render_thumbnails
+
+logger = logging.getLogger(__name__)
+
+JPEG_FORMATS = {"JPEG", "MPO"}
+
+
+def _center_square(width: int, height: int) -> tuple[float, float, float, float]:
+    side = min(width, height)
+    return (
+        (width - side) / 2 / width,
+        (height - side) / 2 / height,
+        side / width,
+        side / height,
+    )
+
+
+def _normalize_original(img, max_side: int) -> bytes | None:
+    """Re-encodes an oversized original within `max_side`, keeping its format."""
+    if img.width <= max_side and img.height <= max_side:
+        return None
+    source_format = img.format or "PNG"
+    img.thumbnail((max_side, max_side))
+    if source_format in JPEG_FORMATS and img.mode not in {"RGB", "L", "CMYK", "YCbCr"}:
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format=source_format)
+    return buf.getvalue()
+
+
+def render_avatar(
+    data: bytes,
+    name: str,
+    *,
+    crop: tuple[float, float, float, float] | None,
+    sizes: list[int],
+    formats: list[str],
+    max_side: int,
+    max_source_pixels: int,
+) -> dict | None:
+    """Нормализует исходный аватар и строит квадратные копии по области обрезки.
+
+    Args:
+        data: Содержимое загруженного аватара.
+        name: Имя файла аватара.
+        crop: Область обрезки (x, y, width, height) в долях изображения;
+            без нее берется центральный квадрат.
+        sizes: Стороны квадратных копий.
+        formats: Форматы вывода копий.
+        max_side: Максимальная сторона исходника после нормализации.
+        max_source_pixels: Максимальное число пикселей исходника.
+
+    Returns:
+        Словарь с `normalized` (новое содержимое исходника или None) и
+        `variants` в формате `render_thumbnails`, либо None для нераспознанного файла.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Pillow not installed — skipping avatar processing")
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            if width * height > max_source_pixels:
+                return None
+            img.load()
+            normalized = _normalize_original(img, max_side)
+    except Exception:
+        logger.debug("Не удалось открыть аватар %s", name, exc_info=True)
+        return None
+
+    result = render_thumbnails(
+        normalized if normalized is not None else data,
+        name,
+        sizes=sizes,
+        formats=formats,
+        max_source_pixels=max_source_pixels,
+        crop=crop or _center_square(width, height),
+    )
+    return {
+        "normalized": normalized,
+        "variants": result["variants"] if result is not None else [],
+    }
@@ -304,11 +304,40 @@ def resolve_bundled_default_avatar_file(path: str | None) -> Path | None:
     return None
 
 
-def resolve_user_avatar_source(user: Any) -> str | None:
+def profile_avatar_derivative(profile: Any) -> str | None:
+    """Возвращает готовую квадратную предобрезанную копию аватара.
+    
+    Берется наименьшая копия не меньше USER_AVATAR_SERVED_SIZE, иначе самая большая.
+    
+    Args:
+        profile: Профиль пользователя.
+    
+    Returns:
+        Имя файла копии в storage или None, если копии еще не построены.
+    """
+    if getattr(profile, "avatar_status", None) != "ready":
+        return None
+    variants = getattr(profile, "avatar_variants", None)
+    if not isinstance(variants, dict) or not variants:
+        return None
+    try:
+        sides = sorted(int(side) for side in variants)
+    except (TypeError, ValueError):
+        return None
+    served_side = int(getattr(settings, "USER_AVATAR_SERVED_SIZE", 128))
+    chosen = next((side for side in sides if side >= served_side), sides[-1])
+    return _normalized_media_path(str(variants.get(str(chosen)) or "")) or None
+
+
+def resolve_user_avatar_source(user: Any, *, original: bool = False) -> str | None:
     """Определяет user avatar source на основе доступного контекста.
     
+    Если для загруженного аватара готова предобрезанная копия, возвращается она
+    (клиент получает `avatarCrop = None` и не обрезает изображение сам).
+    
     Args:
         user: Пользователь, для которого выполняется операция.
+        original: Вернуть исходный файл даже при наличии копий (редактор обрезки).
     
     Returns:
         Объект типа str | None, сформированный в рамках обработки.
@@ -328,6 +357,8 @@ def resolve_user_avatar_source(user: Any) -> str | None:
     avatar_url = _trimmed(getattr(profile, "avatar_url", ""))
 
     if image_name and not _is_default_user_image(image_name):
+        if not original:
+            return profile_avatar_derivative(profile) or image_name
         return image_name
 
     if avatar_url:
@@ -392,17 +423,18 @@ def resolve_avatar_url_from_scope(scope, source: str | None) -> str | None:
     return build_profile_url(scope, normalized)
 
 
-def resolve_user_avatar_url_from_request(request, user: Any) -> str | None:
+def resolve_user_avatar_url_from_request(request, user: Any, *, original: bool = False) -> str | None:
     """Определяет user avatar url from request на основе доступного контекста.
     
     Args:
         request: HTTP-запрос с контекстом пользователя и параметрами вызова.
         user: Пользователь, для которого выполняется операция.
+        original: Ссылаться на исходный файл, а не на предобрезанную копию.
     
     Returns:
         Объект типа str | None, сформированный в рамках обработки.
     """
-    return resolve_avatar_url_from_request(request, resolve_user_avatar_source(user))
+    return resolve_avatar_url_from_request(request, resolve_user_avatar_source(user, original=original))
 
 
 def resolve_user_avatar_url_from_scope(scope, user: Any) -> str | None:
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat_app_django.security.rate_limit import DbRateLimiter
+from users.models import SecurityRateLimitBucket
+
+
+class Command(BaseCommand):
+    """Класс Command реализует management-команду Django."""
+    help = "Удаляет истекшие security rate-limit bucket-ы небольшими пакетами."
+
+    def add_arguments(self, parser):
+        """Добавляет arguments в целевую коллекцию.
+
+        Args:
+            parser: Парсер аргументов management-команды.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DbRateLimiter.PURGE_BATCH_SIZE,
+            help="Количество строк в одном DELETE.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Максимальное число пакетов за запуск (по умолчанию без ограничения).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Пауза между пакетами в секундах.",
+        )
+        parser.add_argument(
+            "--family",
+            choices=[choice for choice, _label in SecurityRateLimitBucket.Family.choices],
+            default=None,
+            help="Очистить только одно семейство bucket-ов.",
+        )
+
+    def handle(self, *args, **options):
+        """Обрабатывает данные.
+
+        Args:
+            *args: Дополнительные позиционные аргументы вызова.
+            **options: Опции, переданные в management-команду.
+        """
+        batch_size = int(options["batch_size"])
+        if batch_size < 1:
+            raise CommandError("--batch-size должно быть >= 1")
+        max_batches = options["max_batches"]
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches должно быть >= 1")
+        sleep_seconds = float(options["sleep"])
+        if sleep_seconds < 0:
+            raise CommandError("--sleep должно быть >= 0")
+
+        deleted = DbRateLimiter.purge_expired(
+            batch_size=batch_size,
+            max_batches=max_batches,
+            sleep_seconds=sleep_seconds,
+            family=options["family"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Удалено {deleted} истекших rate-limit bucket-ов"))
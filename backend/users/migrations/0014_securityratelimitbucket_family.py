@@ -0,0 +1,60 @@
+"""Разделяет индексы security rate-limit bucket-ов по семействам endpoint-ов."""
+
+from django.db import migrations, models
+
+
+def backfill_bucket_family(apps, schema_editor):
+    """Проставляет family для существующих bucket-ов по префиксу scope_key."""
+    bucket_model = apps.get_model("users", "SecurityRateLimitBucket")
+    for family, prefix in (("auth", "rl:auth:"), ("ws_connect", "rl:ws:connect:")):
+        bucket_model.objects.filter(scope_key__startswith=prefix).update(family=family)
+
+
+class Migration(migrations.Migration):
+    """Описывает операции миграции схемы данных."""
+
+    dependencies = [
+        ("users", "0013_usertwofactor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="securityratelimitbucket",
+            name="family",
+            field=models.CharField(
+                choices=[("auth", "Auth"), ("ws_connect", "WebSocket connect"), ("other", "Other")],
+                default="other",
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(backfill_bucket_family, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="securityratelimitbucket",
+            name="scope_key",
+            field=models.CharField(max_length=191),
+        ),
+        migrations.AddConstraint(
+            model_name="securityratelimitbucket",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(family="auth"),
+                fields=("scope_key",),
+                name="users_rl_auth_scope_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="securityratelimitbucket",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(family="ws_connect"),
+                fields=("scope_key",),
+                name="users_rl_ws_connect_scope_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="securityratelimitbucket",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(family="other"),
+                fields=("scope_key",),
+                name="users_rl_other_scope_uniq",
+            ),
+        ),
+    ]
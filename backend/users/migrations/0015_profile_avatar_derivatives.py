@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def queue_existing_avatars(apps, schema_editor):
+    # The periodic media recovery job picks these up in small batches.
+    Profile = apps.get_model("users", "Profile")
+    default_avatars = {
+        "",
+        "default.jpg",
+        "avatars/Password_defualt.jpg",
+        "avatars/OAuth_defualt.jpg",
+        getattr(settings, "USER_PASSWORD_DEFAULT_AVATAR", ""),
+        getattr(settings, "USER_OAUTH_DEFAULT_AVATAR", ""),
+    }
+    (
+        Profile.objects.exclude(image__in=default_avatars)
+        .exclude(image__iendswith=".svg")
+        .update(avatar_status="pending")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_securityratelimitbucket_family'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_status',
+            field=models.CharField(choices=[('none', 'None'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('avatar_status', 'pending')), fields=['updated_at'], name='profile_avatar_pending_idx'),
+        ),
+        migrations.RunPython(queue_existing_avatars, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-19 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_profile_avatar_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -3,14 +3,13 @@
 from __future__ import annotations
 
 import uuid
-import warnings
 from pathlib import Path
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.core.files.storage import default_storage
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.utils.html import strip_tags
 from PIL import Image
@@ -20,8 +19,11 @@ from .avatar_service import profile_avatar_upload_to
 MAX_PROFILE_IMAGE_SIDE = 4096
 MAX_PROFILE_IMAGE_PIXELS = MAX_PROFILE_IMAGE_SIDE * MAX_PROFILE_IMAGE_SIDE
 Image.MAX_IMAGE_PIXELS = MAX_PROFILE_IMAGE_PIXELS
-JPEG_EXTENSIONS = {".jpg", ".jpeg"}
 SVG_EXTENSIONS = {".svg"}
+_AVATAR_CROP_FIELDS = frozenset(
+    {"avatar_crop_x", "avatar_crop_y", "avatar_crop_width", "avatar_crop_height"},
+)
+_UNLOADED = object()
 USER_PUBLIC_ID_VALIDATOR = RegexValidator(
     regex=r"^[1-9]\d{9}$",
     message="public_id must be a positive 10-digit numeric value.",
@@ -30,6 +32,14 @@ USER_PUBLIC_ID_VALIDATOR = RegexValidator(
 
 class Profile(models.Model):
     """Модель Profile описывает структуру и поведение данных в приложении."""
+
+    class AvatarStatus(models.TextChoices):
+        """Состояние фоновой обработки загруженного аватара."""
+        NONE = "none", "None"
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=150, blank=True, default="")
     image = models.ImageField(default="avatars/Password_defualt.jpg", upload_to=profile_avatar_upload_to)
@@ -38,11 +48,30 @@ class Profile(models.Model):
     avatar_crop_y = models.FloatField(null=True, blank=True)
     avatar_crop_width = models.FloatField(null=True, blank=True)
     avatar_crop_height = models.FloatField(null=True, blank=True)
+    avatar_status = models.CharField(
+        max_length=16,
+        choices=AvatarStatus.choices,
+        default=AvatarStatus.NONE,
+    )
+    # Pre-cropped square derivatives: {"<side px>": "<storage name>"}.
+    avatar_variants = models.JSONField(default=dict, blank=True)
+    # Lease of the recovery job that requeued a stuck render; later sweeps skip the profile until it expires.
+    avatar_claimed_at = models.DateTimeField(null=True, blank=True)
     last_seen = models.DateTimeField(null=True, blank=True)
     bio = models.TextField(blank=True, max_length=1000)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        """Класс Meta инкапсулирует связанную бизнес-логику модуля."""
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="profile_avatar_pending_idx",
+                condition=Q(avatar_status="pending"),
+            ),
+        ]
+
     def __init__(self, *args, **kwargs):
         """Инициализирует экземпляр класса и подготавливает внутреннее состояние.
         
@@ -52,6 +81,10 @@ class Profile(models.Model):
         """
         super().__init__(*args, **kwargs)
         self._old_image_name = self.image.name
+        # Deferred crop fields are not loaded just to track changes.
+        self._old_avatar_crop = (
+            _UNLOADED if _AVATAR_CROP_FIELDS & self.get_deferred_fields() else self.avatar_crop_box()
+        )
 
     def __str__(self):
         """Возвращает человекочитаемое строковое представление объекта.
@@ -82,6 +115,25 @@ class Profile(models.Model):
             self.image.name = f"{uuid.uuid4().hex}{ext}"
             new_image_name = self.image.name
 
+        # Resizing and cropping run in the background media pipeline, never inside save().
+        old_avatar_crop = getattr(self, "_old_avatar_crop", None)
+        avatar_changed = new_image_name != old_image_name or (
+            old_avatar_crop is not _UNLOADED and self.avatar_crop_box() != old_avatar_crop
+        )
+        stale_variants: list[str] = []
+        if avatar_changed:
+            stale_variants = [str(name) for name in (self.avatar_variants or {}).values()]
+            self.avatar_variants = {}
+            self.avatar_claimed_at = None
+            self.avatar_status = (
+                self.AvatarStatus.PENDING
+                if self._has_raster_upload(default_name)
+                else self.AvatarStatus.NONE
+            )
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "avatar_status", "avatar_variants", "avatar_claimed_at"}
+
         super().save(*args, **kwargs)
 
         if (
@@ -91,41 +143,35 @@ class Profile(models.Model):
             and default_storage.exists(old_image_name)
         ):
             default_storage.delete(old_image_name)
+        for variant_name in stale_variants:
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
 
-        try:
-            ext = Path(self.image.name or "").suffix.lower()
-            if ext in SVG_EXTENSIONS:
-                self._old_image_name = self.image.name
-                return
-
-            with warnings.catch_warnings():
-                warnings.simplefilter("error", Image.DecompressionBombWarning)
-                with Image.open(self.image.path) as img:
-                    should_resize = (
-                        img.height > MAX_PROFILE_IMAGE_SIDE
-                        or img.width > MAX_PROFILE_IMAGE_SIDE
-                        or (img.width * img.height) > MAX_PROFILE_IMAGE_PIXELS
-                    )
-                    if not should_resize:
-                        self._old_image_name = self.image.name
-                        return
-                    img.thumbnail((MAX_PROFILE_IMAGE_SIDE, MAX_PROFILE_IMAGE_SIDE))
-
-                    if ext in JPEG_EXTENSIONS and img.mode not in {"RGB", "L", "CMYK", "YCbCr"}:
-                        img = img.convert("RGB")
-
-                    img.save(self.image.path)
-        except (
-            FileNotFoundError,
-            ValueError,
-            OSError,
-            Image.DecompressionBombError,
-            Image.DecompressionBombWarning,
-        ):
-            self._old_image_name = self.image.name
-            return
+        if avatar_changed and self.avatar_status == self.AvatarStatus.PENDING:
+            from users.avatar_pipeline import enqueue_profile_avatar
+
+            transaction.on_commit(lambda profile_id=self.pk: enqueue_profile_avatar(profile_id))
 
         self._old_image_name = self.image.name
+        self._old_avatar_crop = self.avatar_crop_box()
+
+    def avatar_crop_box(self) -> tuple[float, float, float, float] | None:
+        """Возвращает область обрезки аватара в долях исходника.
+        
+        Returns:
+            Кортеж (x, y, width, height) или None, если обрезка не задана.
+        """
+        box = (self.avatar_crop_x, self.avatar_crop_y, self.avatar_crop_width, self.avatar_crop_height)
+        if any(value is None for value in box):
+            return None
+        return tuple(float(value) for value in box)
+
+    def _has_raster_upload(self, default_name: str) -> bool:
+        """Проверяет, что у профиля загружен собственный растровый аватар."""
+        name = self.image.name if self.image else ""
+        if not name or name == default_name:
+            return False
+        return Path(name).suffix.lower() not in SVG_EXTENSIONS
 
 
 class UserIdentityCore(models.Model):
@@ -301,9 +347,21 @@ class PublicHandle(models.Model):
 
 
 class SecurityRateLimitBucket(models.Model):
-    """Модель SecurityRateLimitBucket описывает структуру и поведение данных в приложении."""
+    """Модель SecurityRateLimitBucket описывает структуру и поведение данных в приложении.
 
-    scope_key = models.CharField(max_length=191, unique=True, db_index=True)
+    Buckets are split by endpoint family: every family owns a separate partial
+    unique index, so hot WS-connect keys never share index pages with auth keys.
+    """
+
+    class Family(models.TextChoices):
+        """Семейства endpoint-ов, по которым разделяются индексы bucket-ов."""
+
+        AUTH = "auth", "Auth"
+        WS_CONNECT = "ws_connect", "WebSocket connect"
+        OTHER = "other", "Other"
+
+    family = models.CharField(max_length=16, choices=Family.choices, default=Family.OTHER)
+    scope_key = models.CharField(max_length=191)
     count = models.PositiveIntegerField(default=0)
     reset_at = models.DateTimeField(db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -313,6 +371,23 @@ class SecurityRateLimitBucket(models.Model):
         indexes = [
             models.Index(fields=["reset_at"], name="users_rl_reset_idx"),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope_key"],
+                condition=Q(family="auth"),
+                name="users_rl_auth_scope_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["scope_key"],
+                condition=Q(family="ws_connect"),
+                name="users_rl_ws_connect_scope_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["scope_key"],
+                condition=Q(family="other"),
+                name="users_rl_other_scope_uniq",
+            ),
+        ]
 
     def __str__(self):
         """Возвращает человекочитаемое строковое представление объекта.
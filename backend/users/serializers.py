@@ -12,6 +12,7 @@ class UserSerializer(serializers.Serializer):
     email = serializers.EmailField(required=False, allow_blank=True)
     profileImage = serializers.CharField(allow_null=True)
     avatarCrop = serializers.DictField(allow_null=True)
+    avatarVariants = serializers.ListField(child=serializers.DictField(), required=False)
     bio = serializers.CharField(allow_blank=True)
     lastSeen = serializers.CharField(allow_null=True)
     registeredAt = serializers.CharField(allow_null=True)
@@ -3,11 +3,12 @@
 from __future__ import annotations
 
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from chat_app_django.security.audit import audit_security_event
+from chat_app_django.ws_auth import invalidate_ws_user_snapshots
 from messages.models import Message
 
 from .identity import ensure_user_identity_core, user_public_username
@@ -136,3 +137,22 @@ def sync_chat_handle_snapshot_on_delete(sender, instance, **kwargs):
         actor_username=new_username,
         is_authenticated=True,
     )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_ws_user_snapshots_on_change(sender, instance, **kwargs):
+    """Сбрасывает кэш пользователя для WS connect после изменения или удаления.
+    
+    Args:
+        sender: Источник сигнала Django.
+        instance: Измененный или удаленный пользователь.
+        **kwargs: Дополнительные именованные аргументы вызова.
+    """
+    if kwargs.get("raw", False):
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    # После commit: иначе параллельный connect успеет закэшировать старую строку под новым поколением.
+    transaction.on_commit(lambda user_id=instance.pk: invalidate_ws_user_snapshots(user_id))
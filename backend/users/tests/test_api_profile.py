@@ -14,7 +14,7 @@ from django.test.utils import override_settings
 from rest_framework.test import APIClient
 
 from chat import utils
-from messages.models import Message, MessageAttachment
+from messages.models import Message, MessageAttachment, MessageAttachmentThumbnail
 from rooms.models import Room
 from rooms.services import ensure_membership
 from testsupport.files import require_stored_file_name
@@ -629,6 +629,34 @@ class AttachmentMediaAccessTests(TestCase):
                 )
                 response.close()
 
+    def test_attachment_media_view_serves_thumbnail_variant_with_its_content_type(self):
+        attachment = self._attachment_with_custom_file(
+            self.direct_room,
+            author=self.owner,
+            file_name="photo.png",
+            file_content_type="image/png",
+            file_payload=b"\x89PNG\r\n\x1a\n",
+        )
+        variant = MessageAttachmentThumbnail.objects.create(
+            attachment=attachment,
+            file=SimpleUploadedFile("thumb_photo_160.webp", b"RIFF0000WEBP", content_type="image/webp"),
+            width=160,
+            height=120,
+            content_type="image/webp",
+        )
+        variant_path = require_stored_file_name(variant.file, field_name="variant.file")
+
+        self.client.force_login(self.owner)
+        response = self.client.get(f"/api/auth/media/{variant_path}?roomId={self.direct_room.pk}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get("Content-Type", "").split(";")[0], "image/webp")
+        response.close()
+
+        self.client.force_login(self.outsider)
+        denied = self.client.get(f"/api/auth/media/{variant_path}?roomId={self.direct_room.pk}")
+        self.assertEqual(denied.headers.get("Content-Type", "").split(";")[0], "image/svg+xml")
+        denied.close()
+
     @override_settings(DEBUG=True)
     def test_attachment_media_view_supports_video_range_requests_in_debug(self):
         payload = b"....ftypseek-test-video-payload-0123456789"
@@ -662,9 +690,45 @@ class AttachmentMediaAccessTests(TestCase):
                     response.headers.get("Content-Type", "").split(";")[0],
                     "video/mp4",
                 )
+                self.assertTrue(response.streaming)
                 self.assertEqual(self._read_response_content(response), expected_body)
                 response.close()
 
+    @override_settings(DEBUG=True)
+    def test_attachment_media_view_streams_multiple_ranges_as_multipart_in_debug(self):
+        payload = b"....ftypseek-test-video-payload-0123456789"
+        attachment = self._attachment_with_custom_file(
+            self.direct_room,
+            author=self.owner,
+            file_name="clip.mp4",
+            file_content_type="video/mp4",
+            file_payload=payload,
+        )
+        self.client.force_login(self.owner)
+        file_name = _attachment_file_name(attachment)
+
+        response = self.client.get(
+            f"/api/auth/media/{file_name}?roomId={self.direct_room.pk}",
+            HTTP_RANGE="bytes=0-3, 2-5, 10-11, 999-1000",
+        )
+
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.streaming)
+        content_type = response.headers.get("Content-Type", "")
+        self.assertTrue(content_type.startswith("multipart/byteranges; boundary="))
+        boundary = content_type.split("boundary=", 1)[1]
+        body = self._read_response_content(response)
+        self.assertEqual(response.headers.get("Content-Length"), str(len(body)))
+        expected_body = (
+            f"\r\n--{boundary}\r\nContent-Type: video/mp4\r\n"
+            f"Content-Range: bytes 0-5/{len(payload)}\r\n\r\n"
+        ).encode() + payload[0:6] + (
+            f"\r\n--{boundary}\r\nContent-Type: video/mp4\r\n"
+            f"Content-Range: bytes 10-11/{len(payload)}\r\n\r\n"
+        ).encode() + payload[10:12] + f"\r\n--{boundary}--\r\n".encode()
+        self.assertEqual(body, expected_body)
+        response.close()
+
     @override_settings(DEBUG=True)
     def test_attachment_media_view_rejects_invalid_video_range_in_debug(self):
         payload = b"....ftypseek-test-video-payload-0123456789"
@@ -0,0 +1,160 @@
+"""Tests for background avatar derivatives."""
+
+from __future__ import annotations
+
+import io
+from contextlib import AbstractContextManager
+from datetime import timedelta
+from typing import Any, cast
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from chat.tests.media_utils import workspace_media_root
+from chat_app_django.media_utils import serialize_avatar_crop
+from users import avatar_pipeline
+from users.api import _serialize_user
+from users.avatar_service import resolve_user_avatar_source
+from users.models import MAX_PROFILE_IMAGE_SIDE, Profile
+
+User = get_user_model()
+
+
+def _capture_on_commit_callbacks(test_case: TestCase, *, execute: bool) -> AbstractContextManager[list[object]]:
+    callback_capture = cast(Any, test_case).captureOnCommitCallbacks
+    return cast(AbstractContextManager[list[object]], callback_capture(execute=execute))
+
+
+def _two_tone_upload(size: tuple[int, int] = (400, 200)) -> SimpleUploadedFile:
+    # Left half red, right half blue: the crop decides which colour the square shows.
+    image = Image.new("RGB", size, (255, 0, 0))
+    image.paste((0, 0, 255), (size[0] // 2, 0, size[0], size[1]))
+    buff = io.BytesIO()
+    image.save(buff, format="PNG")
+    return SimpleUploadedFile("avatar.png", buff.getvalue(), content_type="image/png")
+
+
+@override_settings(
+    CHAT_THUMBNAIL_PIPELINE="inline",
+    CHAT_THUMBNAIL_FORMATS=["webp"],
+    USER_AVATAR_SIZES=[64, 128],
+    USER_AVATAR_SERVED_SIZE=100,
+)
+class AvatarPipelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="avatar_pipeline_user", password="pass12345")
+        self.profile = self.user.profile
+
+    def test_save_defers_work_and_builds_cropped_squares_after_commit(self):
+        with workspace_media_root():
+            with _capture_on_commit_callbacks(self, execute=False) as callbacks:
+                self.profile.image = _two_tone_upload()
+                self.profile.avatar_crop_x = 0.5
+                self.profile.avatar_crop_y = 0.0
+                self.profile.avatar_crop_width = 0.5
+                self.profile.avatar_crop_height = 1.0
+                self.profile.save()
+            self.assertEqual(self.profile.avatar_status, Profile.AvatarStatus.PENDING)
+            self.assertEqual(resolve_user_avatar_source(self.user), self.profile.image.name)
+
+            for callback in callbacks:
+                cast(Any, callback)()
+
+            self.profile.refresh_from_db()
+            self.assertEqual(self.profile.avatar_status, Profile.AvatarStatus.READY)
+            self.assertEqual(sorted(self.profile.avatar_variants), ["128", "64"])
+            with default_storage.open(self.profile.avatar_variants["128"], "rb") as stored:
+                with Image.open(stored) as square:
+                    self.assertEqual(square.size, (128, 128))
+                    red, _green, blue = square.convert("RGB").getpixel((64, 64))
+                    self.assertGreater(blue, red)
+
+        self.assertEqual(resolve_user_avatar_source(self.user), self.profile.avatar_variants["128"])
+        self.assertEqual(resolve_user_avatar_source(self.user, original=True), self.profile.image.name)
+        self.assertIsNone(serialize_avatar_crop(self.profile))
+        self.assertEqual(serialize_avatar_crop(self.profile, original=True)["x"], 0.5)
+
+        payload = _serialize_user(RequestFactory().get("/api/auth/session/"), self.user)
+        self.assertEqual([item["size"] for item in payload["avatarVariants"]], [64, 128])
+        self.assertIsNotNone(payload["avatarCrop"])
+
+    def test_crop_change_drops_old_squares_and_discards_stale_result(self):
+        with workspace_media_root():
+            with _capture_on_commit_callbacks(self, execute=True):
+                self.profile.image = _two_tone_upload()
+                self.profile.save()
+            self.profile.refresh_from_db()
+            old_variants = list(self.profile.avatar_variants.values())
+
+            with _capture_on_commit_callbacks(self, execute=False):
+                self.profile.avatar_crop_x = 0.0
+                self.profile.avatar_crop_y = 0.0
+                self.profile.avatar_crop_width = 0.5
+                self.profile.avatar_crop_height = 1.0
+                self.profile.save()
+
+            self.assertEqual(self.profile.avatar_status, Profile.AvatarStatus.PENDING)
+            self.assertEqual(self.profile.avatar_variants, {})
+            self.assertFalse(any(default_storage.exists(name) for name in old_variants))
+
+            real_render = avatar_pipeline.run_media_render
+
+            def render_while_crop_changes(*args, **kwargs):
+                Profile.objects.filter(pk=self.profile.pk).update(avatar_crop_x=0.25)
+                return real_render(*args, **kwargs)
+
+            with patch.object(avatar_pipeline, "run_media_render", side_effect=render_while_crop_changes):
+                self.assertFalse(avatar_pipeline.process_profile_avatar(self.profile.pk))
+
+            self.profile.refresh_from_db()
+            self.assertEqual(self.profile.avatar_status, Profile.AvatarStatus.PENDING)
+            self.assertEqual(self.profile.avatar_variants, {})
+            self.assertEqual(list(default_storage.listdir("avatars/users/derived")[1]), [])
+
+    @override_settings(CHAT_THUMBNAIL_STALE_SECONDS=60)
+    def test_requeue_leases_stuck_avatar_until_new_upload(self):
+        with workspace_media_root():
+            with _capture_on_commit_callbacks(self, execute=False):
+                self.profile.image = _two_tone_upload()
+                self.profile.save()
+            Profile.objects.filter(pk=self.profile.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+            with patch.object(avatar_pipeline, "enqueue_profile_avatar") as enqueue:
+                self.assertEqual(avatar_pipeline.requeue_stale_avatars(), 1)
+                self.assertEqual(avatar_pipeline.requeue_stale_avatars(), 0)
+            enqueue.assert_called_once_with(self.profile.pk)
+
+            # A new upload starts a fresh render, so the old lease no longer applies.
+            self.profile.refresh_from_db()
+            with _capture_on_commit_callbacks(self, execute=False):
+                self.profile.image = _two_tone_upload()
+                self.profile.save(update_fields=["image"])
+            self.profile.refresh_from_db()
+            self.assertIsNone(self.profile.avatar_claimed_at)
+
+    def test_discarded_result_removes_downscaled_copy_and_keeps_upload(self):
+        with workspace_media_root():
+            with _capture_on_commit_callbacks(self, execute=False):
+                self.profile.image = _two_tone_upload((MAX_PROFILE_IMAGE_SIDE + 200, 200))
+                self.profile.save()
+            uploaded_name = self.profile.image.name
+            upload_dir = uploaded_name.rsplit("/", 1)[0]
+            real_render = avatar_pipeline.run_media_render
+
+            def render_while_crop_changes(*args, **kwargs):
+                Profile.objects.filter(pk=self.profile.pk).update(avatar_crop_x=0.25)
+                return real_render(*args, **kwargs)
+
+            with patch.object(avatar_pipeline, "run_media_render", side_effect=render_while_crop_changes):
+                self.assertFalse(avatar_pipeline.process_profile_avatar(self.profile.pk))
+
+            self.profile.refresh_from_db()
+            self.assertEqual(self.profile.image.name, uploaded_name)
+            self.assertEqual(default_storage.listdir(upload_dir)[1], [uploaded_name.rsplit("/", 1)[1]])
+            with default_storage.open(uploaded_name) as source, Image.open(source) as image:
+                self.assertEqual(image.width, MAX_PROFILE_IMAGE_SIDE + 200)
@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+from contextlib import AbstractContextManager
+from typing import Any, cast
+
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from chat.services import delete_message
 from messages.models import Message, MessageAttachment
+from roles.models import Membership
 from rooms.models import Room
 from rooms.services import ensure_membership
 from testsupport.files import require_stored_file_name
@@ -17,6 +23,11 @@ from users.application.media_access_service import (
 )
 
 
+def _capture_on_commit_callbacks(test_case: TestCase, *, execute: bool) -> AbstractContextManager[list[object]]:
+    callback_capture = cast(Any, test_case).captureOnCommitCallbacks
+    return cast(AbstractContextManager[list[object]], callback_capture(execute=execute))
+
+
 def _attachment_file_name(attachment: MessageAttachment) -> str:
     return require_stored_file_name(attachment.file, field_name="attachment.file")
 
@@ -27,6 +38,7 @@ def _attachment_thumbnail_name(attachment: MessageAttachment) -> str:
 
 class MediaAccessServiceTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.owner = auth_service.register_user(
             login="svc_media_owner_login",
             password="pass12345",
@@ -150,3 +162,34 @@ class MediaAccessServiceTests(TestCase):
             user=self.outsider,
         )
         self.assertEqual(result.room_id, public_room.pk)
+
+    @override_settings(MEDIA_ACCESS_CACHE_SECONDS=30)
+    def test_repeat_access_is_served_from_cache_until_membership_changes(self):
+        attachment = self._attachment_for_room(self.direct_room, author=self.owner)
+        path = _attachment_file_name(attachment)
+        resolve_attachment_media_access(normalized_path=path, room_id_raw=self.direct_room.pk, user=self.peer)
+
+        with self.assertNumQueries(0):
+            result = resolve_attachment_media_access(
+                normalized_path=path,
+                room_id_raw=self.direct_room.pk,
+                user=self.peer,
+            )
+        self.assertEqual(result.preferred_content_type, "application/pdf")
+
+        with _capture_on_commit_callbacks(self, execute=True):
+            Membership.objects.filter(room=self.direct_room, user=self.peer).get().delete()
+        with self.assertRaises(MediaAccessNotFoundError):
+            resolve_attachment_media_access(normalized_path=path, room_id_raw=self.direct_room.pk, user=self.peer)
+
+    @override_settings(MEDIA_ACCESS_CACHE_SECONDS=30)
+    def test_deleting_message_drops_cached_path_lookup(self):
+        attachment = self._attachment_for_room(self.direct_room, author=self.owner)
+        path = _attachment_file_name(attachment)
+        resolve_attachment_media_access(normalized_path=path, room_id_raw=self.direct_room.pk, user=self.owner)
+
+        with _capture_on_commit_callbacks(self, execute=True):
+            delete_message(self.owner, self.direct_room, attachment.message_id)
+
+        with self.assertRaises(MediaAccessNotFoundError):
+            resolve_attachment_media_access(normalized_path=path, room_id_raw=self.direct_room.pk, user=self.owner)
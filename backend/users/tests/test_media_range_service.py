@@ -0,0 +1,74 @@
+"""Unit tests for users.application.media_range_service."""
+
+from __future__ import annotations
+
+import io
+
+from django.test import SimpleTestCase
+
+from users.application.media_range_service import (
+    MAX_BYTE_RANGES,
+    ByteRange,
+    InvalidByteRangeError,
+    RangeFile,
+    build_partial_media_response,
+    parse_byte_ranges_header,
+    parse_single_byte_range_header,
+)
+
+
+class _TrackingFile(io.BytesIO):
+    def __init__(self, payload: bytes):
+        super().__init__(payload)
+        self.read_sizes: list[int] = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+
+class ParseByteRangesHeaderTests(SimpleTestCase):
+    def test_coalesces_overlapping_ranges_and_skips_unsatisfiable(self):
+        ranges = parse_byte_ranges_header("bytes=20-29, 0-4, 3-9, 500-", file_size=100)
+
+        self.assertEqual(
+            ranges,
+            [ByteRange(start=0, end=9, total_size=100), ByteRange(start=20, end=29, total_size=100)],
+        )
+
+    def test_rejects_when_nothing_satisfiable_or_too_many_ranges(self):
+        with self.assertRaises(InvalidByteRangeError):
+            parse_byte_ranges_header("bytes=500-600", file_size=100)
+        too_many = ",".join(f"{index * 3}-{index * 3}" for index in range(MAX_BYTE_RANGES + 1))
+        with self.assertRaises(InvalidByteRangeError):
+            parse_byte_ranges_header(f"bytes={too_many}", file_size=1000)
+
+    def test_single_range_parser_still_rejects_lists(self):
+        with self.assertRaises(InvalidByteRangeError):
+            parse_single_byte_range_header("bytes=0-1,4-5", file_size=10)
+        self.assertIsNone(parse_single_byte_range_header(None, file_size=10))
+
+
+class RangeFileTests(SimpleTestCase):
+    def test_reads_stay_inside_the_window(self):
+        range_file = RangeFile(io.BytesIO(b"0123456789"), start=2, length=5)
+
+        self.assertEqual(range_file.read(3), b"234")
+        self.assertEqual(range_file.read(), b"56")
+        self.assertEqual(range_file.read(), b"")
+
+    def test_partial_response_reads_in_bounded_chunks(self):
+        payload = b"x" * (300 * 1024)
+        source = _TrackingFile(payload)
+        response = build_partial_media_response(
+            source,
+            byte_range=ByteRange(start=1024, end=len(payload) - 1, total_size=len(payload)),
+            content_type="video/mp4",
+            cache_control="private",
+        )
+
+        body = b"".join(response.streaming_content)
+
+        self.assertEqual(len(body), len(payload) - 1024)
+        self.assertEqual(response["Content-Length"], str(len(payload) - 1024))
+        self.assertLessEqual(max(source.read_sizes), response.block_size)
@@ -5,19 +5,27 @@ from __future__ import annotations
 
 import io
 import shutil
+from contextlib import AbstractContextManager
 from pathlib import Path
+from typing import Any, cast
 
 from PIL import Image
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 
-from users.models import MAX_PROFILE_IMAGE_SIDE
+from users.models import MAX_PROFILE_IMAGE_SIDE, Profile
 
 User = get_user_model()
 
 
+def _capture_on_commit_callbacks(test_case: TestCase, *, execute: bool) -> AbstractContextManager[list[object]]:
+    callback_capture = cast(Any, test_case).captureOnCommitCallbacks
+    return cast(AbstractContextManager[list[object]], callback_capture(execute=execute))
+
+
 class ProfileModelTests(TestCase):
     def test_str_representation_contains_username(self):
         user = User.objects.create_user(username="model_user", password="pass12345")
@@ -106,12 +114,22 @@ class ProfileImageProcessingTests(TestCase):
 
         self.assertNotEqual(first_name, second_name)
 
-    def test_large_avatar_is_resized_to_safe_limit(self):
+    @override_settings(CHAT_THUMBNAIL_PIPELINE="inline")
+    def test_large_avatar_is_resized_to_safe_limit_after_commit(self):
         user = User.objects.create_user(username="resize_user", password="pass12345")
         profile = user.profile
         profile.image = self._png_upload((MAX_PROFILE_IMAGE_SIDE + 500, 800))
-        profile.save()
+        with _capture_on_commit_callbacks(self, execute=True):
+            profile.save()
+            self.assertEqual(profile.avatar_status, Profile.AvatarStatus.PENDING)
+            uploaded_name = profile.image.name
+            with Image.open(profile.image.path) as untouched:
+                self.assertEqual(untouched.width, MAX_PROFILE_IMAGE_SIDE + 500)
         profile.refresh_from_db()
+        self.assertEqual(profile.avatar_status, Profile.AvatarStatus.READY)
+        # The downscaled copy is a new blob swapped in by the status UPDATE, never written over the upload.
+        self.assertNotEqual(profile.image.name, uploaded_name)
+        self.assertFalse(default_storage.exists(uploaded_name))
 
         with Image.open(profile.image.path) as saved:
             self.assertLessEqual(saved.width, MAX_PROFILE_IMAGE_SIDE)
@@ -130,3 +148,4 @@ class ProfileImageProcessingTests(TestCase):
 
         self.assertEqual(profile.image.name, first_saved_name)
         self.assertTrue(profile.image.name.endswith(".svg"))
+        self.assertEqual(profile.avatar_status, Profile.AvatarStatus.NONE)
@@ -2,6 +2,7 @@ import { z } from "zod";
 
 import type {
   Attachment,
+  AttachmentThumbnail,
   Message,
   ReplyTo,
 } from "../../entities/message/types";
@@ -58,6 +59,15 @@ const replyToSchema = z
   })
   .passthrough();
 
+const attachmentThumbnailSchema = z
+  .object({
+    url: z.string().nullable().optional(),
+    width: z.number(),
+    height: z.number(),
+    contentType: z.string(),
+  })
+  .passthrough();
+
 const attachmentSchema = z
   .object({
     id: z.number(),
@@ -66,6 +76,7 @@ const attachmentSchema = z
     fileSize: z.number(),
     url: z.string().nullable().optional(),
     thumbnailUrl: z.string().nullable().optional(),
+    thumbnails: z.array(attachmentThumbnailSchema).optional(),
     width: z.number().nullable().optional(),
     height: z.number().nullable().optional(),
   })
@@ -187,6 +198,20 @@ const mapRoomDetails = (
   };
 };
 
+/**
+ * Преобразует HTTP-данные варианта миниатюры вложения.
+ * @param dto DTO-объект для декодирования данных.
+ * @returns Нормализованные данные после декодирования.
+ */
+const decodeAttachmentThumbnail = (
+  dto: z.infer<typeof attachmentThumbnailSchema>,
+): AttachmentThumbnail => ({
+  url: dto.url ?? null,
+  width: dto.width,
+  height: dto.height,
+  contentType: dto.contentType,
+});
+
 /**
  * Преобразует HTTP-данные для операции map message.
  * @param dto DTO-объект для декодирования данных.
@@ -221,6 +246,7 @@ const mapMessage = (dto: z.infer<typeof messageSchema>): Message => ({
     fileSize: a.fileSize,
     url: a.url ?? null,
     thumbnailUrl: a.thumbnailUrl ?? null,
+    thumbnails: (a.thumbnails ?? []).map(decodeAttachmentThumbnail),
     width: a.width ?? null,
     height: a.height ?? null,
   })),
@@ -684,6 +710,7 @@ export const decodeUploadResponse = (input: unknown): UploadResponse => {
       fileSize: a.fileSize,
       url: a.url ?? null,
       thumbnailUrl: a.thumbnailUrl ?? null,
+      thumbnails: (a.thumbnails ?? []).map(decodeAttachmentThumbnail),
       width: a.width ?? null,
       height: a.height ?? null,
     })),
@@ -760,6 +787,7 @@ export const decodeRoomAttachmentsResponse = (
       fileSize: a.fileSize,
       url: a.url ?? null,
       thumbnailUrl: a.thumbnailUrl ?? null,
+      thumbnails: (a.thumbnails ?? []).map(decodeAttachmentThumbnail),
       width: a.width ?? null,
       height: a.height ?? null,
       messageId: a.messageId,
@@ -1,5 +1,6 @@
 import { z } from "zod";
 
+import type { AttachmentThumbnail } from "../../entities/message/types";
 import { parseJson, safeDecode } from "../core/codec";
 
 const avatarCropSchema = z
@@ -50,6 +51,15 @@ const replyToSchema = z
   })
   .passthrough();
 
+const attachmentThumbnailWsSchema = z
+  .object({
+    url: z.string().nullable().optional(),
+    width: z.number(),
+    height: z.number(),
+    contentType: z.string(),
+  })
+  .passthrough();
+
 const attachmentWsSchema = z
   .object({
     id: z.number(),
@@ -58,6 +68,7 @@ const attachmentWsSchema = z
     fileSize: z.number(),
     url: z.string().nullable().optional(),
     thumbnailUrl: z.string().nullable().optional(),
+    thumbnails: z.array(attachmentThumbnailWsSchema).optional(),
     width: z.number().nullable().optional(),
     height: z.number().nullable().optional(),
   })
@@ -137,6 +148,20 @@ const reactionRemoveSchema = z
   })
   .passthrough();
 
+const attachmentReadySchema = z
+  .object({
+    type: z.literal("attachment_ready"),
+    messageId: z.number(),
+    attachmentId: z.number(),
+    roomId: z.union([z.number(), z.string()]).optional(),
+    thumbnailUrl: z.string().nullable().optional(),
+    thumbnailStatus: z.string(),
+    thumbnails: z.array(attachmentThumbnailWsSchema).optional(),
+    width: z.number().nullable().optional(),
+    height: z.number().nullable().optional(),
+  })
+  .passthrough();
+
 const readReceiptSchema = z
   .object({
     type: z.literal("read_receipt"),
@@ -194,6 +219,7 @@ export type ChatWsEvent =
           fileSize: number;
           url: string | null;
           thumbnailUrl: string | null;
+          thumbnails: AttachmentThumbnail[];
           width: number | null;
           height: number | null;
         }[];
@@ -241,6 +267,17 @@ export type ChatWsEvent =
       username: string;
       displayName: string;
     }
+  | {
+      type: "attachment_ready";
+      messageId: number;
+      attachmentId: number;
+      roomId: number | null;
+      thumbnailUrl: string | null;
+      thumbnailStatus: string;
+      thumbnails: AttachmentThumbnail[];
+      width: number | null;
+      height: number | null;
+    }
   | {
       type: "read_receipt";
       userId: number;
@@ -271,6 +308,20 @@ const toOptionalString = (
   value: string | null | undefined,
 ): string | undefined => (typeof value === "string" ? value : undefined);
 
+/**
+ * Преобразует WebSocket-данные варианта миниатюры вложения.
+ * @param value Входное значение для преобразования.
+ * @returns Нормализованный вариант миниатюры.
+ */
+const mapAttachmentThumbnail = (
+  value: z.infer<typeof attachmentThumbnailWsSchema>,
+): AttachmentThumbnail => ({
+  url: value.url ?? null,
+  width: value.width,
+  height: value.height,
+  contentType: value.contentType,
+});
+
 /**
  * Преобразует WebSocket-данные для операции decode chat ws event.
  * @param raw Сырые входные данные до нормализации.
@@ -380,6 +431,21 @@ export const decodeChatWsEvent = (raw: string): ChatWsEvent => {
     };
   }
 
+  const attachmentReady = safeDecode(attachmentReadySchema, payload);
+  if (attachmentReady) {
+    return {
+      type: "attachment_ready",
+      messageId: attachmentReady.messageId,
+      attachmentId: attachmentReady.attachmentId,
+      roomId: toNumberOrNull(attachmentReady.roomId),
+      thumbnailUrl: attachmentReady.thumbnailUrl ?? null,
+      thumbnailStatus: attachmentReady.thumbnailStatus,
+      thumbnails: (attachmentReady.thumbnails ?? []).map(mapAttachmentThumbnail),
+      width: attachmentReady.width ?? null,
+      height: attachmentReady.height ?? null,
+    };
+  }
+
   const receipt = safeDecode(readReceiptSchema, payload);
   if (receipt) {
     const roomId = toNumberOrNull(receipt.roomId);
@@ -433,6 +499,7 @@ export const decodeChatWsEvent = (raw: string): ChatWsEvent => {
           fileSize: a.fileSize,
           url: a.url ?? null,
           thumbnailUrl: a.thumbnailUrl ?? null,
+          thumbnails: (a.thumbnails ?? []).map(mapAttachmentThumbnail),
           width: a.width ?? null,
           height: a.height ?? null,
         })),
@@ -1,5 +1,15 @@
 import type { AvatarCrop } from "../../shared/api/users";
 
+/**
+ * Описывает вариант миниатюры вложения (размер и формат) для `srcset`.
+ */
+export type AttachmentThumbnail = {
+  url: string | null;
+  width: number;
+  height: number;
+  contentType: string;
+};
+
 /**
  * Описывает структуру данных `Attachment`.
  */
@@ -10,6 +20,7 @@ export type Attachment = {
   fileSize: number;
   url: string | null;
   thumbnailUrl: string | null;
+  thumbnails?: AttachmentThumbnail[];
   width: number | null;
   height: number | null;
 };
@@ -211,6 +211,34 @@ export function useChatRoomPageRealtime({
             ),
           );
           break;
+        case "attachment_ready":
+          if (!matchesRoomId(decoded.roomId)) {
+            break;
+          }
+          setMessages((prev) =>
+            prev.map((msg) =>
+              msg.id === decoded.messageId
+                ? {
+                    ...msg,
+                    attachments: msg.attachments.map((attachment) =>
+                      attachment.id === decoded.attachmentId
+                        ? {
+                            ...attachment,
+                            thumbnailUrl:
+                              decoded.thumbnailUrl ?? attachment.thumbnailUrl,
+                            thumbnails: decoded.thumbnails.length
+                              ? decoded.thumbnails
+                              : attachment.thumbnails,
+                            width: decoded.width ?? attachment.width,
+                            height: decoded.height ?? attachment.height,
+                          }
+                        : attachment,
+                    ),
+                  }
+                : msg,
+            ),
+          );
+          break;
         case "message_delete":
           if (!matchesRoomId(decoded.roomId)) {
             break;
@@ -87,21 +87,62 @@ export type ResponsiveImageSource = {
   sizes?: string;
 };
 
+/**
+ * Size/format variant of an attachment thumbnail produced by the backend.
+ */
+export type ResponsiveImageVariant = {
+  url: string | null;
+  width: number;
+  contentType: string;
+};
+
+const buildVariantSrcSet = (
+  variants: ResponsiveImageVariant[],
+  url: string,
+  originalWidth: number | null | undefined,
+): string | null => {
+  // One format per width: the backend lists formats in preference order.
+  const byWidth = new Map<number, string>();
+  for (const variant of variants) {
+    if (variant.url && variant.width > 0 && !byWidth.has(variant.width)) {
+      byWidth.set(variant.width, variant.url);
+    }
+  }
+  if (!byWidth.size) {
+    return null;
+  }
+  if (originalWidth && originalWidth > 0 && !byWidth.has(originalWidth)) {
+    byWidth.set(originalWidth, url);
+  }
+  return [...byWidth.entries()]
+    .sort(([left], [right]) => left - right)
+    .map(([width, variantUrl]) => `${variantUrl} ${width}w`)
+    .join(", ");
+};
+
 /**
  * Picks the best source for an image tile in the chat grid.
+ *
+ * When the backend provides several thumbnail sizes they are exposed as a
+ * width-descriptor `srcSet`, so the browser downloads the smallest one that
+ * covers the tile at the current device pixel ratio.
  */
 export const resolveResponsiveImageSource = ({
   url,
   thumbnailUrl,
+  thumbnails,
   contentType,
   fileName,
   expectedWidthPx,
+  originalWidth,
 }: {
   url: string | null;
   thumbnailUrl: string | null;
+  thumbnails?: ResponsiveImageVariant[];
   contentType: string | null | undefined;
   fileName: string | null | undefined;
   expectedWidthPx: number;
+  originalWidth?: number | null;
 }): ResponsiveImageSource => {
   if (!url) {
     return { src: null };
@@ -111,6 +152,15 @@ export const resolveResponsiveImageSource = ({
     return { src: url };
   }
 
+  const variantSrcSet = buildVariantSrcSet(thumbnails ?? [], url, originalWidth);
+  if (variantSrcSet) {
+    return {
+      src: thumbnailUrl ?? url,
+      srcSet: variantSrcSet,
+      sizes: `${Math.max(96, Math.round(expectedWidthPx))}px`,
+    };
+  }
+
   if (!thumbnailUrl || thumbnailUrl === url) {
     return { src: url };
   }
@@ -1165,9 +1165,11 @@ export function MessageBubble({
                         const tileImageSource = resolveResponsiveImageSource({
                           url: item.attachment.url,
                           thumbnailUrl: item.attachment.thumbnailUrl,
+                          thumbnails: item.attachment.thumbnails,
                           contentType: item.attachment.contentType,
                           fileName: item.attachment.originalFilename,
                           expectedWidthPx: (420 * item.widthPercent) / 100,
+                          originalWidth: item.attachment.width,
                         });
 
                         return (
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compare per-connection memory of per-socket timer tasks and the shared timer wheel.
+
+Usage:
+    python tools/benchmark_ws_timers.py [--connections 5000] [--timers 2]
+
+"tasks" mimics the previous consumers: every socket started one sleeping
+asyncio task per heartbeat / idle watchdog. "wheel" registers the same timers
+in `chat_app_django.ws_timers.TimerWheel`, driven by a single scheduler task.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from chat_app_django.ws_timers import TimerWheel  # noqa: E402
+
+INTERVAL_SECONDS = 20
+
+
+class _FakeConsumer:
+    """Minimal stand-in holding the state the timers close over."""
+
+    def __init__(self):
+        self.last_activity = 0.0
+        self.timers: list = []
+
+    async def heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(INTERVAL_SECONDS)
+
+    async def tick(self):
+        return True
+
+
+async def _measure(mode: str, connections: int, timers_per_connection: int) -> tuple[float, int]:
+    gc.collect()
+    tasks_before = len(asyncio.all_tasks())
+    tracemalloc.start()
+
+    consumers = [_FakeConsumer() for _ in range(connections)]
+    consumers_only, _ = tracemalloc.get_traced_memory()
+    wheel = TimerWheel(tick_seconds=1)
+    for consumer in consumers:
+        for _ in range(timers_per_connection):
+            if mode == "tasks":
+                consumer.timers.append(asyncio.create_task(consumer.heartbeat_loop()))
+            else:
+                consumer.timers.append(wheel.schedule_every(INTERVAL_SECONDS, consumer.tick))
+    # Let every task reach its first sleep so its frame and loop timer exist.
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    current, _ = tracemalloc.get_traced_memory()
+    task_count = len(asyncio.all_tasks()) - tasks_before
+    tracemalloc.stop()
+
+    for consumer in consumers:
+        for timer in consumer.timers:
+            timer.cancel()
+    await asyncio.sleep(0)
+    return (current - consumers_only) / connections, task_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--timers", type=int, default=2, help="timers per connection (heartbeat + idle)")
+    args = parser.parse_args()
+
+    print(f"connections={args.connections} timers/connection={args.timers}")
+    print(f"{'mode':<8}{'bytes/connection':>18}{'asyncio tasks':>16}")
+    for mode in ("tasks", "wheel"):
+        per_connection, task_count = asyncio.run(_measure(mode, args.connections, args.timers))
+        print(f"{mode:<8}{per_connection:>18.0f}{task_count:>16}")
+
+
+if __name__ == "__main__":
+    main()